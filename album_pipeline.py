@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+from rate_limiter import RetryLater, RetryQueue
+
+
+class AlbumPipeline:
+    """
+    Busca as páginas de álbum de um artista em paralelo com asyncio.
+
+    O número de buscas simultâneas é limitado globalmente e por host. Os limites são
+    da instância, não de cada `run`: com várias threads de artista usando o mesmo
+    pipeline, ALBUM_CONCURRENCY_PER_HOST vale para todas juntas. A ordem da
+    discografia é mantida e, como no fluxo sequencial, só os primeiros
+    `max_albums` álbuns válidos são retornados — nenhum álbum além desse ponto
+    chega a ser buscado.
+
+    Se scrape_fn levantar RetryLater, o álbum vai para uma RetryQueue e volta após
+    o backoff, sem ocupar uma vaga de concorrência enquanto espera.
+
+    Com `single_flight` (um DedupeIndex), um álbum já pedido por outro artista não
+    toma vaga nem thread: espera no loop pelo resultado da primeira busca.
+    """
+
+    def __init__(self, scrape_fn, global_limit=8, per_host_limit=4, retries=3, backoff_base=1.0, backoff_cap=60.0,
+                 single_flight=None):
+        self.scrape_fn = scrape_fn
+        self.single_flight = single_flight
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # Semáforos de thread (e não de asyncio): cada run tem seu próprio loop
+        self._global_sem = threading.BoundedSemaphore(global_limit)
+        self._host_sems = {}
+        self._host_lock = threading.Lock()
+        # scrape_fn é bloqueante (requests/Selenium), então roda em threads próprias
+        self.executor = ThreadPoolExecutor(max_workers=global_limit, thread_name_prefix="album")
+
+    def _host_sem(self, host):
+        with self._host_lock:
+            sem = self._host_sems.get(host)
+            if sem is None:
+                sem = self._host_sems[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return sem
+
+    def _scrape_limited(self, url):
+        """scrape_fn dentro dos limites compartilhados (sempre host antes do global, para não travar)."""
+        with self._host_sem(urlsplit(url).netloc), self._global_sem:
+            return self.scrape_fn(url)
+
+    async def _scrape(self, loop, url):
+        scrape = partial(loop.run_in_executor, self.executor, self._scrape_limited)
+        if self.single_flight is None:
+            return await scrape(url)
+        return await self.single_flight.scrape_once_async(scrape, url)
+
+    def run(self, albums_raw, max_albums):
+        """Versão síncrona de `scrape`, para uso no run_scraper."""
+        return asyncio.run(self.scrape(albums_raw, max_albums))
+
+    async def scrape(self, albums_raw, max_albums):
+        """
+        Retorna pares (album_raw, dados_raspados) na ordem da discografia.
+        `albums_raw` pode ser um gerador preguiçoso (iter_discography): o próximo álbum
+        só é pedido quando ainda pode entrar no corte, numa thread, sem travar o loop.
+        """
+        loop = asyncio.get_running_loop()
+        source = iter(albums_raw)
+        albums_raw = []
+        exhausted = False
+
+        retry_queue = RetryQueue(self.retries, self.backoff_base, self.backoff_cap, clock=loop.time)
+
+        async def fetch_one(index, attempt):
+            url = albums_raw[index]["url_album"]
+            try:
+                data = await self._scrape(loop, url)
+            except RetryLater as e:
+                return index, attempt, e
+            return index, attempt, data
+
+        results = {}
+        pending = set()
+        found = 0
+
+        while not exhausted or pending or retry_queue:
+            for index, attempt in retry_queue.pop_due():
+                pending.add(asyncio.create_task(fetch_one(index, attempt)))
+
+            # Só dispara novas buscas enquanto elas ainda puderem entrar no corte de max_albums
+            while not exhausted and found + len(pending) + len(retry_queue) < max_albums:
+                album_raw = await loop.run_in_executor(self.executor, next, source, None)
+                if album_raw is None:
+                    exhausted = True
+                    break
+                albums_raw.append(album_raw)
+                pending.add(asyncio.create_task(fetch_one(len(albums_raw) - 1, 0)))
+
+            if not pending:
+                if not retry_queue:
+                    break
+                await asyncio.sleep(retry_queue.next_delay())
+                continue
+
+            done, pending = await asyncio.wait(
+                pending, timeout=retry_queue.next_delay(), return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                index, attempt, data = task.result()
+                if isinstance(data, RetryLater):
+                    if retry_queue.push(index, attempt + 1, data.retry_after):
+                        continue
+                    logging.warning(f"[RETRY] Álbum descartado após {self.retries} repetições: {data.url}")
+                    data = None
+                results[index] = data
+                if data:
+                    found += 1
+
+        ordered = [(album_raw, results.get(index)) for index, album_raw in enumerate(albums_raw) if results.get(index)]
+        return ordered[:max_albums]
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,45 @@
+"""
+Benchmark do AlbumPipeline contra um servidor local com latência artificial.
+Mostra o ganho em relação à busca sequencial para cada limite de concorrência.
+
+Uso: python bench_album_pipeline.py [--albums 32] [--latency 0.1]
+"""
+import time
+import argparse
+from functools import partial
+
+from album_pipeline import AlbumPipeline
+from discogs_scraper import scrape_album_page
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--albums", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    pages = {f"/release/{i}": make_album_html(n_tracks=12, title=f"Album {i}") for i in range(args.albums)}
+
+    with FixtureServer(pages, latency=args.latency) as server:
+        albums = [{"url_album": server.url(path)} for path in pages]
+        fetcher = HttpFetcher(pool_size=32)
+        baseline = None
+
+        print(f"{'concorrência':>12} {'tempo (s)':>10} {'ganho':>7}")
+        for limit in (1, 2, 4, 8, 16, 32):
+            pipeline = AlbumPipeline(partial(scrape_album_page, fetcher), limit, limit)
+            start = time.perf_counter()
+            pipeline.run(albums, args.albums)
+            elapsed = time.perf_counter() - start
+            pipeline.close()
+
+            baseline = baseline or elapsed
+            print(f"{limit:>12} {elapsed:>10.2f} {baseline / elapsed:>6.1f}x")
+
+        fetcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Compara a saída JSONL com as tabelas Parquet / Arrow IPC do ColumnarSink.
+Mede o tamanho em disco e o tempo de três consultas típicas de análise: no JSONL
+cada consulta carrega e percorre os registros aninhados em Python; nas tabelas
+colunares só as colunas usadas são lidas e agregadas pelo pyarrow.
+
+Uso: python bench_columnar.py [--jsonl dados_discogs.jsonl] [--artists 2000] [--repeat 3]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from collections import Counter, defaultdict
+
+import pyarrow.compute
+
+from columnar_sink import ColumnarSink, read_table
+from jsonl_sink import JsonlSink, iter_jsonl
+from track_columns import enrich_records
+
+LABELS = [f"Selo {i}" for i in range(200)]
+STYLES = ["Punk", "Shoegaze", "Indie Rock", "Post-Punk", "Grunge", "Art Rock", "Noise", "Garage Rock"]
+
+
+def synthetic_artists(count, seed=0):
+    """Artistas no formato do scraper (já normalizados), com 8 álbuns de 12 faixas em vinil."""
+    rng = random.Random(seed)
+    for n in range(count):
+        albums = [{
+            "nome_album": f"Álbum {n}.{a}",
+            "ano_lancamento": str(rng.randint(1960, 2024)),
+            "faixas_album": [{
+                "numero_faixa": str(t + 1),
+                "nome_faixa": f"Faixa {n}.{a}.{t}",
+                "duracao_faixa": f"{rng.randint(1, 7)}:{rng.randint(0, 59):02d}",
+                "posicao_original": f"{'ABCD'[t // 3]}{t % 3 + 1}",
+            } for t in range(12)],
+            "gravadora_album": rng.choice(LABELS),
+            "genero_album": ["Rock"],
+            "estilos_album": rng.sample(STYLES, 2),
+        } for a in range(8)]
+        artist = {
+            "id_artista": f"{n:08d}-0000-0000-0000-000000000000",
+            "genero": "Rock",
+            "nome_artista": f"Artista {n}",
+            "membros_artista": [f"Membro {n}.{m}" for m in range(3)],
+            "sites_artista": [f"https://artista{n}.example.com/"],
+            "albuns": albums,
+        }
+        yield enrich_records([artist])[0]
+
+
+# Consultas: (1) duração média dos álbuns por década, (2) álbuns por gravadora,
+# (3) faixas por lado do vinil.
+
+def query_jsonl(path):
+    per_decade = defaultdict(list)
+    labels, sides = Counter(), Counter()
+    for artist in iter_jsonl(path):
+        for album in artist["albuns"]:
+            if album["ano_lancamento"].isdigit() and album.get("duracao_total_segundos"):
+                per_decade[int(album["ano_lancamento"]) // 10 * 10].append(album["duracao_total_segundos"])
+            labels[album["gravadora_album"]] += 1
+            for track in album["faixas_album"]:
+                sides[track.get("lado")] += 1
+    return {d: sum(v) / len(v) for d, v in per_decade.items()}, labels, sides
+
+
+def query_columnar(sink):
+    albums = read_table(sink.paths["albuns"])
+    decades = pyarrow.compute.multiply(pyarrow.compute.divide(albums["ano_lancamento"], 10), 10)
+    per_decade = (albums.select(["duracao_total_segundos"]).append_column("decada", decades)
+                  .group_by("decada").aggregate([("duracao_total_segundos", "mean")]))
+    labels = pyarrow.compute.value_counts(albums["gravadora_album"])
+    tracks = read_table(sink.paths["faixas"]).select(["lado"])
+    sides = pyarrow.compute.value_counts(tracks["lado"])
+    return per_decade, labels, sides
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jsonl", help="JSONL de um run real (padrão: artistas sintéticos)")
+    parser.add_argument("--artists", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = args.jsonl
+        if jsonl_path is None:
+            jsonl_path = os.path.join(tmp, "dados_discogs.jsonl")
+            with JsonlSink(jsonl_path) as jsonl:
+                for artist in synthetic_artists(args.artists):
+                    jsonl.write(artist)
+
+        print(f"{'formato':<10} {'tamanho (KB)':>13} {'escrita (ms)':>13} {'consultas (ms)':>15}")
+        jsonl_ms = timed(lambda: query_jsonl(jsonl_path), args.repeat)
+        print(f"{'jsonl':<10} {os.path.getsize(jsonl_path) / 1024:>13.0f} {'-':>13} {jsonl_ms:>15.1f}")
+
+        for fmt in ("parquet", "arrow"):
+            start = time.perf_counter()
+            with ColumnarSink(os.path.join(tmp, "tabelas"), fmt) as sink:
+                for artist in iter_jsonl(jsonl_path):
+                    sink.write(artist)
+            write_ms = (time.perf_counter() - start) * 1000
+            size_kb = sum(os.path.getsize(p) for p in sink.segments) / 1024
+            query_ms = timed(lambda: query_columnar(sink), args.repeat)
+            print(f"{fmt:<10} {size_kb:>13.0f} {write_ms:>13.0f} {query_ms:>15.1f}  ({jsonl_ms / query_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Microbenchmark dos planos de extração compilados contra os seletores por linha.
+Mede ms/página de cada plano de SPECS com o plano compilado (um percurso por linha
+nos backends do bs4, CSS nativo no selectolax) e com a execução ingênua de
+referência (select/select_one do bs4 por campo e por linha, como antes dos planos).
+
+Uso: python bench_extraction_plans.py [--repeat 5] [--number 30] [--tracks 30]
+"""
+import time
+import argparse
+
+from extraction_plans import PLANS, SPECS, reference_run
+from fixture_server import make_album_html, make_artist_html, make_search_html
+from parsers import available_backends, parse_html
+
+
+def sample_pages(n_rows):
+    """Uma página sintética de cada tipo, com n_rows faixas/álbuns/cards."""
+    return {
+        "album": make_album_html(n_tracks=n_rows),
+        "artist": make_artist_html([f"/release/{i}" for i in range(n_rows)]),
+        "search": make_search_html([(f"Artista {i}", f"/artist/{i}-Artista-{i}") for i in range(n_rows)]),
+    }
+
+
+def best_of(fn, repeat, number):
+    """Melhor tempo médio (ms) de `number` chamadas, em `repeat` rodadas."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=30)
+    parser.add_argument("--tracks", type=int, default=30, help="linhas por página (faixas, álbuns, cards)")
+    args = parser.parse_args()
+
+    pages = sample_pages(args.tracks)
+    print(f"{'backend':<14} {'plano':<18} {'compilado (ms)':>15} {'ingênuo (ms)':>13} {'ganho':>7}")
+    for backend in available_backends():
+        for page_type, parts in SPECS.items():
+            soup = parse_html(pages[page_type], page_type, backend)
+            for part, spec in parts.items():
+                plan = PLANS[page_type][part]
+                compiled = best_of(lambda: plan.run(soup), args.repeat, args.number)
+                name = f"{page_type}.{part}"
+                if backend == "selectolax": # a referência usa o select do bs4
+                    print(f"{backend:<14} {name:<18} {compiled:>15.3f} {'-':>13} {'-':>7}")
+                    continue
+                naive = best_of(lambda: reference_run(spec, soup), args.repeat, args.number)
+                print(f"{backend:<14} {name:<18} {compiled:>15.3f} {naive:>13.3f} {naive / compiled:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
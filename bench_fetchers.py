@@ -0,0 +1,77 @@
+"""
+Benchmark dos backends de busca contra um servidor HTTP local de fixtures.
+Reporta páginas por segundo para cada backend.
+
+Uso: python bench_fetchers.py [--pages 200] [--latency 0.0] [--selenium]
+"""
+import time
+import argparse
+import logging
+
+import requests
+
+from fetchers import HttpFetcher, SeleniumFetcher
+from fixture_server import FixtureServer, make_album_html
+
+
+class _NoPoolFetcher:
+    """Referência sem keep-alive: abre uma conexão nova por página."""
+    name = "http-sem-pool"
+
+    def fetch(self, url, page_type=None):
+        return requests.get(url, headers={"Connection": "close"}, timeout=30).text
+
+    def close(self):
+        pass
+
+
+def _headless_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    try:
+        return webdriver.Chrome(options=options)
+    except Exception as e:
+        logging.warning(f"Selenium indisponível para o benchmark: {e}")
+        return None
+
+
+def bench(fetcher, urls):
+    """Busca todas as URLs e retorna páginas por segundo."""
+    start = time.perf_counter()
+    for url in urls:
+        fetcher.fetch(url, "album")
+    return len(urls) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="latência artificial por página (s)")
+    parser.add_argument("--selenium", action="store_true", help="inclui o backend Selenium (headless)")
+    args = parser.parse_args()
+
+    pages = {f"/release/{i}": make_album_html(n_tracks=12, title=f"Album {i}") for i in range(args.pages)}
+
+    with FixtureServer(pages, latency=args.latency) as server:
+        urls = [server.url(path) for path in pages]
+        backends = [_NoPoolFetcher(), HttpFetcher()]
+        if args.selenium:
+            backends.append(SeleniumFetcher(_headless_driver, settle_time=0))
+
+        print(f"{'backend':<16} {'páginas/s':>10}")
+        for fetcher in backends:
+            before = server.connections
+            try:
+                rate = bench(fetcher, urls)
+            finally:
+                fetcher.close()
+            print(f"{fetcher.name:<16} {rate:>10.1f}   (conexões abertas: {server.connections - before})")
+
+
+if __name__ == "__main__":
+    main()
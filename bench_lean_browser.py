@@ -0,0 +1,103 @@
+"""
+Benchmark da navegação enxuta: carrega páginas de álbum com capa, fontes e
+scripts de anúncio (servidos localmente, com latência) no Chrome normal e no
+modo enxuto, e compara bytes, requisições e tempo por página.
+
+Uso: python bench_lean_browser.py [--pages 20] [--latency 0.05] [--image-kb 300]
+"""
+import time
+import logging
+import argparse
+
+from fetchers import SeleniumFetcher
+from fixture_server import FixtureServer, make_album_html
+from instrumentation import METRICS
+from lean_browser import DEFAULT_BLOCKED_URLS, apply_lean_options, enable_request_blocking, transfer_report
+from readiness import ReadinessWaiter
+
+# Recursos externos típicos de uma página de álbum, que o scraper nunca lê
+HEAVY_HEAD = """
+<link rel="stylesheet" href="/static/fonts.css">
+<script src="/ads/tag.js"></script>
+<script src="/analytics/collect.js"></script>
+"""
+HEAVY_BODY = '<img src="/images/capa-{i}.jpg"><img src="/images/verso-{i}.jpg">'
+
+
+def make_pages(n_pages, image_kb):
+    pages = {
+        "/static/fonts.css": "@font-face { font-family: Titulo; src: url('/static/titulo.woff2'); } body { font-family: Titulo; }",
+        "/static/titulo.woff2": "F" * 80 * 1024,
+        "/ads/tag.js": "var anuncio = '" + "a" * 40 * 1024 + "';",
+        "/analytics/collect.js": "var coleta = '" + "c" * 20 * 1024 + "';",
+    }
+    types = {"/static/fonts.css": "text/css", "/static/titulo.woff2": "font/woff2",
+             "/ads/tag.js": "application/javascript", "/analytics/collect.js": "application/javascript"}
+    for i in range(n_pages):
+        html = make_album_html(n_tracks=12, title=f"Album {i}")
+        html = html.replace("<head>", "<head>" + HEAVY_HEAD, 1) if "<head>" in html else HEAVY_HEAD + html
+        pages[f"/release/{i}"] = html.replace("</body>", HEAVY_BODY.format(i=i) + "</body>", 1)
+        for side in ("capa", "verso"):
+            pages[f"/images/{side}-{i}.jpg"] = "J" * image_kb * 1024
+            types[f"/images/{side}-{i}.jpg"] = "image/jpeg"
+    return pages, types
+
+
+def _driver(lean):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    if lean:
+        apply_lean_options(options)
+    try:
+        driver = webdriver.Chrome(options=options)
+    except Exception as e:
+        logging.warning(f"Selenium indisponível para o benchmark: {e}")
+        return None
+    if lean:
+        # Os anúncios e o analytics locais fazem o papel dos domínios bloqueados em produção
+        enable_request_blocking(driver, DEFAULT_BLOCKED_URLS + ["*/ads/*", "*/analytics/*"])
+    return driver
+
+
+def bench(server, n_pages, lean):
+    driver = _driver(lean)
+    if driver is None:
+        return None
+    fetcher = SeleniumFetcher(lambda: driver, settle_time=0, waiter=ReadinessWaiter())
+    METRICS.reset()
+    start = time.perf_counter()
+    try:
+        for i in range(n_pages):
+            fetcher.fetch(server.url(f"/release/{i}"), "album")
+    finally:
+        fetcher.close()
+    elapsed = time.perf_counter() - start
+    return {**transfer_report(METRICS.report()["counters"]), "s_per_page": elapsed / n_pages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="latência de cada requisição, inclusive recursos (s)")
+    parser.add_argument("--image-kb", type=int, default=300, help="tamanho de cada imagem da página")
+    args = parser.parse_args()
+
+    pages, types = make_pages(args.pages, args.image_kb)
+    with FixtureServer(pages, latency=args.latency, content_types=types) as server:
+        results = {"completo": bench(server, args.pages, lean=False), "enxuto": bench(server, args.pages, lean=True)}
+
+    print(f"{'modo':<10} {'KB/página':>10} {'req./página':>12} {'s/página':>9}")
+    for mode, r in results.items():
+        if r is None:
+            print(f"{mode:<10} {'indisponível (sem Chrome)':>33}")
+            continue
+        print(f"{mode:<10} {r['bytes_per_page'] / 1024:>10.1f} {r['requests_per_page']:>12.1f} {r['s_per_page']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark de memória: um crawl longo (10 mil álbuns por padrão) contra o site
+sintético local, com o RSS amostrado durante o run. Com registros compactos e as
+árvores do parse liberadas, o RSS fica plano depois do aquecimento; a inclinação
+(MB por mil álbuns) é o número a acompanhar.
+
+Uso: python bench_memory.py [--artists 1000] [--albums 10] [--tracks 10] [--ceiling-mb 300]
+"""
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+import discogs_scraper
+from fixture_server import FixtureServer, make_site_pages
+from instrumentation import METRICS, resource_usage
+from replay import patched_config, replay_config
+
+MB = 1024 * 1024
+
+
+def sample_rss(samples, stop, interval):
+    """Guarda (álbuns gravados, RSS em MB) a cada `interval` s até `stop`."""
+    while not stop.wait(interval):
+        albums = METRICS.report()["counters"].get("albums_written", 0)
+        samples.append((albums, resource_usage()["rss_bytes"] / MB))
+
+
+def slope(points):
+    """Inclinação por mínimos quadrados, em MB por mil álbuns."""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--artists", type=int, default=1000)
+    parser.add_argument("--albums", type=int, default=10, help="álbuns por artista")
+    parser.add_argument("--tracks", type=int, default=10, help="faixas por álbum")
+    parser.add_argument("--ceiling-mb", type=int, default=None, help="MEMORY_CEILING_MB do run (padrão: sem teto)")
+    parser.add_argument("--interval", type=float, default=0.5, help="intervalo entre amostras de RSS (s)")
+    parser.add_argument("--warmup", type=float, default=0.2, help="fração inicial do run fora do cálculo da inclinação")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    pages = make_site_pages(args.artists, args.albums, args.tracks)
+    total_albums = args.artists * args.albums
+    samples = []
+    stop = threading.Event()
+
+    with tempfile.TemporaryDirectory() as workdir, FixtureServer(pages) as server:
+        overrides = replay_config(server, workdir)
+        overrides.update(
+            MAX_ARTISTS=args.artists, MAX_ALBUMS=args.albums, PARSE_WORKERS=0, SEARCH_MAX_PAGES=1,
+            MEMORY_CEILING_MB=args.ceiling_mb,
+        )
+        baseline = resource_usage()["rss_bytes"] / MB # site sintético já em memória
+        sampler = threading.Thread(target=sample_rss, args=(samples, stop, args.interval), daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        with patched_config(discogs_scraper, **overrides):
+            discogs_scraper.run_scraper()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        sampler.join()
+        counters = METRICS.report()["counters"]
+
+    written = counters.get("albums_written", 0)
+    print(f"{written} de {total_albums} álbuns em {elapsed:.1f} s | RSS inicial {baseline:.1f} MB")
+    print(f"{'álbuns':>8} {'RSS (MB)':>9}")
+    step = max(total_albums // 10, 1)
+    milestone = step
+    for albums, rss in samples:
+        if albums >= milestone:
+            print(f"{albums:>8} {rss:>9.1f}")
+            milestone = (albums // step + 1) * step
+    steady = [(albums, rss) for albums, rss in samples if albums >= args.warmup * written]
+    if steady:
+        print(f"RSS pico {max(rss for _, rss in samples):.1f} MB | inclinação após o aquecimento: "
+              f"{slope(steady):+.2f} MB/mil álbuns | flushes por teto: {counters.get('memory_flushes', 0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark do ParsePool. Compara o parse na própria thread com o parse em N processos:
+primeiro offline, sobre um diretório de páginas de álbum salvas; depois com as buscas
+num servidor local com latência, para medir a sobreposição entre rede e parse.
+
+Uso: python bench_parse_pool.py [--dir pasta_com_html] [--pages 64] [--latency 0.05]
+"""
+import os
+import time
+import argparse
+import tempfile
+from functools import partial
+
+from album_pipeline import AlbumPipeline
+from discogs_scraper import PARSER_BACKEND, PARSE_PARTIAL, parse_album_page, scrape_album_page
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html
+from parse_pool import ParsePool
+
+def write_pages(directory, count):
+    for i in range(count):
+        with open(os.path.join(directory, f"album_{i:04d}.html"), "w", encoding="utf-8") as f:
+            f.write(make_album_html(n_tracks=15, title=f"Album {i}", filler_kb=100))
+
+
+def bench_offline(directory, worker_counts):
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".html"))
+    print(f"Offline: {len(paths)} páginas de {directory}")
+    print(f"{'processos':>10} {'tempo (s)':>10} {'páginas/s':>10}")
+
+    start = time.perf_counter()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            parse_album_page(f.read(), path)
+    elapsed = time.perf_counter() - start
+    print(f"{'thread':>10} {elapsed:>10.2f} {len(paths) / elapsed:>10.1f}")
+
+    for workers in worker_counts:
+        with ParsePool(workers, PARSER_BACKEND, PARSE_PARTIAL) as pool:
+            pool.parse_directory(directory) # aquece os processos (imports)
+            start = time.perf_counter()
+            pool.parse_directory(directory)
+            elapsed = time.perf_counter() - start
+        print(f"{workers:>10} {elapsed:>10.2f} {len(paths) / elapsed:>10.1f}")
+
+
+def bench_overlap(count, latency, workers):
+    pages = {f"/release/{i}": make_album_html(n_tracks=15, title=f"Album {i}", filler_kb=100) for i in range(count)}
+    print(f"\nBusca + parse: {count} álbuns, latência {latency * 1000:.0f} ms, 8 buscas simultâneas")
+    print(f"{'parse':>10} {'tempo (s)':>10}")
+
+    with FixtureServer(pages, latency=latency) as server, ParsePool(workers, PARSER_BACKEND, PARSE_PARTIAL) as pool:
+        albums = [{"url_album": server.url(path)} for path in pages]
+        pool.parse("album", pages["/release/0"], "aquecimento")
+        fetcher = HttpFetcher(pool_size=8)
+        for label, parse_pool in (("thread", None), (f"{workers} proc", pool)):
+            pipeline = AlbumPipeline(partial(scrape_album_page, fetcher, parse_pool=parse_pool), 8, 8)
+            start = time.perf_counter()
+            pipeline.run(albums, count)
+            elapsed = time.perf_counter() - start
+            pipeline.close()
+            print(f"{label:>10} {elapsed:>10.2f}")
+        fetcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", help="diretório com páginas de álbum salvas (*.html)")
+    parser.add_argument("--pages", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({n for n in (1, 2, 4, cpus) if n <= cpus})
+
+    if args.dir:
+        bench_offline(args.dir, worker_counts)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            write_pages(tmp, args.pages)
+            bench_offline(tmp, worker_counts)
+
+    bench_overlap(args.pages, args.latency, cpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Microbenchmark dos backends de parsing para as páginas de álbum.
+Mede ms/página (parse + extract_album_tracklist + extract_album_details) e o pico
+de memória de cada backend, com e sem parse parcial, e da leitura dos dados
+embutidos (JSON-LD/estado hidratado), que dispensa o DOM. Cada configuração roda
+num processo separado para que o pico de RSS de uma não contamine a outra.
+
+Uso: python bench_parsers.py [--dir pasta_com_html] [--pages 20] [--repeat 5]
+"""
+import os
+import glob
+import time
+import argparse
+import resource
+import multiprocessing
+
+from discogs_scraper import extract_album_tracklist, extract_album_details
+from embedded_data import extract_embedded_album
+from fixture_server import make_album_html
+from parsers import parse_html, available_backends
+
+
+def load_pages(directory, count):
+    """Páginas salvas (*.html) de `directory` ou, sem diretório, páginas sintéticas de ~300 KB."""
+    if directory:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.html")))[:count]:
+            with open(path, encoding="utf-8") as f:
+                pages.append(f.read())
+        return pages
+    return [make_album_html(n_tracks=15, title=f"Album {i}", filler_kb=300, embedded=("json-ld", "state"))
+            for i in range(count)]
+
+
+def _rss_kb(field):
+    """VmRSS/VmHWM do processo atual em KB (Linux); fora do Linux usa ru_maxrss."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5") # zera o VmHWM (pico de RSS)
+    except OSError:
+        pass
+
+
+def run_config(backend, partial, pages, repeat):
+    _reset_peak_rss()
+    baseline_kb = _rss_kb("VmRSS")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            if backend == "embedded":
+                extract_embedded_album(html)
+                continue
+            soup = parse_html(html, "album", backend, partial)
+            extract_album_tracklist(soup)
+            extract_album_details(soup)
+            del soup
+    elapsed = time.perf_counter() - start
+    peak_kb = _rss_kb("VmHWM") - baseline_kb
+    return elapsed * 1000 / (len(pages) * repeat), peak_kb / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dir", help="diretório com páginas de álbum salvas (*.html)")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.dir, args.pages)
+    avg_kb = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"{len(pages)} páginas, {avg_kb:.0f} KB em média\n")
+    print(f"{'backend':<14} {'parcial':<8} {'ms/página':>10} {'pico RSS (MB)':>14}")
+
+    ctx = multiprocessing.get_context("spawn")
+    for backend in available_backends() + ["embedded"]:
+        for partial in (False, True):
+            if backend in ("selectolax", "embedded") and partial:
+                continue # o selectolax sempre faz o parse completo; os dados embutidos não usam DOM
+            with ctx.Pool(1) as pool:
+                ms, peak_mb = pool.apply(run_config, (backend, partial, pages, args.repeat))
+            print(f"{backend:<14} {'sim' if partial else 'não':<8} {ms:>10.2f} {peak_mb:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
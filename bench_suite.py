@@ -0,0 +1,173 @@
+"""
+Suíte de benchmarks offline: o crawl de ponta a ponta (run_scraper contra o
+servidor de replay) e cada função extract_* sobre as páginas do corpus.
+
+Cada cenário roda num processo separado (pico de RSS isolado). Os resultados são
+acrescentados a um histórico JSONL e comparados com a mediana dos últimos runs:
+throughput menor ou memória/tempo maiores que a tolerância contam como regressão.
+
+Uso: python bench_suite.py [--corpus corpus_discogs/] [--latency 0.02] [--error-rate 0.02]
+                           [--history bench_history.jsonl] [--fail-on-regression]
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import multiprocessing
+
+from fixture_server import FixtureServer, make_site_pages
+from replay import FixtureCorpus, patched_config, replay_config
+
+# Métricas em que um valor maior é melhor; nas demais (tempo, memória) menor é melhor
+HIGHER_IS_BETTER = ("pages_per_s", "albums_per_s")
+
+
+def _pages(args):
+    if args.corpus:
+        return FixtureCorpus(args.corpus).pages(), FixtureCorpus(args.corpus).content_types()
+    return make_site_pages(args.artists, args.albums, args.tracks, filler_kb=args.filler_kb), {}
+
+
+def run_crawl(pages, content_types, args):
+    """Roda o run_scraper contra o servidor de replay; devolve as métricas do relatório do run."""
+    import discogs_scraper
+
+    server = FixtureServer(pages, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           seed=args.seed, content_types=content_types)
+    with tempfile.TemporaryDirectory() as workdir, server:
+        overrides = replay_config(server, workdir)
+        overrides.update(MAX_ARTISTS=args.artists, MAX_ALBUMS=args.albums, PARSE_WORKERS=args.parse_workers)
+        with patched_config(discogs_scraper, **overrides):
+            discogs_scraper.run_scraper()
+        with open(overrides["RUN_REPORT_FILE"], encoding="utf-8") as f:
+            report = json.load(f)
+
+    elapsed = report["elapsed_s"]
+    resources = report["resources"]
+    return {
+        "elapsed_s": elapsed,
+        "pages_per_s": report["pages_per_s"],
+        "albums_per_s": round(report["counters"].get("albums_written", 0) / elapsed, 3),
+        "cpu_s": round(resources["cpu_user_s"] + resources["cpu_system_s"], 3),
+        "peak_rss_mb": round(resources["peak_rss_bytes"] / (1024 * 1024), 1),
+    }
+
+
+def run_extractors(pages, args):
+    """ms/página de cada etapa de parse/extract_* sobre as páginas do corpus, medido pelo METRICS."""
+    import discogs_scraper
+    from embedded_data import extract_embedded_album
+    from instrumentation import METRICS
+    from parsers import parse_html
+
+    by_type = {"album": [], "artist": [], "search": []}
+    for path, html in pages.items():
+        kind = "album" if "/release/" in path or "/master/" in path else \
+               "artist" if "/artist/" in path else "search" if "search" in path else None
+        if kind:
+            by_type[kind].append((path, html))
+
+    METRICS.reset()
+    for _ in range(args.repeat):
+        for path, html in by_type["album"]:
+            extract_embedded_album(html)
+            discogs_scraper.parse_album_page(html, path, embedded=False)
+        for path, html in by_type["artist"]:
+            discogs_scraper.parse_artist_page(html, path)
+        for path, html in by_type["search"]:
+            discogs_scraper.extract_search_artists(parse_html(html, "search"), limit=None)
+
+    return {f"{stage}_ms": round(summary["mean_s"] * 1000, 4)
+            for stage, summary in METRICS.report()["stages"].items()}
+
+
+def _in_subprocess(fn, *args):
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(fn, args)
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(results, history, window=5, tolerance=0.1):
+    """
+    Compara cada métrica com a mediana dos últimos `window` runs do histórico.
+    Retorna linhas (cenário, métrica, valor, referência, variação, regressão?).
+    """
+    rows = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            past = [run["results"][scenario][metric] for run in history[-window:]
+                    if metric in run.get("results", {}).get(scenario, {})]
+            if not past:
+                rows.append((scenario, metric, value, None, None, False))
+                continue
+            baseline = statistics.median(past)
+            change = (value - baseline) / baseline if baseline else 0.0
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            rows.append((scenario, metric, value, baseline, change, worse > tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="corpus gravado (RECORD_DIR); sem ele, usa um site sintético")
+    parser.add_argument("--artists", type=int, default=10)
+    parser.add_argument("--albums", type=int, default=10)
+    parser.add_argument("--tracks", type=int, default=12)
+    parser.add_argument("--filler-kb", type=int, default=100, help="tamanho extra das páginas sintéticas")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--parse-workers", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="repetições do benchmark dos extratores")
+    parser.add_argument("--history", default="bench_history.jsonl")
+    parser.add_argument("--window", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    pages, content_types = _pages(args)
+    print(f"{len(pages)} páginas no corpus{' gravado' if args.corpus else ' sintético'}\n")
+    results = {
+        "crawl": _in_subprocess(run_crawl, pages, content_types, args),
+        "extract": _in_subprocess(run_extractors, pages, args),
+    }
+
+    history = load_history(args.history)
+    rows = compare(results, history, args.window, args.tolerance)
+    print(f"{'cenário':<8} {'métrica':<36} {'valor':>10} {'referência':>11} {'variação':>9}")
+    for scenario, metric, value, baseline, change, regressed in rows:
+        ref = f"{baseline:>11.3f}" if baseline is not None else f"{'-':>11}"
+        delta = f"{change:>+8.1%}" if change is not None else f"{'-':>9}"
+        print(f"{scenario:<8} {metric:<36} {value:>10.3f} {ref} {delta}{'  REGRESSÃO' if regressed else ''}")
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"timestamp": time.time(), "commit": _commit(), "results": results}) + "\n")
+
+    regressions = sum(1 for row in rows if row[-1])
+    if regressions:
+        print(f"\n{regressions} métricas pioraram mais que {args.tolerance:.0%} em relação aos últimos runs.")
+    if regressions and args.fail_on_regression:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Detecção de mudanças entre runs: só busca o que mudou desde o último snapshot.
+
+Para cada artista fica salvo (SQLite) o último registro emitido, um hash do
+registro e um hash das linhas da discografia da página do artista
+(tr.textWithCoversRow_Xv0h3: título, ano e URL de cada álbum). No run seguinte:
+
+- linhas iguais: a página do artista é a única busca; a discografia salva é
+  reaproveitada e nenhum álbum é buscado;
+- linhas diferentes: a discografia é percorrida de novo, mas só os álbuns novos
+  ou cuja linha mudou (título/ano) têm a página buscada e o parse feito;
+- snapshot mais antigo que recheck_days: tudo é buscado de novo, o que pega
+  mudanças fora da primeira página da discografia e dentro das páginas de álbum.
+
+Cada artista emitido é comparado com o snapshot anterior e as diferenças vão
+para o arquivo de delta (JSON Lines): artistas adicionados, alterados (com os IDs
+dos álbuns adicionados, alterados e removidos) e removidos. O JSONL normal do run
+continua sendo o snapshot completo.
+"""
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter
+
+from embedded_data import ALBUM_FIELDS
+from jsonl_sink import JsonlSink
+
+ADDED = "adicionado"
+CHANGED = "alterado"
+REMOVED = "removido"
+
+
+def _hash(value):
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def listing_hash(albums_raw):
+    """Impressão digital das linhas da discografia (título, ano e URL de cada álbum, na ordem da página)."""
+    return _hash([(album["url_album"], album["nome_album"], album["ano_lancamento"]) for album in albums_raw])
+
+
+def _same_listing_entry(album_raw, saved_album):
+    return (album_raw["nome_album"], album_raw["ano_lancamento"]) == \
+        (saved_album.get("nome_album"), saved_album.get("ano_lancamento"))
+
+
+def album_changes(previous, current):
+    """IDs dos álbuns adicionados, alterados e removidos entre dois registros do mesmo artista."""
+    before = {album.get("id_album"): _hash(album) for album in previous.get("albuns") or ()}
+    after = {album.get("id_album"): _hash(album) for album in current.get("albuns") or ()}
+    return {
+        "albuns_adicionados": [album_id for album_id in after if album_id not in before],
+        "albuns_alterados": [album_id for album_id in after if album_id in before and before[album_id] != after[album_id]],
+        "albuns_removidos": [album_id for album_id in before if album_id not in after],
+    }
+
+
+class ChangeTracker:
+    """
+    Snapshot do último run por artista e decisão do que precisa ser buscado de novo.
+
+    check_artist e reusable_albums rodam nas threads de artista; record roda na
+    emissão (na ordem da busca) e grava o delta. finish_run marca como removidos os
+    artistas do snapshot anterior que não apareceram neste run.
+    """
+
+    def __init__(self, path, delta_path, recheck_days=30, clock=time.time):
+        self.path = path
+        self.delta_path = delta_path
+        self.recheck_seconds = recheck_days * 24 * 3600 if recheck_days else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS artistas (
+                id_artista TEXT PRIMARY KEY,
+                hash_listagem TEXT,
+                hash_registro TEXT NOT NULL,
+                registro TEXT NOT NULL,
+                verificado_em REAL NOT NULL,
+                run INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_artistas_run ON artistas (run);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+        """)
+        self._db.commit()
+        self.run_id = None
+        self._delta = None
+        self._pending = {} # id_artista -> {"listing", "albums", "reused"} até a emissão
+        self._reusable = {} # url_album -> dados raspados salvos, para o scrape_album
+        self.stats = Counter()
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def begin_run(self):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'run'").fetchone()
+            self.run_id = int(row[0]) + 1 if row else 1
+            self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('run', ?)", (str(self.run_id),))
+            self._db.commit()
+        self._delta = JsonlSink(self.delta_path)
+        logging.info(f"[MUDANÇAS] Run #{self.run_id}; snapshot anterior com {self.snapshot_size()} artistas.")
+
+    def snapshot_size(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM artistas").fetchone()[0]
+
+    def _previous(self, artist_id):
+        """(hash_listagem, registro, verificado_em) do snapshot, ou None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash_listagem, registro, verificado_em FROM artistas WHERE id_artista = ?", (artist_id,)
+            ).fetchone()
+        return (row[0], json.loads(row[1]), row[2]) if row else None
+
+    def check_artist(self, artist_id, albums_raw):
+        """
+        Compara as linhas da discografia da página com as do snapshot. Retorna a
+        discografia salva se nada mudou (e o snapshot não está vencido), senão None.
+        """
+        if not artist_id: # sem ID estável na URL não há como achar o snapshot
+            return None
+        current = listing_hash(albums_raw)
+        previous = self._previous(artist_id)
+        pending = {"listing": current, "albums": {}, "reused": 0}
+        self._pending[artist_id] = pending
+        if previous is None:
+            return None
+
+        saved_hash, saved_record, checked_at = previous
+        if self.recheck_seconds is not None and self._clock() - checked_at > self.recheck_seconds:
+            self._count("artistas_vencidos")
+            return None # vencido: tudo é buscado de novo
+        if saved_hash == current:
+            pending["reused"] = len(saved_record["albuns"])
+            self._count("artistas_reaproveitados")
+            return saved_record["albuns"]
+        pending["albums"] = {album["url_album"]: album for album in saved_record["albuns"]}
+        return None
+
+    def reusable_albums(self, artist_id, albums_raw):
+        """
+        Repassa a discografia ao AlbumPipeline, registrando para o scrape_album os álbuns
+        cuja linha não mudou: esses não são buscados de novo.
+        """
+        pending = self._pending.get(artist_id)
+        saved = pending["albums"] if pending else {}
+        for album_raw in albums_raw:
+            album = saved.get(album_raw["url_album"])
+            if album is not None and _same_listing_entry(album_raw, album):
+                self._reusable[album_raw["url_album"]] = {field: album.get(field) for field in ALBUM_FIELDS}
+                pending["reused"] += 1
+            yield album_raw
+
+    def scrape_album(self, scrape, album_url):
+        """scrape_fn do AlbumPipeline: devolve o álbum salvo se ele não mudou, senão busca com `scrape`."""
+        saved = self._reusable.pop(album_url, None)
+        if saved is not None:
+            self._count("albuns_reaproveitados")
+            return saved
+        self._count("albuns_buscados")
+        return scrape(album_url)
+
+    def keep(self, artist_id):
+        """Artista que falhou neste run: o snapshot anterior continua valendo (não é dado como removido)."""
+        self._pending.pop(artist_id, None)
+        with self._lock:
+            self._db.execute("UPDATE artistas SET run = ? WHERE id_artista = ?", (self.run_id, artist_id))
+            self._db.commit()
+
+    def record(self, artist):
+        """Compara o artista emitido com o snapshot, grava o delta e atualiza o snapshot."""
+        artist_id = artist["id_artista"]
+        pending = self._pending.pop(artist_id, None)
+        previous = self._previous(artist_id)
+        record_hash = _hash(artist)
+
+        if previous is None:
+            self._write_delta(ADDED, artist_id, artist)
+        else:
+            saved_hash, saved_record, checked_at = previous
+            if _hash(saved_record) != record_hash:
+                self._write_delta(CHANGED, artist_id, artist, **album_changes(saved_record, artist))
+            else:
+                self._count("iguais")
+
+        # Só uma busca completa (nenhum álbum reaproveitado) renova a data de verificação
+        now = self._clock()
+        if pending is None: # reaproveitado do estado do crawl, sem passar por check_artist
+            listing = previous[0] if previous else None
+            checked_at = previous[2] if previous else now
+        else:
+            listing = pending["listing"]
+            checked_at = previous[2] if previous and pending["reused"] else now
+        with self._lock:
+            self._db.execute(
+                """INSERT OR REPLACE INTO artistas (id_artista, hash_listagem, hash_registro, registro, verificado_em, run)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (artist_id, listing, record_hash, json.dumps(artist, ensure_ascii=False), checked_at, self.run_id),
+            )
+            self._db.commit()
+
+    def _write_delta(self, operation, artist_id, artist, **details):
+        self._delta.write({"operacao": operation, "id_artista": artist_id, **details, "registro": artist})
+        self._count(operation)
+
+    def finish_run(self):
+        """Artistas do snapshot que não apareceram neste run vão para o delta como removidos."""
+        with self._lock:
+            removed = self._db.execute(
+                "SELECT id_artista, registro FROM artistas WHERE run < ? ORDER BY id_artista", (self.run_id,)
+            ).fetchall()
+        for artist_id, record in removed:
+            self._write_delta(REMOVED, artist_id, json.loads(record))
+        with self._lock:
+            self._db.execute("DELETE FROM artistas WHERE run < ?", (self.run_id,))
+            self._db.commit()
+        self.close_delta()
+
+    def close_delta(self):
+        if self._delta is not None:
+            self._delta.close()
+            self._delta = None
+        self._pending.clear()
+        self._reusable.clear()
+
+    def report(self):
+        return {
+            "run": self.run_id,
+            "adicionados": self.stats[ADDED],
+            "alterados": self.stats[CHANGED],
+            "removidos": self.stats[REMOVED],
+            "iguais": self.stats["iguais"],
+            "artistas_reaproveitados": self.stats["artistas_reaproveitados"],
+            "artistas_vencidos": self.stats["artistas_vencidos"],
+            "albuns_reaproveitados": self.stats["albuns_reaproveitados"],
+            "albuns_buscados": self.stats["albuns_buscados"],
+        }
+
+    def log_report(self):
+        r = self.report()
+        logging.info(
+            f"[MUDANÇAS] +{r['adicionados']} ~{r['alterados']} -{r['removidos']} (iguais: {r['iguais']}) | "
+            f"artistas sem mudança na listagem: {r['artistas_reaproveitados']} | "
+            f"álbuns reaproveitados: {r['albuns_reaproveitados']}, buscados: {r['albuns_buscados']} | "
+            f"delta: {self.delta_path}"
+        )
+
+    def close(self):
+        self.close_delta()
+        with self._lock:
+            self._db.close()
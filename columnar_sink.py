@@ -0,0 +1,300 @@
+"""
+Exportação colunar (Parquet ou Arrow IPC) dos registros do scraper em três tabelas
+normalizadas: artistas, álbuns e faixas, ligadas por id_artista / indice_album.
+
+Uso (conversão de um JSONL já gravado):
+    python columnar_sink.py dados_discogs.jsonl --format parquet
+"""
+import os
+import re
+import sys
+import logging
+import argparse
+import threading
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError: # pyarrow é opcional: só necessário para a exportação colunar
+    pyarrow = None
+
+from jsonl_sink import iter_jsonl
+from track_columns import MISSING, normalize_tracks
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+TABLES = ("artistas", "albuns", "faixas")
+
+# Colunas com poucos valores distintos que se repetem muito: gravadas com dicionário
+DICTIONARY_COLUMNS = {
+    "artistas": ("genero",),
+    "albuns": ("gravadora_album", "genero_album", "estilos_album"),
+    "faixas": ("lado",),
+}
+
+
+def _dict_type():
+    return pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+
+
+def table_schemas():
+    """Schema de cada tabela; as colunas de DICTIONARY_COLUMNS usam dicionário (listas: de cada item)."""
+    string, dictionary = pyarrow.string(), _dict_type()
+    return {
+        "artistas": pyarrow.schema([
+            ("id_artista", string),
+            ("nome_artista", string),
+            ("genero", dictionary),
+            ("individual", pyarrow.bool_()),
+            ("membros_artista", pyarrow.list_(string)),
+            ("sites_artista", pyarrow.list_(string)),
+        ]),
+        "albuns": pyarrow.schema([
+            ("id_artista", string),
+            ("indice_album", pyarrow.int16()),
+            ("nome_album", string),
+            ("ano_lancamento", pyarrow.int16()),
+            ("gravadora_album", dictionary),
+            ("genero_album", pyarrow.list_(dictionary)),
+            ("estilos_album", pyarrow.list_(dictionary)),
+            ("duracao_total_segundos", pyarrow.int32()),
+        ]),
+        "faixas": pyarrow.schema([
+            ("id_artista", string),
+            ("indice_album", pyarrow.int16()),
+            ("indice_faixa", pyarrow.int16()),
+            ("numero_faixa", string),
+            ("nome_faixa", string),
+            ("duracao_faixa", string),
+            ("disco", pyarrow.int16()),
+            ("lado", dictionary),
+            ("posicao", pyarrow.int16()),
+            ("duracao_segundos", pyarrow.int32()),
+        ]),
+    }
+
+
+def _year(value):
+    value = str(value or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+def _nullable(value):
+    return None if value == MISSING else value
+
+
+class _Dictionary:
+    """
+    Dicionário de uma coluna que só cresce durante o run. Cada lote reaproveita os
+    índices dos anteriores, então o dicionário de um lote estende o do anterior: no
+    Arrow IPC isso vira um delta, em vez de uma substituição (que o formato de
+    arquivo não aceita).
+    """
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def _code(self, value):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, column):
+        indices = pyarrow.array([None if v is None else self._code(v) for v in column], pyarrow.int32())
+        return pyarrow.DictionaryArray.from_arrays(indices, pyarrow.array(self.values, pyarrow.string()))
+
+    def encode_lists(self, column):
+        offsets, flat = [0], []
+        for items in column:
+            flat.extend(items or ())
+            offsets.append(len(flat))
+        return pyarrow.ListArray.from_arrays(pyarrow.array(offsets, pyarrow.int32()), self.encode(flat))
+
+
+def flatten_artists(artists):
+    """Linhas (dict de colunas) das três tabelas para um lote de registros de artista."""
+    rows = {table: {field: [] for field in schema.names} for table, schema in table_schemas().items()}
+    artist_rows, album_rows, track_rows = rows["artistas"], rows["albuns"], rows["faixas"]
+
+    albums = []
+    for artist in artists:
+        members = artist.get("membros_artista")
+        individual = not isinstance(members, list)
+        artist_rows["id_artista"].append(artist["id_artista"])
+        artist_rows["nome_artista"].append(artist.get("nome_artista"))
+        artist_rows["genero"].append(artist.get("genero"))
+        artist_rows["individual"].append(individual)
+        artist_rows["membros_artista"].append([] if individual else members)
+        artist_rows["sites_artista"].append(artist.get("sites_artista") or [])
+
+        for album_index, album in enumerate(artist.get("albuns") or ()):
+            albums.append(album)
+            album_rows["id_artista"].append(artist["id_artista"])
+            album_rows["indice_album"].append(album_index)
+            album_rows["nome_album"].append(album.get("nome_album"))
+            album_rows["ano_lancamento"].append(_year(album.get("ano_lancamento")))
+            album_rows["gravadora_album"].append(album.get("gravadora_album"))
+            album_rows["genero_album"].append(album.get("genero_album") or [])
+            album_rows["estilos_album"].append(album.get("estilos_album") or [])
+
+            for track_index, track in enumerate(album.get("faixas_album") or ()):
+                track_rows["id_artista"].append(artist["id_artista"])
+                track_rows["indice_album"].append(album_index)
+                track_rows["indice_faixa"].append(track_index)
+                track_rows["numero_faixa"].append(track.get("numero_faixa"))
+                track_rows["nome_faixa"].append(track.get("nome_faixa"))
+                track_rows["duracao_faixa"].append(track.get("duracao_faixa"))
+
+    # Disco, lado, posição e segundos saem da normalização em lote (mesmo sem NORMALIZE_TRACKS)
+    columns = normalize_tracks(albums)
+    album_rows["duracao_total_segundos"] = columns.album_runtimes()
+    track_rows["disco"] = [_nullable(v) for v in columns.disc]
+    track_rows["lado"] = [side or None for side in columns.side]
+    track_rows["posicao"] = [_nullable(v) for v in columns.number]
+    track_rows["duracao_segundos"] = [_nullable(v) for v in columns.duration_s]
+    return rows
+
+
+class ColumnarSink:
+    """
+    Grava os registros do scraper em tabelas colunares, em row groups (Parquet) ou
+    record batches (Arrow IPC) à medida que o crawl avança.
+
+    Os artistas ficam em memória até o lote somar row_group_size faixas; aí as três
+    tabelas recebem um novo row group. Cada tabela é escrita num `.part` que só é
+    renomeado para o nome final no close (o rodapé do Parquet só existe no fim).
+    Com path "dados_discogs.jsonl" as tabelas são dados_discogs.artistas.parquet, etc.
+    """
+
+    def __init__(self, path, format="parquet", row_group_size=50_000, compression="zstd"):
+        if format not in FORMATS:
+            raise ValueError(f"Formato colunar desconhecido: {format!r} (use 'parquet' ou 'arrow').")
+        if pyarrow is None:
+            raise ImportError("A exportação colunar requer o pacote 'pyarrow' (pip install pyarrow).")
+
+        self.format = format
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schemas = table_schemas()
+        base = os.path.splitext(path)[0]
+        self.paths = {table: f"{base}.{table}{FORMATS[format]}" for table in TABLES}
+        self.segments = []
+        self.records = 0
+        self.row_groups = 0
+        self._dictionaries = {
+            (table, column): _Dictionary() for table, columns in DICTIONARY_COLUMNS.items() for column in columns
+        }
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_tracks = 0
+        self._writers = {}
+        self._sinks = {}
+
+    def _open(self):
+        for table, schema in self.schemas.items():
+            part_path = self.paths[table] + ".part"
+            if self.format == "parquet":
+                self._writers[table] = pyarrow.parquet.ParquetWriter(part_path, schema, compression=self.compression)
+            else:
+                self._sinks[table] = pyarrow.OSFile(part_path, "wb")
+                options = pyarrow.ipc.IpcWriteOptions(compression=self.compression, emit_dictionary_deltas=True)
+                self._writers[table] = pyarrow.ipc.new_file(self._sinks[table], schema, options=options)
+
+    def _column(self, table, field, values):
+        dictionary = self._dictionaries.get((table, field.name))
+        if dictionary is None:
+            return pyarrow.array(values, field.type)
+        if pyarrow.types.is_list(field.type):
+            return dictionary.encode_lists(values)
+        return dictionary.encode(values)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        if not self._writers:
+            self._open()
+        rows = flatten_artists(self._pending)
+        for table, schema in self.schemas.items():
+            batch = pyarrow.record_batch(
+                [self._column(table, field, rows[table][field.name]) for field in schema], schema=schema
+            )
+            self._writers[table].write_batch(batch)
+        self.row_groups += 1
+        self._pending = []
+        self._pending_tracks = 0
+
+    def write(self, record):
+        """Acumula um artista; grava um row group quando o lote chega a row_group_size faixas."""
+        with self._lock:
+            self._pending.append(record)
+            self._pending_tracks += sum(len(album.get("faixas_album") or ()) for album in record.get("albuns") or ())
+            self.records += 1
+            if self._pending_tracks >= self.row_group_size:
+                self._flush()
+
+    def flush(self):
+        """Grava já o lote pendente como um row group (menor que row_group_size), liberando a memória."""
+        with self._lock:
+            if not self.segments:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if self.segments:
+                return
+            self._flush()
+            if not self._writers:
+                self._open() # run sem registros ainda gera as tabelas vazias
+            for table in TABLES:
+                self._writers[table].close()
+                if table in self._sinks:
+                    self._sinks[table].close()
+                os.replace(self.paths[table] + ".part", self.paths[table])
+                self.segments.append(self.paths[table])
+            logging.info(f"[SAÍDA] Tabelas {self.format} concluídas ({self.row_groups} row groups): {', '.join(self.segments)}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_table(path):
+    """Lê uma tabela gravada pelo ColumnarSink (Parquet ou Arrow IPC, pela extensão)."""
+    if pyarrow is None:
+        raise ImportError("Ler as tabelas colunares requer o pacote 'pyarrow' (pip install pyarrow).")
+    if path.endswith(FORMATS["arrow"]):
+        with pyarrow.OSFile(path, "rb") as f:
+            return pyarrow.ipc.open_file(f).read_all()
+    return pyarrow.parquet.read_table(path)
+
+
+def convert_jsonl(paths, output, format="parquet", row_group_size=50_000, compression="zstd"):
+    """Converte um ou mais JSONL (segmentos .gz/.zst incluídos) em tabelas colunares. Retorna o sink fechado."""
+    with ColumnarSink(output, format, row_group_size, compression) as sink:
+        for path in paths:
+            for record in iter_jsonl(path):
+                sink.write(record)
+    return sink
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte o JSONL do scraper em tabelas Parquet/Arrow normalizadas.")
+    parser.add_argument("entrada", nargs="+", help="Arquivo(s) JSONL, na ordem (segmentos rotacionados incluídos)")
+    parser.add_argument("--saida", help="Prefixo das tabelas (padrão: o nome do primeiro JSONL)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--row-group-size", type=int, default=50_000, help="Faixas por row group")
+    args = parser.parse_args()
+
+    # dados_discogs.00001.jsonl.gz -> dados_discogs.artistas.parquet, ...
+    output = args.saida or re.sub(r"(\.\d{5})?\.jsonl(\.gz|\.zst)?$", "", args.entrada[0])
+    sink = convert_jsonl(args.entrada, output, args.format, args.row_group_size)
+    print(f"{sink.records} artistas convertidos: {', '.join(sink.segments)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
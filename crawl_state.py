@@ -0,0 +1,148 @@
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+QUEUED = "queued"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+# Sentinela para "sem resultado reaproveitável" (None é um resultado válido: artista/álbum vazio)
+MISSING = object()
+
+
+class CrawlState:
+    """
+    Estado persistente do crawl (fronteira) em SQLite.
+
+    Cada URL de artista ou álbum passa por queued -> in_progress -> done/failed,
+    e o resultado extraído fica salvo junto. Um run interrompido é retomado no
+    próximo: tudo que já estava concluído nele é reaproveitado sem nova busca.
+    No modo incremental também são reaproveitadas entidades concluídas em runs
+    anteriores, desde que não sejam mais antigas que max_age.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                result TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier (status);
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                fresh_after REAL NOT NULL,
+                incremental INTEGER NOT NULL
+            );
+        """)
+        self._db.commit()
+        self.run_id = None
+        self.fresh_after = None
+        self.reused = 0
+
+    def begin_run(self, incremental=False, max_age=7 * 24 * 3600):
+        """Inicia (ou retoma) um run e define a partir de quando um resultado é reaproveitável."""
+        now = self._clock()
+        with self._lock:
+            last = self._db.execute(
+                "SELECT id, finished_at, fresh_after FROM runs ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+
+            if last is not None and last[1] is None:
+                # Run anterior não terminou: retoma com a mesma janela de reaproveitamento
+                self.run_id, self.fresh_after = last[0], last[2]
+                mode = "retomando run interrompido"
+            else:
+                self.fresh_after = now - max_age if incremental else now
+                cursor = self._db.execute(
+                    "INSERT INTO runs (started_at, fresh_after, incremental) VALUES (?, ?, ?)",
+                    (now, self.fresh_after, int(incremental)),
+                )
+                self.run_id = cursor.lastrowid
+                mode = "incremental" if incremental else "completo"
+
+            # O que estava em andamento quando o processo caiu volta para a fila
+            reset = self._db.execute(
+                "UPDATE frontier SET status = ? WHERE status = ?", (QUEUED, IN_PROGRESS)
+            ).rowcount
+            self._db.commit()
+
+        logging.info(f"[ESTADO] Run #{self.run_id} ({mode}); {reset} URLs em andamento voltaram para a fila.")
+
+    def finish_run(self):
+        with self._lock:
+            self._db.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (self._clock(), self.run_id))
+            self._db.commit()
+
+    def enqueue(self, urls, kind):
+        """Adiciona URLs novas à fila (URLs já conhecidas mantêm o estado)."""
+        now = self._clock()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO frontier (url, kind, status, updated_at) VALUES (?, ?, ?, ?)",
+                [(url, kind, QUEUED, now) for url in urls],
+            )
+            self._db.commit()
+
+    def lookup(self, url):
+        """Resultado salvo de uma URL concluída dentro da janela de reaproveitamento, ou MISSING."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM frontier WHERE url = ? AND status = ? AND updated_at >= ?",
+                (url, DONE, self.fresh_after),
+            ).fetchone()
+        if row is None:
+            return MISSING
+        with self._lock:
+            self.reused += 1
+        return json.loads(row[0]) if row[0] is not None else None
+
+    def _set(self, url, kind, status, result=None, error=None):
+        now = self._clock()
+        payload = json.dumps(result, ensure_ascii=False) if result is not None else None
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO frontier (url, kind, status, attempts, updated_at, result, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    status = excluded.status,
+                    attempts = frontier.attempts + excluded.attempts,
+                    updated_at = excluded.updated_at,
+                    result = CASE WHEN excluded.status = 'done' THEN excluded.result ELSE frontier.result END,
+                    error = excluded.error
+                """,
+                (url, kind, status, int(status == IN_PROGRESS), now, payload, error),
+            )
+            self._db.commit()
+
+    def mark_in_progress(self, url, kind):
+        self._set(url, kind, IN_PROGRESS)
+
+    def mark_done(self, url, kind, result):
+        self._set(url, kind, DONE, result=result)
+
+    def mark_failed(self, url, kind, error):
+        self._set(url, kind, FAILED, error=str(error))
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT kind, status, COUNT(*) FROM frontier GROUP BY kind, status").fetchall()
+        return {f"{kind}:{status}": n for kind, status, n in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,291 @@
+import re
+import copy
+import asyncio
+import math
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from urllib.parse import urlsplit, urlunsplit
+
+from crawl_state import MISSING
+from rate_limiter import RetryLater
+
+# Prefixo de idioma das URLs do Discogs ("/pt_BR/release/1" e "/release/1" são a mesma página)
+_LOCALE_PREFIX = re.compile(r"^/[a-z]{2}(?:_[A-Z]{2})?(?=/)")
+# Entidades do Discogs: só o ID numérico importa ("/release/1-Titulo" == "/release/1")
+_ENTITY = re.compile(r"^/(artist|release|master|label)/(\d+)(?:-[^/]*)?$")
+_MASTER_URL = re.compile(r"/master/(\d+)")
+
+
+def normalize_url(url):
+    """
+    Forma canônica de uma URL para deduplicação: esquema/host em minúsculas e sem
+    "www.", sem prefixo de idioma, query, fragmento, barra final e slug do Discogs.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = _LOCALE_PREFIX.sub("", parts.path).rstrip("/")
+    entity = _ENTITY.match(path)
+    if entity:
+        path = f"/{entity.group(1)}/{entity.group(2)}"
+    return urlunsplit((parts.scheme.lower(), host, path, "", ""))
+
+
+def discogs_id(url):
+    """ID estável de uma entidade do Discogs a partir da URL ('/pt_BR/release/12-Titulo' -> 'release:12'), ou None."""
+    entity = _ENTITY.match(urlsplit(normalize_url(url)).path)
+    return f"{entity.group(1)}:{entity.group(2)}" if entity else None
+
+
+def album_key(album_raw, one_per_master=False):
+    """
+    Chave de deduplicação de um álbum (dict com url_album e, se conhecido, id_master).
+    Com one_per_master, todas as prensagens de um master colapsam numa única chave.
+    """
+    if one_per_master:
+        master_id = album_raw.get("id_master")
+        if master_id is None:
+            match = _MASTER_URL.search(album_raw["url_album"])
+            master_id = match.group(1) if match else None
+        if master_id is not None:
+            return f"master:{master_id}"
+    return album_raw["url_album"]
+
+
+class BloomFilter:
+    """Filtro de Bloom em um bytearray, dimensionado para `capacity` itens com taxa de falso positivo `error_rate`."""
+
+    def __init__(self, capacity=100_000, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class DedupeIndex:
+    """
+    Índice global de URLs (e chaves de master) já vistas no run.
+
+    Um filtro de Bloom em memória responde rápido à pergunta comum ("essa URL é
+    nova?"); só um possível repetido é confirmado no conjunto exato, que fica em
+    memória ou, com `path`, numa tabela SQLite (para runs com milhões de URLs).
+    O índice vale só para o run: o arquivo é esvaziado ao abrir, porque a saída de
+    cada run é um snapshot completo e nada visto antes pode ficar de fora dela. Para
+    não buscar de novo o que não mudou entre runs, use --incremental ou --mudancas.
+
+    Artistas repetidos na descoberta são descartados (`add`). Álbuns não: um
+    lançamento de vários artistas entra na discografia de todos, mas a página só é
+    buscada uma vez (`albums` + `scrape_once_async`, passado ao AlbumPipeline como
+    `single_flight`); os outros artistas recebem o resultado já raspado, lido de
+    `load` (o CrawlState) ou guardado em memória.
+    """
+
+    def __init__(self, path=None, capacity=100_000, error_rate=0.01, batch_size=500, load=None):
+        self.path = path
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.avoided = Counter()
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._exact = set()
+        self._pending = []
+        self._db = None
+        self._load = load
+        self._album_keys = {} # url_album -> chave, registrada por `albums` para o scrape_once_async
+        self._owners = {} # chave -> URL que buscou o álbum neste run
+        self._flights = {} # chave -> Future com o desfecho da busca do dono
+        self._results = {} # chave -> resultado, só sem `load`
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, kind TEXT)")
+            cleared = self._db.execute("DELETE FROM seen").rowcount
+            self._db.commit()
+            if cleared:
+                logging.info(f"[DEDUPE] {cleared} chaves de um run anterior descartadas de {path}.")
+
+    @staticmethod
+    def key_for(url):
+        return url if url.startswith("master:") else normalize_url(url)
+
+    def _exact_contains(self, key):
+        if self._db is None:
+            return key in self._exact
+        if key in self._exact: # adicionada neste run, talvez ainda não gravada
+            return True
+        return self._db.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None
+
+    def __contains__(self, url):
+        key = self.key_for(url)
+        with self._lock:
+            return key in self.bloom and self._exact_contains(key)
+
+    def add(self, url, kind="url"):
+        """Registra a URL. Retorna True se ela é nova; False (e conta uma busca evitada) se já foi vista."""
+        key = self.key_for(url)
+        with self._lock:
+            if key in self.bloom and self._exact_contains(key):
+                self.avoided[kind] += 1
+                return False
+            self.bloom.add(key)
+            self._exact.add(key)
+            if self._db is not None:
+                self._pending.append((key, kind))
+                if len(self._pending) >= self.batch_size:
+                    self._flush()
+            return True
+
+    def albums(self, albums_raw, one_per_master=False):
+        """
+        Repassa a discografia de um artista ao AlbumPipeline, sem repetições dentro
+        dela (com one_per_master, uma prensagem por master). Repetições entre artistas
+        continuam na discografia; quem evita a nova busca é o scrape_once_async.
+        """
+        own_keys = set()
+        for album in albums_raw:
+            key = self.key_for(album_key(album, one_per_master))
+            if key in own_keys:
+                continue
+            own_keys.add(key)
+            with self._lock:
+                self._album_keys[album["url_album"]] = key
+            yield album
+
+    def scrape_once(self, scrape, album_url):
+        """
+        Versão síncrona de `scrape_once_async`, para quem busca fora do AlbumPipeline:
+        a primeira busca de uma chave no run é feita com `scrape`; as seguintes esperam
+        por ela (bloqueando a thread) e reaproveitam o resultado.
+        """
+        key = self._album_key(album_url)
+        while True:
+            flight, owner = self._claim(key, album_url)
+            if owner:
+                return self._fetch(scrape, key, album_url)
+            valid = flight.result()
+            if valid is not None:
+                result = self._shared(key, valid)
+                return scrape(album_url) if result is MISSING else result
+
+    async def scrape_once_async(self, scrape, album_url):
+        """
+        scrape_once do AlbumPipeline: `scrape` é uma corrotina que toma as vagas de
+        concorrência só para a busca do dono. As repetições esperam no loop, sem vaga
+        nem thread, e recebem o resultado do dono — inclusive um resultado vazio, que
+        não é buscado de novo no run. Se o dono levantar RetryLater, elas também voltam
+        pela RetryQueue do pipeline.
+        """
+        key = self._album_key(album_url)
+        while True:
+            flight, owner = self._claim(key, album_url)
+            if owner:
+                try:
+                    result = await scrape(album_url)
+                except BaseException as e:
+                    self._abandon(key, e)
+                    raise
+                self._settle(key, result)
+                return result
+            # shield: cancelar esta espera não pode cancelar o futuro dos outros artistas
+            valid = await asyncio.shield(asyncio.wrap_future(flight))
+            if valid is not None:
+                result = self._shared(key, valid)
+                return await scrape(album_url) if result is MISSING else result
+
+    def _album_key(self, album_url):
+        with self._lock:
+            return self._album_keys.pop(album_url, None) or self.key_for(album_url)
+
+    def _claim(self, key, album_url):
+        """(futuro, é_dono): o primeiro a pedir a chave vira o dono e busca; o futuro resolve
+        com True/False (resultado válido ou não) ou None se o dono levantou uma exceção."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            self._owners[key] = album_url
+            flight = self._flights[key] = Future()
+            return flight, True
+
+    def _fetch(self, scrape, key, album_url):
+        try:
+            result = scrape(album_url)
+        except BaseException as e:
+            self._abandon(key, e)
+            raise
+        self._settle(key, result)
+        return result
+
+    def _settle(self, key, result):
+        with self._lock:
+            if self._load is None and result:
+                self._results[key] = copy.deepcopy(result)
+            self._flights[key].set_result(bool(result))
+
+    def _abandon(self, key, error):
+        with self._lock:
+            self._owners.pop(key, None)
+            flight = self._flights.pop(key)
+        if isinstance(error, RetryLater):
+            flight.set_exception(error)
+        else:
+            flight.set_result(None) # a próxima repetição vira a dona e tenta
+
+    def _shared(self, key, valid):
+        """Resultado do dono para uma repetição (MISSING se não der para lê-lo: ela busca)."""
+        result = self._reuse(key, self._owners[key]) if valid else None
+        if result is not MISSING:
+            with self._lock:
+                self.avoided["master" if key.startswith("master:") else "album"] += 1
+        return result
+
+    def _reuse(self, key, owner):
+        if self._load is not None:
+            result = self._load(owner)
+            return result if result else MISSING
+        with self._lock:
+            result = self._results.get(key, MISSING)
+        # Cópia: cada artista recebe (e normaliza) o seu próprio registro
+        return copy.deepcopy(result) if result is not MISSING else MISSING
+
+    def _flush(self):
+        if self._pending:
+            self._db.executemany("INSERT OR IGNORE INTO seen (key, kind) VALUES (?, ?)", self._pending)
+            self._db.commit()
+            self._pending = []
+            # Já está no disco: o conjunto em memória só guarda o que falta gravar
+            self._exact.clear()
+
+    def report(self):
+        with self._lock:
+            report = dict(self.avoided)
+        report["total"] = sum(self.avoided.values())
+        return report
+
+    def log_report(self):
+        r = self.report()
+        details = ", ".join(f"{kind}: {n}" for kind, n in r.items() if kind != "total")
+        logging.info(f"[DEDUPE] Buscas evitadas: {r['total']} ({details or 'nenhuma'})")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._flush()
+                self._db.close()
+                self._db = None
@@ -0,0 +1,114 @@
+import re
+import json
+import logging
+from urllib.parse import urlencode, urljoin
+
+from rate_limiter import fetch_with_retries
+
+# Endpoint de listagem da discografia: JSON paginado, muito mais leve que a página do artista
+LISTING_URL = "https://api.discogs.com/artists/{artist_id}/releases"
+LISTING_PAGE_SIZE = 100
+
+_ARTIST_ID = re.compile(r"/artist/(\d+)")
+
+
+def artist_id_from_url(url):
+    """ID numérico do Discogs numa URL de artista ('/artist/45-Aphex-Twin' -> '45'), ou None."""
+    match = _ARTIST_ID.search(url or "")
+    return match.group(1) if match else None
+
+
+def listing_page_url(artist_id, page=1, per_page=LISTING_PAGE_SIZE, listing_url=LISTING_URL):
+    """URL de uma página da listagem, ordenada por ano (para poder parar no fim do intervalo)."""
+    params = {"sort": "year", "sort_order": "asc", "per_page": per_page, "page": page}
+    return f"{listing_url.format(artist_id=artist_id)}?{urlencode(params)}"
+
+
+class DiscographyFilter:
+    """
+    Seleção de lançamentos da listagem por papel do artista, formato e ano.
+    Vazio/None em qualquer critério aceita tudo. Itens sem formato na listagem
+    (masters) passam pelo filtro de formato, que só dá para checar na página.
+    """
+
+    def __init__(self, roles=("Main",), formats=(), year_min=None, year_max=None):
+        self.roles = {r.lower() for r in roles or ()}
+        self.formats = {f.lower() for f in formats or ()}
+        self.year_min = year_min
+        self.year_max = year_max
+
+    def past_end(self, item):
+        """Com a listagem ordenada por ano, nenhum item depois deste pode passar no filtro."""
+        year = item.get("year") or 0
+        return self.year_max is not None and year > self.year_max
+
+    def accepts(self, item):
+        if self.roles and (item.get("role") or "").lower() not in self.roles:
+            return False
+        year = item.get("year") or 0
+        if self.year_min is not None and year < self.year_min:
+            return False
+        if self.year_max is not None and year > self.year_max:
+            return False
+        if self.formats and item.get("format"):
+            item_formats = {f.strip().lower() for f in item["format"].split(",")}
+            if not item_formats & self.formats:
+                return False
+        return True
+
+
+def release_page_url(item, base_url):
+    """URL da página do lançamento (master ou release) de um item da listagem."""
+    kind = "master" if item.get("type") == "master" else "release"
+    return urljoin(base_url, f"/{kind}/{item['id']}")
+
+
+def iter_discography(fetcher, artist_url, base_url, selection=None, fallback=(), max_pages=None,
+                     per_page=LISTING_PAGE_SIZE, listing_url=LISTING_URL, retries=3):
+    """
+    Gerador preguiçoso dos álbuns selecionados de um artista, no formato do
+    extract_artist_albums (nome_album, url_album, ano_lancamento).
+
+    Segue as páginas da listagem só enquanto o consumidor pede mais álbuns, então o
+    custo acompanha o número de lançamentos selecionados e não o tamanho do catálogo.
+    Se a listagem não estiver disponível, usa os álbuns `fallback` da página do artista.
+    """
+    selection = selection or DiscographyFilter()
+    artist_id = artist_id_from_url(artist_url)
+    if artist_id is None:
+        yield from fallback
+        return
+
+    seen = set()
+    page, pages = 1, 1
+    while page <= pages and (max_pages is None or page <= max_pages):
+        url = listing_page_url(artist_id, page, per_page, listing_url)
+        listing = fetch_with_retries(fetcher, url, "listing", retries)
+        try:
+            data = json.loads(listing.html) if listing is not None and listing.status == 200 else None
+        except ValueError:
+            data = None
+        if data is None:
+            if page == 1:
+                logging.info(f"[DISCOGRAFIA] Listagem indisponível para {artist_url}; usando a página do artista.")
+                yield from fallback
+            return
+
+        pages = data.get("pagination", {}).get("pages", page)
+        for item in data.get("releases", []):
+            if selection.past_end(item):
+                return
+            if not selection.accepts(item) or not item.get("id"):
+                continue
+            title = (item.get("title") or "").strip() or "UNKNOWN_TITLE"
+            year = str(item["year"]) if item.get("year") else "UNKNOWN_YEAR"
+            if (title, year) in seen:
+                continue
+            seen.add((title, year))
+            yield {
+                "nome_album": title,
+                "url_album": release_page_url(item, base_url),
+                "ano_lancamento": year,
+                "id_master": str(item.get("id") if item.get("type") == "master" else item.get("master_id") or "") or None,
+            }
+        page += 1
@@ -1,10 +1,11 @@
-import time
-import json
 import uuid
+import argparse
 import re
 import logging
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures, FIRST_COMPLETED
+from functools import partial
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
 from operator import itemgetter # Importar para facilitar a ordenação
 
 from selenium import webdriver
@@ -16,16 +17,107 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from fetchers import HttpFetcher, FallbackFetcher
+from album_pipeline import AlbumPipeline
+from driver_pool import DriverPool, PooledSeleniumFetcher
+from readiness import ReadinessWaiter
+from page_cache import PageCache, CachingFetcher, DEFAULT_TTLS
+from crawl_state import CrawlState, MISSING
+from jsonl_sink import JsonlSink
+from columnar_sink import ColumnarSink
+from record_store import RecordStore
+from parsers import parse_html, release_soup
+from parse_pool import ParsePool
+from rate_limiter import AdaptiveRateLimiter, RateLimitedFetcher, RetryLater, fetch_with_retries
+from discovery import discover_artists
+from discography import LISTING_URL, DiscographyFilter, artist_id_from_url, iter_discography
+from dedupe import DedupeIndex, discogs_id
+from track_columns import enrich_records, without_raw_positions
+from embedded_data import extract_embedded_album, ALBUM_FIELDS
+from extraction_plans import PLANS
+from records import compact
+from change_detection import ChangeTracker
+from memory_guard import MemoryGuard
+from instrumentation import METRICS, MetricsExporter
+from lean_browser import DEFAULT_BLOCKED_URLS, apply_lean_options, enable_request_blocking, transfer_report
+from replay import FixtureCorpus, RecordingFetcher
+
 # ----------------------
 # CONFIGURAÇÃO & CONSTANTES
 # ----------------------
 MAX_ARTISTS = 10
 MAX_ALBUMS = 10 
+DISCOGRAPHY_SOURCE = "listing" # "listing" (endpoint paginado da discografia) ou "page" (só a 1ª página do artista)
+DISCOGRAPHY_LISTING_URL = LISTING_URL # Modelo da URL da listagem ({artist_id})
+DISCOGRAPHY_ROLES = ["Main"] # Papéis do artista aceitos: "Main", "Appearance", "TrackAppearance"...
+DISCOGRAPHY_FORMATS = [] # Formatos aceitos (ex: ["Album", "LP"]); vazio = todos
+DISCOGRAPHY_YEARS = (None, None) # Intervalo de anos (mínimo, máximo); None = sem limite
+ONE_RELEASE_PER_MASTER = False # Colapsa as prensagens de um mesmo master antes de buscar
+DEDUPE_FILE = None # Despeja no disco (SQLite) o índice de URLs vistas de runs grandes; esvaziado a cada run (entre runs: --incremental/--mudancas)
+DEDUPE_CAPACITY = 1_000_000 # Dimensionamento do filtro de Bloom do índice de URLs
+NORMALIZE_TRACKS = True # Acrescenta disco, lado, posicao e duracao_segundos às faixas e a duração total ao álbum
 URL_BASE = "https://www.discogs.com"
 URL_HOME = urljoin(URL_BASE, "pt_BR/")
 URL_SEARCH = urljoin(URL_BASE, "pt_BR/search")
 GENRE_FILTER = "Rock"
+GENRES = [GENRE_FILTER] # Gêneros percorridos na descoberta de artistas, em ordem
+STYLES = [] # Estilos percorridos depois dos gêneros (ex: ["Punk", "Shoegaze"])
+SEARCH_MAX_PAGES = None # Páginas de resultado por gênero/estilo (None = até a última)
 OUTPUT_FILE = "dados_discogs.jsonl"
+OUTPUT_ROTATE_MB = None # Rotaciona o JSONL em segmentos deste tamanho (None = arquivo único)
+OUTPUT_ROTATE_MINUTES = None # Rotaciona o JSONL a cada N minutos (None = desativado)
+OUTPUT_COMPRESSION = None # None, "gzip" ou "zstd" (requer o pacote zstandard)
+STORE_FILE = None # Banco SQLite (ex: "dados_discogs.sqlite") com upsert por ID do Discogs; o JSONL vira uma exportação dele
+OUTPUT_COLUMNAR = None # Também grava tabelas artistas/albuns/faixas: None, "parquet" ou "arrow" (requer pyarrow)
+OUTPUT_ROW_GROUP_TRACKS = 50_000 # Faixas por row group das tabelas colunares
+PARSER_BACKEND = None # "html.parser", "lxml" ou "selectolax"; None = o mais rápido instalado
+PARSE_PARTIAL = True # Constrói só as subárvores usadas pelas funções extract_* (backends do bs4)
+EMBEDDED_DATA = True # Lê o álbum do JSON-LD/estado embutido na página; o DOM só é usado para o que faltar
+PARSE_WORKERS = None # Processos de parse em paralelo às buscas; None = um por núcleo, 0 = parse na própria thread
+FETCH_BACKEND = "auto" # "auto" (HTTP com fallback para Selenium), "http" ou "selenium"
+HTTP_POOL_SIZE = 10
+RATE_LIMIT_START = 2.0 # Requisições/s por host no início; a taxa sobe com respostas rápidas
+RATE_LIMIT_MIN = 0.25 # Piso da taxa após 429/5xx ou respostas lentas
+RATE_LIMIT_MAX = 10.0 # Teto da taxa por host
+FETCH_RETRIES = 3 # Repetições de uma página após 429/5xx/timeout
+RETRY_BACKOFF_BASE = 1.0 # Backoff exponencial com jitter (s): ~base, ~2×base, ~4×base...
+RETRY_BACKOFF_CAP = 60.0
+ALBUM_CONCURRENCY = 8 # Limite global de páginas de álbum buscadas ao mesmo tempo
+ALBUM_CONCURRENCY_PER_HOST = 4
+ARTIST_WORKERS = 4 # Artistas processados em paralelo
+MEMORY_CEILING_MB = None # Teto de RSS (MB): acima dele os buffers são gravados e os artistas passam a um por vez
+HEADLESS = True
+LEAN_BROWSING = True # Chrome sem imagens/fontes/anúncios, carregamento "eager" (só o DOM que é lido)
+LEAN_BLOCKED_URLS = DEFAULT_BLOCKED_URLS # Padrões de URL bloqueados na rede no modo enxuto
+PAGE_LOAD_TIMEOUT = 300 # Timeout (s) do driver.get com carregamento completo
+LEAN_PAGE_LOAD_TIMEOUT = 60 # No modo enxuto o driver.get volta no DOMContentLoaded
+DRIVER_POOL_SIZE = 2 # Drivers do Chrome mantidos para páginas que precisam de JS
+DRIVER_MAX_MEMORY_MB = 1024 # Driver (com os processos do Chrome) acima disso é reciclado
+DRIVER_MAX_PAGES = 200 # Recicla o driver depois de N páginas
+PAGE_READY_TIMEOUT = 15 # Espera máxima (s) para uma página ficar pronta; o timeout real se adapta
+CACHE_ENABLED = True
+CACHE_DIR = ".cache_discogs"
+CACHE_MAX_MB = 500 # Orçamento de disco do cache; acima disso remove as páginas menos usadas
+CACHE_TTLS = DEFAULT_TTLS # Validade (s) por tipo de página: search, artist, album
+CACHE_OFFLINE = False # Replay só a partir do cache, sem acessar a rede
+RECORD_DIR = None # Grava as páginas buscadas num corpus de fixtures (ex: "corpus_discogs") para replay/benchmark
+STATE_FILE = "crawl_state.sqlite" # Fronteira persistente para retomar runs interrompidos
+QUEUE_URL = None # Fila do modo distribuído num Redis (ex: "redis://fila:6379/0"), para workers em várias máquinas
+QUEUE_FILE = "fila_discogs.sqlite" # Fila do modo distribuído sem QUEUE_URL: SQLite local, workers nesta máquina
+QUEUE_LEASE_SECONDS = 300 # Tarefa reservada por um worker que não termina nesse prazo volta para a fila
+QUEUE_MAX_ATTEMPTS = 3 # Tentativas de uma tarefa da fila antes de ser dada como falha
+DISTRIBUTED_WORKER_THREADS = 8 # Tarefas processadas ao mesmo tempo por worker
+DISTRIBUTED_LOOKAHEAD = 8 # Artistas em andamento na fila ao mesmo tempo
+DISTRIBUTED_CANDIDATE_FACTOR = 2 # Álbuns candidatos lidos por artista: MAX_ALBUMS × fator (reserva para álbuns inválidos)
+DISTRIBUTED_IDLE_TIMEOUT = 600 # Coordenador desiste (erro) se nenhum worker mexer na fila por N s; None = espera sempre
+INCREMENTAL_MAX_AGE_DAYS = 7 # No modo --incremental, entidades mais antigas que isso são buscadas de novo
+CHANGES_FILE = "snapshot_discogs.sqlite" # Modo --mudancas: snapshot do último run (hashes da discografia e dos registros)
+DELTA_FILE = "dados_discogs.delta.jsonl" # Modo --mudancas: artistas adicionados, alterados e removidos no run
+CHANGES_RECHECK_DAYS = 30 # Modo --mudancas: artista verificado há mais tempo que isso é buscado por completo (None = nunca)
+RUN_REPORT_FILE = "relatorio_run.json" # Relatório do run (latência por etapa, bytes, RSS/CPU); None = não grava
+METRICS_FILE = None # Arquivo de métricas no formato do Prometheus, reescrito durante o run (ex: "discogs.prom")
+METRICS_PORT = None # Porta de um endpoint /metrics ao vivo (None = desativado)
+METRICS_INTERVAL = 15 # Intervalo (s) entre as gravações de METRICS_FILE
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -33,27 +125,38 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # FUNÇÕES AUXILIARES
 # ----------------------
 
-def setup_driver():
-    """Configura e inicializa o WebDriver do Chrome."""
+def setup_driver(headless=HEADLESS, lean=None):
+    """
+    Configura e inicializa o WebDriver do Chrome.
+    No modo enxuto (LEAN_BROWSING), bloqueia imagens, fontes e anúncios na rede e não
+    espera o carregamento completo da página.
+    """
+    lean = LEAN_BROWSING if lean is None else lean
     options = Options()
-    #options.add_argument("--headless=new")
+    if headless:
+        options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
     options.add_argument("--window-size=1920,1080")
+    if lean:
+        apply_lean_options(options)
 
     try:
         service = Service(ChromeDriverManager().install())
         driver = webdriver.Chrome(service=service, options=options)
-        driver.set_page_load_timeout(300)
+        driver.set_page_load_timeout(LEAN_PAGE_LOAD_TIMEOUT if lean else PAGE_LOAD_TIMEOUT)
+        if lean:
+            enable_request_blocking(driver, LEAN_BLOCKED_URLS)
         return driver
     except Exception as e:
         logging.error(f"Falha ao configurar o driver: {e}")
         return None
 
-def handle_initial_popups(driver, wait):
+def handle_initial_popups(driver, wait, waiter=None):
     """Lida com o aceite de cookies e outros popups iniciais."""
+    waiter = waiter or ReadinessWaiter()
     driver.get(URL_HOME)
-    time.sleep(2)
+    waiter.wait(driver, "home")
 
     # 1) Aceitar cookies
     try:
@@ -62,11 +165,11 @@ def handle_initial_popups(driver, wait):
         )
         accept_btn.click()
         logging.info("Cookies aceitos.")
+        # Espera o banner sumir para não interceptar os próximos cliques
+        waiter.wait_until(driver, "cookie_banner", EC.invisibility_of_element_located((By.ID, "onetrust-banner-sdk")))
     except Exception:
         logging.warning("Não foi possível clicar no botão de cookies ou ele não apareceu.")
 
-    time.sleep(1)
-
     # 2) Fechar alerta
     try:
         close_alert = wait.until(
@@ -77,51 +180,108 @@ def handle_initial_popups(driver, wait):
     except Exception:
         logging.info("Nenhum alerta para fechar ou não foi possível fechar.")
 
-    time.sleep(1)
+def create_browser_session(waiter=None):
+    """Cria o driver e já trata os popups iniciais (usado pelo pool de drivers)."""
+    with METRICS.stage("driver_startup"):
+        driver = setup_driver()
+        if driver:
+            handle_initial_popups(driver, WebDriverWait(driver, 10), waiter)
+    return driver
 
-def select_genre_and_get_artist_list(driver, wait):
-    """Navega para a busca, seleciona o gênero e extrai a lista inicial de artistas."""
+def requests_per_host():
+    """
+    Máximo de buscas simultâneas ao Discogs no run: cada thread de artista busca a
+    própria página/listagem (ARTIST_WORKERS) e os álbuns de todas elas dividem os
+    limites do AlbumPipeline, compartilhados (ALBUM_CONCURRENCY_PER_HOST, no máximo
+    ALBUM_CONCURRENCY). Não é ARTIST_WORKERS × ALBUM_CONCURRENCY_PER_HOST.
+    """
+    return ARTIST_WORKERS + min(ALBUM_CONCURRENCY, ALBUM_CONCURRENCY_PER_HOST)
+
+def check_concurrency(backend):
+    """Avisa quando o pool de drivers ou de conexões é menor que a concorrência configurada."""
+    demand = requests_per_host()
+    logging.info(f"[CONCORRÊNCIA] Até {demand} buscas simultâneas por host "
+                 f"({ARTIST_WORKERS} artistas + {min(ALBUM_CONCURRENCY, ALBUM_CONCURRENCY_PER_HOST)} álbuns).")
+    if backend != "http" and DRIVER_POOL_SIZE < demand:
+        logging.warning(f"[CONCORRÊNCIA] DRIVER_POOL_SIZE={DRIVER_POOL_SIZE} < {demand}: páginas que precisam "
+                        f"de JS esperam por um driver livre.")
+    if backend != "selenium" and HTTP_POOL_SIZE < demand:
+        logging.warning(f"[CONCORRÊNCIA] HTTP_POOL_SIZE={HTTP_POOL_SIZE} < {demand}: conexões keep-alive "
+                        f"excedentes são descartadas a cada busca.")
+    return demand
+
+def build_fetcher(backend, browser, limiter=None):
+    """
+    Monta o fetcher de páginas conforme o backend configurado, com o limite de taxa
+    por host (se houver limiter) e o cache em disco (se ativo) por cima.
+    """
+    if backend == "selenium":
+        fetcher = browser
+    elif backend == "http":
+        fetcher = HttpFetcher(pool_size=HTTP_POOL_SIZE)
+    else:
+        fetcher = FallbackFetcher(HttpFetcher(pool_size=HTTP_POOL_SIZE), browser)
+
+    if limiter is not None:
+        fetcher = RateLimitedFetcher(fetcher, limiter)
+
+    if CACHE_ENABLED:
+        cache = PageCache(CACHE_DIR, max_bytes=CACHE_MAX_MB * 1024 * 1024)
+        fetcher = CachingFetcher(fetcher, cache, CACHE_TTLS, offline=CACHE_OFFLINE)
+
+    if RECORD_DIR:
+        fetcher = RecordingFetcher(fetcher, FixtureCorpus(RECORD_DIR))
+    return fetcher
+
+def load_genre_search_page(driver, wait, waiter=None):
+    """Navega para a busca, seleciona o gênero e retorna o HTML dos resultados (ou None)."""
+    waiter = waiter or ReadinessWaiter()
     driver.get(URL_SEARCH)
-    time.sleep(2)
+    waiter.wait(driver, "search")
     logging.info(f"Navegando para: {driver.current_url}")
 
+    # Primeiro card antes do filtro: quando ele sair do DOM, os resultados foram atualizados
+    old_cards = driver.find_elements(By.CSS_SELECTOR, 'div[role="listitem"]')
+    genre_locator = (By.XPATH, f"//button[contains(text(), '{GENRE_FILTER}')]")
+
     # 3) Clicar no botão do gênero 
     try:
-        genre_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, f"//button[contains(text(), '{GENRE_FILTER}')]"))
-        )
+        genre_button = wait.until(EC.element_to_be_clickable(genre_locator))
         genre_button.click()
         logging.info(f"Gênero **{GENRE_FILTER}** selecionado.")
     except TimeoutException:
         logging.error(f"Timeout ao tentar clicar no botão do gênero '{GENRE_FILTER}'.")
-        return []
+        return None
     except ElementClickInterceptedException:
         logging.error(f"Elemento de gênero interceptado. Tentando novamente...")
-        time.sleep(3)
-        genre_button.click()
-    
-    time.sleep(3)
+        waiter.wait_until(driver, "cookie_banner", EC.invisibility_of_element_located((By.ID, "onetrust-banner-sdk")))
+        wait.until(EC.element_to_be_clickable(genre_locator)).click()
 
-    html = driver.page_source
-    soup = BeautifulSoup(html, "html.parser")
-    
+    if old_cards:
+        waiter.wait_until(driver, "search_filter", EC.staleness_of(old_cards[0]))
+    waiter.wait(driver, "search")
+
+    return driver.page_source
+
+@METRICS.timed("extract.search_artists")
+def extract_search_artists(soup, limit=5 * MAX_ARTISTS, base_url=URL_BASE):
+    """
+    Extrai a lista de artistas (nome e URL) dos cards da página de busca.
+    Por padrão coleta até 5 × MAX_ARTISTS; limit=None lê a página inteira.
+    """
     artist_list_raw = []
     seen_artists = set()
 
-    # Coleta inicial de artistas da página de busca
-    cards = soup.select('div[role="listitem"].w-full.text-black')
-
-    for card in cards:
-        text_links = card.select("a.block.w-full.truncate.text-sm")
+    # Coleta inicial de artistas dos cards da página de busca
+    for card in PLANS["search"]["artists"].run(soup):
+        # o link do artista é geralmente o segundo do card
+        names, hrefs = card["nomes"], card["hrefs"]
+        artist_name = names[1] if len(names) >= 2 else None
 
-        # o link do artista é geralmente o segundo em 'text_links'
-        artist_tag = text_links[1] if len(text_links) >= 2 else None
-        artist_name = artist_tag.get_text(strip=True) if artist_tag else None
-        
         if artist_name == "Various" or not artist_name or artist_name in seen_artists:
             continue
-        
-        artist_url = urljoin(URL_BASE, artist_tag["href"]) if artist_tag and artist_tag.has_attr("href") else None
+
+        artist_url = urljoin(base_url, hrefs[1]) if hrefs[1] is not None else None
 
         if artist_url:
             seen_artists.add(artist_name)
@@ -129,39 +289,43 @@ def select_genre_and_get_artist_list(driver, wait):
                 "Nome_Artista": artist_name,
                 "url_artista": artist_url,
             })
-            if len(artist_list_raw) >= 5 * MAX_ARTISTS: # Coleta mais do que o necessário para ter margem
+            if limit and len(artist_list_raw) >= limit: # Coleta mais do que o necessário para ter margem
                 break
 
     logging.info(f"Total de artistas encontrados na página de busca: {len(artist_list_raw)}")
     return artist_list_raw
 
+def select_genre_and_get_artist_list(driver, wait, waiter=None):
+    """Navega para a busca, seleciona o gênero e extrai a lista inicial de artistas."""
+    html = load_genre_search_page(driver, wait, waiter)
+    if html is None:
+        return []
+    soup = parse_html(html, "search", PARSER_BACKEND, PARSE_PARTIAL)
+    try:
+        return extract_search_artists(soup)
+    finally:
+        release_soup(soup)
+
 # ----------------------
 # FUNÇÕES DE WEB SCRAPING
 # ----------------------
 
+@METRICS.timed("extract.artist_info")
 def extract_artist_info(soup):
     """Extrai informações do artista (membros, sites) da página do perfil."""
     artist_data = {"membros": "Individual", "sites": []}
-    info_section = soup.select_one("div.info_LD8Ql")
-
-    if info_section:
-        for row in info_section.select("tr"):
-            header = row.find("h2")
-            td = row.find("td")
-            if not header or not td:
-                continue
 
-            title = header.get_text(strip=True).rstrip(":")
-
-            # Sites
-            if title == "Sites":
-                artist_data["sites"] = [a["href"] for a in td.find_all("a", href=True)]
+    for row in PLANS["artist"]["info"].run(soup):
+        if row["rotulo"] is None or row["valor"] is None:
+            continue
 
-            # Members
-            elif title == "Members":
-                members = [a.get_text(strip=True) for a in td.find_all("a")]
-                artist_data["membros"] = members if members else "Individual"
+        # Sites
+        if row["rotulo"] == "Sites":
+            artist_data["sites"] = row["hrefs"]
 
+        # Members
+        elif row["rotulo"] == "Members":
+            artist_data["membros"] = row["links"] or "Individual"
 
     return artist_data
 
@@ -198,23 +362,20 @@ def clean_track_position(raw_position):
     # 3. Retorna a posição original se nenhuma regra se aplicar
     return raw_position
 
+@METRICS.timed("extract.album_tracklist")
 def extract_album_tracklist(album_soup):
     """Extrai a lista de faixas, duração e posição do álbum."""
     tracks = []
-    
-    for tr in album_soup.select("tbody tr[data-track-position]"):
-        raw_position = tr.get("data-track-position")
-        
+
+    for row in PLANS["album"]["tracklist"].run(album_soup):
+        raw_position = row["posicao"]
+
         # Chamada da função para limpar a posição
         position = clean_track_position(raw_position)
 
-        # Título da faixa
-        title_el = tr.select_one("td.trackTitle_loyWF span.trackTitle_loyWF")
-        title_track = title_el.get_text(strip=True) if title_el else None
-
-        # Duração
-        dur_el = tr.select_one("td.duration_GhhxK span span")
-        duration = dur_el.get_text(strip=True) if dur_el else None
+        # Título da faixa e duração
+        title_track = row["nome"]
+        duration = row["duracao"]
 
         if position and title_track and duration:
             try:
@@ -225,7 +386,8 @@ def extract_album_tracklist(album_soup):
             tracks.append({
                 "numero_faixa": position_int, 
                 "nome_faixa": title_track,
-                "duracao_faixa": duration
+                "duracao_faixa": duration,
+                "posicao_original": raw_position.strip(), # lado/disco, para a normalização em lote
             })
             
     # Garantir a ordenação por número da faixa
@@ -237,6 +399,7 @@ def extract_album_tracklist(album_soup):
         
     return tracks
 
+@METRICS.timed("extract.album_details")
 def extract_album_details(album_soup):
     """Extrai gravadora, gênero e estilos da página do álbum."""
     album_info = {
@@ -245,186 +408,474 @@ def extract_album_details(album_soup):
         "estilos_album": [],
     }
 
-    info_table = album_soup.select_one("div.info_LD8Ql table.table_c5ftk")
-    if info_table:
-        for tr in info_table.select("tr"):
-            head_el = tr.select_one("th h2")
-            value_td = tr.select_one("td")
-            if not head_el or not value_td:
-                continue
-
-            field = head_el.get_text(strip=True).replace(":", "")
-
-            # LABEL
-            if field == "Label":
-                label_links = [a.get_text(strip=True) for a in value_td.select("a")]
-                if label_links:
-                    album_info["gravadora_album"] = label_links[0]
-                else:
-                    album_info["gravadora_album"] = value_td.get_text(" ", strip=True)
-
-            # GENRE
-            elif field == "Genre":
-                album_info["genero_album"] = [a.get_text(strip=True) for a in value_td.select("a")]
-
-            # STYLE
-            elif field == "Style":
-                album_info["estilos_album"] = [a.get_text(strip=True) for a in value_td.select("a")]
-                
+    for row in PLANS["album"]["details"].run(album_soup):
+        field = row["rotulo"]
+        if field is None or row["valor"] is None:
+            continue
+
+        # LABEL
+        if field == "Label":
+            album_info["gravadora_album"] = row["links"][0] if row["links"] else row["valor"]
+
+        # GENRE
+        elif field == "Genre":
+            album_info["genero_album"] = row["links"]
+
+        # STYLE
+        elif field == "Style":
+            album_info["estilos_album"] = row["links"]
+
     return album_info
 
-def scrape_album_page(driver, album_url):
-    """Navega e raspa detalhes e tracklist de um álbum."""
+@METRICS.timed("extract.artist_albums")
+def extract_artist_albums(artist_soup, base_url=URL_BASE):
+    """Extrai a lista inicial de álbuns (título, ano e URL) da página do artista."""
+    albums_raw = []
+    seen_albums = set()
+
+    for row in PLANS["artist"]["albums"].run(artist_soup, limit=MAX_ALBUMS * 2):
+
+        if len(albums_raw) >= MAX_ALBUMS:
+            break
+
+        # Link principal (capa)
+        if row["url"] is None:
+            continue
+
+        full_url = urljoin(base_url, row["url"])
+
+        # Título (layout de desktop ou mobile) e Ano
+        title = row["titulo"] if row["titulo"] is not None else row["titulo_mobile"]
+        title = title if title is not None else "UNKNOWN_TITLE"
+        year = row["ano"] if row["ano"] is not None else "UNKNOWN_YEAR"
+
+        # Evitar duplicados no loop inicial
+        key = (title, year)
+        if key in seen_albums:
+            continue
+        seen_albums.add(key)
+
+        albums_raw.append({
+            "nome_album": title,
+            "url_album": full_url,
+            "ano_lancamento": year,
+        })
+
+    return albums_raw
+
+def parse_artist_page(html, artist_url, backend=PARSER_BACKEND, partial=PARSE_PARTIAL):
+    """Extrai membros, sites e a lista inicial de álbuns do HTML de um artista."""
+    artist_soup = parse_html(html, "artist", backend, partial)
     try:
-        driver.get(album_url)
-    except TimeoutException:
-        logging.warning(f"[TIMEOUT] Não consegui carregar o álbum: {album_url}")
-        # Tentativa de interromper o carregamento lento
+        return {
+            **extract_artist_info(artist_soup),
+            "albuns": extract_artist_albums(artist_soup, artist_url),
+        }
+    finally:
+        release_soup(artist_soup)
+
+def parse_album_page(html, album_url, backend=PARSER_BACKEND, partial=PARSE_PARTIAL, embedded=EMBEDDED_DATA):
+    """
+    Extrai detalhes e tracklist do HTML de um álbum.
+    Com embedded=True, usa os dados estruturados da página (sem montar o DOM) e só
+    recorre às funções extract_* para os campos que não estiverem no blob.
+    """
+    album = extract_embedded_album(html) if embedded else {}
+
+    if not all(field in album for field in ALBUM_FIELDS):
+        album_soup = parse_html(html, "album", backend, partial)
         try:
-            driver.execute_script("window.stop();")
-        except Exception:
-            pass
+            if "faixas_album" not in album:
+                album["faixas_album"] = extract_album_tracklist(album_soup)
+            if album["faixas_album"]:
+                for field, value in extract_album_details(album_soup).items():
+                    album.setdefault(field, value)
+        finally:
+            release_soup(album_soup)
+
+    if not album["faixas_album"]:
+        logging.info(f"Álbum ignorado (sem faixas válidas): {album_url}")
         return None
 
-    time.sleep(1) 
-    album_soup = BeautifulSoup(driver.page_source, "html.parser")
-    
-    tracks = extract_album_tracklist(album_soup)
-    if not tracks:
-        logging.info(f"Álbum ignorado (sem faixas válidas): {album_url}")
+    return {field: album[field] for field in ALBUM_FIELDS}
+
+def scrape_album_page(fetcher, album_url, parse_pool=None):
+    """
+    Busca e raspa detalhes e tracklist de um álbum.
+    Com um ParsePool, o parse roda num processo separado enquanto esta thread só espera.
+    """
+    page = fetcher.fetch(album_url, "album")
+    if page is None:
+        logging.warning(f"Não consegui carregar o álbum: {album_url}")
         return None
-        
-    album_details = extract_album_details(album_soup)
-    
-    return {
-        "faixas_album": tracks,
-        **album_details
-    }
+
+    if parse_pool is not None:
+        return parse_pool.parse("album", page.html, page.url)
+    return parse_album_page(page.html, album_url)
+
+def scrape_album_resumable(fetcher, state, album_url, parse_pool=None):
+    """scrape_album_page que reaproveita e registra o resultado no estado persistente do crawl."""
+    if state is None:
+        return scrape_album_page(fetcher, album_url, parse_pool)
+
+    saved = state.lookup(album_url)
+    if saved is not MISSING:
+        return saved
+
+    state.mark_in_progress(album_url, "album")
+    try:
+        scraped_data = scrape_album_page(fetcher, album_url, parse_pool)
+    except RetryLater as e:
+        state.mark_failed(album_url, "album", e) # volta pela RetryQueue do AlbumPipeline
+        raise
+    if scraped_data:
+        state.mark_done(album_url, "album", scraped_data)
+    else:
+        state.mark_failed(album_url, "album", "sem faixas válidas ou falha ao carregar")
+    return scraped_data
 
 # ----------------------
 # FLUXO PRINCIPAL
 # ----------------------
 
-def run_scraper():
-    """Executa o fluxo completo de raspagem de dados."""
-    driver = setup_driver()
-    if not driver:
-        return
+def process_artist(fetcher, album_pipeline, artist_item, state=None, parse_pool=None, dedupe=None, changes=None):
+    """
+    Raspa um artista e sua discografia. Retorna None se ele não tiver álbuns válidos.
+    Com um CrawlState, artistas já concluídos são reaproveitados sem nova busca.
+    Com um DedupeIndex, lançamentos já vistos no run (sob outro artista) entram na discografia
+    sem nova busca: o pipeline deve ter sido criado com single_flight=dedupe.
+    Com um ChangeTracker, só os álbuns novos ou alterados desde o último snapshot são buscados.
+    """
+    artist_name = artist_item["Nome_Artista"]
+    artist_url = artist_item["url_artista"]
 
-    wait = WebDriverWait(driver, 10)
-    
-    try:
-        handle_initial_popups(driver, wait)
-        artist_list_raw = select_genre_and_get_artist_list(driver, wait)
-        
-        final_artists_data = []
+    if not artist_url:
+        return None
 
-        # 1. Iterar sobre a lista bruta de artistas
-        for artist_item in artist_list_raw:
-            if len(final_artists_data) >= MAX_ARTISTS:
-                break
+    if state is not None:
+        saved = state.lookup(artist_url)
+        if saved is not MISSING:
+            logging.info(f"Artista '{artist_name}' já coletado anteriormente; reaproveitando.")
+            return saved
+        state.mark_in_progress(artist_url, "artist")
 
-            artist_name = artist_item["Nome_Artista"]
-            artist_url = artist_item["url_artista"]
-            
-            logging.info(f"\nProcessando artista: **{artist_name}**")
+    logging.info(f"\nProcessando artista: **{artist_name}**")
+
+    try:
+        artist_data = _scrape_artist(
+            fetcher, album_pipeline, artist_name, artist_url, parse_pool,
+            artist_item.get("genero", GENRE_FILTER), dedupe, changes,
+        )
+    except Exception as e:
+        if state is not None:
+            state.mark_failed(artist_url, "artist", e)
+        if changes is not None:
+            changes.keep(artist_id_from_url(artist_url))
+        raise
+
+    if artist_data is False and changes is not None:
+        changes.keep(artist_id_from_url(artist_url))
+
+    if state is not None:
+        if artist_data is False:
+            state.mark_failed(artist_url, "artist", "falha ao carregar a página")
+        else:
+            state.mark_done(artist_url, "artist", artist_data)
+    return artist_data or None
+
+def _scrape_artist(fetcher, album_pipeline, artist_name, artist_url, parse_pool=None, genre=GENRE_FILTER,
+                   dedupe=None, changes=None):
+    """Busca o artista e seus álbuns. Retorna False se a página do artista não carregar."""
+    # 2. Coletar dados do artista e lista inicial de álbuns
+    artist_page = fetch_with_retries(
+        fetcher, artist_url, "artist", FETCH_RETRIES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP
+    )
+    if artist_page is None:
+        logging.warning(f"Não consegui carregar o artista: {artist_url}")
+        return False
+
+    # 3. Membros, sites e a lista inicial de álbuns (num processo de parse, se houver pool)
+    if parse_pool is not None:
+        artist_info = parse_pool.parse("artist", artist_page.html, artist_page.url)
+    else:
+        artist_info = parse_artist_page(artist_page.html, artist_page.url)
+    if changes is not None:
+        # Linhas da discografia iguais às do último snapshot: nenhum álbum é buscado
+        saved = changes.check_artist(artist_id_from_url(artist_url), artist_info["albuns"])
+        if saved is not None:
+            return build_artist_record(artist_name, artist_url, genre, artist_info, saved[:MAX_ALBUMS])
+    albums_raw = artist_info["albuns"]
+    if DISCOGRAPHY_SOURCE == "listing":
+        selection = DiscographyFilter(DISCOGRAPHY_ROLES, DISCOGRAPHY_FORMATS, *DISCOGRAPHY_YEARS)
+        albums_raw = iter_discography(
+            fetcher, artist_page.url, artist_page.url, selection, fallback=albums_raw,
+            listing_url=DISCOGRAPHY_LISTING_URL, retries=FETCH_RETRIES,
+        )
+    if dedupe is not None:
+        # Repetidos deste artista saem; os de outros artistas ficam e o pipeline reaproveita (single_flight)
+        albums_raw = dedupe.albums(albums_raw, ONE_RELEASE_PER_MASTER)
+    if changes is not None:
+        # Álbuns cuja linha não mudou voltam do snapshot, sem busca nem parse
+        albums_raw = changes.reusable_albums(artist_id_from_url(artist_url), albums_raw)
+
+    # 4. Buscar os álbuns em paralelo para coletar tracklist e detalhes
+    discography = [
+        build_album_record(album_data_raw, scraped_data)
+        for album_data_raw, scraped_data in album_pipeline.run(albums_raw, MAX_ALBUMS)
+    ]
+
+    # 5. Montar o artista final se tiver álbuns válidos
+    return build_artist_record(artist_name, artist_url, genre, artist_info, discography)
+
+def build_album_record(album_data_raw, scraped_data):
+    """Álbum final: dados da listagem (nome, ano, URL) mais o que foi raspado da página."""
+    return {
+        # ID estável do Discogs ("release:123" / "master:45"), no lugar do antigo UUID aleatório
+        "id_album": discogs_id(album_data_raw["url_album"]),
+        "nome_album": album_data_raw["nome_album"],
+        "ano_lancamento": album_data_raw["ano_lancamento"],
+        "url_album": album_data_raw["url_album"],
+        **scraped_data
+    }
 
-            if not artist_url:
-                continue
+def build_artist_record(artist_name, artist_url, genre, artist_info, discography):
+    """Artista final com a discografia, ou None se nenhum álbum for válido."""
+    if not discography:
+        logging.warning(f"Artista '{artist_name}' ignorado (sem álbuns válidos).")
+        return None
 
-            # 2. Coletar dados do artista e lista inicial de álbuns
-            driver.get(artist_url)
-            time.sleep(2)
-            artist_soup = BeautifulSoup(driver.page_source, "html.parser")
-            
-            artist_info = extract_artist_info(artist_soup)
-            
-            # 3. Coleta inicial da lista de álbuns
-            albums_raw = []
-            seen_albums = set()
-            
-            # Tenta diferentes seletores para álbuns
-            for row in artist_soup.select("tr.textWithCoversRow_Xv0h3")[:MAX_ALBUMS * 2]:
-                
-                if len(albums_raw) >= MAX_ALBUMS:
-                    break
+    logging.info(f"Artista '{artist_name}' adicionado com **{len(discography)}** álbuns.")
+    return {
+        # ID do artista no Discogs, estável entre runs (UUID só se a URL não tiver ID)
+        "id_artista": artist_id_from_url(artist_url) or str(uuid.uuid4()),
+        "genero": genre,
+        "nome_artista": artist_name,
+        "membros_artista": artist_info["membros"],
+        "sites_artista": artist_info["sites"],
+        "albuns": discography,
+    }
 
-                # Link principal (capa)
-                main_link = row.select_one("td:first-of-type a.link_wXY7O")
-                if not main_link:
-                    continue
-
-                full_url = urljoin(URL_BASE, main_link.get("href", ""))
-
-                # Título e Ano
-                title_a = row.select_one("td.title_K9_iv a.link_wXY7O") or row.select_one("td.mobileStacked_Zbgf9 a.link_wXY7O")
-                title = title_a.get_text(strip=True) if title_a else "UNKNOWN_TITLE"
-                
-                year_td = row.select_one("td.year_o3FNi")
-                year = year_td.get_text(strip=True) if year_td else "UNKNOWN_YEAR"
-                
-                # Evitar duplicados no loop inicial
-                key = (title, year)
-                if key in seen_albums:
-                    continue
-                seen_albums.add(key)
-                
-                albums_raw.append({
-                    "nome_album": title,
-                    "url_album": full_url,
-                    "ano_lancamento": year,
-                })
-
-            # 4. Navegar em cada álbum para coletar tracklist e detalhes
-            discography = []
-            for album_data_raw in albums_raw:
-                if len(discography) >= MAX_ALBUMS:
+def process_artists_in_parallel(process, artists, max_artists, workers, emit, guard=None):
+    """
+    Processa artistas em threads, mantendo a ordem da busca e o corte de max_artists.
+    `artists` pode ser uma lista ou um gerador preguiçoso (discover_artists): o próximo
+    artista só é pedido quando há uma thread livre e ele ainda pode entrar no corte.
+    Cada artista é entregue a `emit` assim que ele e todos os anteriores na ordem da
+    busca terminam, e não fica retido em memória depois disso. Enquanto espera os
+    anteriores, fica na forma compacta de records.py. Com um MemoryGuard acima do
+    teto, só um artista é processado por vez até a memória voltar. Retorna quantos
+    artistas foram emitidos.
+    """
+    artists = iter(artists)
+    exhausted = False
+    results = {}
+    pending = {}
+    found = 0
+    emitted = 0
+    next_index = 0
+    next_emit = 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="artista") as executor:
+        while not exhausted or pending:
+            # Acima do teto de memória, nada novo entra enquanto houver artistas em andamento
+            limit = 1 if guard is not None and guard.over_ceiling() else workers
+            while not exhausted and len(pending) < limit and found + len(pending) < max_artists:
+                artist_item = next(artists, None)
+                if artist_item is None:
+                    exhausted = True
                     break
-                
-                scraped_data = scrape_album_page(driver, album_data_raw["url_album"])
-                
-                if scraped_data:
-                    final_album = {
-                        # "id_album": str(uuid.uuid4()), <--- REMOVIDO CONFORME SOLICITADO
-                        "nome_album": album_data_raw["nome_album"],
-                        "ano_lancamento": album_data_raw["ano_lancamento"],
-                        **scraped_data
-                    }
-                    discography.append(final_album)
-            
-            # 5. Adicionar artista final se tiver álbuns válidos
-            if discography:
-                artist_data = {
-                    "id_artista": str(uuid.uuid4()), 
-                    "genero": GENRE_FILTER, 
-                    "nome_artista": artist_name,
-                    "membros_artista": artist_info["membros"],
-                    "sites_artista": artist_info["sites"],
-                    "albuns": discography,
-                }
-                final_artists_data.append(artist_data)
-                logging.info(f"Artista '{artist_name}' adicionado com **{len(discography)}** álbuns.")
-            else:
-                logging.warning(f"Artista '{artist_name}' ignorado (sem álbuns válidos).")
-
-        # 6. Salvar em JSONL
-        save_to_jsonl(final_artists_data)
+                future = executor.submit(process, artist_item)
+                pending[future] = (next_index, artist_item)
+                next_index += 1
+
+            if not pending:
+                break
+
+            done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, artist_item = pending.pop(future)
+                try:
+                    results[index] = compact(future.result())
+                except Exception as e:
+                    results[index] = None
+                    logging.error(f"Erro ao processar artista {artist_item['Nome_Artista']}: {e}", exc_info=True)
+                if results[index]:
+                    found += 1
+
+            # Emite o prefixo já concluído, na ordem da busca
+            while next_emit in results:
+                artist = results.pop(next_emit)
+                if artist and emitted < max_artists:
+                    emit(artist.to_dict())
+                    emitted += 1
+                next_emit += 1
+
+    return emitted
+
+def run_scraper(incremental=False, changes=False):
+    """
+    Executa o fluxo completo de raspagem de dados.
+    O progresso fica em STATE_FILE: um run interrompido é retomado de onde parou e,
+    com incremental=True, só entidades novas ou mais antigas que INCREMENTAL_MAX_AGE_DAYS
+    são buscadas de novo. Com changes=True, o run é comparado ao snapshot de CHANGES_FILE:
+    só álbuns novos ou alterados são buscados e as diferenças vão para DELTA_FILE.
+    """
+    METRICS.reset()
+    exporter = MetricsExporter(METRICS, METRICS_FILE, METRICS_PORT, METRICS_INTERVAL) \
+        if METRICS_FILE or METRICS_PORT is not None else None
+    state = CrawlState(STATE_FILE)
+    state.begin_run(incremental, INCREMENTAL_MAX_AGE_DAYS * 24 * 3600)
+    waiter = ReadinessWaiter(max_timeout=PAGE_READY_TIMEOUT)
+    pool = DriverPool(
+        partial(create_browser_session, waiter), DRIVER_POOL_SIZE, DRIVER_MAX_MEMORY_MB, DRIVER_MAX_PAGES
+    )
+    browser = PooledSeleniumFetcher(pool, waiter=waiter)
+    limiter = AdaptiveRateLimiter(RATE_LIMIT_START, RATE_LIMIT_MIN, RATE_LIMIT_MAX)
+    fetcher = build_fetcher(FETCH_BACKEND, browser, limiter)
+    check_concurrency(FETCH_BACKEND)
+    dedupe = DedupeIndex(DEDUPE_FILE, DEDUPE_CAPACITY, load=state.lookup)
+    store = RecordStore(STORE_FILE) if STORE_FILE else None
+    parse_pool = ParsePool(PARSE_WORKERS, PARSER_BACKEND, PARSE_PARTIAL) if PARSE_WORKERS != 0 else None
+    tracker = ChangeTracker(CHANGES_FILE, DELTA_FILE, CHANGES_RECHECK_DAYS) if changes else None
+    scrape_album = partial(scrape_album_resumable, fetcher, state, parse_pool=parse_pool)
+    if tracker is not None:
+        tracker.begin_run()
+        scrape_album = partial(tracker.scrape_album, scrape_album)
+    album_pipeline = AlbumPipeline(
+        scrape_album,
+        ALBUM_CONCURRENCY, ALBUM_CONCURRENCY_PER_HOST,
+        FETCH_RETRIES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP,
+        single_flight=dedupe,
+    )
+    guard = MemoryGuard(MEMORY_CEILING_MB)
+    total_artists = 0
+
+    try:
+        # Descoberta paginada pela URL da busca (genre_exp/style_exp), gênero a gênero e
+        # estilo a estilo. As páginas passam pelo fetcher, então usam o cache e o limite
+        # de taxa, e só são buscadas à medida que os artistas anteriores são consumidos.
+        artists = discover_artists(
+            fetcher, URL_SEARCH, GENRES, STYLES, SEARCH_MAX_PAGES, seen=dedupe,
+            on_page=lambda found: state.enqueue([item["url_artista"] for item in found], "artist"),
+            retries=FETCH_RETRIES, parser_backend=PARSER_BACKEND, partial=PARSE_PARTIAL,
+        )
+
+        # 1. Processar os artistas em paralelo (cada um usa o fetcher e, se preciso, um driver do pool).
+        # 6. Cada artista concluído já é gravado no JSONL, sem esperar o fim do run.
+        # Com STORE_FILE, os artistas vão para o banco e o JSONL é exportado dele no fim.
+        with nullcontext(store) if store is not None else open_output_sink() as sink, \
+                open_columnar_sink() as columnar:
+            guard.add_flush(getattr(sink, "flush", None)) # lote pendente do banco
+            guard.add_flush(getattr(columnar, "flush", None)) # row group em montagem
+            total_artists = process_artists_in_parallel(
+                partial(process_artist, fetcher, album_pipeline, state=state, parse_pool=parse_pool, dedupe=dedupe,
+                        changes=tracker),
+                artists, MAX_ARTISTS, ARTIST_WORKERS, partial(emit_artist, sink, columnar, changes=tracker), guard,
+            )
+        if store is not None:
+            with open_output_sink() as sink:
+                store.export_jsonl(sink, normalized=NORMALIZE_TRACKS)
+        logging.info(f"Dados salvos com sucesso em: **{', '.join(sink.segments)}**")
+        if tracker is not None:
+            tracker.finish_run()
+        state.finish_run()
 
     except Exception as e:
         logging.critical(f"Erro Crítico no fluxo principal: {e}", exc_info=True)
     finally:
-        driver.quit()
-        logging.info("Driver encerrado.")
-        logging.info(f"Total de artistas coletados (com >=1 álbum): **{len(final_artists_data)}**")
-
+        album_pipeline.close()
+        if parse_pool is not None:
+            parse_pool.close()
+        # O relatório vem antes dos close(): cache, banco e índice ainda respondem
+        if RUN_REPORT_FILE:
+            METRICS.write_report(RUN_REPORT_FILE, {
+                "artists": total_artists,
+                "waits": waiter.report(),
+                "browser": transfer_report(METRICS.report()["counters"]),
+                "rate_limit": limiter.report(),
+                "dedupe": dedupe.report(),
+                "cache": fetcher.report() if hasattr(fetcher, "report") else None,
+                "store": store.report() if store is not None else None,
+                "frontier": state.counts(),
+                "memory": guard.report(),
+                "changes": tracker.report() if tracker is not None else None,
+            })
+        METRICS.log_report()
+        waiter.log_report()
+        limiter.log_report()
+        dedupe.log_report()
+        dedupe.close()
+        if store is not None:
+            store.log_report()
+            store.close()
+        if tracker is not None:
+            tracker.log_report()
+            tracker.close()
+        if hasattr(fetcher, "log_report"):
+            fetcher.log_report()
+        fetcher.close()
+        if fetcher is not browser:
+            browser.close()
+        logging.info(f"[ESTADO] Entidades reaproveitadas: {state.reused} | fronteira: {state.counts()}")
+        if exporter is not None:
+            exporter.close()
+        state.close()
+        logging.info(f"Total de artistas coletados (com >=1 álbum): **{total_artists}**")
+
+
+def emit_artist(sink, columnar, artist, changes=None):
+    """
+    Grava um artista concluído na saída (JSONL ou banco) e nas tabelas colunares, se ativas.
+    Com um ChangeTracker, o artista também é comparado ao snapshot anterior (delta).
+    Sem NORMALIZE_TRACKS, o registro emitido não leva a posicao_original das faixas;
+    o banco (que exporta conforme NORMALIZE_TRACKS) e as tabelas colunares a recebem.
+    """
+    if NORMALIZE_TRACKS:
+        artist = enrich_records([artist])[0]
+        record = artist
+    else:
+        record = without_raw_positions(artist)
+    if changes is not None:
+        changes.record(record)
+    with METRICS.stage("write"):
+        sink.write(artist if isinstance(sink, RecordStore) else record)
+        if columnar is not None:
+            columnar.write(artist)
+    METRICS.count("artists_written")
+    METRICS.count("albums_written", len(artist["albuns"]))
+
+def open_output_sink():
+    """Abre o JsonlSink de OUTPUT_FILE com a rotação e compressão configuradas."""
+    return JsonlSink(
+        OUTPUT_FILE,
+        rotate_bytes=OUTPUT_ROTATE_MB * 1024 * 1024 if OUTPUT_ROTATE_MB else None,
+        rotate_seconds=OUTPUT_ROTATE_MINUTES * 60 if OUTPUT_ROTATE_MINUTES else None,
+        compression=OUTPUT_COMPRESSION,
+    )
+
+def open_columnar_sink():
+    """Abre o ColumnarSink de OUTPUT_COLUMNAR ao lado do JSONL (ou um contexto vazio, se desativado)."""
+    if not OUTPUT_COLUMNAR:
+        return nullcontext()
+    return ColumnarSink(OUTPUT_FILE, OUTPUT_COLUMNAR, OUTPUT_ROW_GROUP_TRACKS)
 
 def save_to_jsonl(data):
     """Salva a lista de dicionários no formato JSONL."""
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+    with open_output_sink() as sink:
         for item in data:
-            f.write(json.dumps(item, ensure_ascii=False) + '\n')
-    logging.info(f"Dados salvos com sucesso no arquivo: **{OUTPUT_FILE}**")
+            sink.write(item)
+    logging.info(f"Dados salvos com sucesso em: **{', '.join(sink.segments)}**")
 
 
 if __name__ == "__main__":
-    run_scraper()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scraper de artistas e álbuns do Discogs.")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Busca só artistas/álbuns novos ou mais antigos que INCREMENTAL_MAX_AGE_DAYS.",
+    )
+    parser.add_argument(
+        "--mudancas", action="store_true",
+        help="Busca só álbuns novos ou alterados desde o último snapshot (CHANGES_FILE) e grava o delta em DELTA_FILE.",
+    )
+    args = parser.parse_args()
+    run_scraper(incremental=args.incremental, changes=args.mudancas)
\ No newline at end of file
@@ -0,0 +1,69 @@
+import logging
+from urllib.parse import urlencode
+
+from dedupe import DedupeIndex, normalize_url
+from parsers import parse_html, release_soup
+from rate_limiter import fetch_with_retries
+
+SEARCH_PAGE_SIZE = 250 # Maior página de resultados aceita pela busca do Discogs
+
+
+def search_page_url(base_url, genre=None, style=None, page=1, per_page=SEARCH_PAGE_SIZE):
+    """URL de uma página de resultados da busca filtrada por gênero e/ou estilo."""
+    params = {}
+    if genre:
+        params["genre_exp"] = genre
+    if style:
+        params["style_exp"] = style
+    params["limit"] = per_page
+    params["page"] = page
+    return f"{base_url}?{urlencode(params)}"
+
+
+def discover_artists(fetcher, base_url, genres=(), styles=(), max_pages=None, per_page=SEARCH_PAGE_SIZE,
+                     seen=None, on_page=None, retries=3, parser_backend=None, partial=True):
+    """
+    Gerador preguiçoso de artistas (dicts com Nome_Artista, url_artista e genero).
+
+    Percorre as páginas de resultado de cada gênero e depois de cada estilo, buscando
+    a próxima página só quando os artistas da anterior já foram consumidos. Um artista
+    aparece uma única vez no run, mesmo que surja em vários filtros: `seen` é um
+    DedupeIndex (URLs normalizadas), que pode ser compartilhado com o resto do run.
+    Um filtro termina numa página vazia, repetida ou após max_pages páginas.
+    `on_page`, se dado, recebe a lista de artistas novos de cada página.
+    """
+    # Import tardio: o discogs_scraper importa este módulo
+    from discogs_scraper import extract_search_artists
+
+    seen = DedupeIndex() if seen is None else seen
+    filters = [(genre, None) for genre in genres] + [(None, style) for style in styles]
+
+    for genre, style in filters:
+        label = genre or style
+        previous_keys = None
+        page = 1
+        while max_pages is None or page <= max_pages:
+            url = search_page_url(base_url, genre, style, page, per_page)
+            search_page = fetch_with_retries(fetcher, url, "search", retries)
+            if search_page is None:
+                logging.warning(f"[BUSCA] Não consegui carregar {url}; encerrando o filtro '{label}'.")
+                break
+
+            soup = parse_html(search_page.html, "search", parser_backend, partial)
+            found = extract_search_artists(soup, limit=None, base_url=search_page.url)
+            release_soup(soup)
+            keys = [normalize_url(item["url_artista"]) for item in found]
+            if not found or keys == previous_keys:
+                break
+            previous_keys = keys
+
+            new_artists = []
+            for item in found:
+                if seen.add(item["url_artista"], "artist"):
+                    new_artists.append({**item, "genero": label})
+
+            logging.info(f"[BUSCA] '{label}' página {page}: {len(found)} artistas, {len(new_artists)} novos.")
+            if on_page is not None and new_artists:
+                on_page(new_artists)
+            yield from new_artists
+            page += 1
@@ -0,0 +1,464 @@
+"""
+Crawl distribuído: um coordenador e qualquer número de workers ligados por uma
+fila com leases (TaskQueue).
+
+O coordenador faz a descoberta de artistas e enfileira cada um. Um worker busca
+a página do artista e devolve a lista de álbuns candidatos; o coordenador
+enfileira os álbuns, e os workers buscam e extraem cada página de álbum. Quando
+todos os álbuns de um artista terminam, o coordenador monta o artista e o grava
+na saída (JSONL, banco, tabelas colunares), na ordem da descoberta. Se faltarem
+álbuns válidos, ele enfileira os próximos candidatos.
+
+Com QUEUE_URL (redis://...), a fila fica num servidor Redis e os workers podem
+rodar em várias máquinas, cada uma com o seu IP e o seu limite de taxa, todas
+consumindo a mesma fila. Sem ela, a fila é o arquivo SQLite QUEUE_FILE, e os
+workers são processos da mesma máquina. Um worker que cai perde o lease e as suas
+tarefas voltam para a fila.
+
+Uso: python distributed.py coordenador redis://fila.exemplo:6379/0
+     python distributed.py worker redis://fila.exemplo:6379/0 --threads 8   # em cada máquina
+     python distributed.py local fila_discogs.sqlite --workers 4
+"""
+import os
+import time
+import socket
+import logging
+import argparse
+import threading
+import multiprocessing
+from functools import partial
+from contextlib import nullcontext
+from itertools import islice
+
+import discogs_scraper as ds
+from dedupe import DedupeIndex, album_key
+from discography import DiscographyFilter, iter_discography
+from discovery import discover_artists
+from driver_pool import DriverPool, PooledSeleniumFetcher
+from instrumentation import METRICS
+from parse_pool import ParsePool
+from rate_limiter import AdaptiveRateLimiter, RetryLater, backoff_delay, fetch_with_retries
+from readiness import ReadinessWaiter
+from record_store import RecordStore
+from work_queue import DONE, FAILED, REDIS_SCHEMES, open_work_queue
+
+# Álbuns têm prioridade sobre artistas: os workers terminam os artistas em andamento
+# antes de começar novos, e o coordenador consegue gravá-los mais cedo.
+ARTIST_PRIORITY = 0
+ALBUM_PRIORITY = 1
+# Marca na fila com o número do último run que o coordenador encerrou (os workers
+# daquele run saem quando ela aparece e a fila esvazia)
+CLOSED = "fechada"
+
+
+def open_queue():
+    """Abre a fila de QUEUE_URL (Redis) ou, sem ela, de QUEUE_FILE (SQLite), com o lease e as tentativas configurados."""
+    return open_work_queue(ds.QUEUE_URL or ds.QUEUE_FILE, ds.QUEUE_LEASE_SECONDS, ds.QUEUE_MAX_ATTEMPTS)
+
+
+class _FetchStack:
+    """Fetcher completo de um processo (drivers, limite de taxa, cache), montado como no run_scraper."""
+
+    def __init__(self):
+        self.waiter = ReadinessWaiter(max_timeout=ds.PAGE_READY_TIMEOUT)
+        pool = DriverPool(
+            partial(ds.create_browser_session, self.waiter), ds.DRIVER_POOL_SIZE,
+            ds.DRIVER_MAX_MEMORY_MB, ds.DRIVER_MAX_PAGES,
+        )
+        self.browser = PooledSeleniumFetcher(pool, waiter=self.waiter)
+        self.limiter = AdaptiveRateLimiter(ds.RATE_LIMIT_START, ds.RATE_LIMIT_MIN, ds.RATE_LIMIT_MAX)
+        self.fetcher = ds.build_fetcher(ds.FETCH_BACKEND, self.browser, self.limiter)
+
+    def close(self):
+        self.waiter.log_report()
+        self.limiter.log_report()
+        if hasattr(self.fetcher, "log_report"):
+            self.fetcher.log_report()
+        self.fetcher.close()
+        if self.fetcher is not self.browser:
+            self.browser.close()
+
+
+# ----------------------
+# WORKER
+# ----------------------
+
+def scrape_artist_candidates(fetcher, artist_url, parse_pool=None, limit=None):
+    """
+    Busca a página do artista e devolve membros, sites e até `limit` álbuns candidatos
+    (da listagem da discografia, com os filtros configurados). None se a página não carregar.
+    """
+    artist_page = fetch_with_retries(
+        fetcher, artist_url, "artist", ds.FETCH_RETRIES, ds.RETRY_BACKOFF_BASE, ds.RETRY_BACKOFF_CAP
+    )
+    if artist_page is None:
+        return None
+
+    if parse_pool is not None:
+        artist_info = parse_pool.parse("artist", artist_page.html, artist_page.url)
+    else:
+        artist_info = ds.parse_artist_page(artist_page.html, artist_page.url)
+    albums_raw = artist_info["albuns"]
+    if ds.DISCOGRAPHY_SOURCE == "listing":
+        selection = DiscographyFilter(ds.DISCOGRAPHY_ROLES, ds.DISCOGRAPHY_FORMATS, *ds.DISCOGRAPHY_YEARS)
+        albums_raw = iter_discography(
+            fetcher, artist_page.url, artist_page.url, selection, fallback=albums_raw,
+            listing_url=ds.DISCOGRAPHY_LISTING_URL, retries=ds.FETCH_RETRIES,
+        )
+    return {"membros": artist_info["membros"], "sites": artist_info["sites"],
+            "candidatos": list(islice(albums_raw, limit))}
+
+
+class Worker:
+    """
+    Consome a fila em `threads` threads: cada uma reserva uma tarefa, processa com os
+    extractors de sempre e grava o resultado na fila. Sai quando o coordenador fecha
+    o run e não há mais nada a fazer (ou após idle_timeout s sem tarefas).
+
+    Com run_id, o worker é daquele run. Sem ele, é do run em andamento; se a fila
+    estiver fechada por um run já encerrado (worker iniciado antes do coordenador),
+    ele espera o próximo run em vez de sair.
+    """
+
+    def __init__(self, queue, fetcher, threads=4, parse_pool=None, name=None, poll_interval=0.2,
+                 idle_timeout=None, run_id=None):
+        self.queue = queue
+        self.fetcher = fetcher
+        self.threads = threads
+        self.parse_pool = parse_pool
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.run_id = run_id
+        self._stale_run = None
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._held = {} # owner (thread) -> tarefa em processamento, para a renovação do lease
+
+    def handle(self, task):
+        if task.kind == "artist":
+            return scrape_artist_candidates(
+                self.fetcher, task.url, self.parse_pool, ds.MAX_ALBUMS * ds.DISTRIBUTED_CANDIDATE_FACTOR
+            )
+        # None (álbum sem faixas válidas ou que não carregou) também é um resultado final
+        return ds.scrape_album_page(self.fetcher, task.url, self.parse_pool)
+
+    def _loop(self, owner):
+        idle_since = time.monotonic()
+        while True:
+            tasks = self.queue.claim(owner)
+            if not tasks:
+                if self._closed():
+                    return
+                if self.idle_timeout is not None and time.monotonic() - idle_since > self.idle_timeout:
+                    logging.warning(f"[WORKER] {owner} sem tarefas há {self.idle_timeout}s; saindo.")
+                    return
+                time.sleep(self.poll_interval)
+                continue
+
+            idle_since = time.monotonic()
+            task = tasks[0]
+            with self._lock:
+                self._held[owner] = task
+            try:
+                result = self.handle(task)
+            except RetryLater as e:
+                delay = backoff_delay(task.attempts, ds.RETRY_BACKOFF_BASE, ds.RETRY_BACKOFF_CAP, e.retry_after)
+                self.queue.fail(task, owner, e, retry_after=delay)
+                continue
+            except Exception as e:
+                logging.error(f"[WORKER] Erro em {task.url}: {e}", exc_info=True)
+                self.queue.fail(task, owner, e)
+                continue
+            finally:
+                with self._lock:
+                    self._held.pop(owner, None)
+
+            if result is None and task.kind == "artist":
+                self.queue.fail(task, owner, "falha ao carregar a página")
+            else:
+                self.queue.complete(task, owner, result)
+            with self._lock:
+                self.processed += 1
+
+    def _closed(self):
+        """O run deste worker foi encerrado pelo coordenador?"""
+        closed = self.queue.get_meta(CLOSED)
+        if closed is None:
+            return False
+        if self.run_id is not None:
+            return closed >= self.run_id
+        return closed == self.queue.current_run() and closed != self._stale_run
+
+    def _renew_leases(self, stop):
+        """Renova, a cada terço do lease, as tarefas em processamento (páginas lentas não perdem o lease)."""
+        while not stop.wait(self.queue.lease_seconds / 3):
+            with self._lock:
+                held = list(self._held.items())
+            for owner, task in held:
+                self.queue.renew(task, owner)
+
+    def run(self):
+        if self.run_id is None and self.queue.get_meta(CLOSED) == self.queue.current_run():
+            self._stale_run = self.queue.current_run()
+            logging.info(f"[WORKER] Run #{self._stale_run} já encerrado; aguardando o próximo run do coordenador.")
+        threads = [
+            threading.Thread(target=self._loop, args=(f"{self.name}/{i}",), name=f"worker-{i}")
+            for i in range(self.threads)
+        ]
+        stop = threading.Event()
+        renewer = threading.Thread(target=self._renew_leases, args=(stop,), name="worker-lease", daemon=True)
+        renewer.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        logging.info(f"[WORKER] {self.name}: {self.processed} tarefas processadas.")
+        return self.processed
+
+
+def run_worker(threads=None, idle_timeout=None, run_id=None):
+    """Worker completo de um processo, com a configuração do discogs_scraper."""
+    queue = open_queue()
+    stack = _FetchStack()
+    parse_pool = ParsePool(ds.PARSE_WORKERS, ds.PARSER_BACKEND, ds.PARSE_PARTIAL) if ds.PARSE_WORKERS != 0 else None
+    try:
+        return Worker(queue, stack.fetcher, threads or ds.DISTRIBUTED_WORKER_THREADS, parse_pool,
+                      idle_timeout=idle_timeout, run_id=run_id).run()
+    finally:
+        if parse_pool is not None:
+            parse_pool.close()
+        METRICS.log_report()
+        stack.close()
+        queue.close()
+
+
+# ----------------------
+# COORDENADOR
+# ----------------------
+
+class _ArtistAssembly:
+    """Um artista em andamento no coordenador: a tarefa do artista e as dos seus álbuns."""
+
+    def __init__(self, item, task_id):
+        self.item = item
+        self.task_id = task_id
+        self.info = None
+        self.next_candidate = 0
+        self.albums = [] # pares (album_raw, id da tarefa), na ordem da discografia
+        self.finished = False
+        self.record = None
+
+
+class Coordinator:
+    """
+    Enfileira os artistas descobertos (no máximo `lookahead` em andamento), depois os
+    álbuns de cada um, e monta os artistas concluídos a partir dos resultados da fila.
+    Se nenhum worker mexer na fila por idle_timeout s com tarefas pendentes, o run
+    termina com erro em vez de esperar para sempre.
+    """
+
+    def __init__(self, queue, max_artists, max_albums, emit, lookahead=8, poll_interval=0.2,
+                 one_per_master=False, idle_timeout=None):
+        self.queue = queue
+        self.max_artists = max_artists
+        self.max_albums = max_albums
+        self.emit = emit
+        self.lookahead = lookahead
+        self.poll_interval = poll_interval
+        self.one_per_master = one_per_master
+        self.idle_timeout = idle_timeout
+        self.shared_albums = 0
+
+    def _enqueue_albums(self, assembly, needed):
+        candidates = assembly.info["candidatos"]
+        while needed > 0 and assembly.next_candidate < len(candidates):
+            album_raw = candidates[assembly.next_candidate]
+            assembly.next_candidate += 1
+            task, created = self.queue.put(
+                "album", album_key(album_raw, self.one_per_master), album_raw["url_album"],
+                payload=album_raw, parent=assembly.task_id, priority=ALBUM_PRIORITY,
+            )
+            if not created:
+                if task.parent == assembly.task_id:
+                    continue # repetido na discografia do próprio artista (ex: outra prensagem do master)
+                # Já enfileirado por outro artista neste run: entra nas duas discografias,
+                # com uma única busca (o resultado da mesma tarefa)
+                self.shared_albums += 1
+            assembly.albums.append((album_raw, task.id))
+            needed -= 1
+
+    def _advance(self, assembly):
+        """Avança um artista com o que já foi concluído na fila; marca finished quando não há mais o que esperar."""
+        if assembly.info is None:
+            status, result = self.queue.statuses([assembly.task_id])[assembly.task_id]
+            if status == FAILED or (status == DONE and result is None):
+                logging.warning(f"Não consegui carregar o artista: {assembly.item['url_artista']}")
+                assembly.finished = True
+                return
+            if status != DONE:
+                return
+            assembly.info = result
+            self._enqueue_albums(assembly, self.max_albums)
+
+        statuses = self.queue.statuses(task_id for _, task_id in assembly.albums)
+        if any(status not in (DONE, FAILED) for status, _ in statuses.values()):
+            return
+        valid = [(album_raw, statuses[task_id][1]) for album_raw, task_id in assembly.albums
+                 if statuses[task_id][1]]
+        if len(valid) < self.max_albums and assembly.next_candidate < len(assembly.info["candidatos"]):
+            self._enqueue_albums(assembly, self.max_albums - len(valid))
+            return
+
+        item = assembly.item
+        assembly.record = ds.build_artist_record(
+            item["Nome_Artista"], item["url_artista"], item.get("genero", ds.GENRE_FILTER), assembly.info,
+            [ds.build_album_record(album_raw, scraped) for album_raw, scraped in valid[:self.max_albums]],
+        )
+        assembly.finished = True
+
+    def run(self, artists, run_id=None):
+        """
+        Processa os artistas (iterável/gerador preguiçoso) e retorna quantos foram gravados.
+        Começa um run novo na fila, a menos que run_id (já começado, ex: pelo run_local) seja dado.
+        """
+        run_id = run_id or self.queue.begin_run()
+        artists = iter(artists)
+        exhausted = False
+        active = []
+        found = emitted = 0
+
+        try:
+            while True:
+                while not exhausted and len(active) < self.lookahead and found + len(active) < self.max_artists:
+                    item = next(artists, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    if not item["url_artista"]:
+                        continue
+                    task, _ = self.queue.put("artist", item["url_artista"], item["url_artista"], payload=item,
+                                             priority=ARTIST_PRIORITY)
+                    active.append(_ArtistAssembly(item, task.id))
+
+                for assembly in active:
+                    if not assembly.finished:
+                        self._advance(assembly)
+
+                # Grava o prefixo já concluído, na ordem da descoberta
+                while active and active[0].finished:
+                    record = active.pop(0).record
+                    if record and emitted < self.max_artists:
+                        self.emit(record)
+                        emitted += 1
+                        found += 1
+
+                if not active and (exhausted or found >= self.max_artists):
+                    return emitted
+                if self.idle_timeout is not None and active and self.queue.idle_seconds() > self.idle_timeout:
+                    raise RuntimeError(f"Nenhum worker consumiu a fila em {self.idle_timeout}s "
+                                       f"({len(active)} artistas pendentes). Inicie workers: python distributed.py worker")
+                time.sleep(self.poll_interval)
+        finally:
+            self.queue.set_meta(CLOSED, run_id)
+
+
+def run_coordinator(run_id=None):
+    """Coordenador completo: descoberta, fila e gravação, com a configuração do discogs_scraper."""
+    METRICS.reset()
+    queue = open_queue()
+    stack = _FetchStack()
+    dedupe = DedupeIndex(ds.DEDUPE_FILE, ds.DEDUPE_CAPACITY)
+    store = RecordStore(ds.STORE_FILE) if ds.STORE_FILE else None
+    coordinator = Coordinator(queue, ds.MAX_ARTISTS, ds.MAX_ALBUMS, None, ds.DISTRIBUTED_LOOKAHEAD,
+                              one_per_master=ds.ONE_RELEASE_PER_MASTER, idle_timeout=ds.DISTRIBUTED_IDLE_TIMEOUT)
+    total_artists = 0
+
+    try:
+        artists = discover_artists(
+            stack.fetcher, ds.URL_SEARCH, ds.GENRES, ds.STYLES, ds.SEARCH_MAX_PAGES, seen=dedupe,
+            retries=ds.FETCH_RETRIES, parser_backend=ds.PARSER_BACKEND, partial=ds.PARSE_PARTIAL,
+        )
+        with nullcontext(store) if store is not None else ds.open_output_sink() as sink, \
+                ds.open_columnar_sink() as columnar:
+            coordinator.emit = partial(ds.emit_artist, sink, columnar)
+            total_artists = coordinator.run(artists, run_id)
+        if store is not None:
+            with ds.open_output_sink() as sink:
+                store.export_jsonl(sink, normalized=ds.NORMALIZE_TRACKS)
+        logging.info(f"Dados salvos com sucesso em: **{', '.join(sink.segments)}**")
+    finally:
+        if ds.RUN_REPORT_FILE:
+            METRICS.write_report(ds.RUN_REPORT_FILE, {
+                "artists": total_artists,
+                "queue": queue.report(),
+                "shared_albums": coordinator.shared_albums,
+                "dedupe": dedupe.report(),
+                "store": store.report() if store is not None else None,
+            })
+        logging.info(f"[FILA] {queue.report()} | álbuns compartilhados entre artistas: {coordinator.shared_albums}")
+        dedupe.close()
+        if store is not None:
+            store.log_report()
+            store.close()
+        stack.close()
+        queue.close()
+        logging.info(f"Total de artistas coletados (com >=1 álbum): **{total_artists}**")
+    return total_artists
+
+
+def _worker_process(overrides, threads, idle_timeout, run_id):
+    for name, value in (overrides or {}).items():
+        setattr(ds, name, value)
+    run_worker(threads, idle_timeout, run_id)
+
+
+def run_local(workers=2, threads=None, overrides=None, idle_timeout=None):
+    """
+    Roda o coordenador neste processo e `workers` processos de worker nesta máquina
+    (outras máquinas podem somar workers à mesma fila com QUEUE_URL).
+    `overrides` são constantes do discogs_scraper aplicadas também nos workers.
+    """
+    # O run começa antes dos workers subirem, e cada um sabe qual é o seu: um worker que suba
+    # depois de o coordenador terminar sai na hora, em vez de esperar o próximo run
+    queue = open_queue()
+    run_id = queue.begin_run()
+    queue.close()
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=_worker_process, args=(overrides, threads, idle_timeout, run_id), name=f"worker-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        return run_coordinator(run_id)
+    finally:
+        for process in processes:
+            process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl distribuído do Discogs com uma fila compartilhada.")
+    parser.add_argument("papel", choices=("coordenador", "worker", "local"))
+    parser.add_argument("fila", nargs="?", help="URL redis:// ou arquivo SQLite da fila (padrão: QUEUE_URL ou QUEUE_FILE)")
+    parser.add_argument("--threads", type=int, help="threads por worker (padrão: DISTRIBUTED_WORKER_THREADS)")
+    parser.add_argument("--workers", type=int, default=2, help="processos de worker no modo local")
+    parser.add_argument("--idle-timeout", type=float, help="worker sai após N s sem tarefas")
+    args = parser.parse_args()
+
+    if args.fila and args.fila.startswith(REDIS_SCHEMES):
+        ds.QUEUE_URL = args.fila
+    elif args.fila:
+        ds.QUEUE_FILE, ds.QUEUE_URL = args.fila, None
+    if args.papel == "coordenador":
+        run_coordinator()
+    elif args.papel == "worker":
+        run_worker(args.threads, args.idle_timeout)
+    else:
+        run_local(args.workers, args.threads, {"QUEUE_FILE": ds.QUEUE_FILE, "QUEUE_URL": ds.QUEUE_URL}, args.idle_timeout)
+
+
+if __name__ == "__main__":
+    main()
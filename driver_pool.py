@@ -0,0 +1,153 @@
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+from fetchers import fetch_with_driver
+
+try:
+    import psutil
+except ImportError: # psutil é opcional: sem ele o limite de memória não é aplicado
+    psutil = None
+
+
+def driver_memory_mb(driver):
+    """Memória residente (MB) do chromedriver e de todos os processos do Chrome filhos dele."""
+    if psutil is None:
+        return 0.0
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except (AttributeError, psutil.Error):
+        return 0.0
+
+
+class _Slot:
+    """Uma vaga do pool; o driver é criado sob demanda e recriado quando reciclado."""
+
+    def __init__(self, index):
+        self.index = index
+        self.driver = None
+        self.pages = 0
+        self.broken = False
+
+
+class DriverPool:
+    """
+    Pool de sessões do WebDriver reaproveitáveis entre threads.
+
+    Cada driver é criado (e aquecido pelo driver_factory, ex: aceite de cookies)
+    uma única vez e depois emprestado às threads. Drivers que falham no teste de
+    saúde, travam, passam do limite de memória ou de páginas são reciclados.
+    """
+
+    def __init__(self, driver_factory, size=2, max_memory_mb=None, max_pages=None,
+                 memory_probe=driver_memory_mb):
+        self._driver_factory = driver_factory
+        self.size = size
+        self.max_memory_mb = max_memory_mb
+        self.max_pages = max_pages
+        self._memory_probe = memory_probe
+        self._slots = [_Slot(i) for i in range(size)]
+        # LIFO: reaproveita o driver já aquecido mais recente antes de criar outro
+        self._idle = queue.LifoQueue()
+        for slot in reversed(self._slots):
+            self._idle.put(slot)
+        self._lock = threading.Lock()
+        self.created = 0
+
+        if max_memory_mb and psutil is None and memory_probe is driver_memory_mb:
+            logging.warning("psutil não instalado: o limite de memória por driver não será aplicado.")
+
+    def _is_healthy(self, driver):
+        try:
+            driver.execute_script("return 1;")
+            return True
+        except WebDriverException:
+            return False
+
+    def _retire(self, slot, reason):
+        logging.info(f"[POOL] Reciclando driver #{slot.index} ({reason}).")
+        try:
+            slot.driver.quit()
+        except Exception:
+            pass
+        slot.driver = None
+        slot.pages = 0
+        slot.broken = False
+
+    def _ensure_driver(self, slot):
+        if slot.driver is not None and not self._is_healthy(slot.driver):
+            self._retire(slot, "sessão não responde")
+
+        if slot.driver is None:
+            slot.driver = self._driver_factory()
+            if slot.driver is None:
+                raise RuntimeError("Falha ao criar um driver para o pool.")
+            with self._lock:
+                self.created += 1
+        return slot.driver
+
+    @contextmanager
+    def session(self):
+        """Empresta um driver saudável do pool para a thread atual."""
+        slot = self._idle.get()
+        try:
+            yield self._ensure_driver(slot)
+        except WebDriverException:
+            # Sessão quebrada (ex: Chrome travou): será recriada no próximo uso
+            slot.broken = True
+            raise
+        finally:
+            slot.pages += 1
+            if slot.driver is not None:
+                if slot.broken:
+                    self._retire(slot, "sessão quebrada")
+                elif self.max_pages and slot.pages >= self.max_pages:
+                    self._retire(slot, f"{slot.pages} páginas")
+                elif self.max_memory_mb:
+                    memory = self._memory_probe(slot.driver)
+                    if memory > self.max_memory_mb:
+                        self._retire(slot, f"{memory:.0f} MB acima do limite")
+            self._idle.put(slot)
+
+    def close(self):
+        open_slots = [slot for slot in self._slots if slot.driver is not None]
+        for slot in open_slots:
+            try:
+                slot.driver.quit()
+            except Exception:
+                pass
+            slot.driver = None
+        if open_slots:
+            logging.info(f"Pool de drivers encerrado ({len(open_slots)} drivers).")
+
+
+class PooledSeleniumFetcher:
+    """Fetcher Selenium que usa os drivers de um DriverPool, permitindo buscas em paralelo."""
+    name = "selenium"
+
+    def __init__(self, pool, settle_time=1, retries=1, waiter=None):
+        self.pool = pool
+        self.settle_time = settle_time
+        self.retries = retries
+        self.waiter = waiter
+
+    def fetch(self, url, page_type=None, headers=None):
+        for attempt in range(self.retries + 1):
+            try:
+                with self.pool.session() as driver:
+                    return fetch_with_driver(driver, url, self.settle_time, self.name, page_type, self.waiter)
+            except WebDriverException as e:
+                # A sessão já foi reciclada pelo pool; tenta de novo com um driver novo
+                logging.warning(f"[POOL] Sessão do driver falhou em {url} (tentativa {attempt + 1}): {e}")
+            except RuntimeError as e:
+                logging.error(f"[POOL] {e}")
+                return None
+        return None
+
+    def close(self):
+        self.pool.close()
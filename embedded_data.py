@@ -0,0 +1,170 @@
+import re
+import json
+import logging
+
+from instrumentation import METRICS
+
+# Abertura dos <script> com dados estruturados: JSON-LD (schema.org) e o estado
+# hidratado da página (mesmo formato da API do Discogs: tracklist/labels/genres/styles)
+_SCRIPT_OPEN = re.compile(
+    r'<script\b[^>]*?(?:type\s*=\s*["\']application/ld\+json["\']|id\s*=\s*["\'](?:dsdata|__NEXT_DATA__)["\'])[^>]*>',
+    re.IGNORECASE,
+)
+_ISO_DURATION = re.compile(r"^P(?:T)?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$", re.IGNORECASE)
+
+ALBUM_FIELDS = ("faixas_album", "gravadora_album", "genero_album", "estilos_album")
+
+
+def find_json_blobs(html):
+    """
+    Decodifica os blobs JSON embutidos na página (JSON-LD e estado hidratado)
+    com uma varredura do texto, sem montar o DOM. Blobs inválidos são ignorados.
+    """
+    blobs = []
+    for match in _SCRIPT_OPEN.finditer(html):
+        end = html.find("</script>", match.end())
+        if end < 0:
+            break
+        try:
+            blobs.append(json.loads(html[match.end():end]))
+        except ValueError:
+            logging.debug(f"Blob JSON inválido na posição {match.start()}; ignorado.")
+    return blobs
+
+
+def _walk(node):
+    """Todos os dicts aninhados em node (JSON-LD com @graph, estado do Apollo/Next etc.)."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            yield current
+            stack.extend(reversed(list(current.values())))
+        elif isinstance(current, list):
+            stack.extend(reversed(current))
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _names(values):
+    """Nomes de uma lista de strings ou objetos {"name": ...}."""
+    names = []
+    for value in _as_list(values):
+        name = value.get("name") if isinstance(value, dict) else value
+        if isinstance(name, str) and name.strip():
+            names.append(name.strip())
+    return names
+
+
+def iso_duration_to_text(duration):
+    """'PT3M26S' -> '3:26'; 'PT1H2M3S' -> '1:02:03'. Texto que não é ISO 8601 volta como está."""
+    if not duration:
+        return None
+    match = _ISO_DURATION.match(duration.strip())
+    if not match:
+        return duration.strip()
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def _finish_tracklist(raw_tracks):
+    """Aplica as mesmas regras do extract_album_tracklist: filtra, limpa a posição e ordena."""
+    # Import tardio: o discogs_scraper importa este módulo
+    from discogs_scraper import clean_track_position
+
+    tracks = []
+    for raw_position, title, duration in raw_tracks:
+        position = clean_track_position(raw_position)
+        title = title.strip() if isinstance(title, str) else None
+        if not (position and title and duration):
+            continue
+        try:
+            position = int(position)
+        except ValueError:
+            pass
+        tracks.append({
+            "numero_faixa": position, "nome_faixa": title, "duracao_faixa": duration,
+            "posicao_original": raw_position.strip(),
+        })
+
+    tracks.sort(key=lambda track: track["numero_faixa"])
+    for track in tracks:
+        track["numero_faixa"] = str(track["numero_faixa"])
+    return tracks
+
+
+def _from_state(obj):
+    """Release no formato da API/estado hidratado: tracklist, labels, genres, styles."""
+    album = {}
+    if isinstance(obj.get("tracklist"), list):
+        album["faixas_album"] = _finish_tracklist(
+            (t.get("position"), t.get("title"), iso_duration_to_text(t.get("duration")))
+            for t in obj["tracklist"] if isinstance(t, dict) and t.get("type_", "track") == "track"
+        )
+    if "labels" in obj:
+        labels = _names(obj["labels"])
+        album["gravadora_album"] = labels[0] if labels else None
+    if "genres" in obj:
+        album["genero_album"] = _names(obj["genres"])
+    if "styles" in obj:
+        album["estilos_album"] = _names(obj["styles"])
+    return album
+
+
+def _from_json_ld(obj):
+    """
+    MusicAlbum/MusicRelease do schema.org. O schema.org não tem estilos e, nas páginas
+    do Discogs, também não tem a posição das faixas: o `position` do ListItem é só o
+    ordinal na lista (1..N), que perderia lado e disco ("A1".."B4" viraria "1".."8").
+    Sem a posição em todas as gravações, a tracklist fica de fora e vem do estado
+    hidratado ou do DOM.
+    """
+    album = {}
+    if "track" in obj:
+        raw_tracks = []
+        for entry in _as_list(obj["track"]):
+            if not isinstance(entry, dict):
+                continue
+            items = entry.get("itemListElement") if entry.get("@type") == "ItemList" else [entry]
+            for item in _as_list(items):
+                recording = item.get("item", item) if isinstance(item, dict) else {}
+                position = recording.get("position")
+                raw_tracks.append((
+                    str(position) if position is not None else None,
+                    recording.get("name"),
+                    iso_duration_to_text(recording.get("duration")),
+                ))
+        if raw_tracks and all(position for position, _, _ in raw_tracks):
+            album["faixas_album"] = _finish_tracklist(raw_tracks)
+    if "recordLabel" in obj:
+        labels = _names(obj["recordLabel"])
+        album["gravadora_album"] = labels[0] if labels else None
+    if "genre" in obj:
+        album["genero_album"] = _names(obj["genre"])
+    return album
+
+
+@METRICS.timed("extract.embedded_album")
+def extract_embedded_album(html):
+    """
+    Extrai faixas, gravadora, gêneros e estilos dos dados estruturados da página.
+    Retorna só os campos encontrados (chaves de ALBUM_FIELDS); o estado hidratado
+    tem prioridade sobre o JSON-LD. Um dict vazio indica que não há blob utilizável.
+    """
+    from_state, from_ld = {}, {}
+    for blob in find_json_blobs(html):
+        for obj in _walk(blob):
+            # Um campo já encontrado não é sobrescrito (ex.: MusicRelease com releaseOf MusicAlbum)
+            if "tracklist" in obj:
+                for field, value in _from_state(obj).items():
+                    from_state.setdefault(field, value)
+            elif obj.get("@type") in ("MusicAlbum", "MusicRelease"):
+                for field, value in _from_json_ld(obj).items():
+                    from_ld.setdefault(field, value)
+    return {**from_ld, **from_state}
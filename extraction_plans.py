@@ -0,0 +1,362 @@
+"""
+Planos de extração declarativos: os seletores de cada página do Discogs num só
+lugar (SPECS), compilados uma vez na importação.
+
+Cada plano tem um seletor de linhas (os registros repetidos da página: faixas,
+linhas de uma tabela de informações, cards da busca), opcionalmente restrito ao
+primeiro elemento de um "scope" (como o select_one seguido de select das funções
+originais), e campos relativos à linha.
+Nos backends do bs4, o plano roda num único percurso da subárvore: as linhas e
+todos os campos de cada linha são reconhecidos juntos, sem reinterpretar seletores
+a cada chamada. No selectolax, os mesmos seletores vão para o motor CSS nativo
+(Lexbor, em C), que já é mais rápido que qualquer percurso em Python.
+
+Depois de uma mudança de layout do site, basta editar SPECS.
+"""
+import re
+
+from bs4 import Tag
+
+from parsers import SelectolaxNode
+
+# ----------------------
+# ESPECIFICAÇÃO DAS PÁGINAS
+# ----------------------
+# Plano: "rows" e, opcionalmente, "scope": as linhas são procuradas só dentro do primeiro
+# elemento que casa com "scope" (ex: só o primeiro div.info_LD8Ql da página).
+# Campo: "css" relativo à linha (sem "css", a própria linha), "scope" para procurar o "css"
+# só dentro do primeiro elemento da linha que casa com ele (ex: os links só do primeiro td),
+# "attr" para ler um atributo em vez do texto, "exists" para só saber se o elemento existe
+# (True/None), "many" para todos os elementos (lista), "separator" do texto e "post", o nome
+# de um pós-processador de POST_PROCESSORS.
+SPECS = {
+    "album": {
+        "tracklist": {
+            "rows": "tbody tr[data-track-position]",
+            "fields": {
+                "posicao": {"attr": "data-track-position"},
+                "nome": {"css": "td.trackTitle_loyWF span.trackTitle_loyWF"},
+                "duracao": {"css": "td.duration_GhhxK span span"},
+            },
+        },
+        "details": {
+            "scope": "div.info_LD8Ql table.table_c5ftk",
+            "rows": "tr",
+            "fields": {
+                "rotulo": {"css": "th h2", "post": "rotulo_album"},
+                "valor": {"css": "td", "separator": " "},
+                "links": {"scope": "td", "css": "a", "many": True},
+            },
+        },
+    },
+    "artist": {
+        "info": {
+            "scope": "div.info_LD8Ql",
+            "rows": "tr",
+            "fields": {
+                "rotulo": {"css": "h2", "post": "rotulo"},
+                "valor": {"css": "td", "exists": True},
+                "links": {"scope": "td", "css": "a", "many": True},
+                "hrefs": {"scope": "td", "css": "a[href]", "attr": "href", "many": True},
+            },
+        },
+        "albums": {
+            "rows": "tr.textWithCoversRow_Xv0h3",
+            "fields": {
+                "url": {"css": "td:first-of-type a.link_wXY7O", "attr": "href"},
+                "titulo": {"css": "td.title_K9_iv a.link_wXY7O"},
+                "titulo_mobile": {"css": "td.mobileStacked_Zbgf9 a.link_wXY7O"},
+                "ano": {"css": "td.year_o3FNi"},
+            },
+        },
+    },
+    "search": {
+        "artists": {
+            "rows": 'div[role="listitem"].w-full.text-black',
+            "fields": {
+                "nomes": {"css": "a.block.w-full.truncate.text-sm", "many": True},
+                "hrefs": {"css": "a.block.w-full.truncate.text-sm", "attr": "href", "many": True},
+            },
+        },
+    },
+}
+
+POST_PROCESSORS = {
+    # "Members:" -> "Members" (só os dois-pontos do fim, como o extract_artist_info original)
+    "rotulo": lambda text: text.rstrip(":") if text is not None else None,
+    # "Label:" -> "Label" (todos os dois-pontos, como o extract_album_details original)
+    "rotulo_album": lambda text: text.replace(":", "") if text is not None else None,
+}
+
+# ----------------------
+# SELETORES COMPILADOS
+# ----------------------
+_COMPOUND = re.compile(r"(?P<tag>[a-zA-Z][\w-]*|\*)?(?P<rest>(?:\.[\w-]+|\[[\w-]+(?:=\"?[^\"\]]*\"?)?\]|:first-of-type)*)")
+_PART = re.compile(r"\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)(?:=\"?(?P<value>[^\"\]]*)\"?)?\]|(?P<first>:first-of-type)")
+
+
+class _Compound:
+    """Um seletor composto (tag.classe[atributo=valor]:first-of-type) testado direto no Tag do bs4."""
+    __slots__ = ("tag", "classes", "attrs", "first_of_type")
+
+    def __init__(self, text):
+        match = _COMPOUND.fullmatch(text)
+        if not match or not text:
+            raise ValueError(f"Seletor não suportado pelos planos de extração: {text!r}")
+        tag = match.group("tag")
+        self.tag = None if tag in (None, "*") else tag.lower()
+        self.classes = ()
+        self.attrs = ()
+        self.first_of_type = False
+        for part in _PART.finditer(match.group("rest")):
+            if part.group("cls"):
+                self.classes += (part.group("cls"),)
+            elif part.group("attr"):
+                self.attrs += ((part.group("attr"), part.group("value")),)
+            else:
+                self.first_of_type = True
+
+    def matches(self, node, first_of_type):
+        if self.tag is not None and node.name != self.tag:
+            return False
+        if self.first_of_type and not first_of_type:
+            return False
+        attrs = node.attrs
+        if self.classes:
+            node_classes = attrs.get("class")
+            if not node_classes or any(cls not in node_classes for cls in self.classes):
+                return False
+        for name, value in self.attrs:
+            actual = attrs.get(name)
+            if actual is None:
+                return False
+            if value is not None and (" ".join(actual) if isinstance(actual, list) else actual) != value:
+                return False
+        return True
+
+
+class Selector:
+    """
+    Seletor CSS simples compilado: compostos ligados por descendente (espaço) ou filho (>).
+    É o subconjunto usado nas páginas do Discogs; qualquer outra sintaxe falha já na compilação.
+    """
+
+    def __init__(self, css):
+        self.css = css
+        tokens = css.replace(">", " > ").split()
+        self.steps = [] # (combinador com o passo anterior, composto)
+        combinator = " "
+        for token in tokens:
+            if token == ">":
+                combinator = ">"
+                continue
+            self.steps.append((combinator, _Compound(token)))
+            combinator = " "
+        if not self.steps or combinator == ">":
+            raise ValueError(f"Seletor vazio ou incompleto: {css!r}")
+
+
+def _match_many(scope, selectors, many, prune=False):
+    """
+    Percorre a subárvore de `scope` uma única vez e devolve, para cada seletor, o primeiro
+    elemento (ou todos, se many[i]) na ordem do documento. Com prune, não desce dentro
+    de um elemento que já casou (linhas não se aninham).
+    """
+    results = [[] if m else None for m in many]
+    last = [len(selector.steps) - 1 for selector in selectors]
+    remaining = [sum(1 for m in many if not m)] # seletores de "primeiro" ainda sem resultado
+    any_many = any(many)
+
+    def visit(node, desc_states, child_states):
+        seen_types = set()
+        for child in node.contents:
+            if type(child) is not Tag:
+                continue
+            name = child.name
+            first = name not in seen_types
+            seen_types.add(name)
+
+            next_desc = desc_states
+            next_child = []
+            matched = False
+            for states in (desc_states, child_states):
+                for i, k in states:
+                    if not many[i] and results[i] is not None:
+                        continue
+                    if not selectors[i].steps[k][1].matches(child, first):
+                        continue
+                    if k == last[i]:
+                        matched = True
+                        if many[i]:
+                            if not results[i] or results[i][-1] is not child:
+                                results[i].append(child)
+                        else:
+                            results[i] = child
+                            remaining[0] -= 1
+                            if not remaining[0] and not any_many:
+                                return True
+                        continue
+                    state = (i, k + 1)
+                    if selectors[i].steps[k + 1][0] == ">":
+                        next_child.append(state)
+                    elif state not in next_desc:
+                        next_desc = next_desc + [state]
+            if matched and prune:
+                continue
+            if child.contents and visit(child, next_desc, next_child):
+                return True
+        return False
+
+    visit(scope, [(i, 0) for i in range(len(selectors))], [])
+    return results
+
+
+class Field:
+    __slots__ = ("name", "css", "selector", "scope", "attr", "exists", "many", "separator", "post")
+
+    def __init__(self, name, css=None, attr=None, exists=False, many=False, separator="", post=None, scope=None):
+        if scope and not css:
+            raise ValueError(f"Campo {name!r}: 'scope' precisa de um 'css' dentro dele.")
+        self.name = name
+        self.css = css
+        self.selector = Selector(css) if css else None
+        self.scope = scope
+        self.attr = attr
+        self.exists = exists
+        self.many = many
+        self.separator = separator
+        self.post = POST_PROCESSORS[post] if post else None
+
+    def value(self, node):
+        """Texto (com strip) ou atributo de um elemento; None se o elemento não existe."""
+        if node is None:
+            return None
+        if self.exists:
+            return True
+        if self.attr:
+            return node.get(self.attr)
+        return node.get_text(self.separator, strip=True)
+
+    def finish(self, value):
+        return self.post(value) if self.post is not None else value
+
+
+class ExtractionPlan:
+    """Plano compilado de uma parte da página: linhas e os campos de cada linha."""
+
+    def __init__(self, rows, fields, scope=None):
+        self.rows_css = rows
+        self.rows = Selector(rows)
+        self.scope_css = scope
+        self.scope = Selector(scope) if scope else None
+        self.fields = [Field(name, **spec) for name, spec in fields.items()]
+        self._row_fields = [f for f in self.fields if f.selector is None]
+        # Campos sem scope e, por scope, os campos procurados dentro dele
+        self._nested = [f for f in self.fields if f.selector is not None and not f.scope]
+        self._scoped = {}
+        for f in self.fields:
+            if f.scope:
+                self._scoped.setdefault(f.scope, []).append(f)
+        # O percurso da linha acha os campos sem scope e o primeiro elemento de cada scope juntos
+        self._selectors = [f.selector for f in self._nested] + [Selector(css) for css in self._scoped]
+        self._many = [f.many for f in self._nested] + [False] * len(self._scoped)
+
+    def run(self, soup, limit=None):
+        """Lista de registros ({campo: valor}) das linhas da página, até `limit` linhas."""
+        if isinstance(soup, SelectolaxNode):
+            return self._run_native(soup._node, limit)
+
+        if self.scope is not None:
+            soup = _match_many(soup, [self.scope], [False])[0]
+            if soup is None:
+                return []
+        rows = _match_many(soup, [self.rows], [True], prune=True)[0]
+        records = []
+        for row in rows[:limit] if limit else rows:
+            record = {f.name: f.finish(f.value(row)) for f in self._row_fields}
+            found = _match_many(row, self._selectors, self._many)
+            for f, nodes in zip(self._nested, found):
+                record[f.name] = f.finish([f.value(n) for n in nodes] if f.many else f.value(nodes))
+            for fields, scope_node in zip(self._scoped.values(), found[len(self._nested):]):
+                inner = _match_many(scope_node, [f.selector for f in fields], [f.many for f in fields]) \
+                    if scope_node is not None else [[] if f.many else None for f in fields]
+                for f, nodes in zip(fields, inner):
+                    record[f.name] = f.finish([f.value(n) for n in nodes] if f.many else f.value(nodes))
+            records.append(record)
+        return records
+
+    def _run_native(self, root, limit):
+        # Direto nos nós do Lexbor, sem o adaptador SelectolaxNode (mesma semântica de get/get_text)
+        if self.scope_css:
+            root = root.css_first(self.scope_css)
+            if root is None:
+                return []
+        rows = root.css(self.rows_css)
+        records = []
+        for row in rows[:limit] if limit else rows:
+            record = {}
+            scopes = {css: row.css_first(css) for css in self._scoped}
+            for f in self.fields:
+                node = scopes[f.scope] if f.scope else row
+                if f.many:
+                    value = [_native_value(f, n) for n in node.css(f.css)] if node is not None else []
+                elif node is None:
+                    value = None
+                else:
+                    value = _native_value(f, node.css_first(f.css) if f.css else node)
+                record[f.name] = f.finish(value)
+            records.append(record)
+        return records
+
+
+def _native_value(field, node):
+    if node is None:
+        return None
+    if field.exists:
+        return True
+    if field.attr:
+        return node.attributes.get(field.attr)
+    return node.text(deep=True, separator=field.separator, strip=True)
+
+
+def reference_run(spec, soup):
+    """
+    Execução ingênua de uma especificação com select/select_one do bs4 (soupsieve) por
+    campo e por linha, como as funções extract_* eram antes dos planos. É a referência
+    de semântica dos testes e a linha de base do bench_extraction_plans.py.
+    """
+    root = soup.select_one(spec["scope"]) if spec.get("scope") else soup
+    if root is None:
+        return []
+    records = []
+    for row in root.select(spec["rows"]):
+        record = {}
+        for name, field in spec["fields"].items():
+            base = row.select_one(field["scope"]) if field.get("scope") else row
+            if base is None:
+                nodes = [] if field.get("many") else [None]
+            elif field.get("css"):
+                nodes = base.select(field["css"]) if field.get("many") else [base.select_one(field["css"])]
+            else:
+                nodes = [base]
+            values = [
+                None if n is None else True if field.get("exists") else
+                n.get(field["attr"]) if field.get("attr") else n.get_text(field.get("separator", ""), strip=True)
+                for n in nodes
+            ]
+            value = values if field.get("many") else values[0]
+            record[name] = POST_PROCESSORS[field["post"]](value) if field.get("post") else value
+        records.append(record)
+    return records
+
+
+def compile_plans(specs=SPECS):
+    """{page_type: {parte: ExtractionPlan}} a partir das especificações."""
+    return {
+        page_type: {part: ExtractionPlan(spec["rows"], spec["fields"], spec.get("scope"))
+                    for part, spec in parts.items()}
+        for page_type, parts in specs.items()
+    }
+
+
+PLANS = compile_plans()
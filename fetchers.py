@@ -0,0 +1,223 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import TimeoutException
+
+from instrumentation import METRICS
+from lean_browser import record_page_transfer
+
+# ----------------------
+# CONFIGURAÇÃO & CONSTANTES
+# ----------------------
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+}
+
+# Trecho de HTML que precisa estar presente para a página ser útil sem JavaScript.
+# Se faltar, a página foi renderizada no cliente e o Selenium é necessário.
+PAGE_MARKERS = {
+    "search": 'role="listitem"',
+    "artist": "info_LD8Ql",
+    "album": "data-track-position",
+}
+
+# Respostas que indicam limite de taxa ou falha temporária do servidor: a busca deve
+# ser repetida mais tarde (e mais devagar), não refeita no navegador.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Erros do cliente que não mudam no navegador (404, 410...): voltam direto, sem Selenium.
+# 403 costuma ser bloqueio de bot e 429 é limite de taxa, então ficam de fora.
+BROWSER_STATUSES = (403,)
+
+def is_definitive_error(status):
+    """4xx que o navegador não resolve: a página não existe (ou não vai existir) para ninguém."""
+    return 400 <= status < 500 and status not in BROWSER_STATUSES and status not in RETRY_STATUSES
+
+@dataclass
+class Page:
+    """Resultado de uma busca de página, independente do backend."""
+    url: str
+    html: str
+    status: int = 200
+    headers: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+    backend: str = ""
+    cookies: list = field(default_factory=list)
+
+def needs_js(page, page_type):
+    """Indica se a página veio sem o conteúdo esperado (renderizado só via JavaScript)."""
+    marker = PAGE_MARKERS.get(page_type)
+    return bool(marker) and marker not in page.html
+
+def fetch_with_driver(driver, url, settle_time=1, backend="selenium", page_type=None, waiter=None):
+    """
+    Carrega a URL em um driver do Selenium e devolve o HTML renderizado.
+    Com um ReadinessWaiter que conheça o page_type, espera a página ficar pronta
+    em vez de dormir settle_time segundos.
+    """
+    start = time.perf_counter()
+    try:
+        with METRICS.stage("driver_get"):
+            driver.get(url)
+    except TimeoutException:
+        logging.warning(f"[TIMEOUT] Não consegui carregar a página: {url}")
+        # Tentativa de interromper o carregamento lento
+        try:
+            driver.execute_script("window.stop();")
+        except Exception:
+            pass
+        return None
+
+    with METRICS.stage("wait"):
+        if waiter is not None and waiter.handles(page_type):
+            waiter.wait(driver, page_type)
+        else:
+            time.sleep(settle_time)
+    html = driver.page_source
+    METRICS.count("pages_downloaded")
+    METRICS.count("bytes_downloaded", len(html.encode("utf-8"))) # HTML renderizado (sem recursos da página)
+    record_page_transfer(driver) # tráfego real do navegador: documento, scripts, imagens...
+    return Page(
+        url=driver.current_url,
+        html=html,
+        elapsed=time.perf_counter() - start,
+        backend=backend,
+        cookies=driver.get_cookies(),
+    )
+
+# ----------------------
+# BACKENDS
+# ----------------------
+
+class HttpFetcher:
+    """Cliente HTTP simples com pool de conexões keep-alive, cabeçalhos e cookies."""
+    name = "http"
+
+    def __init__(self, headers=None, cookies=None, pool_size=10, timeout=30):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+        if cookies:
+            self.session.cookies.update(cookies)
+
+    def load_cookies(self, cookies):
+        """Importa cookies no formato do Selenium (lista de dicts) para a sessão HTTP."""
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain"), path=cookie.get("path", "/"),
+            )
+
+    def fetch(self, url, page_type=None, headers=None):
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            logging.warning(f"[HTTP] Falha ao buscar {url}: {e}")
+            return None
+
+        elapsed = time.perf_counter() - start
+        METRICS.observe("http_get", elapsed)
+        METRICS.count("pages_downloaded")
+        METRICS.count("bytes_downloaded", len(response.content))
+        return Page(
+            url=response.url,
+            html=response.text,
+            status=response.status_code,
+            headers=dict(response.headers),
+            elapsed=elapsed,
+            backend=self.name,
+        )
+
+    def close(self):
+        self.session.close()
+
+
+class SeleniumFetcher:
+    """
+    Busca páginas com um navegador real. O driver só é criado no primeiro uso e,
+    como não é thread-safe, as buscas são serializadas.
+    """
+    name = "selenium"
+
+    def __init__(self, driver_factory, settle_time=1, waiter=None):
+        self._driver_factory = driver_factory
+        self._driver = None
+        self._lock = threading.RLock()
+        self.settle_time = settle_time
+        self.waiter = waiter
+
+    @property
+    def started(self):
+        return self._driver is not None
+
+    @property
+    def driver(self):
+        with self._lock:
+            if self._driver is None:
+                self._driver = self._driver_factory()
+            return self._driver
+
+    def fetch(self, url, page_type=None, headers=None):
+        with self._lock:
+            driver = self.driver
+            if driver is None:
+                return None
+            return fetch_with_driver(driver, url, self.settle_time, self.name, page_type, self.waiter)
+
+    def close(self):
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+            logging.info("Driver encerrado.")
+
+
+class FallbackFetcher:
+    """
+    Usa o backend HTTP e recorre ao Selenium apenas para páginas que precisam de JS
+    ou que foram bloqueadas (403, falha de conexão). Um 404/410 volta direto: carregar
+    a página no navegador custaria uma sessão inteira para chegar ao mesmo erro.
+    """
+    name = "auto"
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+
+    def load_cookies(self, cookies):
+        self.primary.load_cookies(cookies)
+
+    def fetch(self, url, page_type=None, headers=None):
+        page = self.primary.fetch(url, page_type, headers=headers)
+        if page is not None and (page.status == 304 or page.status in RETRY_STATUSES
+                                 or is_definitive_error(page.status)):
+            return page
+        if page is not None and page.status == 200 and not needs_js(page, page_type):
+            return page
+
+        status = page.status if page is not None else "erro"
+        logging.info(f"[FALLBACK] {url} (status {status}) será carregada via {self.fallback.name}.")
+        page = self.fallback.fetch(url, page_type)
+
+        # Reaproveita os cookies do navegador (ex: aceite de cookies) nas próximas requisições HTTP
+        if page is not None and page.cookies and hasattr(self.primary, "load_cookies"):
+            self.primary.load_cookies(page.cookies)
+        return page
+
+    def close(self):
+        self.primary.close()
+        self.fallback.close()
@@ -0,0 +1,298 @@
+import json
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ----------------------
+# PÁGINAS SINTÉTICAS
+# ----------------------
+
+def make_filler_html(kb):
+    """Marcação irrelevante (menus, créditos, recomendações) para aproximar o tamanho das páginas reais."""
+    block = (
+        '<div class="card_x1"><ul class="menu_a2"><li><a href="/x">Item</a></li>'
+        '<li><a href="/y">Outro item</a></li></ul><p class="text_z9">Texto de exemplo '
+        '<span>com</span> <em>marcação</em> aninhada.</p></div>'
+    )
+    return block * max(0, kb * 1024 // len(block))
+
+def make_album_blobs(n_tracks, title, label, genres, styles, embedded, positions=None):
+    """
+    <script> com os dados do álbum: "json-ld" (schema.org) e/ou "state" (estado hidratado).
+    Como nas páginas reais, o JSON-LD só tem o ordinal do ListItem (1..N), não a posição da faixa.
+    """
+    positions = positions or [f"A{i}" for i in range(1, n_tracks + 1)]
+    scripts = []
+    if "json-ld" in embedded:
+        json_ld = {
+            "@context": "http://schema.org",
+            "@type": "MusicRelease",
+            "name": title,
+            "recordLabel": [{"@type": "Organization", "name": label}],
+            "genre": list(genres),
+            "releaseOf": {
+                "@type": "MusicAlbum",
+                "name": title,
+                "track": {"@type": "ItemList", "itemListElement": [
+                    {"@type": "ListItem", "position": i, "item": {
+                        "@type": "MusicRecording", "name": f"{title} Faixa {i}",
+                        "duration": f"PT{i % 6 + 2}M{i * 7 % 60}S",
+                    }}
+                    for i in range(1, n_tracks + 1)
+                ]},
+            },
+        }
+        scripts.append(f'<script type="application/ld+json">{json.dumps(json_ld)}</script>')
+    if "state" in embedded:
+        state = {"data": {"release": {
+            "title": title,
+            "tracklist": [
+                {"position": position, "type_": "track", "title": f"{title} Faixa {i}",
+                 "duration": f"{i % 6 + 2}:{i * 7 % 60:02d}"}
+                for i, position in enumerate(positions, start=1)
+            ],
+            "labels": [{"name": label}],
+            "genres": list(genres),
+            "styles": list(styles),
+        }}}
+        scripts.append(f'<script id="dsdata" type="application/json">{json.dumps(state)}</script>')
+    return "".join(scripts)
+
+def make_album_html(n_tracks=10, title="Album", label="Fixture Records",
+                    genres=("Rock",), styles=("Indie Rock",), filler_kb=0, embedded=(), positions=None):
+    """
+    Gera uma página de álbum com a mesma estrutura de classes do Discogs.
+    `embedded` adiciona os mesmos dados como blobs JSON ("json-ld" e/ou "state").
+    `positions` troca as posições padrão ("A1".."AN") das faixas (ex: lados A e B de um vinil).
+    """
+    positions = positions or [f"A{i}" for i in range(1, n_tracks + 1)]
+    genre_links = ", ".join(f'<a href="/genre/{g}">{g}</a>' for g in genres)
+    style_links = ", ".join(f'<a href="/style/{s}">{s}</a>' for s in styles)
+    rows = "".join(
+        f'<tr data-track-position="{position}">'
+        f'<td class="trackTitle_loyWF"><span class="trackTitle_loyWF">{title} Faixa {i}</span></td>'
+        f'<td class="duration_GhhxK"><span><span>{i % 6 + 2}:{i * 7 % 60:02d}</span></span></td>'
+        f'</tr>'
+        for i, position in enumerate(positions, start=1)
+    )
+    return (
+        f"<html><head><title>{title}</title>"
+        f"{make_album_blobs(len(positions), title, label, genres, styles, embedded, positions)}</head><body>"
+        f'<div class="info_LD8Ql"><table class="table_c5ftk">'
+        f'<tr><th><h2>Label:</h2></th><td><a href="/label/1">{label}</a></td></tr>'
+        f'<tr><th><h2>Genre:</h2></th><td>{genre_links}</td></tr>'
+        f'<tr><th><h2>Style:</h2></th><td>{style_links}</td></tr>'
+        f"</table></div>"
+        f"<table><tbody>{rows}</tbody></table>"
+        f"{make_filler_html(filler_kb)}"
+        f"</body></html>"
+    )
+
+def make_artist_html(album_paths, members=("Membro 1", "Membro 2"), sites=("https://site.example",)):
+    """Gera uma página de artista com a tabela de discografia apontando para album_paths."""
+    member_links = ", ".join(f'<a href="/artist/{m}">{m}</a>' for m in members)
+    site_links = ", ".join(f'<a href="{s}">{s}</a>' for s in sites)
+    rows = "".join(
+        f'<tr class="textWithCoversRow_Xv0h3">'
+        f'<td><a class="link_wXY7O" href="{path}">capa</a></td>'
+        f'<td class="title_K9_iv"><a class="link_wXY7O" href="{path}">Album {i}</a></td>'
+        f'<td class="year_o3FNi">{2000 + i}</td>'
+        f'</tr>'
+        for i, path in enumerate(album_paths, start=1)
+    )
+    return (
+        "<html><body>"
+        '<div class="info_LD8Ql"><table>'
+        f"<tr><th><h2>Sites:</h2></th><td>{site_links}</td></tr>"
+        f"<tr><th><h2>Members:</h2></th><td>{member_links}</td></tr>"
+        "</table></div>"
+        f"<table><tbody>{rows}</tbody></table>"
+        "</body></html>"
+    )
+
+def make_search_html(artists):
+    """Gera uma página de resultados da busca com um card por (nome, caminho do artista)."""
+    cards = "".join(
+        f'<div role="listitem" class="w-full text-black">'
+        f'<a class="block w-full truncate text-sm" href="/release/{i}">Release {i}</a>'
+        f'<a class="block w-full truncate text-sm" href="{path}">{name}</a>'
+        f"</div>"
+        for i, (name, path) in enumerate(artists)
+    )
+    return f'<html><body><div role="list">{cards}</div></body></html>'
+
+def make_listing_json(releases, page=1, pages=1):
+    """Gera uma página da listagem JSON da discografia (mesmo formato do endpoint do Discogs)."""
+    return json.dumps({
+        "pagination": {"page": page, "pages": pages, "per_page": len(releases), "items": len(releases) * pages},
+        "releases": list(releases),
+    })
+
+def make_site_pages(n_artists=4, n_albums=3, n_tracks=10, genre="Rock", filler_kb=0, search_path="/pt_BR/search",
+                    listing_path="/artists/{artist_id}/releases"):
+    """
+    Site sintético completo para um crawl de ponta a ponta: a página da busca por
+    `genre`, uma página por artista, a listagem JSON da discografia de cada um e
+    as páginas dos álbuns. Retorna {caminho (com query): corpo}.
+    """
+    # Import tardio: o fixture_server não depende dos módulos do scraper para as outras páginas
+    from discovery import search_page_url
+    from discography import listing_page_url
+
+    pages = {}
+    artists = [(f"Artista {a}", f"/artist/{a}-Artista-{a}") for a in range(1, n_artists + 1)]
+    pages[search_page_url(search_path, genre)] = make_search_html(artists)
+    for a, (name, path) in enumerate(artists, start=1):
+        album_paths = []
+        releases = []
+        for i in range(1, n_albums + 1):
+            release_id = a * 1000 + i
+            album_paths.append(f"/release/{release_id}")
+            releases.append({"id": release_id, "title": f"{name} Album {i}", "year": 1990 + i,
+                             "role": "Main", "type": "release", "format": "LP, Album"})
+            pages[f"/release/{release_id}"] = make_album_html(
+                n_tracks, f"{name} Album {i}", filler_kb=filler_kb, embedded=("state",) if i % 2 else ()
+            )
+        pages[path] = make_artist_html(album_paths, members=(f"{name} Membro",))
+        pages[listing_page_url(a, listing_url=listing_path)] = make_listing_json(releases)
+    return pages
+
+# ----------------------
+# SERVIDOR LOCAL
+# ----------------------
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 para permitir conexões keep-alive
+    protocol_version = "HTTP/1.1"
+    # Evita o atraso do Nagle/delayed ACK entre cabeçalhos e corpo em conexões reaproveitadas
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        fixture = self.server.fixture
+        with self.server.lock:
+            self.server.requests += 1
+            scheduled = fixture.schedule[(self.server.requests - 1) % len(fixture.schedule)] if fixture.schedule else 200
+            if scheduled == 200 and fixture.error_rate and fixture.rng.random() < fixture.error_rate:
+                scheduled = fixture.rng.choice(fixture.error_statuses)
+            latency = fixture.latency + (fixture.rng.uniform(0, fixture.jitter) if fixture.jitter else 0)
+
+        if latency:
+            fixture.sleep(latency)
+
+        if scheduled != 200:
+            with self.server.lock:
+                self.server.rejected += 1
+            self.send_response(scheduled)
+            if fixture.retry_after is not None:
+                self.send_header("Retry-After", str(fixture.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = fixture.pages.get(self.path.split("#")[0])
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        data = body.encode("utf-8")
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        if fixture.etags and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", fixture.content_types.get(self.path, "text/html; charset=utf-8"))
+        if fixture.etags:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    Servidor HTTP local que serve páginas em memória, usado em testes e benchmarks.
+    `schedule` é uma sequência de status aplicada em ciclo às requisições, na ordem
+    de chegada (ex: (200, 200, 429) recusa uma a cada três), com Retry-After opcional.
+    Para injetar falhas aleatórias, `error_rate` responde com um dos `error_statuses`
+    nessa fração das requisições; `jitter` soma até N segundos aleatórios à latência.
+    `seed` torna as duas coisas reproduzíveis.
+    """
+
+    def __init__(self, pages, latency=0.0, etags=False, schedule=None, retry_after=None, host="127.0.0.1", port=0,
+                 error_rate=0.0, error_statuses=(503,), jitter=0.0, seed=None, content_types=None):
+        self.pages = dict(pages)
+        self.latency = latency
+        self.etags = etags
+        self.schedule = tuple(schedule or ())
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.content_types = dict(content_types or {})
+        self._httpd = ThreadingHTTPServer((host, port), _FixtureHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fixture = self
+        self._httpd.lock = threading.Lock()
+        self._httpd.connections = 0
+        self._httpd.requests = 0
+        self._httpd.rejected = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self):
+        return self._httpd.connections
+
+    @property
+    def requests(self):
+        return self._httpd.requests
+
+    @property
+    def rejected(self):
+        """Requisições respondidas com um status de erro (do `schedule` ou do `error_rate`)."""
+        return self._httpd.rejected
+
+    def url(self, path):
+        return self.base_url + path
+
+    def sleep(self, seconds):
+        self._stop.wait(seconds)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import bisect
+import logging
+import resource
+import threading
+import functools
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+except ImportError: # psutil é opcional: sem ele o RSS atual vem de /proc (só Linux)
+    psutil = None
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+# Buckets das etapas do run: o parse e os extract_* ficam na casa dos milissegundos
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+
+class LatencyHistogram:
+    """Histograma de latências thread-safe com buckets fixos e amostras recentes para percentis."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, max_samples=1000):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1) # último = acima do maior limite
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self._samples.append(seconds)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Percentil aproximado a partir das amostras mais recentes."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def cumulative_buckets(self):
+        """Pares (limite, contagem acumulada), no formato dos histogramas do Prometheus."""
+        with self._lock:
+            counts = list(self.bucket_counts)
+        total, pairs = 0, []
+        for bound, n in zip([f"{b:g}" for b in self.buckets] + ["+Inf"], counts):
+            total += n
+            pairs.append((bound, total))
+        return pairs
+
+    def format_buckets(self):
+        """Representação compacta dos buckets não vazios, ex: '<=0.1s:3 <=0.25s:5 >30s:1'."""
+        labels = [f"<={b:g}s" for b in self.buckets] + [f">{self.buckets[-1]:g}s"]
+        return " ".join(f"{label}:{n}" for label, n in zip(labels, self.bucket_counts) if n)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 4),
+            "mean_s": round(self.mean, 4),
+            "p50_s": round(self.quantile(0.5), 4),
+            "p95_s": round(self.quantile(0.95), 4),
+            "max_s": round(self.max, 4),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.bucket_counts)),
+        }
+
+
+def resource_usage():
+    """RSS atual e de pico do processo (bytes) e CPU de usuário/sistema (s), incluindo filhos já encerrados."""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    rss = None
+    if psutil is not None:
+        rss = psutil.Process().memory_info().rss
+    else:
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss = int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return {
+        "rss_bytes": rss,
+        "peak_rss_bytes": own.ru_maxrss * 1024, # ru_maxrss vem em KB no Linux
+        "cpu_user_s": round(own.ru_utime + children.ru_utime, 3),
+        "cpu_system_s": round(own.ru_stime + children.ru_stime, 3),
+    }
+
+
+class StageMetrics:
+    """
+    Latência de cada etapa do run (histogramas por nome de etapa) e contadores
+    (bytes baixados, páginas...). As etapas são medidas com `stage` ou `timed`.
+
+    Nos processos de parse, keep_observations=True guarda também as observações
+    brutas, que voltam ao processo principal com `drain` e entram aqui com `merge`.
+    """
+
+    def __init__(self, buckets=STAGE_BUCKETS, clock=time.perf_counter):
+        self.buckets = buckets
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.keep_observations = False
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = Counter()
+            self.started = self._clock()
+            self._observations = []
+            self._pending_counts = Counter()
+
+    def histogram(self, stage):
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = LatencyHistogram(self.buckets)
+            return hist
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+        if self.keep_observations:
+            with self._lock:
+                self._observations.append((stage, seconds))
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+            if self.keep_observations:
+                self._pending_counts[name] += amount
+
+    @contextmanager
+    def stage(self, name):
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.observe(name, self._clock() - start)
+
+    def timed(self, name):
+        """Decorador que mede cada chamada da função como a etapa `name`."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def drain(self):
+        """Observações e contagens desde o último drain (para enviar a outro processo)."""
+        with self._lock:
+            observations, counts = self._observations, dict(self._pending_counts)
+            self._observations, self._pending_counts = [], Counter()
+        return observations, counts
+
+    def merge(self, observations, counts=None):
+        for stage, seconds in observations:
+            self.histogram(stage).observe(seconds)
+        for name, amount in (counts or {}).items():
+            self.count(name, amount)
+
+    def report(self, extra=None):
+        """Relatório do run (dict serializável em JSON); `extra` junta os relatórios de outros componentes."""
+        elapsed = self._clock() - self.started
+        with self._lock:
+            stages = sorted(self.histograms.items())
+            counters = dict(self.counters)
+        report = {
+            "elapsed_s": round(elapsed, 3),
+            "pages_per_s": round(counters.get("pages_downloaded", 0) / elapsed, 3) if elapsed > 0 else 0.0,
+            "bytes_per_s": round(counters.get("bytes_downloaded", 0) / elapsed, 1) if elapsed > 0 else 0.0,
+            "counters": counters,
+            "resources": resource_usage(),
+            "stages": {stage: hist.summary() for stage, hist in stages},
+        }
+        report.update(extra or {})
+        return report
+
+    def log_report(self):
+        r = self.report()
+        for stage, summary in r["stages"].items():
+            logging.info(
+                f"[MÉTRICAS] {stage}: {summary['count']}x, total {summary['total_s']:.2f}s, "
+                f"média {summary['mean_s'] * 1000:.1f} ms, p95 {summary['p95_s'] * 1000:.1f} ms"
+            )
+        logging.info(
+            f"[MÉTRICAS] {r['pages_per_s']:.2f} páginas/s, {r['bytes_per_s'] / 1024:.0f} KB/s, "
+            f"CPU {r['resources']['cpu_user_s'] + r['resources']['cpu_system_s']:.1f}s, "
+            f"pico de RSS {r['resources']['peak_rss_bytes'] / (1024 * 1024):.0f} MB"
+        )
+
+    def write_report(self, path, extra=None):
+        report = self.report(extra)
+        _write_atomic(path, json.dumps(report, ensure_ascii=False, indent=2, default=str))
+        logging.info(f"[MÉTRICAS] Relatório do run salvo em {path}.")
+        return report
+
+    def prometheus_text(self, prefix="discogs"):
+        """Métricas no formato de texto do Prometheus (endpoint /metrics ou textfile collector)."""
+        with self._lock:
+            stages = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+        for stage, hist in stages:
+            for bound, total in hist.cumulative_buckets():
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {total}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {hist.total:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+        for name, value in counters:
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+
+        usage = resource_usage()
+        lines.append(f"# TYPE {prefix}_cpu_seconds_total counter")
+        lines.append(f'{prefix}_cpu_seconds_total{{mode="user"}} {usage["cpu_user_s"]}')
+        lines.append(f'{prefix}_cpu_seconds_total{{mode="system"}} {usage["cpu_system_s"]}')
+        for gauge in ("rss_bytes", "peak_rss_bytes"):
+            if usage[gauge] is not None:
+                lines.append(f"# TYPE {prefix}_{gauge} gauge")
+                lines.append(f"{prefix}_{gauge} {usage[gauge]}")
+        lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+        lines.append(f"{prefix}_uptime_seconds {self._clock() - self.started:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Métricas do processo. Os módulos registram nelas sem precisar receber um objeto.
+METRICS = StageMetrics()
+
+
+class MetricsExporter:
+    """
+    Exporta as métricas ao vivo durante crawls longos: reescreve `path` (arquivo para o
+    textfile collector do node_exporter) a cada `interval` segundos e/ou serve
+    GET /metrics na porta `port` (0 escolhe uma porta livre).
+    """
+
+    def __init__(self, metrics=METRICS, path=None, port=None, interval=15, host="127.0.0.1"):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._threads = []
+        self.server = None
+
+        if port is not None:
+            self.server = ThreadingHTTPServer((host, port), self._handler())
+            self.port = self.server.server_address[1]
+            self._start(self.server.serve_forever)
+            logging.info(f"[MÉTRICAS] Endpoint em http://{host}:{self.port}/metrics")
+        if path:
+            self._start(self._write_loop)
+
+    def _handler(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _start(self, target):
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def write(self):
+        _write_atomic(self.path, self.metrics.prometheus_text())
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def close(self):
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        for thread in self._threads:
+            thread.join()
+        if self.path:
+            self.write() # valores finais do run
@@ -0,0 +1,158 @@
+import io
+import os
+import re
+import gzip
+import json
+import time
+import logging
+import threading
+
+try:
+    import zstandard
+except ImportError: # zstandard é opcional: só necessário com compression="zstd"
+    zstandard = None
+
+EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+class JsonlSink:
+    """
+    Escreve registros em JSON Lines à medida que ficam prontos.
+
+    Cada registro é gravado e enviado ao disco imediatamente (flush). Sem rotação,
+    a escrita vai direto para `path`, no mesmo formato do save_to_jsonl original, e
+    quem lê o arquivo (ex: OutputIndex) já vê os registros durante o run. Com
+    rotação, cada segmento é escrito num `.part` e renomeado atomicamente para o
+    nome final ao fechar ou ao passar de rotate_bytes / rotate_seconds, então
+    consumidores nunca veem um segmento fechado pela metade.
+
+    As saídas de um run anterior só são removidas depois que o novo arquivo existe
+    (sem rotação, ao abri-lo; com rotação, quando o primeiro segmento é concluído).
+    """
+
+    def __init__(self, path, rotate_bytes=None, rotate_seconds=None, compression=None, clock=time.monotonic):
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Compressão desconhecida: {compression!r} (use None, 'gzip' ou 'zstd').")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("Compressão zstd requer o pacote 'zstandard' (pip install zstandard).")
+
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compression = compression
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file = None
+        self._raw = None
+        self._segment = 0
+        self._segment_bytes = 0
+        self._segment_started = None
+        self._cleared = False
+        self.records = 0
+        self.segments = []
+
+    @property
+    def rotating(self):
+        return bool(self.rotate_bytes or self.rotate_seconds)
+
+    def _final_name(self, segment):
+        ext = EXTENSIONS[self.compression]
+        if not self.rotating:
+            return self.path + ext
+        base, suffix = os.path.splitext(self.path)
+        return f"{base}.{segment:05d}{suffix}{ext}"
+
+    def _clear_previous(self, keep):
+        """A saída pertence ao run atual (como o modo 'w' original): remove os segmentos antigos fora de `keep`."""
+        self._cleared = True
+        directory = os.path.dirname(self.path) or "."
+        base, suffix = os.path.splitext(os.path.basename(self.path))
+        pattern = re.compile(rf"^{re.escape(base)}(\.\d{{5}})?{re.escape(suffix)}(\.gz|\.zst)?(\.part)?$")
+        keep = {os.path.basename(path) for path in keep}
+        for name in os.listdir(directory):
+            if pattern.match(name) and name not in keep:
+                os.remove(os.path.join(directory, name))
+
+    def _open_segment(self):
+        self._segment += 1
+        final = self._final_name(self._segment)
+        self._raw = open(final + ".part" if self.rotating else final, "wb")
+        if not self._cleared and not self.rotating:
+            self._clear_previous([final])
+        if self.compression == "gzip":
+            self._file = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        elif self.compression == "zstd":
+            self._file = zstandard.ZstdCompressor().stream_writer(self._raw)
+        else:
+            self._file = self._raw
+        self._segment_bytes = 0
+        self._segment_started = self._clock()
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        if self.compression == "gzip":
+            self._file.close() # fecha só o stream gzip; o arquivo é fechado abaixo
+        elif self.compression == "zstd":
+            self._file.flush(zstandard.FLUSH_FRAME)
+        self._raw.close()
+        final = self._final_name(self._segment)
+        if self.rotating:
+            os.replace(final + ".part", final)
+        self.segments.append(final)
+        if not self._cleared:
+            self._clear_previous(self.segments)
+        self._file = self._raw = None
+        logging.info(f"[SAÍDA] Segmento concluído: {final}")
+
+    def _should_rotate(self):
+        if self.rotate_bytes and self._segment_bytes >= self.rotate_bytes:
+            return True
+        return bool(self.rotate_seconds) and self._clock() - self._segment_started >= self.rotate_seconds
+
+    def write(self, record):
+        """Grava um registro e faz flush, para que fique visível imediatamente."""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is not None and self._should_rotate():
+                self._close_segment()
+            if self._file is None:
+                self._open_segment()
+
+            self._file.write(line)
+            if self.compression == "zstd":
+                self._file.flush(zstandard.FLUSH_BLOCK)
+            elif self.compression == "gzip":
+                self._file.flush()
+            self._raw.flush()
+            self._segment_bytes += len(line)
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is None and not self.segments:
+                self._open_segment() # run sem registros ainda gera o arquivo vazio, como antes
+            self._close_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path):
+    """Lê os registros de um arquivo JSONL escrito pelo JsonlSink (.gz e .zst são descomprimidos)."""
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("Ler arquivos .zst requer o pacote 'zstandard' (pip install zstandard).")
+        raw = open(path, "rb")
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw), encoding="utf-8")
+    elif path.endswith(".gz"):
+        f = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        f = open(path, encoding="utf-8")
+    with f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,100 @@
+"""
+Navegação enxuta no Selenium: o Chrome só baixa o documento e os scripts que
+montam o DOM lido pelas funções extract_*.
+
+Imagens (capas), fontes, mídia e scripts de anúncio/analytics são bloqueados na
+camada de rede (Network.setBlockedURLs do DevTools), as imagens também são
+desativadas nas preferências, e a estratégia de carregamento "eager" faz o
+driver.get voltar no DOMContentLoaded. A espera pelo que é lido na página fica
+com o ReadinessWaiter.
+"""
+import logging
+
+from instrumentation import METRICS
+
+# Tipos de recurso que nunca são usados (padrões do Network.setBlockedURLs, com curinga *)
+BLOCKED_RESOURCE_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp3", "*.mp4", "*.webm",
+]
+
+# Anúncios, analytics e rastreadores
+BLOCKED_DOMAINS = [
+    "doubleclick.net", "googlesyndication.com", "googletagservices.com", "googletagmanager.com",
+    "google-analytics.com", "adservice.google.com", "amazon-adsystem.com", "adnxs.com", "criteo.com",
+    "criteo.net", "taboola.com", "outbrain.com", "scorecardresearch.com", "quantserve.com",
+    "quantcount.com", "facebook.net", "connect.facebook.com", "hotjar.com", "chartbeat.com",
+    "moatads.com", "rubiconproject.com", "pubmatic.com", "openx.net", "casalemedia.com",
+    "bidswitch.net", "sentry-cdn.com",
+    "i.discogs.com", # capas e fotos do Discogs
+]
+
+DEFAULT_BLOCKED_URLS = BLOCKED_RESOURCE_PATTERNS + [f"*{domain}*" for domain in BLOCKED_DOMAINS]
+
+# Bytes transferidos e número de requisições da página atual, pela Resource Timing API.
+# transferSize é 0 para recursos de outra origem sem Timing-Allow-Origin e para os bloqueados.
+PAGE_TRANSFER_SCRIPT = """
+const nav = performance.getEntriesByType("navigation")[0];
+const resources = performance.getEntriesByType("resource");
+return {
+    bytes: (nav ? nav.transferSize : 0) + resources.reduce((total, r) => total + (r.transferSize || 0), 0),
+    requests: resources.length + (nav ? 1 : 0),
+    dom_ready_s: nav ? nav.domContentLoadedEventEnd / 1000 : null,
+};
+"""
+
+
+def apply_lean_options(options, page_load_strategy="eager"):
+    """Ajusta as Options do Chrome: sem imagens e carregamento até o DOMContentLoaded."""
+    options.page_load_strategy = page_load_strategy
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    return options
+
+
+def enable_request_blocking(driver, patterns=DEFAULT_BLOCKED_URLS):
+    """Bloqueia as URLs que casam com `patterns` via DevTools. False se o driver não suportar CDP."""
+    if not hasattr(driver, "execute_cdp_cmd"):
+        logging.warning("[ENXUTO] Driver sem DevTools (CDP): recursos não serão bloqueados na rede.")
+        return False
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    return True
+
+
+def page_transfer(driver):
+    """{bytes, requests, dom_ready_s} da página carregada no driver, ou None se não for possível medir."""
+    try:
+        stats = driver.execute_script(PAGE_TRANSFER_SCRIPT)
+    except Exception:
+        return None
+    return stats if isinstance(stats, dict) else None
+
+
+def record_page_transfer(driver):
+    """Soma o tráfego real da página (documento e recursos) às métricas do run."""
+    stats = page_transfer(driver)
+    if stats is None:
+        return None
+    METRICS.count("browser_pages")
+    METRICS.count("browser_bytes", stats.get("bytes") or 0)
+    METRICS.count("browser_requests", stats.get("requests") or 0)
+    if stats.get("dom_ready_s") is not None:
+        METRICS.observe("dom_ready", stats["dom_ready_s"])
+    return stats
+
+
+def transfer_report(counters):
+    """Média de bytes e requisições por página carregada no navegador, a partir dos contadores do run."""
+    pages = counters.get("browser_pages", 0)
+    return {
+        "pages": pages,
+        "bytes_per_page": round(counters.get("browser_bytes", 0) / pages) if pages else 0,
+        "requests_per_page": round(counters.get("browser_requests", 0) / pages, 1) if pages else 0.0,
+    }
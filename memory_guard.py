@@ -0,0 +1,81 @@
+import gc
+import time
+import logging
+
+from instrumentation import METRICS, resource_usage
+
+
+class MemoryGuard:
+    """
+    Teto de memória (RSS) do crawl.
+
+    `over_ceiling` é consultado pelo laço de artistas antes de submeter trabalho
+    novo. Acima do teto, os sinks gravam o que têm em buffer (flush), o coletor de
+    ciclos roda e o RSS é medido de novo; se ainda estiver acima, o laço segura as
+    submissões (backpressure) até os artistas em andamento terminarem e serem
+    gravados. O flush roda no máximo uma vez a cada `interval` segundos.
+
+    Com ceiling_mb=None o guarda fica inativo e nunca mede nada.
+    """
+
+    def __init__(self, ceiling_mb=None, flush=(), interval=1.0, rss=None, clock=time.monotonic):
+        self.ceiling_bytes = ceiling_mb * 1024 * 1024 if ceiling_mb else None
+        self._flush = [callback for callback in flush if callback is not None]
+        self.interval = interval
+        self._rss = rss or (lambda: resource_usage()["rss_bytes"])
+        self._clock = clock
+        self._last_flush = None
+        self.flushes = 0
+        self.throttled = 0
+        self.max_rss_bytes = 0
+
+    @property
+    def enabled(self):
+        return self.ceiling_bytes is not None
+
+    def add_flush(self, callback):
+        if callback is not None:
+            self._flush.append(callback)
+
+    def over_ceiling(self):
+        """True se o processo continua acima do teto mesmo depois do flush."""
+        if not self.enabled:
+            return False
+        rss = self._rss()
+        if rss is None: # sem psutil nem /proc: não há como medir
+            return False
+        self.max_rss_bytes = max(self.max_rss_bytes, rss)
+        if rss <= self.ceiling_bytes:
+            return False
+
+        now = self._clock()
+        if self._last_flush is None or now - self._last_flush >= self.interval:
+            self._last_flush = now
+            self.release()
+            after = self._rss()
+            logging.info(
+                f"[MEMÓRIA] RSS {rss / 1024 / 1024:.0f} MB acima do teto de {self.ceiling_bytes / 1024 / 1024:.0f} MB; "
+                f"buffers gravados, agora {after / 1024 / 1024:.0f} MB."
+            )
+            rss = after
+        if rss > self.ceiling_bytes:
+            self.throttled += 1
+            METRICS.count("memory_throttled")
+            return True
+        return False
+
+    def release(self):
+        """Grava os buffers dos sinks e coleta os ciclos de objetos já sem uso."""
+        for callback in self._flush:
+            callback()
+        gc.collect()
+        self.flushes += 1
+        METRICS.count("memory_flushes")
+
+    def report(self):
+        return {
+            "ceiling_mb": round(self.ceiling_bytes / 1024 / 1024) if self.enabled else None,
+            "max_rss_mb": round(self.max_rss_bytes / 1024 / 1024, 1),
+            "flushes": self.flushes,
+            "throttled": self.throttled,
+        }
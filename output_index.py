@@ -0,0 +1,374 @@
+"""
+Índice invertido sobre o JSONL de saída, para consultas sem varrer o arquivo.
+
+Para cada linha (um artista) o índice guarda o offset em bytes e, por termo, as
+linhas e os álbuns em que ele aparece: gravadora, gênero e estilo de cada álbum,
+nome do artista e as palavras dos nomes das faixas. Uma consulta resolve os termos
+no SQLite e lê só as linhas encontradas, direto do arquivo mapeado em memória
+(mmap). Os termos são normalizados (sem acento nem caixa): "Rock", "rock" e
+"RÓCK" são a mesma chave.
+
+O índice acompanha o arquivo: a cada consulta, as linhas acrescentadas desde a
+última atualização são indexadas (só as completas, terminadas em quebra de
+linha). Se o arquivo foi reescrito (um run novo), o índice é refeito do zero.
+
+Uso:
+    python output_index.py dados_discogs.jsonl --gravadora "Sub Pop"
+    python output_index.py dados_discogs.jsonl --estilo Shoegaze --genero Rock --artistas
+    python output_index.py dados_discogs.jsonl --faixa "love song"
+"""
+import os
+import re
+import sys
+import json
+import mmap
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+import unicodedata
+
+# Campo da consulta -> (chave no registro, nível). Nível "album": o termo aponta
+# para um álbum da linha; "artista": para a linha inteira.
+FIELDS = {
+    "artista": ("nome_artista", "artista"),
+    "gravadora": ("gravadora_album", "album"),
+    "genero": ("genero_album", "album"),
+    "estilo": ("estilos_album", "album"),
+    "faixa": ("nome_faixa", "album"), # por palavra: todas as palavras da consulta no mesmo álbum
+}
+WORD_FIELDS = {"faixa"}
+ARTIST_LEVEL = -1 # "álbum" das postings de nível artista
+
+HEAD_BYTES = 4096 # bytes do início do arquivo usados para reconhecer que ele não foi reescrito
+_WORD = re.compile(r"\w+")
+_MAX_PARAMS = 900 # parâmetros por consulta IN (o limite antigo do SQLite é 999)
+
+
+def normalize(text):
+    """Chave de busca: sem acentos, casefold e espaços colapsados."""
+    text = str(text)
+    if not text.isascii(): # a maioria dos nomes é ASCII e não precisa da decomposição
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.casefold().split())
+
+
+def words(text):
+    return _WORD.findall(normalize(text))
+
+
+def _values(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def record_terms(record):
+    """Termos de uma linha do JSONL: {(campo, termo, álbum)}, com álbum = ARTIST_LEVEL nos de artista."""
+    terms = set()
+    for value in _values(record.get("nome_artista")):
+        terms.add(("artista", normalize(value), ARTIST_LEVEL))
+    for index, album in enumerate(record.get("albuns") or ()):
+        for field in ("gravadora", "genero", "estilo"):
+            for value in _values(album.get(FIELDS[field][0])):
+                terms.add((field, normalize(value), index))
+        for track in album.get("faixas_album") or ():
+            for word in words(track.get("nome_faixa") or ""):
+                terms.add(("faixa", word, index))
+    return {term for term in terms if term[1]}
+
+
+class OutputIndex:
+    """
+    Índice (SQLite) de um arquivo JSONL do scraper, com consultas por artista,
+    gravadora, gênero, estilo e palavras dos nomes das faixas.
+
+    Arquivos comprimidos (.gz/.zst) não têm offsets úteis e não são aceitos; para
+    eles, descomprima antes ou use o RecordStore.
+    """
+
+    def __init__(self, jsonl_path, index_path=None, batch_postings=500_000):
+        if jsonl_path.endswith((".gz", ".zst")):
+            raise ValueError(f"O índice precisa do JSONL sem compressão (offsets em bytes): {jsonl_path}")
+        self.path = jsonl_path
+        self.index_path = index_path or jsonl_path + ".idx.sqlite"
+        self.batch_postings = batch_postings
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL") # o índice pode ser refeito a partir do JSONL
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS linhas (
+                offset INTEGER PRIMARY KEY,
+                tamanho INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS termos (
+                id INTEGER PRIMARY KEY,
+                campo TEXT NOT NULL,
+                termo TEXT NOT NULL,
+                UNIQUE (campo, termo)
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                termo INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                album INTEGER NOT NULL,
+                PRIMARY KEY (termo, offset, album)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+        """)
+        self._db.commit()
+        self._term_ids = {}
+        self._file = None
+        self._map = None
+
+    # ----------------------
+    # ATUALIZAÇÃO
+    # ----------------------
+
+    def _meta(self, name, default=None):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, name, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, json.dumps(value)))
+
+    def _head_hash(self, f, size):
+        f.seek(0)
+        return hashlib.sha1(f.read(size)).hexdigest()
+
+    def _clear(self):
+        for table in ("linhas", "termos", "postings", "meta"):
+            self._db.execute(f"DELETE FROM {table}")
+        self._term_ids.clear()
+
+    def _term_id(self, field, term):
+        key = (field, term)
+        term_id = self._term_ids.get(key)
+        if term_id is None:
+            self._db.execute("INSERT OR IGNORE INTO termos (campo, termo) VALUES (?, ?)", key)
+            term_id = self._db.execute("SELECT id FROM termos WHERE campo = ? AND termo = ?", key).fetchone()[0]
+            self._term_ids[key] = term_id
+        return term_id
+
+    def _insert_postings(self, postings):
+        # Em ordem da chave primária, as inserções caem em páginas vizinhas da árvore
+        postings.sort()
+        self._db.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?)", postings)
+
+    def update(self):
+        """Indexa as linhas completas acrescentadas desde a última atualização. Retorna quantas."""
+        if not os.path.exists(self.path):
+            return 0
+        with self._lock, open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            indexed = self._meta("tamanho", 0)
+            head_size = self._meta("tamanho_inicio", 0)
+            if size < indexed or (head_size and self._head_hash(f, head_size) != self._meta("hash_inicio")):
+                logging.info(f"[ÍNDICE] {self.path} foi reescrito; refazendo o índice.")
+                self._clear()
+                indexed = head_size = 0
+
+            f.seek(indexed)
+            lines = 0
+            offset = indexed
+            postings = []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # linha ainda sendo escrita: fica para a próxima atualização
+                if line.strip():
+                    record = json.loads(line)
+                    self._db.execute("INSERT OR REPLACE INTO linhas (offset, tamanho) VALUES (?, ?)",
+                                     (offset, len(line)))
+                    postings.extend((self._term_id(field, term), offset, album)
+                                    for field, term, album in record_terms(record))
+                    lines += 1
+                    if len(postings) >= self.batch_postings:
+                        self._insert_postings(postings)
+                        postings = []
+                offset += len(line)
+            self._insert_postings(postings)
+
+            if head_size < HEAD_BYTES and offset > head_size:
+                head_size = min(offset, HEAD_BYTES)
+                self._set_meta("tamanho_inicio", head_size)
+                self._set_meta("hash_inicio", self._head_hash(f, head_size))
+            self._set_meta("tamanho", offset)
+            self._db.commit()
+        if lines:
+            logging.info(f"[ÍNDICE] {lines} linhas novas indexadas em {self.index_path}.")
+        return lines
+
+    # ----------------------
+    # CONSULTAS
+    # ----------------------
+
+    def _query_terms(self, criteria):
+        """[(nível, id do termo, nº de postings)] dos critérios, do mais raro ao mais comum; None se algum não existe."""
+        terms = []
+        for field, value in criteria.items():
+            if field not in FIELDS:
+                raise ValueError(f"Campo de consulta desconhecido: {field!r} (use {', '.join(FIELDS)}).")
+            for term in words(value) if field in WORD_FIELDS else [normalize(value)]:
+                row = self._db.execute("SELECT id FROM termos WHERE campo = ? AND termo = ?", (field, term)).fetchone()
+                if row is None:
+                    return None
+                count = self._db.execute("SELECT COUNT(*) FROM postings WHERE termo = ?", (row[0],)).fetchone()[0]
+                terms.append((FIELDS[field][1], row[0], count))
+        return sorted(terms, key=lambda term: term[2])
+
+    def _restricted(self, term_id, offsets):
+        """Postings de um termo só nas linhas candidatas (busca pela chave primária)."""
+        rows = []
+        offsets = sorted(offsets)
+        for start in range(0, len(offsets), _MAX_PARAMS):
+            chunk = offsets[start:start + _MAX_PARAMS]
+            rows += self._db.execute(
+                f"SELECT offset, album FROM postings WHERE termo = ? AND offset IN ({', '.join('?' * len(chunk))})",
+                (term_id, *chunk),
+            ).fetchall()
+        return rows
+
+    def _matches(self, criteria):
+        """
+        {offset: álbuns que casam (None = a linha inteira)} para todos os critérios juntos (E).
+        Os termos são resolvidos do mais raro ao mais comum: depois do primeiro, cada termo
+        só é procurado nas linhas que ainda são candidatas.
+        """
+        criteria = {field: value for field, value in criteria.items() if value is not None}
+        if not criteria:
+            raise ValueError("Informe ao menos um critério de consulta.")
+        self.update()
+        with self._lock:
+            terms = self._query_terms(criteria)
+            if not terms:
+                return {}
+            offsets = None # linhas candidatas
+            albums = None # (offset, álbum) candidatos, depois do primeiro critério de álbum
+            for level, term_id, _ in terms:
+                if offsets is None:
+                    rows = self._db.execute("SELECT offset, album FROM postings WHERE termo = ?", (term_id,)).fetchall()
+                else:
+                    rows = self._restricted(term_id, offsets)
+                if level == "album":
+                    found = set(rows)
+                    albums = found if albums is None else albums & found
+                    if offsets is not None:
+                        albums = {(offset, album) for offset, album in albums if offset in offsets}
+                    offsets = {offset for offset, _ in albums}
+                else:
+                    found = {offset for offset, _ in rows}
+                    offsets = found if offsets is None else offsets & found
+                    if albums is not None:
+                        albums = {(offset, album) for offset, album in albums if offset in offsets}
+                if not offsets:
+                    return {}
+
+        if albums is None:
+            return {offset: None for offset in sorted(offsets)}
+        matches = {}
+        for offset, album in sorted(albums):
+            matches.setdefault(offset, []).append(album)
+        return matches
+
+    def _view(self):
+        """Arquivo mapeado em memória, remapeado se cresceu desde a última leitura."""
+        stat = os.stat(self.path)
+        if self._map is None or len(self._map) < stat.st_size or os.fstat(self._file.fileno()).st_ino != stat.st_ino:
+            self._close_map()
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _read(self, offsets):
+        """[(offset, registro)] das linhas, lidas direto do mmap."""
+        if not offsets:
+            return []
+        with self._lock:
+            lengths = {}
+            for start in range(0, len(offsets), _MAX_PARAMS):
+                chunk = offsets[start:start + _MAX_PARAMS]
+                lengths.update(self._db.execute(
+                    f"SELECT offset, tamanho FROM linhas WHERE offset IN ({', '.join('?' * len(chunk))})", chunk,
+                ).fetchall())
+            view = self._view()
+            return [(offset, json.loads(view[offset:offset + lengths[offset]])) for offset in offsets]
+
+    def artists(self, **criteria):
+        """Artistas (linhas inteiras) com o critério; nos critérios de álbum, basta um álbum casar."""
+        matches = self._matches(criteria)
+        return [record for _, record in self._read(list(matches))]
+
+    def albums(self, **criteria):
+        """Pares (artista, álbum) que casam com todos os critérios, na ordem do arquivo."""
+        matches = self._matches(criteria)
+        result = []
+        for offset, record in self._read(list(matches)):
+            indexes = matches[offset]
+            albums = record.get("albuns") or []
+            for index in range(len(albums)) if indexes is None else indexes:
+                result.append((record, albums[index]))
+        return result
+
+    def terms(self, field, prefix=""):
+        """Termos indexados de um campo (ex: todas as gravadoras), com o número de linhas de cada um."""
+        self.update()
+        with self._lock:
+            return self._db.execute(
+                """SELECT t.termo, COUNT(DISTINCT p.offset) FROM termos t JOIN postings p ON p.termo = t.id
+                   WHERE t.campo = ? AND t.termo LIKE ? GROUP BY t.termo ORDER BY t.termo""",
+                (field, normalize(prefix) + "%"),
+            ).fetchall()
+
+    def _close_map(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def close(self):
+        with self._lock:
+            self._close_map()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o JSONL do scraper por um índice invertido.")
+    parser.add_argument("jsonl")
+    parser.add_argument("--indice", help="Banco do índice (padrão: <jsonl>.idx.sqlite)")
+    for field in FIELDS:
+        parser.add_argument(f"--{field}", help=f"Filtra por {field}" + (" (palavras)" if field in WORD_FIELDS else ""))
+    parser.add_argument("--artistas", action="store_true", help="Imprime os artistas inteiros em vez dos álbuns")
+    parser.add_argument("--termos", choices=list(FIELDS), help="Lista os termos indexados de um campo")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    with OutputIndex(args.jsonl, args.indice) as index:
+        if args.termos:
+            for term, count in index.terms(args.termos):
+                print(f"{count}\t{term}")
+            return
+        criteria = {field: getattr(args, field) for field in FIELDS}
+        if not any(criteria.values()):
+            index.update()
+            return
+        if args.artistas:
+            results = [json.dumps(artist, ensure_ascii=False) for artist in index.artists(**criteria)]
+        else:
+            results = [json.dumps({"id_artista": artist.get("id_artista"), "nome_artista": artist.get("nome_artista"),
+                                   **album}, ensure_ascii=False)
+                       for artist, album in index.albums(**criteria)]
+        for line in results:
+            print(line)
+        print(f"{len(results)} resultados", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
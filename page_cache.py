@@ -0,0 +1,232 @@
+import os
+import gzip
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from email.utils import formatdate
+
+from fetchers import Page
+
+# Validade padrão (s) de cada tipo de página; páginas de lançamento quase nunca mudam
+DEFAULT_TTLS = {
+    "search": 24 * 3600,
+    "artist": 7 * 24 * 3600,
+    "album": 30 * 24 * 3600,
+    "listing": 24 * 3600,
+}
+
+
+def cache_key(url):
+    """Chave do cache: hash SHA-256 da URL (sem fragmento)."""
+    return hashlib.sha256(url.split("#")[0].encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    Cache de páginas em disco. O HTML fica comprimido (gzip) em arquivos nomeados
+    pelo hash da URL e os metadados (ETag, Last-Modified, tamanho, último acesso)
+    num índice SQLite, usado para a expiração e para a remoção LRU quando o cache
+    passa de max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=500 * 1024 * 1024, compress_level=6):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                page_type TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                raw_size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        self._db.commit()
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".html.gz")
+
+    def get(self, url):
+        """Retorna os metadados da entrada (dict) ou None."""
+        key = cache_key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, page_type, stored_at, size, raw_size, etag, last_modified FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None or not os.path.exists(self._path(key)):
+            return None
+        url, page_type, stored_at, size, raw_size, etag, last_modified = row
+        return {
+            "key": key, "url": url, "page_type": page_type, "stored_at": stored_at,
+            "size": size, "raw_size": raw_size, "etag": etag, "last_modified": last_modified,
+        }
+
+    def read(self, entry):
+        """Lê o HTML de uma entrada e atualiza o último acesso (para o LRU)."""
+        with gzip.open(self._path(entry["key"]), "rt", encoding="utf-8") as f:
+            html = f.read()
+        self.touch(entry, refresh=False)
+        return html
+
+    def touch(self, entry, refresh=True):
+        """Marca a entrada como acessada; com refresh=True ela também volta a ser considerada nova."""
+        now = time.time()
+        with self._lock:
+            if refresh:
+                self._db.execute("UPDATE entries SET accessed_at = ?, stored_at = ? WHERE key = ?", (now, now, entry["key"]))
+            else:
+                self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, entry["key"]))
+            self._db.commit()
+
+    def put(self, url, html, page_type=None, headers=None):
+        headers = headers or {}
+        key = cache_key(url)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        raw = html.encode("utf-8")
+        data = gzip.compress(raw, compresslevel=self.compress_level)
+        # Escrita atômica: outro processo/thread nunca lê um arquivo pela metade
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, page_type, now, now, len(data), len(raw),
+                 headers.get("ETag"), headers.get("Last-Modified")),
+            )
+            self._db.commit()
+        self._evict()
+
+    def total_bytes(self):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        """Remove as entradas menos usadas recentemente até caber em max_bytes."""
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        with self._lock:
+            rows = self._db.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+            removed = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                try:
+                    os.remove(self._path(key))
+                except FileNotFoundError:
+                    pass
+                removed.append((key,))
+                excess -= size
+            self._db.executemany("DELETE FROM entries WHERE key = ?", removed)
+            self._db.commit()
+            self.evictions += len(removed)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class CachingFetcher:
+    """
+    Fetcher que consulta o PageCache antes de ir à rede.
+
+    Entradas dentro do TTL do tipo de página são servidas direto do disco. Entradas
+    vencidas são revalidadas com If-None-Match/If-Modified-Since; um 304 renova a
+    entrada sem baixar o corpo. No modo offline só o cache é usado.
+    """
+
+    def __init__(self, inner, cache, ttls=None, default_ttl=24 * 3600, offline=False):
+        self.inner = inner
+        self.cache = cache
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.offline = offline
+        self.name = f"cache+{getattr(inner, 'name', 'fetcher')}"
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "bytes_saved": 0}
+        self._lock = threading.Lock()
+
+    def load_cookies(self, cookies):
+        if hasattr(self.inner, "load_cookies"):
+            self.inner.load_cookies(cookies)
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self.stats[counter] += amount
+
+    def _cached_page(self, entry, url):
+        return Page(url=url, html=self.cache.read(entry), status=200, backend="cache")
+
+    def fetch(self, url, page_type=None, headers=None):
+        entry = self.cache.get(url)
+        ttl = self.ttls.get(page_type, self.default_ttl)
+
+        if entry is not None and (self.offline or time.time() - entry["stored_at"] < ttl):
+            self._count("hits")
+            self._count("bytes_saved", entry["raw_size"])
+            return self._cached_page(entry, url)
+
+        if self.offline:
+            self._count("misses")
+            logging.warning(f"[CACHE] Página fora do cache no modo offline: {url}")
+            return None
+
+        conditional = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                conditional["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                conditional["If-Modified-Since"] = entry["last_modified"]
+            elif not entry["etag"]:
+                conditional["If-Modified-Since"] = formatdate(entry["stored_at"], usegmt=True)
+
+        page = self.inner.fetch(url, page_type, headers=conditional or None)
+
+        if page is not None and page.status == 304 and entry is not None:
+            self._count("revalidated")
+            self._count("bytes_saved", entry["raw_size"])
+            self.cache.touch(entry)
+            return self._cached_page(entry, url)
+
+        self._count("misses")
+        if page is not None and page.status == 200:
+            self.cache.put(url, page.html, page_type, page.headers)
+            self._count("stored")
+        return page
+
+    def report(self):
+        with self._lock:
+            report = dict(self.stats)
+        report["evictions"] = self.cache.evictions
+        report["disk_bytes"] = self.cache.total_bytes()
+        return report
+
+    def log_report(self):
+        r = self.report()
+        logging.info(
+            f"[CACHE] hits: {r['hits']}, misses: {r['misses']}, revalidadas (304): {r['revalidated']}, "
+            f"bytes economizados: {r['bytes_saved'] / 1024:.0f} KB, em disco: {r['disk_bytes'] / 1024:.0f} KB, "
+            f"removidas (LRU): {r['evictions']}"
+        )
+
+    def close(self):
+        self.inner.close()
+        self.cache.close()
@@ -0,0 +1,108 @@
+import os
+import glob
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from instrumentation import METRICS
+
+# Configuração de cada processo de parse (definida pelo initializer)
+_worker_backend = None
+_worker_partial = False
+
+
+def _init_worker(backend, partial):
+    global _worker_backend, _worker_partial
+    _worker_backend = backend
+    _worker_partial = partial
+    # As medições do parse e dos extract_* voltam ao processo principal junto com cada resultado
+    METRICS.keep_observations = True
+
+
+def parse_page(page_type, html, url, backend=None, partial=False):
+    """
+    Roda as funções extract_* de um tipo de página ("album" ou "artist") e
+    devolve só dicts simples, que podem voltar do processo de parse via pickle.
+    """
+    # Import tardio: o discogs_scraper importa este módulo
+    from discogs_scraper import parse_album_page, parse_artist_page
+
+    if page_type == "album":
+        return parse_album_page(html, url, backend, partial)
+    if page_type == "artist":
+        return parse_artist_page(html, url, backend, partial)
+    raise ValueError(f"Tipo de página sem parser: {page_type!r}")
+
+
+def _parse_in_worker(page_type, html, url):
+    return parse_page(page_type, html, url, _worker_backend, _worker_partial), METRICS.drain()
+
+
+def _parse_file_in_worker(page_type, path):
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    return path, _parse_in_worker(page_type, html, "file://" + os.path.abspath(path))
+
+
+class ParsePool:
+    """
+    Faz o parse do HTML num ProcessPoolExecutor, para que o parse (CPU) use
+    vários núcleos e rode em paralelo com as buscas (rede).
+
+    As threads de busca entregam o HTML com `parse` e só esperam o resultado,
+    liberando o GIL para as outras buscas. Os processos usam o contexto "spawn":
+    fazer fork de um processo com threads de rede e drivers abertos não é seguro.
+    """
+
+    def __init__(self, workers=None, backend=None, partial=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend, partial),
+        )
+        logging.info(f"[PARSE] {self.workers} processos de parse.")
+
+    def submit(self, page_type, html, url):
+        """Envia uma página para o parse e devolve o Future com o dict extraído."""
+        result = Future()
+
+        def unwrap(future):
+            try:
+                data, measurements = future.result()
+            except BaseException as e:
+                result.set_exception(e)
+                return
+            METRICS.merge(*measurements)
+            result.set_result(data)
+
+        self.executor.submit(_parse_in_worker, page_type, html, url).add_done_callback(unwrap)
+        return result
+
+    def parse(self, page_type, html, url):
+        """Versão bloqueante de `submit`."""
+        return self.submit(page_type, html, url).result()
+
+    def parse_directory(self, directory, page_type="album", chunksize=4):
+        """
+        Faz o parse de todas as páginas salvas (*.html) de um diretório, sem rede.
+        Os processos leem os arquivos diretamente; retorna pares (caminho, dados) em ordem.
+        """
+        paths = sorted(glob.glob(os.path.join(directory, "*.html")))
+        results = []
+        for path, (data, measurements) in self.executor.map(
+            _parse_file_in_worker, [page_type] * len(paths), paths, chunksize=chunksize
+        ):
+            METRICS.merge(*measurements)
+            results.append((path, data))
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,154 @@
+import logging
+
+from bs4 import BeautifulSoup, Tag
+
+from instrumentation import METRICS
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError: # bs4 < 4.13: sem parse parcial
+    ElementFilter = None
+
+try:
+    import lxml # noqa: F401 (só para saber se o tree builder do lxml está disponível)
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# ----------------------
+# SUBÁRVORES NECESSÁRIAS POR TIPO DE PÁGINA
+# ----------------------
+# (tag, atributos exigidos). Para "class", basta a classe estar entre as do elemento;
+# valor None só exige a presença do atributo.
+SUBTREES = {
+    "album": [("div", {"class": "info_LD8Ql"}), ("tbody", {})],
+    "artist": [("div", {"class": "info_LD8Ql"}), ("tr", {"class": "textWithCoversRow_Xv0h3"})],
+    "search": [("div", {"role": "listitem"})],
+}
+
+
+def available_backends():
+    """Backends de parsing instalados, do mais lento para o mais rápido."""
+    backends = ["html.parser"]
+    if lxml is not None:
+        backends.append("lxml")
+    if LexborHTMLParser is not None:
+        backends.append("selectolax")
+    return backends
+
+
+def default_backend():
+    """O backend mais rápido instalado."""
+    return available_backends()[-1]
+
+
+if ElementFilter is not None:
+    class _SubtreeFilter(ElementFilter):
+        """Filtro de parse do bs4 que só cria as subárvores listadas (e todos os seus descendentes)."""
+
+        def __init__(self, rules):
+            super().__init__()
+            self.rules = rules
+
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            attrs = attrs or {}
+            for tag, required in self.rules:
+                if name != tag:
+                    continue
+                if all(_attr_matches(attrs.get(attr), value) for attr, value in required.items()):
+                    return True
+            return False
+
+        def allow_string_creation(self, string):
+            return False
+
+
+def _attr_matches(actual, expected):
+    if actual is None:
+        return False
+    if expected is None:
+        return True
+    if isinstance(actual, (list, tuple)):
+        return expected in actual
+    return expected in actual.split()
+
+
+class SelectolaxNode:
+    """
+    Adaptador de um nó do selectolax (Lexbor) para o subconjunto da API do
+    BeautifulSoup usado pelas funções extract_*.
+    """
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, css):
+        return [SelectolaxNode(n) for n in self._node.css(css)]
+
+    def select_one(self, css):
+        node = self._node.css_first(css)
+        return SelectolaxNode(node) if node is not None else None
+
+    def find(self, name):
+        return self.select_one(name)
+
+    def find_all(self, name, href=False):
+        return self.select(f"{name}[href]" if href else name)
+
+    def get_text(self, separator="", strip=False):
+        return self._node.text(deep=True, separator=separator, strip=strip)
+
+    def get(self, attr, default=None):
+        value = self._node.attributes.get(attr)
+        return default if value is None else value
+
+    def has_attr(self, attr):
+        return attr in self._node.attributes
+
+    def __getitem__(self, attr):
+        return self._node.attributes[attr]
+
+
+def parse_html(html, page_type=None, backend=None, partial=False):
+    """
+    Faz o parse do HTML com o backend escolhido ("html.parser", "lxml" ou "selectolax").
+
+    Com partial=True e um page_type conhecido, os backends do bs4 só constroem as
+    subárvores usadas pelas funções extract_* (SUBTREES). O selectolax sempre faz
+    o parse completo, que já é mais barato que o parse parcial do bs4.
+    """
+    backend = backend or default_backend()
+    with METRICS.stage(f"parse.{page_type or 'html'}"):
+        return _parse(html, page_type, backend, partial)
+
+
+def _parse(html, page_type, backend, partial):
+    if backend == "selectolax":
+        if LexborHTMLParser is None:
+            raise ImportError("Backend 'selectolax' requer o pacote selectolax (pip install selectolax).")
+        return SelectolaxNode(LexborHTMLParser(html).root)
+
+    if backend == "lxml" and lxml is None:
+        logging.warning("lxml não instalado; usando html.parser.")
+        backend = "html.parser"
+
+    parse_only = None
+    if partial and page_type in SUBTREES and ElementFilter is not None:
+        parse_only = _SubtreeFilter(SUBTREES[page_type])
+    return BeautifulSoup(html, backend, parse_only=parse_only)
+
+
+def release_soup(soup):
+    """
+    Desmonta a árvore do bs4 depois da extração. Os nós do bs4 se referenciam em
+    ciclo (pai <-> filhos), então sem isso a árvore só sai da memória na próxima
+    coleta completa do gc. No selectolax a árvore é do Lexbor (C) e é liberada
+    assim que a última referência ao nó cai.
+    """
+    if isinstance(soup, Tag):
+        soup.decompose()
@@ -0,0 +1,252 @@
+import time
+import heapq
+import random
+import logging
+import threading
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from fetchers import RETRY_STATUSES
+from instrumentation import LatencyHistogram
+
+
+def parse_retry_after(value, now=None):
+    """Segundos de espera de um cabeçalho Retry-After (segundos ou data HTTP); None se ausente/inválido."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0, retry_after=None, rng=random):
+    """
+    Espera antes da tentativa `attempt` (1 = primeira repetição): backoff exponencial
+    com jitter ("equal jitter": metade fixa, metade aleatória), limitado a `cap`.
+    Um Retry-After do servidor é sempre respeitado como mínimo.
+    """
+    ceiling = min(cap, base * 2 ** (attempt - 1))
+    delay = ceiling / 2 + rng.uniform(0, ceiling / 2)
+    return max(delay, retry_after or 0.0)
+
+
+class RetryLater(Exception):
+    """Busca que falhou de um jeito recuperável (429, 5xx, timeout) e deve ser repetida mais tarde."""
+
+    def __init__(self, url, status=None, retry_after=None):
+        super().__init__(f"{url} (status {status or 'erro'})")
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _HostState:
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = now
+        self.blocked_until = 0.0
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.throttled = 0
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket por host com taxa adaptativa (AIMD).
+
+    Cada resposta rápida soma `increase` req/s à taxa do host, até max_rate. Um
+    429/5xx/erro multiplica a taxa por `decrease` e, com Retry-After, pausa o host
+    inteiro até o prazo pedido. Respostas muito mais lentas que a mediana do host
+    (slow_factor × p50) reduzem a taxa de leve, antes que o servidor comece a recusar.
+    """
+
+    def __init__(self, initial_rate=2.0, min_rate=0.25, max_rate=10.0, burst=2, increase=0.25,
+                 decrease=0.5, slow_factor=3.0, slow_decrease=0.8, min_samples=10,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_factor = slow_factor
+        self.slow_decrease = slow_decrease
+        self.min_samples = min_samples
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.initial_rate, self.burst, self._clock())
+        return state
+
+    def rate(self, url):
+        with self._lock:
+            return self._host(url).rate
+
+    def acquire(self, url):
+        """Bloqueia até o host de `url` ter um token livre. Retorna o tempo total de espera."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                state = self._host(url)
+                now = self._clock()
+                state.tokens = min(self.burst, state.tokens + (now - state.updated) * state.rate)
+                state.updated = now
+                if now < state.blocked_until:
+                    delay = state.blocked_until - now
+                elif state.tokens >= 1:
+                    state.tokens -= 1
+                    state.requests += 1
+                    return waited
+                else:
+                    delay = (1 - state.tokens) / state.rate
+            self._sleep(delay)
+            waited += delay
+
+    def record(self, url, status, elapsed, retry_after=None):
+        """Ajusta a taxa do host conforme o resultado de uma busca (status None = erro de rede)."""
+        with self._lock:
+            state = self._host(url)
+            if status is None or status in RETRY_STATUSES:
+                state.throttled += 1
+                state.rate = max(self.min_rate, state.rate * self.decrease)
+                state.tokens = min(state.tokens, 0.0)
+                if retry_after:
+                    state.blocked_until = max(state.blocked_until, self._clock() + retry_after)
+                return
+
+            slow = (state.latency.count >= self.min_samples
+                    and elapsed > self.slow_factor * state.latency.quantile(0.5))
+            state.latency.observe(elapsed)
+            if slow:
+                state.rate = max(self.min_rate, state.rate * self.slow_decrease)
+            else:
+                state.rate = min(self.max_rate, state.rate + self.increase)
+
+    def report(self):
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(state.rate, 2),
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "p50_s": round(state.latency.quantile(0.5), 4),
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def log_report(self):
+        for host, r in self.report().items():
+            logging.info(
+                f"[RATE] {host}: taxa final {r['rate']} req/s, requisições: {r['requests']}, "
+                f"recusadas/erros: {r['throttled']}, p50: {r['p50_s'] * 1000:.0f} ms"
+            )
+
+
+class RateLimitedFetcher:
+    """
+    Fetcher que passa cada busca pelo AdaptiveRateLimiter e informa o resultado a ele.
+    Respostas 429/5xx e falhas de rede levantam RetryLater, para que quem chamou
+    reagende a URL (RetryQueue / fetch_with_retries) em vez de descartá-la.
+    """
+
+    def __init__(self, inner, limiter):
+        self.inner = inner
+        self.limiter = limiter
+        self.name = f"rate+{getattr(inner, 'name', 'fetcher')}"
+
+    def load_cookies(self, cookies):
+        if hasattr(self.inner, "load_cookies"):
+            self.inner.load_cookies(cookies)
+
+    def fetch(self, url, page_type=None, headers=None):
+        self.limiter.acquire(url)
+        start = time.perf_counter()
+        page = self.inner.fetch(url, page_type, headers=headers)
+        elapsed = time.perf_counter() - start
+
+        status = page.status if page is not None else None
+        retry_after = parse_retry_after(page.headers.get("Retry-After")) if page is not None else None
+        self.limiter.record(url, status, elapsed, retry_after)
+
+        if status is None or status in RETRY_STATUSES:
+            raise RetryLater(url, status, retry_after)
+        return page
+
+    def close(self):
+        self.inner.close()
+
+
+class RetryQueue:
+    """
+    Fila de itens a repetir, ordenada pelo momento em que cada um pode voltar.
+    O atraso vem de backoff_delay (exponencial com jitter, respeitando Retry-After);
+    itens que passam de max_attempts repetições são recusados por `push`.
+    """
+
+    def __init__(self, max_attempts=3, base=1.0, cap=60.0, clock=time.monotonic, rng=random):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self._clock = clock
+        self._rng = rng
+        self._heap = []
+        self._seq = 0
+        self.retried = defaultdict(int)
+
+    def push(self, item, attempt, retry_after=None):
+        """Agenda a repetição número `attempt` de item. Retorna False se as tentativas acabaram."""
+        if attempt > self.max_attempts:
+            return False
+        delay = backoff_delay(attempt, self.base, self.cap, retry_after, self._rng)
+        heapq.heappush(self._heap, (self._clock() + delay, self._seq, item, attempt))
+        self._seq += 1
+        self.retried[attempt] += 1
+        return True
+
+    def pop_due(self):
+        """Remove e retorna os pares (item, attempt) cujo prazo já chegou."""
+        due = []
+        now = self._clock()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, item, attempt = heapq.heappop(self._heap)
+            due.append((item, attempt))
+        return due
+
+    def next_delay(self):
+        """Segundos até o próximo item ficar pronto (None se a fila estiver vazia)."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self._clock())
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def fetch_with_retries(fetcher, url, page_type=None, retries=3, base=1.0, cap=60.0, sleep=time.sleep):
+    """Busca uma única URL repetindo com backoff quando o fetcher levanta RetryLater. None se desistir."""
+    attempt = 0
+    while True:
+        try:
+            return fetcher.fetch(url, page_type)
+        except RetryLater as e:
+            attempt += 1
+            if attempt > retries:
+                logging.warning(f"[RETRY] Desistindo de {url} após {retries} repetições (status {e.status or 'erro'}).")
+                return None
+            delay = backoff_delay(attempt, base, cap, e.retry_after)
+            logging.info(f"[RETRY] {url} (status {e.status or 'erro'}); nova tentativa em {delay:.1f}s.")
+            sleep(delay)
@@ -0,0 +1,113 @@
+import time
+import logging
+import threading
+from collections import defaultdict
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from instrumentation import LatencyHistogram
+
+# ----------------------
+# CONDIÇÕES DE PRONTIDÃO POR TIPO DE PÁGINA
+# ----------------------
+
+def _dom_loaded(driver):
+    return driver.execute_script("return document.readyState") != "loading"
+
+PAGE_READY = {
+    "home": _dom_loaded,
+    "search": EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="listitem"]')),
+    "artist": EC.presence_of_element_located((By.CSS_SELECTOR, "div.info_LD8Ql")),
+    "album": EC.presence_of_element_located((By.CSS_SELECTOR, "tbody tr[data-track-position]")),
+}
+
+# Esperas fixas (time.sleep) que cada tipo de página tinha antes, usadas para estimar a economia
+FIXED_SLEEPS = {
+    "home": 2,
+    "cookie_banner": 1,
+    "search": 2,
+    "search_filter": 3,
+    "artist": 2,
+    "album": 1,
+}
+
+
+class ReadinessWaiter:
+    """
+    Espera cada página ficar pronta (condição declarada por tipo) em vez de dormir um tempo fixo.
+
+    O timeout é adaptativo: começa em max_timeout e, depois de algumas amostras,
+    passa a ser `factor` vezes o p95 das esperas observadas, dentro de
+    [min_timeout, max_timeout].
+    """
+
+    def __init__(self, conditions=None, min_timeout=2, max_timeout=15, factor=3,
+                 min_samples=5, poll_frequency=0.1):
+        self.conditions = dict(PAGE_READY if conditions is None else conditions)
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.factor = factor
+        self.min_samples = min_samples
+        self.poll_frequency = poll_frequency
+        self.histograms = defaultdict(LatencyHistogram)
+        self.timeouts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def handles(self, page_type):
+        return page_type in self.conditions
+
+    def _histogram(self, page_type):
+        with self._lock:
+            return self.histograms[page_type]
+
+    def timeout_for(self, page_type):
+        hist = self._histogram(page_type)
+        if hist.count < self.min_samples:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.factor * hist.quantile(0.95)))
+
+    def wait_until(self, driver, page_type, condition):
+        """Espera uma condição arbitrária e registra o tempo no histograma de page_type."""
+        timeout = self.timeout_for(page_type)
+        start = time.perf_counter()
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=self.poll_frequency).until(condition)
+            ready = True
+        except TimeoutException:
+            with self._lock:
+                self.timeouts[page_type] += 1
+            logging.warning(f"[ESPERA] Página '{page_type}' não ficou pronta em {timeout:.1f}s.")
+            ready = False
+        self._histogram(page_type).observe(time.perf_counter() - start)
+        return ready
+
+    def wait(self, driver, page_type):
+        """Espera a condição declarada para o tipo de página. Retorna False em caso de timeout."""
+        return self.wait_until(driver, page_type, self.conditions[page_type])
+
+    def report(self):
+        """Resumo por tipo de página, com a economia estimada em relação às esperas fixas."""
+        with self._lock:
+            items = sorted(self.histograms.items())
+        report = {}
+        for page_type, hist in items:
+            summary = hist.summary()
+            summary["timeouts"] = self.timeouts[page_type]
+            fixed = FIXED_SLEEPS.get(page_type)
+            if fixed is not None:
+                summary["saved_s"] = round(fixed * hist.count - hist.total, 2)
+            report[page_type] = summary
+        return report
+
+    def log_report(self):
+        for page_type, summary in self.report().items():
+            hist = self._histogram(page_type)
+            saved = summary.get("saved_s")
+            saved_text = f", economia vs. espera fixa: {saved:.1f}s" if saved is not None else ""
+            logging.info(
+                f"[ESPERA] {page_type}: {summary['count']} esperas, média {summary['mean_s']:.2f}s, "
+                f"p95 {summary['p95_s']:.2f}s, timeouts {summary['timeouts']}{saved_text} | {hist.format_buckets()}"
+            )
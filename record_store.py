@@ -0,0 +1,298 @@
+"""
+Armazenamento dos resultados em SQLite: artistas, álbuns e faixas em tabelas
+indexadas, com upsert pelos IDs do Discogs.
+
+Uso:
+    python record_store.py dados_discogs.sqlite --importar dados_discogs.jsonl
+    python record_store.py dados_discogs.sqlite --exportar dados_discogs.jsonl
+"""
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from collections import Counter
+
+from dedupe import discogs_id
+from jsonl_sink import JsonlSink, iter_jsonl
+from track_columns import MISSING, normalize_tracks
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS artistas (
+        id_artista TEXT PRIMARY KEY,
+        nome_artista TEXT,
+        genero TEXT,
+        membros_artista TEXT,
+        sites_artista TEXT,
+        hash TEXT NOT NULL,
+        criado_em REAL NOT NULL,
+        atualizado_em REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS albuns (
+        id_album TEXT PRIMARY KEY,
+        url_album TEXT,
+        nome_album TEXT,
+        ano_lancamento TEXT,
+        gravadora_album TEXT,
+        genero_album TEXT,
+        estilos_album TEXT,
+        duracao_total_segundos INTEGER,
+        hash TEXT NOT NULL,
+        criado_em REAL NOT NULL,
+        atualizado_em REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS artista_albuns (
+        id_artista TEXT NOT NULL,
+        ordem INTEGER NOT NULL,
+        id_album TEXT NOT NULL,
+        PRIMARY KEY (id_artista, ordem)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS faixas (
+        id_album TEXT NOT NULL,
+        indice_faixa INTEGER NOT NULL,
+        numero_faixa TEXT,
+        nome_faixa TEXT,
+        duracao_faixa TEXT,
+        posicao_original TEXT,
+        disco INTEGER,
+        lado TEXT,
+        posicao INTEGER,
+        duracao_segundos INTEGER,
+        PRIMARY KEY (id_album, indice_faixa)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_artistas_genero ON artistas (genero);
+    CREATE INDEX IF NOT EXISTS idx_albuns_ano ON albuns (ano_lancamento);
+    CREATE INDEX IF NOT EXISTS idx_albuns_gravadora ON albuns (gravadora_album);
+    CREATE INDEX IF NOT EXISTS idx_artista_albuns_album ON artista_albuns (id_album);
+"""
+
+ARTIST_COLUMNS = ("id_artista", "nome_artista", "genero", "membros_artista", "sites_artista")
+ALBUM_COLUMNS = ("id_album", "url_album", "nome_album", "ano_lancamento", "gravadora_album",
+                 "genero_album", "estilos_album", "duracao_total_segundos")
+TRACK_COLUMNS = ("numero_faixa", "nome_faixa", "duracao_faixa", "posicao_original",
+                 "disco", "lado", "posicao", "duracao_segundos")
+# Colunas que só existem com a normalização das faixas (NORMALIZE_TRACKS)
+NORMALIZED_COLUMNS = {"duracao_total_segundos", "posicao_original", "disco", "lado", "posicao", "duracao_segundos"}
+JSON_COLUMNS = {"membros_artista", "sites_artista", "genero_album", "estilos_album"}
+
+
+def _hash(value):
+    return hashlib.sha1(json.dumps(value, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _upsert_sql(table, key, columns):
+    names = columns + ("hash", "criado_em", "atualizado_em")
+    updates = ", ".join(f"{c} = excluded.{c}" for c in names if c not in (key, "criado_em"))
+    return (
+        f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+        f"ON CONFLICT ({key}) DO UPDATE SET {updates}"
+    )
+
+
+def _stored(column, value):
+    return json.dumps(value, ensure_ascii=False) if column in JSON_COLUMNS else value
+
+
+def _loaded(column, value):
+    return json.loads(value) if column in JSON_COLUMNS and value is not None else value
+
+
+def _nullable(value):
+    return None if value == MISSING else value
+
+
+class RecordStore:
+    """
+    Artistas, álbuns e faixas em SQLite, com upsert pelos IDs estáveis do Discogs.
+
+    Cada linha guarda um hash do conteúdo: um artista ou álbum igual ao já salvo não
+    é regravado, então repetir um crawl só altera as linhas que mudaram. As escritas
+    são agrupadas em transações de batch_size registros e o banco fica em modo WAL,
+    para que outros processos consultem as tabelas durante o run. O JSONL passa a
+    ser uma exportação do banco (export_jsonl), que acumula os runs anteriores.
+    """
+
+    def __init__(self, path, batch_size=50, clock=time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL") # seguro com WAL; só o último lote pode se perder
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        self._uncommitted = 0
+        self.stats = Counter()
+
+    def _existing_hashes(self, table, key, ids):
+        if not ids:
+            return {}
+        rows = self._db.execute(
+            f"SELECT {key}, hash FROM {table} WHERE {key} IN ({', '.join('?' * len(ids))})", ids
+        )
+        return dict(rows.fetchall())
+
+    def _rows(self, artist):
+        """Linha do artista e linhas (com faixas) dos álbuns, com as faixas normalizadas em lote."""
+        albums = artist.get("albuns") or []
+        columns = normalize_tracks(albums)
+        runtimes = columns.album_runtimes()
+        artist_row = tuple(_stored(c, artist.get(c)) for c in ARTIST_COLUMNS)
+
+        album_rows, row = [], 0
+        for index, album in enumerate(albums):
+            album_id = (album.get("id_album") or discogs_id(album.get("url_album") or "")
+                        or f"{artist['id_artista']}:{index}") # registros antigos, sem URL
+            values = {**album, "id_album": album_id, "duracao_total_segundos": runtimes[index]}
+            tracks = []
+            for position, track in enumerate(album.get("faixas_album") or ()):
+                tracks.append((
+                    album_id, position, track.get("numero_faixa"), track.get("nome_faixa"),
+                    track.get("duracao_faixa"), columns.raw_position[row], _nullable(columns.disc[row]),
+                    columns.side[row] or None, _nullable(columns.number[row]), _nullable(columns.duration_s[row]),
+                ))
+                row += 1
+            album_rows.append((tuple(_stored(c, values.get(c)) for c in ALBUM_COLUMNS), tracks))
+        return artist_row, album_rows
+
+    def write(self, artist):
+        """Faz o upsert de um registro de artista (formato do JSONL), regravando só o que mudou."""
+        artist_row, album_rows = self._rows(artist)
+        artist_id = artist_row[0]
+        now = self._clock()
+        with self._lock:
+            album_hashes = self._existing_hashes("albuns", "id_album", [a[0][0] for a in album_rows])
+            for values, tracks in album_rows:
+                digest = _hash([values, tracks])
+                previous = album_hashes.get(values[0])
+                if previous == digest:
+                    self.stats["albuns_iguais"] += 1
+                    continue
+                self.stats["albuns_novos" if previous is None else "albuns_alterados"] += 1
+                self._db.execute(_upsert_sql("albuns", "id_album", ALBUM_COLUMNS), values + (digest, now, now))
+                self._db.execute("DELETE FROM faixas WHERE id_album = ?", (values[0],))
+                self._db.executemany(
+                    f"INSERT INTO faixas VALUES ({', '.join('?' * (len(TRACK_COLUMNS) + 2))})", tracks
+                )
+
+            album_ids = [values[0] for values, _ in album_rows]
+            digest = _hash([artist_row, album_ids])
+            previous = self._existing_hashes("artistas", "id_artista", [artist_id]).get(artist_id)
+            if previous == digest:
+                self.stats["artistas_iguais"] += 1
+            else:
+                self.stats["artistas_novos" if previous is None else "artistas_alterados"] += 1
+                self._db.execute(_upsert_sql("artistas", "id_artista", ARTIST_COLUMNS), artist_row + (digest, now, now))
+                self._db.execute("DELETE FROM artista_albuns WHERE id_artista = ?", (artist_id,))
+                self._db.executemany(
+                    "INSERT INTO artista_albuns VALUES (?, ?, ?)",
+                    [(artist_id, order, album_id) for order, album_id in enumerate(album_ids)],
+                )
+
+            self._uncommitted += 1
+            if self._uncommitted >= self.batch_size:
+                self._commit()
+
+    def _commit(self):
+        self._db.commit()
+        self._uncommitted = 0
+
+    def flush(self):
+        """Confirma o lote atual (fica visível para os leitores)."""
+        with self._lock:
+            self._commit()
+
+    def iter_records(self, normalized=True):
+        """
+        Registros no formato do JSONL, na ordem em que os artistas entraram no banco.
+        Com normalized=False, sem as colunas da normalização (como NORMALIZE_TRACKS=False).
+        """
+        album_columns = [c for c in ALBUM_COLUMNS if normalized or c not in NORMALIZED_COLUMNS]
+        track_columns = [c for c in TRACK_COLUMNS if normalized or c not in NORMALIZED_COLUMNS]
+        with self._lock:
+            artists = self._db.execute(
+                f"SELECT {', '.join(ARTIST_COLUMNS)} FROM artistas ORDER BY criado_em, rowid"
+            ).fetchall()
+        for artist_row in artists:
+            artist = {c: _loaded(c, v) for c, v in zip(ARTIST_COLUMNS, artist_row)}
+            with self._lock:
+                albums = self._db.execute(
+                    f"SELECT {', '.join('a.' + c for c in album_columns)} FROM artista_albuns l "
+                    "JOIN albuns a ON a.id_album = l.id_album WHERE l.id_artista = ? ORDER BY l.ordem",
+                    (artist["id_artista"],),
+                ).fetchall()
+                tracks = {}
+                for row in self._db.execute(
+                    f"SELECT id_album, {', '.join(track_columns)} FROM faixas WHERE id_album IN "
+                    "(SELECT id_album FROM artista_albuns WHERE id_artista = ?) ORDER BY id_album, indice_faixa",
+                    (artist["id_artista"],),
+                ):
+                    tracks.setdefault(row[0], []).append(dict(zip(track_columns, row[1:])))
+
+            artist["albuns"] = []
+            for album_row in albums:
+                album = {c: _loaded(c, v) for c, v in zip(album_columns, album_row)}
+                album["faixas_album"] = tracks.get(album["id_album"], [])
+                artist["albuns"].append(album)
+            yield artist
+
+    def export_jsonl(self, sink, normalized=True):
+        """Grava todos os registros do banco num JsonlSink (ou qualquer objeto com write). Retorna quantos."""
+        self.flush()
+        count = 0
+        for record in self.iter_records(normalized):
+            sink.write(record)
+            count += 1
+        return count
+
+    def report(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def log_report(self):
+        r = Counter(self.report())
+        logging.info(
+            f"[BANCO] Artistas: {r['artistas_novos']} novos, {r['artistas_alterados']} alterados, "
+            f"{r['artistas_iguais']} sem mudança | Álbuns: {r['albuns_novos']} novos, "
+            f"{r['albuns_alterados']} alterados, {r['albuns_iguais']} sem mudança"
+        )
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._commit()
+                self._db.close()
+                self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa/exporta o banco SQLite de artistas, álbuns e faixas.")
+    parser.add_argument("banco")
+    parser.add_argument("--importar", nargs="+", default=[], metavar="JSONL", help="Faz o upsert de arquivos JSONL no banco")
+    parser.add_argument("--exportar", metavar="JSONL", help="Exporta o banco inteiro para um JSONL")
+    args = parser.parse_args()
+
+    with RecordStore(args.banco) as store:
+        for path in args.importar:
+            for record in iter_jsonl(path):
+                store.write(record)
+        if args.importar:
+            store.log_report()
+        if args.exportar:
+            with JsonlSink(args.exportar) as sink:
+                count = store.export_jsonl(sink)
+            print(f"{count} artistas exportados para {args.exportar}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Representação compacta dos registros enquanto esperam a gravação.
+
+Um artista concluído fora da ordem da busca fica retido até os anteriores
+terminarem. Em vez do dict do JSON (um dict por faixa e por álbum, cada um com a
+sua tabela de hash), ele fica como dataclasses com __slots__, e as strings que se
+repetem por todo o crawl (gêneros, estilos, gravadoras, anos, durações, posições)
+são internadas com sys.intern: há uma única cópia de "Rock" no processo.
+
+to_dict devolve o registro exatamente como entrou: chaves ausentes continuam
+ausentes e chaves desconhecidas (de versões futuras do registro) são preservadas
+em `extra`, então a saída não muda.
+"""
+import sys
+from dataclasses import dataclass, fields
+
+
+class _Absent:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "ABSENT"
+
+
+ABSENT = _Absent() # chave que não estava no registro de origem
+
+
+def intern(value):
+    """sys.intern para strings; outros valores (None, números) passam direto."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def intern_list(values):
+    return [intern(value) for value in values] if isinstance(values, list) else values
+
+
+class _Compact:
+    """Conversão dict <-> dataclass comum aos registros. LOAD: {campo: conversor na entrada}."""
+    __slots__ = ()
+    LOAD = {}
+    NESTED = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        values = []
+        for name in cls.NAMES:
+            value = data.get(name, ABSENT)
+            if value is not ABSENT and name in cls.LOAD:
+                value = cls.LOAD[name](value)
+            values.append(value)
+        extra = {key: value for key, value in data.items() if key not in cls.NAMES}
+        return cls(*values, extra or None)
+
+    def to_dict(self):
+        record = {}
+        for name in self.NAMES:
+            value = getattr(self, name)
+            if value is ABSENT:
+                continue
+            if name in self.NESTED and isinstance(value, list):
+                value = [item.to_dict() for item in value]
+            record[name] = value
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+
+@dataclass(slots=True)
+class Track(_Compact):
+    numero_faixa: str
+    nome_faixa: str
+    duracao_faixa: str
+    posicao_original: str
+    extra: dict = None
+
+    LOAD = {"numero_faixa": intern, "duracao_faixa": intern, "posicao_original": intern}
+
+
+def _tracks(values):
+    return [Track.from_dict(track) for track in values] if isinstance(values, list) else values
+
+
+@dataclass(slots=True)
+class Album(_Compact):
+    id_album: str
+    nome_album: str
+    ano_lancamento: str
+    url_album: str
+    faixas_album: list
+    gravadora_album: str
+    genero_album: list
+    estilos_album: list
+    extra: dict = None
+
+    LOAD = {
+        "ano_lancamento": intern, "faixas_album": _tracks, "gravadora_album": intern,
+        "genero_album": intern_list, "estilos_album": intern_list,
+    }
+    NESTED = ("faixas_album",)
+
+
+def _albums(values):
+    return [Album.from_dict(album) for album in values] if isinstance(values, list) else values
+
+
+@dataclass(slots=True)
+class Artist(_Compact):
+    id_artista: str
+    genero: str
+    nome_artista: str
+    membros_artista: list
+    sites_artista: list
+    albuns: list
+    extra: dict = None
+
+    LOAD = {"genero": intern, "albuns": _albums}
+    NESTED = ("albuns",)
+
+
+for _cls in (Track, Album, Artist):
+    _cls.NAMES = tuple(f.name for f in fields(_cls) if f.name != "extra")
+
+
+def compact(artist):
+    """Artist compacto a partir do dict do registro (None continua None)."""
+    return Artist.from_dict(artist) if artist else artist
@@ -0,0 +1,187 @@
+"""
+Gravação e replay de páginas para rodar o crawl inteiro sem acessar o Discogs.
+
+Gravação: com RECORD_DIR definido, toda página buscada com sucesso durante o run
+entra no corpus (um diretório com as páginas em gzip e um manifest.json).
+Replay: o corpus é servido por um FixtureServer local, com latência e falhas
+configuráveis, e o run_scraper é apontado para ele com replay_config().
+
+Uso: python replay.py corpus_discogs/ --port 8000 --latency 0.05 --error-rate 0.02
+"""
+import os
+import json
+import gzip
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from fixture_server import FixtureServer
+
+MANIFEST = "manifest.json"
+JSON_CONTENT_TYPE = "application/json"
+
+
+def corpus_key(url):
+    """Caminho + query da URL: o corpus ignora o host (www e api do Discogs não colidem)."""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class FixtureCorpus:
+    """Corpus de páginas gravadas: {caminho: metadados} no manifest e o corpo em arquivos .gz."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.entries = {}
+        path = os.path.join(directory, MANIFEST)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _file(self, key):
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".html.gz"
+
+    def add(self, url, body, page_type=None, content_type=None):
+        key = corpus_key(url)
+        name = self._file(key)
+        with gzip.open(os.path.join(self.directory, name), "wt", encoding="utf-8") as f:
+            f.write(body)
+        with self._lock:
+            self.entries[key] = {
+                "file": name, "url": url, "page_type": page_type,
+                "content_type": content_type, "recorded_at": time.time(),
+            }
+
+    def read(self, key):
+        with gzip.open(os.path.join(self.directory, self.entries[key]["file"]), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def pages(self, page_type=None):
+        """{caminho: corpo} de todas as páginas (ou só das de `page_type`), no formato do FixtureServer."""
+        with self._lock:
+            keys = [k for k, e in self.entries.items() if page_type is None or e["page_type"] == page_type]
+        return {key: self.read(key) for key in keys}
+
+    def content_types(self):
+        with self._lock:
+            return {k: e["content_type"] for k, e in self.entries.items() if e.get("content_type")}
+
+    def save(self):
+        tmp_path = os.path.join(self.directory, MANIFEST + ".tmp")
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.directory, MANIFEST))
+
+    def server(self, **kwargs):
+        """FixtureServer que serve o corpus (kwargs: latency, jitter, error_rate, seed...)."""
+        return FixtureServer(self.pages(), content_types=self.content_types(), **kwargs)
+
+
+class RecordingFetcher:
+    """Fetcher que grava no corpus cada página obtida com status 200 (inclusive do cache)."""
+
+    def __init__(self, inner, corpus):
+        self.inner = inner
+        self.corpus = corpus
+        self.name = f"record+{getattr(inner, 'name', 'fetcher')}"
+        self.recorded = 0
+
+    def load_cookies(self, cookies):
+        if hasattr(self.inner, "load_cookies"):
+            self.inner.load_cookies(cookies)
+
+    def fetch(self, url, page_type=None, headers=None):
+        page = self.inner.fetch(url, page_type, headers=headers)
+        if page is not None and page.status == 200:
+            content_type = JSON_CONTENT_TYPE if page_type == "listing" else None
+            self.corpus.add(url, page.html, page_type, content_type)
+            self.recorded += 1
+        return page
+
+    def report(self):
+        return self.inner.report() if hasattr(self.inner, "report") else {}
+
+    def log_report(self):
+        if hasattr(self.inner, "log_report"):
+            self.inner.log_report()
+        logging.info(f"[GRAVAÇÃO] {self.recorded} páginas gravadas em {self.corpus.directory} ({len(self.corpus)} no corpus).")
+
+    def close(self):
+        self.corpus.save()
+        self.inner.close()
+
+
+def replay_config(server, workdir, search_path="/pt_BR/search", listing_path="/artists/{artist_id}/releases"):
+    """
+    Configuração do discogs_scraper para um run contra o servidor de replay: busca,
+    listagem e arquivos de saída locais, só HTTP, sem cache e sem limite de taxa
+    (o que se quer medir é o scraper, não a espera imposta ao Discogs). Os caminhos
+    padrão são os do Discogs, então servem tanto para um corpus gravado quanto para
+    o site sintético do make_site_pages.
+    """
+    return {
+        "URL_SEARCH": server.url(search_path),
+        "DISCOGRAPHY_LISTING_URL": server.url(listing_path),
+        "FETCH_BACKEND": "http",
+        "CACHE_ENABLED": False,
+        "RECORD_DIR": None,
+        "RATE_LIMIT_START": 1000.0,
+        "RATE_LIMIT_MAX": 1000.0,
+        "RETRY_BACKOFF_BASE": 0.05,
+        "RETRY_BACKOFF_CAP": 0.5,
+        "STATE_FILE": os.path.join(workdir, "crawl_state.sqlite"),
+        "QUEUE_FILE": os.path.join(workdir, "fila_discogs.sqlite"),
+        "QUEUE_URL": None,
+        "OUTPUT_FILE": os.path.join(workdir, "dados_discogs.jsonl"),
+        "RUN_REPORT_FILE": os.path.join(workdir, "relatorio_run.json"),
+        "STORE_FILE": None,
+        "DEDUPE_FILE": None,
+    }
+
+
+@contextmanager
+def patched_config(module, **overrides):
+    """Troca constantes de configuração de um módulo durante o bloco e restaura no fim."""
+    previous = {name: getattr(module, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(module, name, value)
+    try:
+        yield module
+    finally:
+        for name, value in previous.items():
+            setattr(module, name, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve um corpus gravado num servidor HTTP local.")
+    parser.add_argument("corpus")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    corpus = FixtureCorpus(args.corpus)
+    server = corpus.server(port=args.port, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, seed=args.seed)
+    with server:
+        print(f"{len(corpus)} páginas em {server.base_url} (Ctrl+C para sair)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
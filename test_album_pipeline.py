@@ -0,0 +1,96 @@
+import time
+import threading
+import unittest
+from collections import Counter
+from functools import partial
+
+from album_pipeline import AlbumPipeline
+from discogs_scraper import scrape_album_page
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html
+
+LATENCY = 0.1
+
+
+class TestAlbumPipeline(unittest.TestCase):
+
+    def setUp(self):
+        pages = {f"/release/{i}": make_album_html(n_tracks=3, title=f"Album {i}") for i in range(8)}
+        self.server = FixtureServer(pages, latency=LATENCY).start()
+        self.fetcher = HttpFetcher()
+
+    def tearDown(self):
+        self.fetcher.close()
+        self.server.stop()
+
+    def _albums(self, ids):
+        return [{"nome_album": f"Album {i}", "url_album": self.server.url(f"/release/{i}")} for i in ids]
+
+    def _run(self, albums, max_albums, global_limit=8, per_host_limit=8):
+        pipeline = AlbumPipeline(partial(scrape_album_page, self.fetcher), global_limit, per_host_limit)
+        start = time.perf_counter()
+        try:
+            result = pipeline.run(albums, max_albums)
+        finally:
+            pipeline.close()
+        return result, time.perf_counter() - start
+
+    def test_keeps_discography_order(self):
+        """Deve retornar os álbuns na ordem da discografia, mesmo buscando em paralelo."""
+        result, _ = self._run(self._albums(range(8)), max_albums=8)
+        self.assertEqual([raw["nome_album"] for raw, _ in result], [f"Album {i}" for i in range(8)])
+        self.assertEqual(result[0][1]["faixas_album"][0]["nome_faixa"], "Album 0 Faixa 1")
+
+    def test_max_albums_cutoff_skips_invalid(self):
+        """Deve pular álbuns inválidos e parar nos primeiros max_albums válidos, sem buscar além."""
+        # /release/99 não existe (404) e não conta para o limite
+        albums = self._albums([0, 99, 1, 2, 3, 4])
+        result, _ = self._run(albums, max_albums=3)
+        self.assertEqual([raw["nome_album"] for raw, _ in result], ["Album 0", "Album 1", "Album 2"])
+        self.assertEqual(self.server.requests, 4)
+
+    def test_near_linear_speedup(self):
+        """Deve ter ganho próximo do linear até o limite de concorrência."""
+        albums = self._albums(range(8))
+        _, sequential = self._run(albums, max_albums=8, global_limit=1)
+        _, parallel = self._run(albums, max_albums=8, global_limit=8)
+        self.assertGreater(sequential / parallel, 4)
+
+    def test_per_host_limit(self):
+        """O limite por host deve prevalecer sobre o limite global."""
+        _, elapsed = self._run(self._albums(range(8)), max_albums=8, global_limit=8, per_host_limit=2)
+        # 8 páginas com no máximo 2 simultâneas => pelo menos 4 rodadas de latência
+        self.assertGreaterEqual(elapsed, 4 * LATENCY)
+
+    def test_limits_are_shared_between_runs(self):
+        """Duas threads de artista com o mesmo pipeline: o limite por host vale para as duas juntas."""
+        lock = threading.Lock()
+        running, peak = Counter(), Counter()
+
+        def scrape(url):
+            host = url.split("/")[2]
+            with lock:
+                running[host] += 1
+                peak[host] = max(peak[host], running[host])
+            time.sleep(0.05)
+            with lock:
+                running[host] -= 1
+            return {"faixas_album": []}
+
+        pipeline = AlbumPipeline(scrape, global_limit=8, per_host_limit=2)
+        artists = [[{"url_album": f"http://{host}/release/{a}{i}"} for i in range(4) for host in ("a.test", "b.test")]
+                   for a in range(2)]
+        results = [None, None]
+        threads = [threading.Thread(target=lambda n=n: results.__setitem__(n, pipeline.run(artists[n], 8)))
+                   for n in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pipeline.close()
+        self.assertEqual([len(result) for result in results], [8, 8])
+        self.assertEqual(peak, {"a.test": 2, "b.test": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
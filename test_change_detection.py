@@ -0,0 +1,185 @@
+import os
+import json
+import tempfile
+import unittest
+
+import discogs_scraper
+from change_detection import ChangeTracker, album_changes, listing_hash
+from discography import listing_page_url
+from discovery import search_page_url
+from fixture_server import FixtureServer, make_album_html, make_artist_html, make_listing_json, make_search_html, \
+    make_site_pages
+from jsonl_sink import iter_jsonl
+from replay import patched_config, replay_config
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _album(n, title=None):
+    return {"id_album": f"release:{n}", "nome_album": title or f"Album {n}", "ano_lancamento": "1999",
+            "url_album": f"http://x/release/{n}", "faixas_album": [{"numero_faixa": "1", "nome_faixa": "Um",
+                                                                      "duracao_faixa": "3:00"}],
+            "gravadora_album": "Selo", "genero_album": ["Rock"], "estilos_album": []}
+
+
+def _artist(albums):
+    return {"id_artista": "7", "genero": "Rock", "nome_artista": "Artista", "membros_artista": "Individual",
+            "sites_artista": [], "albuns": albums}
+
+
+def _rows(albums):
+    return [{k: a[k] for k in ("nome_album", "ano_lancamento", "url_album")} for a in albums]
+
+
+class TestChangeTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = _Clock()
+        self.db = os.path.join(self.tmp.name, "snapshot.sqlite")
+        self.delta = os.path.join(self.tmp.name, "delta.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, artists, rows=None, failed=()):
+        """Um run: check_artist/record para cada artista; devolve (delta, discografias reaproveitadas)."""
+        tracker = ChangeTracker(self.db, self.delta, recheck_days=30, clock=self.clock)
+        tracker.begin_run()
+        reused = {}
+        for artist in artists:
+            saved = tracker.check_artist(artist["id_artista"], (rows or {}).get(artist["id_artista"]) or _rows(artist["albuns"]))
+            reused[artist["id_artista"]] = saved is not None
+            tracker.record(artist)
+        for artist_id in failed:
+            tracker.keep(artist_id)
+        tracker.finish_run()
+        tracker.close()
+        return list(iter_jsonl(self.delta)), reused
+
+    def test_delta_between_runs(self):
+        first = _artist([_album(1), _album(2)])
+        delta, reused = self._run([first])
+        self.assertEqual([(d["operacao"], d["id_artista"]) for d in delta], [("adicionado", "7")])
+        self.assertEqual(reused, {"7": False})
+
+        delta, reused = self._run([first])
+        self.assertEqual(delta, [])
+        self.assertEqual(reused, {"7": True})
+
+        changed = _artist([_album(1, "Album 1 (Remaster)"), _album(3)])
+        delta, _ = self._run([changed])
+        self.assertEqual(len(delta), 1)
+        self.assertEqual(delta[0]["operacao"], "alterado")
+        self.assertEqual(delta[0]["albuns_adicionados"], ["release:3"])
+        self.assertEqual(delta[0]["albuns_alterados"], ["release:1"])
+        self.assertEqual(delta[0]["albuns_removidos"], ["release:2"])
+        self.assertEqual(delta[0]["registro"], changed)
+
+        delta, _ = self._run([])
+        self.assertEqual([(d["operacao"], d["registro"]) for d in delta], [("removido", changed)])
+
+    def test_failed_artist_is_not_removed(self):
+        self._run([_artist([_album(1)])])
+        delta, _ = self._run([], failed=["7"])
+        self.assertEqual(delta, [])
+
+    def test_recheck_after_max_age(self):
+        artist = _artist([_album(1)])
+        self._run([artist])
+        self.clock.now += 31 * 24 * 3600
+        _, reused = self._run([artist])
+        self.assertEqual(reused, {"7": False})
+        _, reused = self._run([artist]) # a busca completa renovou a verificação
+        self.assertEqual(reused, {"7": True})
+
+    def test_only_changed_rows_are_fetched(self):
+        self._run([_artist([_album(1), _album(2)])])
+        tracker = ChangeTracker(self.db, self.delta, clock=self.clock)
+        tracker.begin_run()
+        rows = _rows([_album(1), _album(2, "Album 2 (Deluxe)"), _album(3)])
+        self.assertIsNone(tracker.check_artist("7", rows))
+        fetched = []
+        scrape = lambda url: fetched.append(url) or {"faixas_album": []}
+        results = [tracker.scrape_album(scrape, album["url_album"]) for album in tracker.reusable_albums("7", rows)]
+        self.assertEqual(fetched, ["http://x/release/2", "http://x/release/3"])
+        self.assertEqual(results[0]["gravadora_album"], "Selo")
+        self.assertEqual(tracker.report()["albuns_reaproveitados"], 1)
+        tracker.close()
+
+    def test_helpers(self):
+        self.assertEqual(listing_hash(_rows([_album(1)])), listing_hash(_rows([_album(1)])))
+        self.assertNotEqual(listing_hash(_rows([_album(1)])), listing_hash(_rows([_album(1, "Outro")])))
+        self.assertEqual(album_changes(_artist([_album(1)]), _artist([_album(1)])),
+                         {"albuns_adicionados": [], "albuns_alterados": [], "albuns_removidos": []})
+
+
+class TestChangeDetectionRun(unittest.TestCase):
+    """Runs de ponta a ponta contra o site sintético: o segundo run só busca o que mudou."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, server):
+        overrides = replay_config(server, self.tmp.name)
+        overrides.update(
+            PARSE_WORKERS=0, MAX_ARTISTS=3, SEARCH_MAX_PAGES=1,
+            CHANGES_FILE=os.path.join(self.tmp.name, "snapshot.sqlite"),
+            DELTA_FILE=os.path.join(self.tmp.name, "delta.jsonl"),
+        )
+        with patched_config(discogs_scraper, **overrides):
+            discogs_scraper.run_scraper(changes=True)
+        with open(overrides["RUN_REPORT_FILE"], encoding="utf-8") as f:
+            report = json.load(f)
+        return (list(iter_jsonl(overrides["OUTPUT_FILE"])), list(iter_jsonl(overrides["DELTA_FILE"])),
+                report["changes"])
+
+    def test_second_run_fetches_only_churn(self):
+        pages = make_site_pages(n_artists=3, n_albums=2, n_tracks=4)
+        with FixtureServer(pages) as server:
+            snapshot, delta, changes = self._run(server)
+            self.assertEqual(len(snapshot), 3)
+            self.assertEqual([d["operacao"] for d in delta], ["adicionado"] * 3)
+            self.assertEqual(changes["albuns_buscados"], 6)
+
+            # Sem mudanças: nenhum álbum buscado, delta vazio, mesmo snapshot
+            again, delta, changes = self._run(server)
+            self.assertEqual(again, snapshot)
+            self.assertEqual(delta, [])
+            self.assertEqual((changes["albuns_buscados"], changes["artistas_reaproveitados"]), (0, 3))
+
+            # Artista 2 ganha um álbum: só a página nova é buscada
+            album_paths = ["/release/2001", "/release/2002", "/release/2003"]
+            server.pages["/release/2003"] = make_album_html(4, "Artista 2 Album 3")
+            server.pages["/artist/2-Artista-2"] = make_artist_html(album_paths, members=("Artista 2 Membro",))
+            server.pages[listing_page_url(2, listing_url="/artists/{artist_id}/releases")] = make_listing_json([
+                {"id": 2000 + i, "title": f"Artista 2 Album {i}", "year": 1990 + i, "role": "Main",
+                 "type": "release", "format": "LP, Album"} for i in (1, 2, 3)
+            ])
+            with patched_config(discogs_scraper, MAX_ALBUMS=3):
+                _, delta, changes = self._run(server)
+            self.assertEqual(changes["albuns_buscados"], 1)
+            self.assertEqual(changes["albuns_reaproveitados"], 2)
+            self.assertEqual([(d["operacao"], d["id_artista"]) for d in delta], [("alterado", "2")])
+            self.assertEqual(delta[0]["albuns_adicionados"], ["release:2003"])
+
+            # Artista 3 sai da busca: removido
+            search = search_page_url("/pt_BR/search", "Rock")
+            server.pages[search] = make_search_html([(f"Artista {a}", f"/artist/{a}-Artista-{a}") for a in (1, 2)])
+            with patched_config(discogs_scraper, MAX_ALBUMS=3):
+                snapshot, delta, _ = self._run(server)
+            self.assertEqual(len(snapshot), 2)
+            self.assertEqual([(d["operacao"], d["id_artista"]) for d in delta], [("removido", "3")])
+
+
+if __name__ == '__main__':
+    unittest.main()
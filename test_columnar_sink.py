@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+from columnar_sink import ColumnarSink, convert_jsonl, read_table, pyarrow
+from jsonl_sink import JsonlSink
+
+
+def _artist(n, albums=2, tracks=3):
+    return {
+        "id_artista": f"artista-{n}",
+        "genero": "Rock" if n % 2 else "Jazz",
+        "nome_artista": f"Artista {n}",
+        "membros_artista": "Individual" if n % 2 else [f"Membro {n}a", f"Membro {n}b"],
+        "sites_artista": [f"https://artista{n}.example"],
+        "albuns": [{
+            "nome_album": f"Álbum {n}.{a}",
+            "ano_lancamento": str(1990 + a) if a else "UNKNOWN_YEAR",
+            "faixas_album": [{"numero_faixa": str(t + 1), "nome_faixa": f"Faixa {t}", "duracao_faixa": "3:00",
+                              "posicao_original": f"{'AB'[t % 2]}{t + 1}"} for t in range(tracks)],
+            "gravadora_album": f"Selo {n % 3}",
+            "genero_album": ["Rock"],
+            "estilos_album": ["Punk", f"Estilo {a}"],
+        } for a in range(albums)],
+    }
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow não instalado")
+class TestColumnarSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "dados_discogs.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalized_tables(self):
+        for fmt in ("parquet", "arrow"):
+            with self.subTest(fmt=fmt):
+                with ColumnarSink(self.path, fmt) as sink:
+                    for n in range(4):
+                        sink.write(_artist(n))
+
+                artists = read_table(sink.paths["artistas"]).to_pylist()
+                albums = read_table(sink.paths["albuns"]).to_pylist()
+                tracks = read_table(sink.paths["faixas"])
+                self.assertEqual(len(artists), 4)
+                self.assertEqual((artists[0]["individual"], artists[0]["membros_artista"]), (False, ["Membro 0a", "Membro 0b"]))
+                self.assertEqual((artists[1]["individual"], artists[1]["membros_artista"]), (True, []))
+                self.assertEqual([a["ano_lancamento"] for a in albums[:2]], [None, 1991])
+                self.assertEqual(albums[0]["estilos_album"], ["Punk", "Estilo 0"])
+                self.assertEqual(albums[0]["duracao_total_segundos"], 540)
+                self.assertEqual(tracks.num_rows, 24)
+                self.assertEqual(tracks.slice(0, 2).select(["disco", "lado", "posicao", "duracao_segundos"]).to_pylist(),
+                                 [{"disco": 1, "lado": "A", "posicao": 1, "duracao_segundos": 180},
+                                  {"disco": 1, "lado": "B", "posicao": 2, "duracao_segundos": 180}])
+                self.assertTrue(pyarrow.types.is_dictionary(tracks.schema.field("lado").type))
+
+    def test_incremental_row_groups(self):
+        """Um row group por lote de row_group_size faixas; os dicionários crescem entre os lotes."""
+        for fmt in ("parquet", "arrow"):
+            with self.subTest(fmt=fmt):
+                sink = ColumnarSink(self.path, fmt, row_group_size=6)
+                for n in range(5):
+                    sink.write(_artist(n))
+                self.assertEqual(sink.row_groups, 5)
+                self.assertFalse(os.path.exists(sink.paths["faixas"])) # ainda .part
+                sink.close()
+
+                albums = read_table(sink.paths["albuns"])
+                self.assertEqual(albums.column("gravadora_album").to_pylist(),
+                                 [f"Selo {n % 3}" for n in range(5) for _ in range(2)])
+                if fmt == "parquet":
+                    self.assertEqual(pyarrow.parquet.ParquetFile(sink.paths["faixas"]).num_row_groups, 5)
+
+    def test_flush_writes_partial_row_group(self):
+        """flush (do teto de memória) grava o lote pendente antes de completar row_group_size."""
+        with ColumnarSink(self.path, "parquet", row_group_size=1000) as sink:
+            sink.write(_artist(0))
+            sink.flush()
+            self.assertEqual(sink.row_groups, 1)
+            sink.flush() # sem pendentes: nada a gravar
+            sink.write(_artist(1))
+        self.assertEqual(sink.row_groups, 2)
+        self.assertEqual(read_table(sink.paths["artistas"]).num_rows, 2)
+
+    def test_convert_jsonl_segments(self):
+        """O conversor lê os segmentos rotacionados (e comprimidos) na ordem."""
+        with JsonlSink(self.path, rotate_bytes=1, compression="gzip") as jsonl:
+            for n in range(3):
+                jsonl.write(_artist(n))
+
+        sink = convert_jsonl(jsonl.segments, os.path.join(self.tmp.name, "convertido"))
+        artists = read_table(sink.paths["artistas"]).column("nome_artista").to_pylist()
+        self.assertEqual(artists, ["Artista 0", "Artista 1", "Artista 2"])
+        self.assertEqual(read_table(sink.paths["faixas"]).num_rows, 18)
+
+    def test_empty_run_writes_empty_tables(self):
+        with ColumnarSink(self.path) as sink:
+            pass
+        self.assertEqual(read_table(sink.paths["albuns"]).num_rows, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from functools import partial
+from unittest import mock
+
+from album_pipeline import AlbumPipeline
+from crawl_state import CrawlState, MISSING
+from discogs_scraper import process_artist, scrape_album_resumable
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html, make_artist_html
+
+DAY = 24 * 3600
+
+
+class _Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestCrawlState(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state.sqlite")
+        self.clock = _Clock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _state(self):
+        return CrawlState(self.path, clock=self.clock)
+
+    def test_interrupted_run_is_resumed(self):
+        """Um run que não terminou deve ser retomado reaproveitando o que já foi concluído."""
+        state = self._state()
+        state.begin_run()
+        state.mark_done("http://x/artist/1", "artist", {"nome_artista": "A"})
+        state.mark_in_progress("http://x/artist/2", "artist")
+        state.close() # "queda" sem finish_run
+
+        self.clock.now += 60
+        state = self._state()
+        state.begin_run()
+        self.assertEqual(state.lookup("http://x/artist/1"), {"nome_artista": "A"})
+        self.assertIs(state.lookup("http://x/artist/2"), MISSING)
+        self.assertEqual(state.counts(), {"artist:done": 1, "artist:queued": 1})
+        state.close()
+
+    def test_full_run_after_finished_run_refetches(self):
+        """Depois de um run concluído, um run completo não reaproveita nada."""
+        state = self._state()
+        state.begin_run()
+        state.mark_done("http://x/artist/1", "artist", None)
+        state.finish_run()
+
+        self.clock.now += 60
+        state.begin_run()
+        self.assertIs(state.lookup("http://x/artist/1"), MISSING)
+        state.close()
+
+    def test_incremental_reuses_only_fresh_entities(self):
+        """No modo incremental, só entidades mais novas que max_age são reaproveitadas."""
+        state = self._state()
+        state.begin_run()
+        state.mark_done("http://x/release/old", "album", {"faixas_album": []})
+        self.clock.now += 5 * DAY
+        state.mark_done("http://x/release/new", "album", {"faixas_album": [1]})
+        state.finish_run()
+
+        self.clock.now += 3 * DAY
+        state.begin_run(incremental=True, max_age=7 * DAY)
+        self.assertIs(state.lookup("http://x/release/old"), MISSING)
+        self.assertEqual(state.lookup("http://x/release/new"), {"faixas_album": [1]})
+        state.close()
+
+    def test_resumed_artist_is_not_fetched_again(self):
+        """Artistas e álbuns concluídos não devem gerar novas requisições ao retomar."""
+        pages = {f"/release/{i}": make_album_html(n_tracks=2, title=f"Album {i}") for i in range(2)}
+        pages["/artist/1"] = make_artist_html(["/release/0", "/release/1"])
+
+        # Discografia só pela página do artista: a listagem ficaria fora do servidor local
+        with FixtureServer(pages) as server, mock.patch("discogs_scraper.DISCOGRAPHY_SOURCE", "page"):
+            fetcher = HttpFetcher()
+            item = {"Nome_Artista": "Artista", "url_artista": server.url("/artist/1")}
+            results = []
+            for _ in range(2):
+                state = self._state()
+                state.begin_run()
+                pipeline = AlbumPipeline(partial(scrape_album_resumable, fetcher, state))
+                results.append(process_artist(fetcher, pipeline, item, state=state))
+                pipeline.close()
+                state.close()
+            fetcher.close()
+
+            self.assertEqual(server.requests, 3)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(results[1]["albuns"]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+from functools import partial
+from unittest import mock
+
+from album_pipeline import AlbumPipeline
+from dedupe import BloomFilter, DedupeIndex, album_key, discogs_id, normalize_url
+from discogs_scraper import process_artist, scrape_album_page
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html, make_artist_html
+
+
+class TestNormalization(unittest.TestCase):
+
+    def test_normalize_url(self):
+        """Variações de idioma, host, slug, query e barra final devem virar a mesma chave."""
+        variants = [
+            "https://www.discogs.com/pt_BR/release/123-Artista-Album",
+            "https://discogs.com/release/123/",
+            "HTTPS://WWW.DISCOGS.COM/release/123?ref=search#tracks",
+            "https://www.discogs.com/fr/release/123-Outro-Slug",
+        ]
+        self.assertEqual({normalize_url(url) for url in variants}, {"https://discogs.com/release/123"})
+        self.assertNotEqual(normalize_url("https://discogs.com/release/123"), normalize_url("https://discogs.com/master/123"))
+
+    def test_discogs_id(self):
+        self.assertEqual(discogs_id("https://www.discogs.com/pt_BR/release/123-Artista-Album?x=1"), "release:123")
+        self.assertEqual(discogs_id("https://discogs.com/master/123/"), "master:123")
+        self.assertIsNone(discogs_id("https://discogs.com/search?q=x"))
+
+    def test_album_key_collapses_masters(self):
+        release = {"url_album": "https://discogs.com/release/9", "id_master": "5"}
+        master = {"url_album": "https://www.discogs.com/pt_BR/master/5-Album"}
+        self.assertEqual(album_key(release), "https://discogs.com/release/9")
+        self.assertEqual(album_key(release, one_per_master=True), album_key(master, one_per_master=True))
+
+
+class TestDedupeIndex(unittest.TestCase):
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"https://discogs.com/release/{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f"https://discogs.com/master/{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_add_reports_avoided_fetches(self):
+        index = DedupeIndex(capacity=100)
+        self.assertTrue(index.add("https://www.discogs.com/release/1-A", "album"))
+        self.assertFalse(index.add("https://discogs.com/pt_BR/release/1", "album"))
+        self.assertFalse(index.add("https://discogs.com/release/1/", "album"))
+        self.assertTrue(index.add("https://discogs.com/release/2", "album"))
+        self.assertIn("https://discogs.com/release/2?x=1", index)
+        self.assertEqual(index.report(), {"album": 2, "total": 2})
+
+    def test_persisted_index_is_scoped_to_the_run(self):
+        """No disco, o conjunto exato vale para o run; um run novo (ou retomado) começa vazio."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dedupe.sqlite")
+            index = DedupeIndex(path, capacity=100, batch_size=2)
+            for i in range(5):
+                index.add(f"https://discogs.com/release/{i}")
+            self.assertFalse(index.add("https://www.discogs.com/release/1-X")) # já gravada no SQLite
+            index.close()
+
+            index = DedupeIndex(path, capacity=100)
+            self.assertTrue(index.add("https://www.discogs.com/release/3-X"))
+            self.assertFalse(index.add("https://discogs.com/release/3"))
+            index.close()
+
+    def test_concurrent_scrapes_of_a_key_fetch_once(self):
+        """Dois artistas pedindo o mesmo álbum ao mesmo tempo: um busca, o outro espera e recebe uma cópia."""
+        index = DedupeIndex(capacity=100)
+        fetched = []
+
+        def scrape(url):
+            fetched.append(url)
+            time.sleep(0.05)
+            return {"faixas_album": [{"nome_faixa": "Um"}]}
+
+        results = [None, None]
+        urls = ["https://discogs.com/release/1", "https://www.discogs.com/pt_BR/release/1-A"]
+        threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, index.scrape_once(scrape, urls[i])))
+                   for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(fetched), 1)
+        self.assertEqual(results[0], results[1])
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(index.report(), {"album": 1, "total": 1})
+
+    def test_invalid_result_is_not_fetched_again_in_the_run(self):
+        """Um álbum que o dono não conseguiu raspar não é buscado de novo pelos outros artistas."""
+        index = DedupeIndex(capacity=100)
+        fetched = []
+        scrape = lambda url: fetched.append(url) or None
+        self.assertIsNone(index.scrape_once(scrape, "https://discogs.com/release/1"))
+        self.assertIsNone(index.scrape_once(scrape, "https://www.discogs.com/release/1-A"))
+        self.assertEqual(len(fetched), 1)
+        self.assertEqual(index.report(), {"album": 1, "total": 1})
+
+    def test_failed_owner_lets_next_artist_fetch(self):
+        index = DedupeIndex(capacity=100)
+
+        def broken(url):
+            raise RuntimeError("driver caiu")
+
+        with self.assertRaises(RuntimeError):
+            index.scrape_once(broken, "https://discogs.com/release/1")
+        self.assertEqual(index.scrape_once(lambda url: {"ok": True}, "https://discogs.com/release/1"), {"ok": True})
+        self.assertEqual(index.report(), {"total": 0})
+
+    def test_waiting_repeat_does_not_hold_a_slot(self):
+        """Enquanto o dono busca, a repetição espera fora do pipeline: a vaga fica para o próximo álbum."""
+        index = DedupeIndex(capacity=100)
+        started, second_done = threading.Event(), threading.Event()
+        fetched = []
+
+        def scrape(url):
+            fetched.append(url)
+            if url.endswith("/1"):
+                started.set()
+                return {"outro_antes": second_done.wait(2)}
+            second_done.set()
+            return {"ok": True}
+
+        pipeline = AlbumPipeline(scrape, global_limit=2, per_host_limit=2, single_flight=index)
+        albums = [{"url_album": f"https://x/release/{i}"} for i in (1, 2)]
+        results = []
+        owner = threading.Thread(target=lambda: results.append(pipeline.run(albums[:1], 1)))
+        owner.start()
+        started.wait(2)
+        repeat = pipeline.run(albums, 2)
+        owner.join()
+        pipeline.close()
+        self.assertEqual(fetched, ["https://x/release/1", "https://x/release/2"])
+        self.assertEqual([data for _, data in repeat], [{"outro_antes": True}, {"ok": True}])
+        self.assertEqual(results[0][0][1], {"outro_antes": True})
+
+    def test_release_shared_by_artists_is_fetched_once(self):
+        """Um lançamento listado por dois artistas só é buscado uma vez, mas entra nas duas discografias."""
+        pages = {
+            "/release/1": make_album_html(n_tracks=2, title="Split"),
+            "/release/2": make_album_html(n_tracks=2, title="Solo"),
+            "/master/7": make_album_html(n_tracks=2, title="Master"),
+            "/release/8": make_album_html(n_tracks=2, title="Prensagem"),
+            "/artist/a": make_artist_html(["/release/1", "/master/7"]),
+            "/artist/b": make_artist_html(["/pt_BR/release/1-Split", "/release/2"]),
+        }
+        with FixtureServer(pages) as server, mock.patch("discogs_scraper.DISCOGRAPHY_SOURCE", "page"):
+            fetcher = HttpFetcher()
+            dedupe = DedupeIndex()
+            pipeline = AlbumPipeline(partial(scrape_album_page, fetcher), single_flight=dedupe)
+            results = [
+                process_artist(fetcher, pipeline, {"Nome_Artista": name, "url_artista": server.url(f"/artist/{name}")},
+                               dedupe=dedupe)
+                for name in ("a", "b")
+            ]
+            pipeline.close()
+            fetcher.close()
+            self.assertEqual(server.requests, 2 + 3)
+
+        self.assertEqual([a["nome_album"] for a in results[0]["albuns"]], ["Album 1", "Album 2"])
+        self.assertEqual([a["nome_album"] for a in results[1]["albuns"]], ["Album 1", "Album 2"])
+        self.assertEqual(results[1]["albuns"][0]["faixas_album"], results[0]["albuns"][0]["faixas_album"])
+        self.assertEqual(dedupe.report(), {"album": 1, "total": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
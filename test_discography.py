@@ -0,0 +1,84 @@
+import unittest
+from functools import partial
+
+from album_pipeline import AlbumPipeline
+from discogs_scraper import scrape_album_page
+from discography import DiscographyFilter, artist_id_from_url, iter_discography, listing_page_url
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html, make_listing_json
+
+
+def _release(i, year, role="Main", fmt="LP, Album", kind="release"):
+    item = {"id": i, "title": f"Album {i}", "year": year, "role": role, "type": kind}
+    if fmt:
+        item["format"] = fmt
+    return item
+
+
+class TestDiscography(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FixtureServer({}).start()
+        self.fetcher = HttpFetcher()
+        self.listing_url = self.server.url("/artists/{artist_id}/releases")
+        self.artist_url = self.server.url("/artist/42-Artista")
+
+    def tearDown(self):
+        self.fetcher.close()
+        self.server.stop()
+
+    def _serve_listing(self, pages, per_page=3):
+        for number, releases in enumerate(pages, start=1):
+            url = listing_page_url("42", number, per_page, self.listing_url)
+            self.server.pages[url[len(self.server.base_url):]] = make_listing_json(releases, number, len(pages))
+
+    def _discography(self, selection=None, per_page=3, **kwargs):
+        return iter_discography(self.fetcher, self.artist_url, self.artist_url, selection,
+                                per_page=per_page, listing_url=self.listing_url, **kwargs)
+
+    def test_follows_pages_and_applies_filters(self):
+        """Deve seguir a paginação e aplicar papel, formato e ano antes de buscar qualquer álbum."""
+        self._serve_listing([
+            [_release(1, 1990), _release(2, 1991, role="Appearance"), _release(3, 1992, fmt="CD, Single")],
+            [_release(4, 1993, kind="master", fmt=None), _release(5, 1994), _release(6, 1995)],
+            [_release(7, 2001), _release(8, 2002), _release(9, 2003)],
+        ])
+        selection = DiscographyFilter(roles=["Main"], formats=["Album"], year_min=1991, year_max=1994)
+        albums = list(self._discography(selection))
+
+        self.assertEqual([a["nome_album"] for a in albums], ["Album 4", "Album 5"])
+        self.assertEqual(albums[0]["url_album"], self.server.url("/master/4"))
+        self.assertEqual(albums[1], {"nome_album": "Album 5", "url_album": self.server.url("/release/5"),
+                                     "ano_lancamento": "1994", "id_master": None})
+        self.assertEqual(albums[0]["id_master"], "4")
+        # Listagem ordenada por ano: a página 3 nem é buscada, pois começa depois de year_max
+        self.assertEqual(self.server.requests, 2)
+
+    def test_cost_scales_with_selected_releases(self):
+        """Com max_albums pequeno, só a primeira página da listagem e os álbuns usados são buscados."""
+        self._serve_listing([[_release(i * 3 + j + 1, 2000 + i) for j in range(3)] for i in range(10)])
+        for i in range(1, 31):
+            self.server.pages[f"/release/{i}"] = make_album_html(n_tracks=2, title=f"Album {i}")
+
+        pipeline = AlbumPipeline(partial(scrape_album_page, self.fetcher), 2, 2)
+        result = pipeline.run(self._discography(), 2)
+        pipeline.close()
+
+        self.assertEqual([raw["nome_album"] for raw, _ in result], ["Album 1", "Album 2"])
+        self.assertLessEqual(self.server.requests, 1 + 3)
+
+    def test_falls_back_to_artist_page_albums(self):
+        """Sem listagem (ou sem ID na URL), usa os álbuns extraídos da página do artista."""
+        fallback = [{"nome_album": "Da página", "url_album": "http://x/release/1", "ano_lancamento": "2000"}]
+        self.assertEqual(list(self._discography(fallback=fallback)), fallback)
+        self.assertEqual(
+            list(iter_discography(self.fetcher, "http://x/artista-sem-id", "http://x", fallback=fallback)), fallback
+        )
+
+    def test_artist_id_from_url(self):
+        self.assertEqual(artist_id_from_url("https://www.discogs.com/pt_BR/artist/45-Aphex-Twin"), "45")
+        self.assertIsNone(artist_id_from_url("https://www.discogs.com/label/1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,149 +1,21 @@
 import unittest
-import json
-import re
-from bs4 import BeautifulSoup
-from operator import itemgetter 
 
-
-
-def clean_track_position(raw_position):
-    """
-    Remove todos os caracteres não numéricos de uma string de posição de faixa.
-    Se a posição for apenas uma letra (ex: 'A', 'B'), converte para número ('1', '2').
-    Ex: 'A1' -> '1', 'B2' -> '2', 'C10' -> '10', 'A' -> '1', 'B' -> '2'
-    """
-    if not raw_position:
-        return None
-    
-    # Normaliza a string (remove espaços e torna maiúscula)
-    raw_position = raw_position.strip().upper()
-    
-    # 1. Tenta encontrar dígitos
-    numbers = re.findall(r'\d+', raw_position)
-    
-    if numbers:
-        # Se encontrou números, usa o primeiro conjunto de dígitos (Ex: A10 -> 10)
-        cleaned_position = "".join(numbers) 
-        try:
-            return str(int(cleaned_position))
-        except ValueError:
-            return cleaned_position 
-    
-    # 2. Se não encontrou números, verifica se é uma letra única
-    if len(raw_position) == 1 and raw_position.isalpha():
-        # Converte a letra para um valor numérico (A=1, B=2, Z=26)
-        letter_value = ord(raw_position) - ord('A') + 1
-        return str(letter_value)
-    
-    # 3. Retorna a posição original se nenhuma regra se aplicar
-    return raw_position
-
-def extract_artist_info(soup):
-    """Extrai informações do artista (membros, sites) da página do perfil."""
-    artist_data = {"membros": "Individual", "sites": []}
-    info_section = soup.select_one("div.info_LD8Ql")
-
-    if info_section:
-        for row in info_section.select("tr"):
-            header = row.find("h2")
-            td = row.find("td")
-            if not header or not td:
-                continue
-
-            title = header.get_text(strip=True).rstrip(":")
-
-            # Sites
-            if title == "Sites":
-                artist_data["sites"] = [a["href"] for a in td.find_all("a", href=True)]
-
-            # Members
-            elif title == "Members":
-                members = [a.get_text(strip=True) for a in td.find_all("a")]
-                artist_data["membros"] = members if members else "Individual"
-
-    return artist_data
-
-def extract_album_tracklist(album_soup):
-    """Extrai a lista de faixas, duração e posição do álbum."""
-    tracks = []
-    
-    for tr in album_soup.select("tbody tr[data-track-position]"):
-        raw_position = tr.get("data-track-position")
-        
-        # Chamada da função para limpar a posição
-        position = clean_track_position(raw_position)
-
-        # Título da faixa
-        title_el = tr.select_one("td.trackTitle_loyWF span.trackTitle_loyWF")
-        title_track = title_el.get_text(strip=True) if title_el else None
-
-        # Duração
-        dur_el = tr.select_one("td.duration_GhhxK span span")
-        duration = dur_el.get_text(strip=True) if dur_el else None
-
-        if position and title_track and duration:
-            try:
-                position_int = int(position) 
-            except ValueError:
-                position_int = position
-
-            tracks.append({
-                "numero_faixa": position_int, 
-                "nome_faixa": title_track,
-                "duracao_faixa": duration
-            })
-            
-    # Garantir a ordenação por número da faixa
-    try:
-        tracks.sort(key=itemgetter("numero_faixa"))
-    except TypeError:
-         pass
-    
-    # Converte o 'numero_faixa' de volta para string para o output JSONL
-    for track in tracks:
-        track["numero_faixa"] = str(track["numero_faixa"])
-        
-    return tracks
-
-def extract_album_details(album_soup):
-    """Extrai gravadora, gênero e estilos da página do álbum."""
-    album_info = {
-        "gravadora_album": None,
-        "genero_album": [],
-        "estilos_album": [],
-    }
-
-    info_table = album_soup.select_one("div.info_LD8Ql table.table_c5ftk")
-    if info_table:
-        for tr in info_table.select("tr"):
-            head_el = tr.select_one("th h2")
-            value_td = tr.select_one("td")
-            if not head_el or not value_td:
-                continue
-
-            field = head_el.get_text(strip=True).replace(":", "")
-
-            # LABEL
-            if field == "Label":
-                label_links = [a.get_text(strip=True) for a in value_td.select("a")]
-                if label_links:
-                    album_info["gravadora_album"] = label_links[0]
-                else:
-                    album_info["gravadora_album"] = value_td.get_text(" ", strip=True)
-
-            # GENRE
-            elif field == "Genre":
-                album_info["genero_album"] = [a.get_text(strip=True) for a in value_td.select("a")]
-
-            # STYLE
-            elif field == "Style":
-                album_info["estilos_album"] = [a.get_text(strip=True) for a in value_td.select("a")]
-                
-    return album_info
+from discogs_scraper import (
+    clean_track_position,
+    extract_artist_info,
+    extract_album_details,
+    extract_album_tracklist,
+)
+from parsers import parse_html, available_backends
 
 # --- Classe de Testes Unitários ---
 
 class TestDiscogsScraperFunctions(unittest.TestCase):
+    parser_backend = "html.parser"
+    partial = False
+
+    def parse(self, html, page_type=None):
+        return parse_html(html, page_type, self.parser_backend, self.partial)
     
     ## Testes da Função clean_track_position
     
@@ -184,7 +56,7 @@ class TestDiscogsScraperFunctions(unittest.TestCase):
             </table>
         </div>
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse(html, "artist")
         expected = {
             "membros": ["Membro 1", "Membro 2"],
             "sites": ["https://site1.com", "https://site2.org"]
@@ -200,7 +72,7 @@ class TestDiscogsScraperFunctions(unittest.TestCase):
             </table>
         </div>
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse(html, "artist")
         expected = {
             "membros": "Individual",
             "sites": ["https://solo.net"]
@@ -219,7 +91,7 @@ class TestDiscogsScraperFunctions(unittest.TestCase):
             <tr><th><h2>Style:</h2></th><td><a href="/style/Prog">Prog Rock</a>, <a href="/style/Art">Art Rock</a></td></tr>
         </table></div>
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse(html, "album")
         expected = {
             "gravadora_album": "Major Records",
             "genero_album": ["Rock", "Pop"],
@@ -234,7 +106,7 @@ class TestDiscogsScraperFunctions(unittest.TestCase):
             <tr><th><h2>Label:</h2></th><td>Self-Released (No Link)</td></tr>
         </table></div>
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse(html, "album")
         expected = {
             "gravadora_album": "Self-Released (No Link)",
             "genero_album": [],
@@ -267,7 +139,7 @@ class TestDiscogsScraperFunctions(unittest.TestCase):
             </tbody>
         </table>
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse(html, "album")
         
         tracks = extract_album_tracklist(soup)
         
@@ -282,8 +154,16 @@ class TestDiscogsScraperFunctions(unittest.TestCase):
     def test_extract_album_tracklist_empty(self):
         """Deve retornar uma lista vazia para tracklist vazia ou inválida."""
         html = "<table><tbody></tbody></table>"
-        soup = BeautifulSoup(html, "html.parser")
+        soup = self.parse(html, "album")
         self.assertEqual(extract_album_tracklist(soup), [])
 
+# Os mesmos testes em cada backend de parsing instalado, com e sem parse parcial
+for _backend in available_backends():
+    for _partial in (False, True):
+        if (_backend, _partial) == (TestDiscogsScraperFunctions.parser_backend, False):
+            continue
+        _name = f"TestDiscogsScraperFunctions_{_backend.replace('.', '_')}{'_partial' if _partial else ''}"
+        globals()[_name] = type(_name, (TestDiscogsScraperFunctions,), {"parser_backend": _backend, "partial": _partial})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
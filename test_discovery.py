@@ -0,0 +1,81 @@
+import unittest
+
+from discogs_scraper import process_artists_in_parallel
+from discovery import discover_artists, search_page_url
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_search_html
+
+
+def _page(prefix, ids):
+    return make_search_html([(f"{prefix} {i}", f"/artist/{prefix}-{i}") for i in ids])
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.fetcher = HttpFetcher()
+
+    def tearDown(self):
+        self.fetcher.close()
+
+    def _serve(self, server_pages):
+        server = FixtureServer({}).start()
+        self.addCleanup(server.stop)
+        base = server.url("/search")
+        for (genre, style, page), html in server_pages.items():
+            server.pages[search_page_url(base, genre, style, page, per_page=3)[len(server.base_url):]] = html
+        return server, base
+
+    def test_walks_pages_and_filters_with_global_dedupe(self):
+        """Deve percorrer as páginas de cada filtro e emitir cada artista uma única vez."""
+        server, base = self._serve({
+            ("Rock", None, 1): _page("R", [1, 2, 3]),
+            ("Rock", None, 2): _page("R", [4]),
+            ("Jazz", None, 1): _page("R", [2]) + _page("J", [1]),
+            ("Jazz", None, 2): _page("R", [2]) + _page("J", [1]), # página repetida = fim
+            (None, "Punk", 1): make_search_html([("R 1", "/artist/R-1/?ref=x"), ("P 1", "/artist/P-1")]),
+        })
+        found = list(discover_artists(self.fetcher, base, ["Rock", "Jazz"], ["Punk"], per_page=3))
+
+        self.assertEqual([a["Nome_Artista"] for a in found], ["R 1", "R 2", "R 3", "R 4", "J 1", "P 1"])
+        self.assertEqual([a["genero"] for a in found], ["Rock"] * 4 + ["Jazz", "Punk"])
+        self.assertEqual(found[0]["url_artista"], server.url("/artist/R-1"))
+
+    def test_generator_is_lazy(self):
+        """A próxima página só é buscada quando os artistas da anterior já foram consumidos."""
+        server, base = self._serve({("Rock", None, p): _page(f"R{p}", [1, 2, 3]) for p in range(1, 5)})
+        artists = discover_artists(self.fetcher, base, ["Rock"], per_page=3)
+
+        self.assertEqual(server.requests, 0)
+        for _ in range(3):
+            next(artists)
+        self.assertEqual(server.requests, 1)
+        next(artists)
+        self.assertEqual(server.requests, 2)
+
+    def test_max_pages_and_on_page(self):
+        server, base = self._serve({("Rock", None, p): _page(f"R{p}", [1, 2]) for p in range(1, 5)})
+        pages = []
+        found = list(discover_artists(self.fetcher, base, ["Rock"], max_pages=2, per_page=3, on_page=pages.append))
+        self.assertEqual(len(found), 4)
+        self.assertEqual([len(p) for p in pages], [2, 2])
+
+    def test_processing_pulls_artists_on_demand(self):
+        """process_artists_in_parallel só pede ao gerador os artistas que ainda cabem no corte."""
+        pulled = []
+
+        def artists():
+            for i in range(1000):
+                pulled.append(i)
+                yield {"Nome_Artista": f"A{i}", "url_artista": f"http://x/artist/{i}"}
+
+        emitted = []
+        total = process_artists_in_parallel(lambda item: {"nome_artista": item["Nome_Artista"]},
+                                            artists(), 5, 2, emitted.append)
+        self.assertEqual(total, 5)
+        self.assertEqual([a["nome_artista"] for a in emitted], [f"A{i}" for i in range(5)])
+        self.assertLessEqual(len(pulled), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,335 @@
+import os
+import uuid
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import discogs_scraper
+from distributed import Coordinator, Worker, open_queue, run_coordinator, run_local
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_site_pages
+from jsonl_sink import iter_jsonl
+from replay import patched_config, replay_config
+from work_queue import DONE, FAILED, LEASED, QUEUED, RedisWorkQueue, WorkQueue, open_work_queue, redis
+
+# Servidor Redis para os testes da RedisWorkQueue (ex: redis://localhost:6379/15); sem ele, são pulados
+REDIS_TEST_URL = os.environ.get("REDIS_TEST_URL")
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _QueueContract:
+    """Comportamento comum às implementações da TaskQueue: leases, tentativas, runs e prioridade."""
+
+    def open_queue(self, **kwargs):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.queue = self.open_queue(lease_seconds=10, max_attempts=2, clock=self.clock)
+
+    def tearDown(self):
+        self.queue.close()
+
+    def test_expired_lease_is_requeued_and_late_result_is_rejected(self):
+        self.queue.put("album", "a", "https://x/release/1")
+        crashed, = self.queue.claim("morto")
+        self.assertEqual(self.queue.claim("vivo"), [])
+
+        self.clock.now += 11
+        task, = self.queue.claim("vivo")
+        self.assertEqual((task.id, task.attempts), (crashed.id, 2))
+        self.assertFalse(self.queue.complete(crashed, "morto", {"x": 1}))
+        self.assertTrue(self.queue.complete(task, "vivo", {"x": 2}))
+        self.assertEqual(self.queue.get(task.id).result, {"x": 2})
+        self.assertEqual(self.queue.report()["leases_expirados"], 1)
+
+    def test_failures_wait_for_retry_after_and_stop_after_max_attempts(self):
+        self.queue.put("artist", "a", "https://x/artist/1")
+        task, = self.queue.claim("w")
+        self.queue.fail(task, "w", "503", retry_after=5)
+        self.assertEqual(self.queue.claim("w"), [])
+
+        self.clock.now += 5
+        task, = self.queue.claim("w")
+        self.queue.fail(task, "w", "503")
+        self.assertEqual(self.queue.get(task.id).status, FAILED)
+
+    def test_renew_extends_the_lease(self):
+        self.queue.put("album", "a", "https://x/release/1")
+        task, = self.queue.claim("lento")
+        self.clock.now += 8
+        self.assertTrue(self.queue.renew(task, "lento"))
+        self.clock.now += 8 # 16 s depois do claim, mas só 8 depois da renovação
+        self.assertEqual(self.queue.claim("outro"), [])
+        self.assertFalse(self.queue.renew(task, "outro"))
+        self.assertTrue(self.queue.complete(task, "lento", {"x": 1}))
+        self.assertFalse(self.queue.renew(task, "lento"))
+
+    def test_new_run_discards_previous_results(self):
+        """Um resultado concluído num run não é devolvido no seguinte: a tarefa volta a ser buscada."""
+        self.assertEqual(self.queue.begin_run(), 1)
+        old, _ = self.queue.put("album", "a", "https://x/release/1")
+        self.queue.complete(self.queue.claim("w")[0], "w", {"x": 1})
+        self.assertEqual(self.queue.begin_run(), 2)
+        task, created = self.queue.put("album", "a", "https://x/release/1")
+        self.assertTrue(created)
+        self.assertNotEqual(task.id, old.id)
+        self.assertEqual((task.status, task.result), (QUEUED, None))
+
+    def test_late_result_from_previous_run_is_rejected(self):
+        self.queue.begin_run()
+        self.queue.put("album", "a", "https://x/release/1")
+        old, = self.queue.claim("lento")
+        self.queue.begin_run()
+        self.queue.put("album", "a", "https://x/release/1")
+        self.assertFalse(self.queue.renew(old, "lento"))
+        self.assertFalse(self.queue.complete(old, "lento", {"x": 1}))
+        self.assertEqual(self.queue.counts(), {"album:queued": 1})
+
+    def test_put_is_idempotent_per_key_and_claims_by_priority(self):
+        artist, created = self.queue.put("artist", "a", "https://x/artist/1", payload={"n": 1})
+        again, created_again = self.queue.put("artist", "a", "https://x/artist/1", payload={"n": 2})
+        self.assertEqual((created, created_again, again.id, again.payload), (True, False, artist.id, {"n": 1}))
+
+        album, _ = self.queue.put("album", "b", "https://x/release/2", parent=artist.id, priority=1)
+        self.assertEqual([t.id for t in self.queue.claim("w", limit=2)], [album.id, artist.id])
+        self.assertEqual(self.queue.statuses([album.id])[album.id], (LEASED, None))
+
+    def test_concurrent_claims_never_share_a_task(self):
+        for i in range(50):
+            self.queue.put("album", str(i), f"https://x/release/{i}")
+        claimed = []
+
+        def claim_all(owner):
+            queue = self.open_queue(clock=self.clock)
+            while tasks := queue.claim(owner):
+                claimed.extend(task.id for task in tasks)
+            queue.close()
+
+        threads = [threading.Thread(target=claim_all, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed), sorted(set(claimed)))
+        self.assertEqual(len(claimed), 50)
+        self.assertEqual(self.queue.counts(), {"album:leased": 50})
+
+
+class TestWorkQueue(_QueueContract, unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmp.cleanup()
+
+    def open_queue(self, **kwargs):
+        return WorkQueue(os.path.join(self.tmp.name, "fila.sqlite"), **kwargs)
+
+    def test_network_filesystem_is_refused(self):
+        """O WAL não funciona em NFS/SMB: a fila SQLite só abre num disco local."""
+        with mock.patch("work_queue.filesystem_type", return_value="nfs4"):
+            with self.assertRaises(ValueError):
+                WorkQueue(os.path.join(self.tmp.name, "rede.sqlite"))
+
+    def test_open_work_queue_picks_the_backend(self):
+        queue = open_work_queue(os.path.join(self.tmp.name, "outra.sqlite"))
+        self.assertIsInstance(queue, WorkQueue)
+        queue.close()
+
+
+@unittest.skipUnless(redis is not None and REDIS_TEST_URL, "defina REDIS_TEST_URL (com o pacote redis instalado)")
+class TestRedisWorkQueue(_QueueContract, unittest.TestCase):
+    """A mesma fila num Redis: cada teste usa um prefixo próprio e apaga as suas chaves no fim."""
+
+    def setUp(self):
+        self.prefix = f"teste:{uuid.uuid4().hex}"
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        client = redis.Redis.from_url(REDIS_TEST_URL)
+        keys = list(client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            client.delete(*keys)
+        client.close()
+
+    def open_queue(self, **kwargs):
+        return RedisWorkQueue(REDIS_TEST_URL, prefix=self.prefix, **kwargs)
+
+
+class TestDistributedCrawl(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pages = make_site_pages(n_artists=3, n_albums=2, n_tracks=4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _assert_output(self, output_file):
+        records = list(iter_jsonl(output_file))
+        self.assertEqual([r["nome_artista"] for r in records], ["Artista 1", "Artista 2", "Artista 3"])
+        self.assertTrue(all(len(r["albuns"]) == 2 for r in records))
+        self.assertEqual(records[0]["albuns"][0]["id_album"], "release:1001")
+
+    def test_crashed_worker_tasks_are_redone(self):
+        """Um worker que reserva uma tarefa e some: o lease expira e outro worker a conclui."""
+        with FixtureServer(self.pages) as server:
+            overrides = replay_config(server, self.tmp.name)
+            with patched_config(discogs_scraper, PARSE_WORKERS=0, MAX_ARTISTS=3, QUEUE_LEASE_SECONDS=0.5,
+                                **overrides):
+                queue = open_queue()
+                crashed = []
+
+                def crash():
+                    while not crashed:
+                        crashed.extend(queue.claim("morto"))
+                        time.sleep(0.01)
+
+                crasher = threading.Thread(target=crash)
+                crasher.start()
+                worker = None
+
+                def start_worker():
+                    nonlocal worker
+                    crasher.join()
+                    worker = Worker(open_queue(), HttpFetcher(), threads=2, poll_interval=0.05)
+                    worker.run()
+
+                worker_thread = threading.Thread(target=start_worker)
+                worker_thread.start()
+                self.assertEqual(run_coordinator(), 3)
+                worker_thread.join()
+                self.assertEqual(queue.get(crashed[0].id).status, DONE)
+                queue.close()
+
+        self._assert_output(overrides["OUTPUT_FILE"])
+        self.assertEqual(worker.processed, 9) # 3 artistas + 6 álbuns, inclusive a tarefa abandonada
+
+    def test_local_worker_processes(self):
+        with FixtureServer(self.pages, error_rate=0.1, seed=3) as server:
+            overrides = {**replay_config(server, self.tmp.name), "PARSE_WORKERS": 0, "MAX_ARTISTS": 3}
+            with patched_config(discogs_scraper, **overrides):
+                self.assertEqual(run_local(workers=2, threads=2, overrides=overrides, idle_timeout=30), 3)
+                queue = open_queue()
+                counts = queue.counts()
+                queue.close()
+
+        self._assert_output(overrides["OUTPUT_FILE"])
+        self.assertEqual(counts, {"artist:done": 3, "album:done": 6})
+
+    def test_invalid_album_pulls_the_next_candidate(self):
+        queue = WorkQueue(os.path.join(self.tmp.name, "fila.sqlite"))
+        emitted = []
+        coordinator = Coordinator(queue, max_artists=1, max_albums=2, emit=emitted.append, poll_interval=0.01)
+        candidates = [{"nome_album": f"A{i}", "ano_lancamento": "2000", "url_album": f"https://x/release/{i}"}
+                      for i in range(4)]
+
+        def fake_worker():
+            while not queue.get_meta("fechada", False):
+                for task in queue.claim("w"):
+                    if task.kind == "artist":
+                        queue.complete(task, "w", {"membros": "Individual", "sites": [], "candidatos": candidates})
+                    else:
+                        valid = task.url != "https://x/release/1"
+                        queue.complete(task, "w", {"faixas_album": [{"nome_faixa": "x"}]} if valid else None)
+                time.sleep(0.01)
+
+        thread = threading.Thread(target=fake_worker)
+        thread.start()
+        artist = {"Nome_Artista": "X", "url_artista": "https://x/artist/9-X", "genero": "Rock"}
+        self.assertEqual(coordinator.run([artist]), 1)
+        thread.join()
+        queue.close()
+        self.assertEqual([a["url_album"] for a in emitted[0]["albuns"]], ["https://x/release/0", "https://x/release/2"])
+        self.assertEqual(emitted[0]["id_artista"], "9")
+
+
+    def test_album_shared_by_artists_is_in_both_records(self):
+        """Um lançamento de dois artistas é uma tarefa só, mas entra nas duas discografias."""
+        queue = WorkQueue(os.path.join(self.tmp.name, "fila.sqlite"))
+        emitted = []
+        coordinator = Coordinator(queue, max_artists=2, max_albums=2, emit=emitted.append, poll_interval=0.01)
+        candidates = {
+            "https://x/artist/1-A": ["https://x/release/7", "https://x/release/1"],
+            "https://x/artist/2-B": ["https://x/release/7", "https://x/release/2"],
+        }
+
+        def fake_worker():
+            while not queue.get_meta("fechada", False):
+                for task in queue.claim("w"):
+                    if task.kind == "artist":
+                        queue.complete(task, "w", {"membros": "Individual", "sites": [], "candidatos": [
+                            {"nome_album": url, "ano_lancamento": "2000", "url_album": url}
+                            for url in candidates[task.url]]})
+                    else:
+                        queue.complete(task, "w", {"faixas_album": [{"nome_faixa": task.url}]})
+                time.sleep(0.01)
+
+        thread = threading.Thread(target=fake_worker)
+        thread.start()
+        artists = [{"Nome_Artista": name, "url_artista": url, "genero": "Rock"}
+                   for name, url in zip("AB", candidates)]
+        self.assertEqual(coordinator.run(artists), 2)
+        thread.join()
+        counts = queue.counts()
+        queue.close()
+        self.assertEqual([[a["url_album"] for a in record["albuns"]] for record in emitted],
+                         list(candidates.values()))
+        self.assertEqual(counts["album:done"], 3)
+        self.assertEqual(coordinator.shared_albums, 1)
+
+
+    def test_worker_started_before_the_coordinator_waits_for_the_new_run(self):
+        """A marca de fechamento do run anterior não faz um worker novo sair antes do próximo run."""
+        queue = WorkQueue(os.path.join(self.tmp.name, "fila.sqlite"))
+        old_run = queue.begin_run()
+        queue.set_meta("fechada", old_run)
+
+        class EchoWorker(Worker):
+            def handle(self, task):
+                return {"url": task.url}
+
+        worker = EchoWorker(WorkQueue(queue.path), fetcher=None, threads=1, poll_interval=0.01)
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        time.sleep(0.1)
+        self.assertTrue(thread.is_alive())
+
+        run_id = queue.begin_run()
+        task, _ = queue.put("album", "a", "https://x/release/1")
+        while queue.get(task.id).status != DONE:
+            time.sleep(0.01)
+        queue.set_meta("fechada", run_id)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(queue.get(task.id).result, {"url": "https://x/release/1"})
+        worker.queue.close()
+        queue.close()
+
+    def test_coordinator_without_workers_gives_up(self):
+        queue = WorkQueue(os.path.join(self.tmp.name, "fila.sqlite"))
+        coordinator = Coordinator(queue, max_artists=1, max_albums=2, emit=None, poll_interval=0.01,
+                                  idle_timeout=0.2)
+        artist = {"Nome_Artista": "X", "url_artista": "https://x/artist/9-X", "genero": "Rock"}
+        with self.assertRaises(RuntimeError):
+            coordinator.run([artist])
+        self.assertEqual(queue.get_meta("fechada"), queue.current_run())
+        queue.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import threading
+import unittest
+
+from selenium.common.exceptions import WebDriverException
+
+from driver_pool import DriverPool, PooledSeleniumFetcher
+
+
+class _FakeDriver:
+    """Driver falso com o mínimo da API do Selenium usada pelo pool."""
+
+    def __init__(self):
+        self.alive = True
+        self.crash_on_get = False
+        self.quit_called = False
+        self.current_url = None
+        self.page_source = "<html></html>"
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise WebDriverException("sessão morta")
+        return 1
+
+    def get(self, url):
+        if self.crash_on_get:
+            raise WebDriverException("chrome not reachable")
+        self.current_url = url
+        self.page_source = f"<html>{url}</html>"
+
+    def get_cookies(self):
+        return []
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestDriverPool(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+
+    def _factory(self):
+        driver = _FakeDriver()
+        self.created.append(driver)
+        return driver
+
+    def test_drivers_are_created_lazily_and_reused(self):
+        """Deve criar o driver no primeiro uso e reaproveitá-lo nos seguintes."""
+        pool = DriverPool(self._factory, size=2)
+        self.assertEqual(self.created, [])
+        for _ in range(3):
+            with pool.session() as driver:
+                pass
+        self.assertEqual(len(self.created), 1)
+        self.assertIs(driver, self.created[0])
+
+    def test_parallel_sessions_use_distinct_drivers(self):
+        """Threads simultâneas devem receber drivers diferentes, até o tamanho do pool."""
+        pool = DriverPool(self._factory, size=2)
+        barrier = threading.Barrier(2)
+        seen = []
+
+        def worker():
+            with pool.session() as driver:
+                seen.append(driver)
+                barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len({id(d) for d in seen}), 2)
+
+    def test_unhealthy_driver_is_recycled(self):
+        """Driver que não responde ao teste de saúde deve ser trocado por um novo."""
+        pool = DriverPool(self._factory, size=1)
+        with pool.session() as first:
+            pass
+        first.alive = False
+        with pool.session() as second:
+            pass
+        self.assertIsNot(first, second)
+        self.assertTrue(first.quit_called)
+
+    def test_crashed_session_is_restarted_by_fetcher(self):
+        """Uma sessão que trava no meio da busca deve ser recriada e a busca repetida."""
+        pool = DriverPool(self._factory, size=1)
+        with pool.session() as driver:
+            driver.crash_on_get = True
+
+        page = PooledSeleniumFetcher(pool, settle_time=0).fetch("http://x/release/1")
+        self.assertEqual(len(self.created), 2)
+        self.assertIn("/release/1", page.html)
+
+    def test_memory_and_page_limits(self):
+        """Drivers acima do limite de memória ou de páginas devem ser reciclados."""
+        pool = DriverPool(self._factory, size=1, max_memory_mb=100, memory_probe=lambda d: 500)
+        with pool.session():
+            pass
+        with pool.session():
+            pass
+        self.assertEqual(len(self.created), 2)
+
+        self.created.clear()
+        pool = DriverPool(self._factory, size=1, max_pages=2)
+        for _ in range(4):
+            with pool.session():
+                pass
+        self.assertEqual(len(self.created), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import unittest
+
+from discogs_scraper import parse_album_page
+from embedded_data import extract_embedded_album, iso_duration_to_text
+from fixture_server import make_album_html
+
+URL = "http://x/release/1"
+
+# Lado B antes do A no HTML, faixa sem duração (título de seção) e duração com horas
+MIXED_STATE = {"tracklist": [
+    {"position": "B1", "type_": "track", "title": "Lado B", "duration": "4:10"},
+    {"position": "", "type_": "heading", "title": "Parte 1", "duration": ""},
+    {"position": "A2", "type_": "track", "title": "Segunda", "duration": "1:02:03"},
+    {"position": "A1", "type_": "track", "title": " Primeira ", "duration": "3:26"},
+    {"position": "A3", "type_": "track", "title": "Sem duração", "duration": ""},
+], "labels": [{"name": "Selo"}, {"name": "Outro Selo"}], "genres": ["Jazz"], "styles": ["Bop"]}
+
+
+def _mixed_page():
+    rows = "".join(
+        f'<tr data-track-position="{t["position"]}">'
+        f'<td class="trackTitle_loyWF"><span class="trackTitle_loyWF">{t["title"]}</span></td>'
+        f'<td class="duration_GhhxK"><span><span>{t["duration"]}</span></span></td></tr>'
+        for t in MIXED_STATE["tracklist"] if t["type_"] == "track"
+    )
+    return (
+        f'<html><head><script id="dsdata" type="application/json">{json.dumps({"data": MIXED_STATE})}</script></head>'
+        '<body><div class="info_LD8Ql"><table class="table_c5ftk">'
+        '<tr><th><h2>Label:</h2></th><td><a href="/l/1">Selo</a>, <a href="/l/2">Outro Selo</a></td></tr>'
+        '<tr><th><h2>Genre:</h2></th><td><a href="/g">Jazz</a></td></tr>'
+        '<tr><th><h2>Style:</h2></th><td><a href="/s">Bop</a></td></tr>'
+        f'</table></div><table><tbody>{rows}</tbody></table></body></html>'
+    )
+
+
+class TestEmbeddedData(unittest.TestCase):
+
+    def assertParity(self, html):
+        """O caminho dos dados embutidos deve gerar exatamente o mesmo álbum que as funções extract_*."""
+        self.assertEqual(
+            parse_album_page(html, URL, "html.parser", False, embedded=True),
+            parse_album_page(html, URL, "html.parser", False, embedded=False),
+        )
+
+    def test_field_parity_on_fixture_pages(self):
+        for embedded in ((), ("json-ld",), ("state",), ("json-ld", "state")):
+            with self.subTest(embedded=embedded):
+                html = make_album_html(n_tracks=12, title="Album Ç", label="Selo & Cia",
+                                       genres=("Rock", "Pop"), styles=("Indie Rock", "Shoegaze"),
+                                       embedded=embedded)
+                self.assertParity(html)
+
+    def test_field_parity_on_mixed_positions(self):
+        self.assertParity(_mixed_page())
+        tracks = extract_embedded_album(_mixed_page())["faixas_album"]
+        # Mesmas regras do DOM: "B1" e "A1" viram 1 e a ordenação estável mantém a ordem da página
+        self.assertEqual([t["nome_faixa"] for t in tracks], ["Lado B", "Primeira", "Segunda"])
+
+    def test_state_blob_alone_skips_dom(self):
+        """Com o estado hidratado, a página não precisa da marcação com as classes do Discogs."""
+        html = f'<html><head><script id="dsdata" type="application/json">{json.dumps(MIXED_STATE)}</script></head></html>'
+        album = parse_album_page(html, URL, embedded=True)
+        self.assertEqual(album["gravadora_album"], "Selo")
+        self.assertEqual(album["estilos_album"], ["Bop"])
+        self.assertEqual(album["faixas_album"][-1], {"numero_faixa": "2", "nome_faixa": "Segunda", "duracao_faixa": "1:02:03",
+                                                    "posicao_original": "A2"})
+
+    def test_json_ld_has_no_styles_nor_track_positions(self):
+        """O schema.org não tem estilos nem posições (só o ordinal do ListItem): esses campos vêm do DOM."""
+        album = extract_embedded_album(make_album_html(n_tracks=2, embedded=("json-ld",)))
+        self.assertNotIn("estilos_album", album)
+        self.assertNotIn("faixas_album", album)
+        self.assertEqual(album["gravadora_album"], "Fixture Records")
+
+    def test_field_parity_on_vinyl_sides(self):
+        """Num vinil só com JSON-LD, "A1".."B4" não vira "1".."8": lado e posição original vêm do DOM."""
+        positions = [f"{side}{i}" for side in "AB" for i in range(1, 5)]
+        for embedded in (("json-ld",), ("state",), ("json-ld", "state")):
+            with self.subTest(embedded=embedded):
+                html = make_album_html(title="Vinil", embedded=embedded, positions=positions)
+                self.assertParity(html)
+                tracks = parse_album_page(html, URL, "html.parser", False, embedded=True)["faixas_album"]
+                self.assertEqual(sorted(t["posicao_original"] for t in tracks), positions)
+
+    def test_invalid_or_missing_blob_falls_back(self):
+        broken = make_album_html(n_tracks=3).replace(
+            "</head>", '<script type="application/ld+json">{"@type": "MusicAlbum",</script></head>'
+        )
+        self.assertEqual(extract_embedded_album(broken), {})
+        self.assertEqual(len(parse_album_page(broken, URL, embedded=True)["faixas_album"]), 3)
+
+    def test_iso_duration_to_text(self):
+        self.assertEqual(iso_duration_to_text("PT3M26S"), "3:26")
+        self.assertEqual(iso_duration_to_text("PT1H2M3S"), "1:02:03")
+        self.assertEqual(iso_duration_to_text("PT45S"), "0:45")
+        self.assertEqual(iso_duration_to_text("3:26"), "3:26")
+        self.assertIsNone(iso_duration_to_text(""))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest import mock
+
+import extraction_plans
+from discogs_scraper import extract_album_details, extract_artist_info
+from extraction_plans import PLANS, SPECS, ExtractionPlan, Selector, compile_plans, reference_run
+from fixture_server import make_album_html, make_artist_html, make_search_html
+from parsers import available_backends, parse_html
+
+
+# Linhas com links também nos tds seguintes e um segundo bloco de informações: as funções
+# originais liam só o primeiro td de cada linha e só o primeiro bloco
+SCOPED_ARTIST = """
+<div class="info_LD8Ql"><table>
+  <tr><th><h2>Members:</h2></th><td><a href="/artist/1">Membro A</a>, <a href="/artist/2">Membro B</a></td>
+      <td><a href="/artist/3">Ex-membro</a></td></tr>
+  <tr><th><h2>Sites:</h2></th><td><a href="https://a.example">a</a> <a>sem href</a></td>
+      <td><a href="https://b.example">b</a></td></tr>
+</table></div>
+<div class="info_LD8Ql"><table>
+  <tr><th><h2>Sites:</h2></th><td><a href="https://outro.example">outro</a></td></tr>
+</table></div>
+"""
+SCOPED_ALBUM = """
+<div class="info_LD8Ql"><table class="table_c5ftk">
+  <tr><th><h2>Label:</h2></th><td>Selo Sem Link</td><td><a href="/label/1">Outro Selo</a></td></tr>
+  <tr><th><h2>Genre:</h2></th><td><a href="/genre/rock">Rock</a></td><td><a href="/genre/jazz">Jazz</a></td></tr>
+</table></div>
+<div class="info_LD8Ql"><table class="table_c5ftk">
+  <tr><th><h2>Style:</h2></th><td><a href="/style/x">Estilo de outro bloco</a></td></tr>
+</table></div>
+"""
+
+
+class TestExtractionPlans(unittest.TestCase):
+
+    pages = {
+        "album": make_album_html(n_tracks=30),
+        "artist": make_artist_html([f"/release/{i}" for i in range(20)]),
+        "search": make_search_html([(f"Artista {i}", f"/artist/{i}-Artista-{i}") for i in range(20)]),
+    }
+
+    def test_plans_match_the_naive_selectors_on_every_backend(self):
+        for backend in available_backends():
+            for page_type, parts in SPECS.items():
+                # O select do bs4 (soupsieve) é a referência da semântica dos seletores
+                bs4_soup = parse_html(self.pages[page_type], page_type, "html.parser")
+                soup = parse_html(self.pages[page_type], page_type, backend)
+                for part, spec in parts.items():
+                    with self.subTest(backend=backend, plan=f"{page_type}.{part}"):
+                        expected = reference_run(spec, bs4_soup)
+                        self.assertTrue(expected)
+                        self.assertEqual(PLANS[page_type][part].run(soup), expected)
+
+    def test_only_the_first_block_and_first_td_are_read(self):
+        for backend in available_backends():
+            with self.subTest(backend=backend):
+                artist = extract_artist_info(parse_html(SCOPED_ARTIST, "artist", backend))
+                self.assertEqual(artist, {"membros": ["Membro A", "Membro B"], "sites": ["https://a.example"]})
+                album = extract_album_details(parse_html(SCOPED_ALBUM, "album", backend))
+                self.assertEqual(album, {"gravadora_album": "Selo Sem Link", "genero_album": ["Rock"],
+                                         "estilos_album": []})
+                for page_type, html in (("artist", SCOPED_ARTIST), ("album", SCOPED_ALBUM)):
+                    part = "info" if page_type == "artist" else "details"
+                    expected = reference_run(SPECS[page_type][part], parse_html(html, page_type, "html.parser"))
+                    self.assertEqual(PLANS[page_type][part].run(parse_html(html, page_type, backend)), expected)
+
+    def test_unsupported_selectors_fail_at_compile_time(self):
+        for css in ("a:hover", "h2 ~ td", "a[href^=http]", "", "tr >"):
+            with self.subTest(css=css), self.assertRaises(ValueError):
+                Selector(css)
+
+    def test_redesign_is_a_spec_edit(self):
+        html = self.pages["album"].replace("duration_GhhxK", "duration_N3w")
+        soup = parse_html(html, "album", "html.parser")
+        self.assertIsNone(PLANS["album"]["tracklist"].run(soup)[0]["duracao"])
+
+        specs = {"album": {"tracklist": {**SPECS["album"]["tracklist"], "fields": {
+            **SPECS["album"]["tracklist"]["fields"], "duracao": {"css": "td.duration_N3w span span"},
+        }}}}
+        self.assertEqual(compile_plans(specs)["album"]["tracklist"].run(soup)[0]["duracao"], "3:07")
+
+    def test_label_post_processors_match_the_original_extractors(self):
+        """Artista: só os dois-pontos do fim (rstrip); álbum: todos (replace), como nas funções originais."""
+        html = '<div class="info_LD8Ql"><table><tr><th><h2>Ver: mais:</h2></th><td>x</td></tr></table></div>'
+        soup = parse_html(html, "artist", "html.parser")
+        self.assertEqual(PLANS["artist"]["info"].run(soup)[0]["rotulo"], "Ver: mais")
+        table = html.replace("<table>", '<table class="table_c5ftk">')
+        soup = parse_html(table, "album", "html.parser")
+        self.assertEqual(PLANS["album"]["details"].run(soup)[0]["rotulo"], "Ver mais")
+
+    def test_limit_and_first_of_type(self):
+        plan = ExtractionPlan("tr", {"primeira": {"css": "td:first-of-type"}})
+        soup = parse_html("<table><tr><td>a</td><td>b</td></tr><tr><th>x</th><td>c</td></tr></table>", None, "html.parser")
+        self.assertEqual(plan.run(soup), [{"primeira": "a"}, {"primeira": "c"}])
+        self.assertEqual(plan.run(soup, limit=1), [{"primeira": "a"}])
+
+    def test_one_tree_walk_per_row(self):
+        """O plano percorre a página uma vez para achar as linhas e cada linha uma vez para todos os campos."""
+        for backend in ("html.parser", "lxml"):
+            if backend not in available_backends():
+                continue
+            for page_type, part in (("album", "tracklist"), ("artist", "albums")):
+                soup = parse_html(self.pages[page_type], page_type, backend)
+                with self.subTest(backend=backend, plan=f"{page_type}.{part}"), \
+                        mock.patch.object(extraction_plans, "_match_many", wraps=extraction_plans._match_many) as walk:
+                    records = PLANS[page_type][part].run(soup)
+                    self.assertTrue(records)
+                    self.assertEqual(walk.call_count, 1 + len(records))
+
+
+if __name__ == '__main__':
+    unittest.main()
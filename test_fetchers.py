@@ -0,0 +1,83 @@
+import unittest
+
+from fetchers import HttpFetcher, FallbackFetcher, Page, needs_js
+from fixture_server import FixtureServer, make_album_html
+
+
+class _FakeFetcher:
+    """Fetcher em memória que registra as URLs pedidas."""
+    name = "fake"
+
+    def __init__(self, html, status=200):
+        self.html = html
+        self.status = status
+        self.calls = []
+
+    def fetch(self, url, page_type=None, headers=None):
+        self.calls.append(url)
+        return Page(url=url, html=self.html, status=self.status, backend=self.name)
+
+    def close(self):
+        pass
+
+
+class TestFetchers(unittest.TestCase):
+
+    def test_http_fetcher_reuses_connection(self):
+        """Deve buscar várias páginas reaproveitando a mesma conexão keep-alive."""
+        pages = {f"/release/{i}": make_album_html(n_tracks=2) for i in range(5)}
+        with FixtureServer(pages) as server:
+            fetcher = HttpFetcher()
+            results = [fetcher.fetch(server.url(path), "album") for path in pages]
+            fetcher.close()
+
+            self.assertTrue(all(p.status == 200 for p in results))
+            self.assertIn("data-track-position", results[0].html)
+            self.assertEqual(server.requests, 5)
+            self.assertEqual(server.connections, 1)
+
+    def test_http_fetcher_404(self):
+        """Deve retornar a página com o status HTTP em vez de levantar exceção."""
+        with FixtureServer({}) as server:
+            fetcher = HttpFetcher()
+            page = fetcher.fetch(server.url("/nao-existe"))
+            fetcher.close()
+        self.assertEqual(page.status, 404)
+
+    def test_needs_js(self):
+        """Deve detectar páginas sem o conteúdo esperado para o tipo."""
+        self.assertTrue(needs_js(Page(url="x", html="<div id='app'></div>"), "album"))
+        self.assertFalse(needs_js(Page(url="x", html=make_album_html()), "album"))
+        self.assertFalse(needs_js(Page(url="x", html=""), None))
+
+    def test_fallback_only_when_needed(self):
+        """Deve recorrer ao fallback apenas quando a página HTTP não tem o conteúdo."""
+        primary = _FakeFetcher(make_album_html())
+        fallback = _FakeFetcher(make_album_html())
+        fetcher = FallbackFetcher(primary, fallback)
+
+        fetcher.fetch("http://x/release/1", "album")
+        self.assertEqual(fallback.calls, [])
+
+        primary.html = "<div id='app'></div>"
+        page = fetcher.fetch("http://x/release/2", "album")
+        self.assertEqual(fallback.calls, ["http://x/release/2"])
+        self.assertEqual(page.backend, "fake")
+
+    def test_client_errors_skip_the_browser(self):
+        """404/410 voltam direto; 403 (bloqueio) ainda vai para o navegador."""
+        primary = _FakeFetcher("<html>Not found</html>")
+        fallback = _FakeFetcher(make_album_html())
+        fetcher = FallbackFetcher(primary, fallback)
+        for status in (404, 410, 400):
+            primary.status = status
+            self.assertEqual(fetcher.fetch(f"http://x/release/{status}", "album").status, status)
+        self.assertEqual(fallback.calls, [])
+
+        primary.status = 403
+        self.assertEqual(fetcher.fetch("http://x/release/403", "album").status, 200)
+        self.assertEqual(fallback.calls, ["http://x/release/403"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import json
+import tempfile
+import unittest
+import urllib.request
+
+from instrumentation import LatencyHistogram, MetricsExporter, StageMetrics
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_buckets_and_summary(self):
+        """Deve distribuir as amostras nos buckets e calcular média e percentis."""
+        hist = LatencyHistogram(buckets=(0.1, 1))
+        for seconds in (0.05, 0.5, 0.5, 2):
+            hist.observe(seconds)
+
+        self.assertEqual(hist.bucket_counts, [1, 2, 1])
+        self.assertEqual(hist.count, 4)
+        self.assertAlmostEqual(hist.mean, 0.7625)
+        self.assertEqual(hist.quantile(0.5), 0.5)
+        self.assertEqual(hist.format_buckets(), "<=0.1s:1 <=1s:2 >1s:1")
+        self.assertEqual(hist.summary()["buckets"], {"0.1": 1, "1": 2, "+Inf": 1})
+
+    def test_empty(self):
+        """Histograma vazio não deve gerar divisão por zero."""
+        hist = LatencyHistogram()
+        self.assertEqual(hist.mean, 0.0)
+        self.assertEqual(hist.quantile(0.95), 0.0)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStageMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+        self.metrics = StageMetrics(buckets=(0.01, 1), clock=self.clock)
+
+    def test_stages_counters_and_rates(self):
+        with self.metrics.stage("driver_get"):
+            self.clock.now += 0.5
+
+        @self.metrics.timed("extract.album_tracklist")
+        def extract():
+            self.clock.now += 0.002
+            return "ok"
+
+        self.assertEqual(extract(), "ok")
+        self.metrics.count("pages_downloaded", 4)
+        self.metrics.count("bytes_downloaded", 4096)
+        self.clock.now = 2.0
+
+        report = self.metrics.report({"cache": {"hits": 1}})
+        self.assertEqual(report["stages"]["driver_get"]["count"], 1)
+        self.assertEqual(report["stages"]["extract.album_tracklist"]["buckets"], {"0.01": 1, "1": 0, "+Inf": 0})
+        self.assertEqual((report["pages_per_s"], report["bytes_per_s"]), (2.0, 2048.0))
+        self.assertEqual(report["cache"], {"hits": 1})
+        self.assertIn("cpu_user_s", report["resources"])
+
+    def test_worker_measurements_merge(self):
+        """Observações de um processo de parse entram no registro principal via drain/merge."""
+        worker = StageMetrics(clock=self.clock)
+        worker.keep_observations = True
+        worker.observe("parse.album", 0.02)
+        worker.count("pages_parsed")
+        self.metrics.merge(*worker.drain())
+        self.assertEqual(worker.drain(), ([], {}))
+
+        self.assertEqual(self.metrics.histogram("parse.album").count, 1)
+        self.assertEqual(self.metrics.counters["pages_parsed"], 1)
+
+    def test_prometheus_text(self):
+        for seconds in (0.005, 0.5, 3):
+            self.metrics.observe("wait", seconds)
+        self.metrics.count("bytes_downloaded", 10)
+        text = self.metrics.prometheus_text()
+
+        self.assertIn('discogs_stage_seconds_bucket{stage="wait",le="0.01"} 1', text)
+        self.assertIn('discogs_stage_seconds_bucket{stage="wait",le="1"} 2', text) # acumulado
+        self.assertIn('discogs_stage_seconds_bucket{stage="wait",le="+Inf"} 3', text)
+        self.assertIn('discogs_stage_seconds_count{stage="wait"} 3', text)
+        self.assertIn("discogs_bytes_downloaded_total 10", text)
+
+    def test_report_file_and_live_exporter(self):
+        self.metrics.observe("write", 0.001)
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = os.path.join(tmp, "relatorio.json")
+            self.metrics.write_report(report_path, {"artists": 3})
+            with open(report_path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["artists"], 3)
+
+            prom_path = os.path.join(tmp, "discogs.prom")
+            exporter = MetricsExporter(self.metrics, prom_path, port=0, interval=60)
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+                    self.assertIn('stage="write"', response.read().decode("utf-8"))
+            finally:
+                exporter.close()
+            with open(prom_path, encoding="utf-8") as f:
+                self.assertIn("discogs_stage_seconds_count", f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import gzip
+import json
+import tempfile
+import unittest
+
+from jsonl_sink import JsonlSink
+
+RECORD = {
+    "id_artista": "649ec218-7ed8-4d5c-a5a2-46f8ed0345bc",
+    "genero": "Rock",
+    "nome_artista": "Artista Ç",
+    "membros_artista": "Individual",
+    "sites_artista": [],
+    "albuns": [{"nome_album": "Álbum", "ano_lancamento": "2010",
+                "faixas_album": [{"numero_faixa": "1", "nome_faixa": "Faixa", "duracao_faixa": "3:26"}]}],
+}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestJsonlSink(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "dados_discogs.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_byte_compatible_with_save_to_jsonl(self):
+        """Sem rotação, o arquivo deve ser idêntico ao que o save_to_jsonl original gerava."""
+        with JsonlSink(self.path) as sink:
+            sink.write(RECORD)
+            sink.write(RECORD)
+
+        expected = "".join(json.dumps(item, ensure_ascii=False) + '\n' for item in [RECORD, RECORD])
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), expected)
+        self.assertEqual(os.listdir(self.tmp.name), ["dados_discogs.jsonl"])
+
+    def test_records_visible_before_close(self):
+        """Sem rotação, cada registro deve estar no arquivo final logo após o write, sem .part."""
+        sink = JsonlSink(self.path)
+        sink.write(RECORD)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["nome_artista"], "Artista Ç")
+        self.assertEqual(os.listdir(self.tmp.name), ["dados_discogs.jsonl"])
+        sink.close()
+
+        # Com rotação, o segmento em andamento fica num .part
+        sink = JsonlSink(self.path, rotate_bytes=10**6)
+        sink.write(RECORD)
+        with open(self.path.replace(".jsonl", ".00001.jsonl.part"), encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["nome_artista"], "Artista Ç")
+        sink.close()
+
+    def test_rotation_by_size_and_gzip(self):
+        """Deve rotacionar por tamanho e gerar segmentos gzip legíveis com todos os registros."""
+        with JsonlSink(self.path, rotate_bytes=1, compression="gzip") as sink:
+            for _ in range(3):
+                sink.write(RECORD)
+
+        self.assertEqual(len(sink.segments), 3)
+        self.assertTrue(sink.segments[0].endswith("dados_discogs.00001.jsonl.gz"))
+        lines = []
+        for segment in sink.segments:
+            with gzip.open(segment, "rt", encoding="utf-8") as f:
+                lines.extend(f.read().splitlines())
+        self.assertEqual([json.loads(line) for line in lines], [RECORD] * 3)
+
+    def test_rotation_by_time(self):
+        """Deve abrir um novo segmento quando o atual passa de rotate_seconds."""
+        clock = _Clock()
+        with JsonlSink(self.path, rotate_seconds=60, clock=clock) as sink:
+            sink.write(RECORD)
+            clock.now = 30
+            sink.write(RECORD)
+            clock.now = 61
+            sink.write(RECORD)
+        self.assertEqual(len(sink.segments), 2)
+
+    def test_previous_output_is_replaced(self):
+        """Segmentos de um run anterior não devem se misturar ao novo run."""
+        with JsonlSink(self.path, rotate_bytes=1) as sink:
+            sink.write(RECORD)
+            sink.write(RECORD)
+        with JsonlSink(self.path, rotate_bytes=1) as sink:
+            sink.write(RECORD)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["dados_discogs.00001.jsonl"])
+
+    def test_previous_output_kept_until_new_file_exists(self):
+        """A saída anterior continua lá até o novo run ter o seu arquivo."""
+        with JsonlSink(self.path, rotate_bytes=1) as sink:
+            sink.write(RECORD)
+            sink.write(RECORD)
+        sink = JsonlSink(self.path, rotate_bytes=10**6)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 2)
+        sink.write(RECORD)
+        self.assertEqual(len([name for name in os.listdir(self.tmp.name) if not name.endswith(".part")]), 2)
+        sink.close()
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["dados_discogs.00001.jsonl"])
+
+        sink = JsonlSink(self.path)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["dados_discogs.00001.jsonl"])
+        sink.write(RECORD)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["dados_discogs.jsonl"])
+        sink.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
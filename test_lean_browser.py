@@ -0,0 +1,66 @@
+import unittest
+
+from selenium.webdriver.chrome.options import Options
+
+from fetchers import fetch_with_driver
+from instrumentation import METRICS
+from lean_browser import DEFAULT_BLOCKED_URLS, apply_lean_options, enable_request_blocking, transfer_report
+
+
+class _Driver:
+    """Driver falso: registra os comandos do DevTools e devolve medições fixas da Resource Timing API."""
+
+    def __init__(self, stats=None):
+        self.stats = stats
+        self.cdp = []
+        self.current_url = None
+        self.page_source = "<html></html>"
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((cmd, params))
+
+    def execute_script(self, script):
+        return self.stats
+
+    def get(self, url):
+        self.current_url = url
+
+    def get_cookies(self):
+        return []
+
+
+class TestLeanBrowser(unittest.TestCase):
+
+    def setUp(self):
+        METRICS.reset()
+
+    def test_lean_options(self):
+        options = apply_lean_options(Options())
+        self.assertEqual(options.page_load_strategy, "eager")
+        self.assertIn("--blink-settings=imagesEnabled=false", options.arguments)
+        self.assertEqual(options.experimental_options["prefs"]["profile.managed_default_content_settings.images"], 2)
+
+    def test_blocking_uses_devtools(self):
+        driver = _Driver()
+        self.assertTrue(enable_request_blocking(driver))
+        self.assertEqual(driver.cdp, [("Network.enable", {}), ("Network.setBlockedURLs", {"urls": DEFAULT_BLOCKED_URLS})])
+        self.assertIn("*.woff2", DEFAULT_BLOCKED_URLS)
+        self.assertIn("*doubleclick.net*", DEFAULT_BLOCKED_URLS)
+        self.assertFalse(enable_request_blocking(object()))
+
+    def test_page_transfer_is_recorded(self):
+        driver = _Driver({"bytes": 300_000, "requests": 12, "dom_ready_s": 0.4})
+        fetch_with_driver(driver, "http://x/release/1", settle_time=0)
+        fetch_with_driver(driver, "http://x/release/2", settle_time=0)
+        # Drivers que não conseguem medir (execute_script sem o dict) não entram na média
+        fetch_with_driver(_Driver(1), "http://x/release/3", settle_time=0)
+
+        report = METRICS.report()
+        self.assertEqual(transfer_report(report["counters"]),
+                         {"pages": 2, "bytes_per_page": 300_000, "requests_per_page": 12.0})
+        self.assertEqual(report["stages"]["dom_ready"]["count"], 2)
+        self.assertEqual(report["counters"]["pages_downloaded"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import time
+import threading
+import unittest
+
+from discogs_scraper import parse_album_page, process_artists_in_parallel
+from fixture_server import make_album_html
+from memory_guard import MemoryGuard
+from parsers import parse_html, release_soup
+
+MB = 1024 * 1024
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMemoryGuard(unittest.TestCase):
+
+    def test_disabled_never_measures(self):
+        def rss():
+            raise AssertionError("não deveria medir")
+        guard = MemoryGuard(None, rss=rss)
+        self.assertFalse(guard.over_ceiling())
+        self.assertEqual(guard.report()["ceiling_mb"], None)
+
+    def test_flush_brings_memory_back_under_ceiling(self):
+        usage = [150 * MB]
+        flushed = []
+
+        def flush():
+            flushed.append(True)
+            usage[0] = 80 * MB
+
+        guard = MemoryGuard(100, [flush, None], rss=lambda: usage[0])
+        self.assertFalse(guard.over_ceiling())
+        self.assertEqual(len(flushed), 1)
+        self.assertEqual(guard.report()["flushes"], 1)
+        self.assertEqual(guard.report()["max_rss_mb"], 150)
+
+    def test_stays_over_ceiling_and_flush_is_rate_limited(self):
+        clock = _Clock()
+        flushed = []
+        guard = MemoryGuard(100, rss=lambda: 150 * MB, interval=5, clock=clock)
+        guard.add_flush(lambda: flushed.append(True))
+        self.assertTrue(guard.over_ceiling())
+        self.assertTrue(guard.over_ceiling())
+        self.assertEqual(len(flushed), 1)
+        clock.now = 6
+        self.assertTrue(guard.over_ceiling())
+        self.assertEqual(len(flushed), 2)
+        self.assertEqual(guard.report()["throttled"], 3)
+
+    def test_over_ceiling_runs_one_artist_at_a_time(self):
+        """Acima do teto o laço não submete artistas novos enquanto houver um em andamento."""
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def process(item):
+            with lock:
+                running.append(item)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(item)
+            return {"nome_artista": item["Nome_Artista"]}
+
+        guard = MemoryGuard(100, rss=lambda: 150 * MB, interval=3600)
+        artists = [{"Nome_Artista": f"A{i}", "url_artista": f"http://x/artist/{i}"} for i in range(6)]
+        emitted = []
+        total = process_artists_in_parallel(process, artists, 6, 4, emitted.append, guard)
+        self.assertEqual(total, 6)
+        self.assertEqual(max(peak), 1)
+        self.assertEqual([a["nome_artista"] for a in emitted], [f"A{i}" for i in range(6)])
+
+    def test_release_soup(self):
+        html = make_album_html(n_tracks=3)
+        soup = parse_html(html, "album", "html.parser")
+        release_soup(soup)
+        self.assertEqual(soup.contents, [])
+        # Os valores extraídos não dependem da árvore liberada
+        album = parse_album_page(html, "http://x/release/1", backend="html.parser", embedded=False)
+        self.assertEqual(len(album["faixas_album"]), 3)
+        self.assertTrue(all(isinstance(t["nome_faixa"], str) for t in album["faixas_album"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
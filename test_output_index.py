@@ -0,0 +1,125 @@
+import os
+import json
+import tempfile
+import unittest
+
+from jsonl_sink import JsonlSink
+from output_index import OutputIndex, normalize, record_terms
+
+
+def _artist(n, name, albums):
+    return {
+        "id_artista": str(n),
+        "genero": "Rock",
+        "nome_artista": name,
+        "membros_artista": "Individual",
+        "sites_artista": [],
+        "albuns": [{
+            "id_album": f"release:{n}{i}",
+            "nome_album": title,
+            "ano_lancamento": "1999",
+            "url_album": f"https://www.discogs.com/release/{n}{i}",
+            "faixas_album": [{"numero_faixa": str(t + 1), "nome_faixa": track, "duracao_faixa": "3:00"}
+                             for t, track in enumerate(tracks)],
+            "gravadora_album": label,
+            "genero_album": genres,
+            "estilos_album": styles,
+        } for i, (title, label, genres, styles, tracks) in enumerate(albums)],
+    }
+
+
+ARTISTS = [
+    _artist(1, "Pixies", [
+        ("Doolittle", "4AD", ["Rock"], ["Indie Rock"], ["Debaser", "Here Comes Your Man"]),
+        ("Surfer Rosa", "4AD", ["Rock"], ["Indie Rock", "Noise"], ["Where Is My Mind?"]),
+    ]),
+    _artist(2, "Slowdive", [
+        ("Souvlaki", "Creation Records", ["Rock"], ["Shoegaze"], ["Alison", "When the Sun Hits"]),
+    ]),
+    _artist(3, "Os Mutantes", [
+        ("A Divina Comédia", "Polydor", ["Rock", "Latin"], ["Psychedelic Rock", "Tropicália"], ["Ave, Lúcifer"]),
+    ]),
+]
+
+
+class TestOutputIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "dados_discogs.jsonl")
+        self._write(ARTISTS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, artists):
+        with JsonlSink(self.path) as sink:
+            for artist in artists:
+                sink.write(artist)
+
+    def test_lookups_by_field(self):
+        with OutputIndex(self.path) as index:
+            albums = index.albums(gravadora="4ad")
+            self.assertEqual([album["nome_album"] for _, album in albums], ["Doolittle", "Surfer Rosa"])
+            self.assertEqual([artist["nome_artista"] for artist in index.artists(estilo="Shoegaze")], ["Slowdive"])
+            self.assertEqual([a["nome_album"] for _, a in index.albums(estilo="tropicalia")], ["A Divina Comédia"])
+            self.assertEqual(len(index.albums(artista="PIXIES")), 2)
+            self.assertEqual(index.artists(gravadora="Sub Pop"), [])
+            self.assertEqual([t for t, _ in index.terms("gravadora")], ["4ad", "creation records", "polydor"])
+
+    def test_criteria_are_combined_per_album(self):
+        with OutputIndex(self.path) as index:
+            # As duas condições precisam valer para o mesmo álbum
+            self.assertEqual([a["nome_album"] for _, a in index.albums(estilo="Noise", gravadora="4AD")], ["Surfer Rosa"])
+            self.assertEqual(index.albums(estilo="Noise", artista="Slowdive"), [])
+            # Palavras das faixas: todas no mesmo álbum, em qualquer ordem e sem acento/caixa
+            self.assertEqual([a["nome_album"] for _, a in index.albums(faixa="mind where")], ["Surfer Rosa"])
+            self.assertEqual([a["nome_album"] for _, a in index.albums(faixa="lucifer")], ["A Divina Comédia"])
+            self.assertEqual(index.albums(faixa="debaser alison"), [])
+            with self.assertRaises(ValueError):
+                index.albums()
+
+    def test_incremental_update_on_append(self):
+        index = OutputIndex(self.path)
+        self.assertEqual(index.update(), 3)
+        self.assertEqual(index.update(), 0)
+
+        new = _artist(4, "Sonic Youth", [("Daydream Nation", "Enigma", ["Rock"], ["Noise"], ["Teen Age Riot"])])
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(new, ensure_ascii=False) + "\n")
+            f.write('{"id_artista": "5", "nome_art') # linha incompleta: ainda sendo escrita
+            f.flush()
+            self.assertEqual([a["nome_album"] for _, a in index.albums(estilo="noise")],
+                             ["Surfer Rosa", "Daydream Nation"])
+        index.close()
+
+    def test_sees_records_while_sink_is_open(self):
+        """Sem rotação o JsonlSink escreve direto no arquivo final: o índice acompanha o run."""
+        sink = JsonlSink(self.path)
+        sink.write(ARTISTS[1])
+        with OutputIndex(self.path) as index:
+            self.assertEqual([a["nome_artista"] for a in index.artists(genero="rock")], ["Slowdive"])
+            sink.write(ARTISTS[2])
+            self.assertEqual(len(index.artists(genero="rock")), 2)
+        sink.close()
+
+    def test_rewritten_file_rebuilds_index(self):
+        with OutputIndex(self.path) as index:
+            self.assertEqual(len(index.artists(genero="rock")), 3)
+        self._write(ARTISTS[1:])
+        with OutputIndex(self.path) as index:
+            self.assertEqual([a["nome_artista"] for a in index.artists(genero="rock")], ["Slowdive", "Os Mutantes"])
+            self.assertEqual(index.artists(artista="Pixies"), [])
+
+    def test_terms_and_compressed_files(self):
+        self.assertEqual(normalize("  Tropicália  Rock "), "tropicalia rock")
+        terms = record_terms(ARTISTS[0])
+        self.assertIn(("gravadora", "4ad", 0), terms)
+        self.assertIn(("artista", "pixies", -1), terms)
+        self.assertIn(("faixa", "debaser", 0), terms)
+        with self.assertRaises(ValueError):
+            OutputIndex(self.path + ".gz")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html
+from page_cache import PageCache, CachingFetcher
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        pages = {f"/release/{i}": make_album_html(n_tracks=5, title=f"Album {i}") for i in range(3)}
+        self.server = FixtureServer(pages, etags=True).start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.tmp.cleanup()
+
+    def _fetcher(self, ttls=None, offline=False, max_bytes=10 * 1024 * 1024):
+        cache = PageCache(self.tmp.name, max_bytes=max_bytes)
+        return CachingFetcher(HttpFetcher(), cache, ttls, offline=offline)
+
+    def test_hit_within_ttl(self):
+        """A segunda busca dentro do TTL deve vir do disco, sem requisição."""
+        fetcher = self._fetcher()
+        url = self.server.url("/release/0")
+        first = fetcher.fetch(url, "album")
+        second = fetcher.fetch(url, "album")
+        fetcher.close()
+
+        self.assertEqual(first.html, second.html)
+        self.assertEqual(second.backend, "cache")
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(fetcher.stats["hits"], 1)
+        self.assertEqual(fetcher.stats["bytes_saved"], len(first.html.encode("utf-8")))
+
+    def test_revalidation_with_etag(self):
+        """Entrada vencida deve ser revalidada com If-None-Match e reaproveitada no 304."""
+        fetcher = self._fetcher(ttls={"album": 0})
+        url = self.server.url("/release/1")
+        fetcher.fetch(url, "album")
+        page = fetcher.fetch(url, "album")
+        fetcher.close()
+
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(fetcher.stats["revalidated"], 1)
+        self.assertIn("Album 1 Faixa 1", page.html)
+
+    def test_offline_replay(self):
+        """No modo offline, páginas em cache são servidas mesmo vencidas e as demais retornam None."""
+        fetcher = self._fetcher()
+        fetcher.fetch(self.server.url("/release/0"), "album")
+        fetcher.close()
+
+        offline = self._fetcher(ttls={"album": 0}, offline=True)
+        self.assertIsNotNone(offline.fetch(self.server.url("/release/0"), "album"))
+        self.assertIsNone(offline.fetch(self.server.url("/release/2"), "album"))
+        offline.close()
+        self.assertEqual(self.server.requests, 1)
+
+    def test_lru_eviction_respects_budget(self):
+        """Deve remover as entradas menos usadas quando o cache passa do orçamento em disco."""
+        cache = PageCache(self.tmp.name, max_bytes=2500)
+        html = os.urandom(1000).hex() # pouco compressível: ~1.1 KB em disco por entrada
+        for i in range(3):
+            cache.put(f"http://x/{i}", html, "album")
+
+        self.assertLessEqual(cache.total_bytes(), 2500)
+        self.assertIsNone(cache.get("http://x/0"))
+        self.assertIsNotNone(cache.get("http://x/2"))
+        self.assertGreaterEqual(cache.evictions, 1)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from functools import partial
+
+from album_pipeline import AlbumPipeline
+from discogs_scraper import parse_album_page, parse_artist_page, scrape_album_page
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html, make_artist_html
+from parse_pool import ParsePool
+
+
+class TestParsePool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ParsePool(workers=2, backend="html.parser")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_same_result_as_inline_parse(self):
+        """O parse num processo separado deve devolver os mesmos dicts que o parse na thread."""
+        album = make_album_html(n_tracks=4, title="Album X", genres=["Rock"])
+        artist = make_artist_html(["/release/1", "/release/2"], members=["A", "B"])
+
+        self.assertEqual(
+            self.pool.parse("album", album, "http://x/release/1"),
+            parse_album_page(album, "http://x/release/1", "html.parser", False),
+        )
+        self.assertEqual(
+            self.pool.parse("artist", artist, "http://x/artist/1"),
+            parse_artist_page(artist, "http://x/artist/1", "html.parser", False),
+        )
+
+    def test_parse_directory_offline(self):
+        """Deve fazer o parse de um diretório de páginas salvas, na ordem dos arquivos."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(5):
+                with open(os.path.join(tmp, f"album_{i}.html"), "w", encoding="utf-8") as f:
+                    f.write(make_album_html(n_tracks=2, title=f"Album {i}"))
+            with open(os.path.join(tmp, "vazio.html"), "w", encoding="utf-8") as f:
+                f.write("<html></html>")
+
+            results = self.pool.parse_directory(tmp, "album")
+
+        self.assertEqual([os.path.basename(path) for path, _ in results],
+                         [f"album_{i}.html" for i in range(5)] + ["vazio.html"])
+        self.assertEqual(results[0][1]["faixas_album"][0]["nome_faixa"], "Album 0 Faixa 1")
+        self.assertIsNone(results[-1][1])
+
+    def test_album_pipeline_with_parse_pool(self):
+        """Buscas em threads com parse no pool devem manter o resultado e a ordem da discografia."""
+        pages = {f"/release/{i}": make_album_html(n_tracks=3, title=f"Album {i}") for i in range(6)}
+        with FixtureServer(pages, latency=0.02) as server:
+            fetcher = HttpFetcher()
+            albums = [{"url_album": server.url(path)} for path in pages]
+            results = []
+            for parse_pool in (None, self.pool):
+                pipeline = AlbumPipeline(partial(scrape_album_page, fetcher, parse_pool=parse_pool))
+                results.append(pipeline.run(albums, 6))
+                pipeline.close()
+            fetcher.close()
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(results[1]), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import random
+import unittest
+from functools import partial
+
+from album_pipeline import AlbumPipeline
+from discogs_scraper import scrape_album_page
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_album_html
+from rate_limiter import (
+    AdaptiveRateLimiter, RateLimitedFetcher, RetryLater, RetryQueue,
+    backoff_delay, fetch_with_retries, parse_retry_after,
+)
+
+A = "http://a.example/release/1"
+B = "http://b.example/release/1"
+
+
+class _Clock:
+    """Relógio falso: sleep só avança o tempo."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+
+    def _limiter(self, **kwargs):
+        return AdaptiveRateLimiter(clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_token_bucket_paces_requests(self):
+        """Depois do burst, as requisições saem no ritmo da taxa do host."""
+        limiter = self._limiter(initial_rate=2.0, burst=2)
+        for _ in range(6):
+            limiter.acquire(A)
+        self.assertAlmostEqual(self.clock.now, 2.0)
+
+    def test_hosts_are_independent(self):
+        limiter = self._limiter(initial_rate=1.0, burst=1)
+        limiter.acquire(A)
+        limiter.acquire(B)
+        self.assertEqual(self.clock.now, 0.0)
+
+    def test_speeds_up_on_fast_responses_and_backs_off_on_429(self):
+        limiter = self._limiter(initial_rate=2.0, increase=0.5, max_rate=3.0, decrease=0.5)
+        for _ in range(4):
+            limiter.record(A, 200, 0.05)
+        self.assertEqual(limiter.rate(A), 3.0)
+
+        limiter.record(A, 429, 0.05)
+        self.assertEqual(limiter.rate(A), 1.5)
+        limiter.record(A, 503, 0.05)
+        self.assertEqual(limiter.rate(A), 0.75)
+        self.assertEqual(limiter.rate(B), 2.0)
+
+    def test_slow_responses_reduce_rate(self):
+        """Latência bem acima da mediana do host reduz a taxa antes de qualquer 429."""
+        limiter = self._limiter(initial_rate=2.0, increase=0.0, min_samples=5, slow_factor=3.0, slow_decrease=0.5)
+        for _ in range(5):
+            limiter.record(A, 200, 0.1)
+        limiter.record(A, 200, 1.0)
+        self.assertEqual(limiter.rate(A), 1.0)
+
+    def test_retry_after_pauses_the_host(self):
+        limiter = self._limiter(initial_rate=10.0, burst=5)
+        limiter.record(A, 429, 0.05, retry_after=30)
+        limiter.acquire(A)
+        self.assertGreaterEqual(self.clock.now, 30)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("120"), 120.0)
+        self.assertEqual(parse_retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=40), 60.0)
+        self.assertIsNone(parse_retry_after("amanhã"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestRetryQueue(unittest.TestCase):
+
+    def test_backoff_is_exponential_with_jitter_and_capped(self):
+        rng = random.Random(1)
+        for attempt, ceiling in ((1, 1), (2, 2), (3, 4), (4, 8), (10, 30)):
+            delays = [backoff_delay(attempt, base=1.0, cap=30.0, rng=rng) for _ in range(50)]
+            self.assertTrue(all(ceiling / 2 <= d <= ceiling for d in delays))
+            self.assertGreater(len(set(delays)), 1)
+        self.assertEqual(backoff_delay(1, base=1.0, retry_after=45, rng=rng), 45)
+
+    def test_items_come_back_in_due_order_until_attempts_run_out(self):
+        clock = _Clock()
+        queue = RetryQueue(max_attempts=2, base=1.0, clock=clock)
+        self.assertTrue(queue.push("lento", 1, retry_after=10))
+        self.assertTrue(queue.push("rápido", 1))
+        self.assertFalse(queue.push("esgotado", 3))
+
+        clock.now = 1.0
+        self.assertEqual(queue.pop_due(), [("rápido", 1)])
+        self.assertAlmostEqual(queue.next_delay(), 9.0)
+        clock.now = 10.0
+        self.assertEqual(queue.pop_due(), [("lento", 1)])
+        self.assertEqual(len(queue), 0)
+
+
+class TestAgainstStubServer(unittest.TestCase):
+
+    def setUp(self):
+        self.pages = {f"/release/{i}": make_album_html(n_tracks=2, title=f"Album {i}") for i in range(6)}
+
+    def test_album_pipeline_retries_scheduled_429s(self):
+        """Com uma a cada três requisições recusada, todos os álbuns devem chegar, na ordem."""
+        with FixtureServer(self.pages, schedule=(200, 200, 429), retry_after=0) as server:
+            limiter = AdaptiveRateLimiter(initial_rate=50.0, burst=5, max_rate=100.0)
+            fetcher = RateLimitedFetcher(HttpFetcher(), limiter)
+            pipeline = AlbumPipeline(partial(scrape_album_page, fetcher), 4, 4, retries=5,
+                                     backoff_base=0.01, backoff_cap=0.05)
+            albums = [{"nome_album": f"Album {i}", "url_album": server.url(path)} for i, path in enumerate(self.pages)]
+            result = pipeline.run(albums, 6)
+            pipeline.close()
+            fetcher.close()
+
+            self.assertEqual([raw["nome_album"] for raw, _ in result], [f"Album {i}" for i in range(6)])
+            self.assertGreater(server.rejected, 0)
+            self.assertEqual(server.requests, 6 + server.rejected)
+        self.assertEqual(limiter.report()[server.base_url[len("http://"):]]["throttled"], server.rejected)
+
+    def test_fetch_with_retries_gives_up(self):
+        with FixtureServer(self.pages, schedule=(503,)) as server:
+            fetcher = RateLimitedFetcher(HttpFetcher(), AdaptiveRateLimiter(initial_rate=100.0))
+            slept = []
+            page = fetch_with_retries(fetcher, server.url("/release/0"), "album", retries=2,
+                                      base=0.01, sleep=slept.append)
+            fetcher.close()
+            self.assertIsNone(page)
+            self.assertEqual(server.requests, 3)
+            self.assertEqual(len(slept), 2)
+
+    def test_rate_limited_fetcher_raises_retry_later(self):
+        with FixtureServer(self.pages, schedule=(429,), retry_after=7) as server:
+            fetcher = RateLimitedFetcher(HttpFetcher(), AdaptiveRateLimiter(initial_rate=100.0))
+            with self.assertRaises(RetryLater) as ctx:
+                fetcher.fetch(server.url("/release/0"), "album")
+            fetcher.close()
+        self.assertEqual((ctx.exception.status, ctx.exception.retry_after), (429, 7.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
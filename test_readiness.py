@@ -0,0 +1,54 @@
+import time
+import unittest
+
+from readiness import ReadinessWaiter
+
+
+class _SlowDriver:
+    """Driver falso cuja página fica pronta depois de `delay` segundos."""
+
+    def __init__(self, delay):
+        self.ready_at = time.perf_counter() + delay
+
+
+def _ready(driver):
+    return time.perf_counter() >= driver.ready_at
+
+
+class TestReadinessWaiter(unittest.TestCase):
+
+    def _waiter(self, **kwargs):
+        return ReadinessWaiter(conditions={"album": _ready}, poll_frequency=0.01, **kwargs)
+
+    def test_waits_only_until_ready(self):
+        """Deve retornar assim que a condição for satisfeita, bem antes do timeout."""
+        waiter = self._waiter(max_timeout=5)
+        start = time.perf_counter()
+        self.assertTrue(waiter.wait(_SlowDriver(0.05), "album"))
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(waiter.histograms["album"].count, 1)
+
+    def test_timeout_is_recorded(self):
+        """Deve retornar False e contar o timeout quando a página não fica pronta."""
+        waiter = self._waiter(max_timeout=0.05)
+        self.assertFalse(waiter.wait(_SlowDriver(10), "album"))
+        self.assertEqual(waiter.report()["album"]["timeouts"], 1)
+
+    def test_adaptive_timeout(self):
+        """Depois de amostras suficientes, o timeout deve acompanhar o p95 observado."""
+        waiter = self._waiter(min_timeout=0.1, max_timeout=10, factor=3, min_samples=3)
+        self.assertEqual(waiter.timeout_for("album"), 10)
+        for _ in range(3):
+            waiter.wait(_SlowDriver(0), "album")
+        self.assertEqual(waiter.timeout_for("album"), 0.1)
+
+    def test_report_estimates_savings(self):
+        """O relatório deve estimar a economia em relação à espera fixa antiga do tipo."""
+        waiter = self._waiter()
+        waiter.wait(_SlowDriver(0), "album")
+        self.assertGreater(waiter.report()["album"]["saved_s"], 0.9)
+        self.assertFalse(waiter.handles("artist"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from jsonl_sink import JsonlSink, iter_jsonl
+from record_store import RecordStore
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _album(release, title, tracks=("3:00", "4:00")):
+    return {
+        "id_album": f"release:{release}",
+        "nome_album": title,
+        "ano_lancamento": "1999",
+        "url_album": f"https://www.discogs.com/release/{release}-{title}",
+        "faixas_album": [{"numero_faixa": str(i + 1), "nome_faixa": f"{title} {i}", "duracao_faixa": d,
+                          "posicao_original": f"A{i + 1}"} for i, d in enumerate(tracks)],
+        "gravadora_album": "Selo",
+        "genero_album": ["Rock"],
+        "estilos_album": ["Punk"],
+    }
+
+
+def _artist(artist_id, *albums):
+    return {"id_artista": artist_id, "genero": "Rock", "nome_artista": f"Artista {artist_id}",
+            "membros_artista": "Individual", "sites_artista": [], "albuns": list(albums)}
+
+
+class TestRecordStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "dados.sqlite")
+        self.clock = _Clock()
+        self.store = RecordStore(self.path, batch_size=1, clock=self.clock)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def _updated_at(self, table, key, value):
+        return self.store._db.execute(f"SELECT atualizado_em FROM {table} WHERE {key} = ?", (value,)).fetchone()[0]
+
+    def test_rerun_touches_only_changed_rows(self):
+        self.store.write(_artist("1", _album(10, "A"), _album(11, "B")))
+        self.clock.now = 2000.0
+        # Mesmo artista no run seguinte, só o álbum B mudou (uma faixa a mais)
+        self.store.write(_artist("1", _album(10, "A"), _album(11, "B", ("3:00", "4:00", "5:00"))))
+
+        self.assertEqual(self.store.report(), {
+            "albuns_novos": 2, "artistas_novos": 1, "albuns_iguais": 1, "albuns_alterados": 1, "artistas_iguais": 1,
+        })
+        self.assertEqual(self._updated_at("albuns", "id_album", "release:10"), 1000.0)
+        self.assertEqual(self._updated_at("albuns", "id_album", "release:11"), 2000.0)
+        self.assertEqual(self._updated_at("artistas", "id_artista", "1"), 1000.0)
+        tracks = self.store._db.execute("SELECT COUNT(*) FROM faixas WHERE id_album = 'release:11'").fetchone()[0]
+        self.assertEqual(tracks, 3)
+
+    def test_export_is_a_view_over_merged_runs(self):
+        """Runs diferentes se somam no banco; a exportação segue o formato do JSONL."""
+        self.store.write(_artist("1", _album(10, "A")))
+        self.store.write(_artist("2", _album(20, "C")))
+        self.store.write(_artist("1", _album(10, "A"), _album(12, "Novo")))
+
+        path = os.path.join(self.tmp.name, "dados.jsonl")
+        with JsonlSink(path) as sink:
+            self.assertEqual(self.store.export_jsonl(sink), 2)
+        records = list(iter_jsonl(path))
+
+        self.assertEqual([r["id_artista"] for r in records], ["1", "2"])
+        self.assertEqual([a["id_album"] for a in records[0]["albuns"]], ["release:10", "release:12"])
+        album = records[0]["albuns"][0]
+        self.assertEqual(album["duracao_total_segundos"], 420)
+        self.assertEqual((album["genero_album"], album["estilos_album"]), (["Rock"], ["Punk"]))
+        self.assertEqual(album["faixas_album"][1], {
+            "numero_faixa": "2", "nome_faixa": "A 1", "duracao_faixa": "4:00", "posicao_original": "A2",
+            "disco": 1, "lado": "A", "posicao": 2, "duracao_segundos": 240,
+        })
+        self.assertEqual(records[0]["membros_artista"], "Individual")
+
+        plain = next(self.store.iter_records(normalized=False))["albuns"][0]
+        self.assertNotIn("duracao_total_segundos", plain)
+        self.assertEqual(plain["faixas_album"][1], {"numero_faixa": "2", "nome_faixa": "A 1", "duracao_faixa": "4:00"})
+
+    def test_album_id_from_url_for_older_records(self):
+        album = _album(30, "Antigo")
+        del album["id_album"]
+        self.store.write(_artist("3", album))
+        self.assertEqual(next(self.store.iter_records())["albuns"][0]["id_album"], "release:30")
+
+    def test_readers_see_committed_batches_during_the_run(self):
+        """Em modo WAL, outra conexão consulta o banco enquanto o crawl escreve."""
+        store = RecordStore(os.path.join(self.tmp.name, "lote.sqlite"), batch_size=2)
+        reader = sqlite3.connect(store.path)
+        try:
+            self.assertEqual(reader.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            store.write(_artist("1", _album(10, "A")))
+            self.assertEqual(reader.execute("SELECT COUNT(*) FROM artistas").fetchone()[0], 0)
+            store.write(_artist("2", _album(20, "B")))
+            self.assertEqual(reader.execute("SELECT COUNT(*) FROM artistas").fetchone()[0], 2)
+        finally:
+            reader.close()
+            store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
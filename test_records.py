@@ -0,0 +1,64 @@
+import json
+import unittest
+
+from records import ABSENT, Album, Artist, Track, compact
+
+
+def _artist(name="Artista", albums=2):
+    return {
+        "id_artista": "123",
+        "genero": "Rock",
+        "nome_artista": name,
+        "membros_artista": ["A", "B"],
+        "sites_artista": [],
+        "albuns": [{
+            "id_album": f"release:{i}",
+            "nome_album": f"Album {i}",
+            "ano_lancamento": "1999",
+            "url_album": f"https://www.discogs.com/release/{i}",
+            "faixas_album": [
+                {"numero_faixa": "1", "nome_faixa": "Um", "duracao_faixa": "3:00", "posicao_original": "A1"},
+                {"numero_faixa": "2", "nome_faixa": "Dois", "duracao_faixa": "4:10", "posicao_original": "A2"},
+            ],
+            "gravadora_album": "Fixture Records",
+            "genero_album": ["Rock"],
+            "estilos_album": ["Indie Rock"],
+        } for i in range(albums)],
+    }
+
+
+class TestRecords(unittest.TestCase):
+
+    def test_round_trip_keeps_keys_and_order(self):
+        artist = _artist()
+        restored = compact(artist).to_dict()
+        self.assertEqual(restored, artist)
+        self.assertEqual(json.dumps(restored, ensure_ascii=False), json.dumps(artist, ensure_ascii=False))
+
+    def test_absent_and_unknown_keys(self):
+        """Chaves ausentes continuam ausentes; desconhecidas são preservadas."""
+        old_track = {"numero_faixa": "1", "nome_faixa": "Um", "duracao_faixa": "3:00"}
+        track = Track.from_dict(old_track)
+        self.assertIs(track.posicao_original, ABSENT)
+        self.assertEqual(track.to_dict(), old_track)
+
+        artist = {**_artist(albums=1), "novo_campo": {"x": 1}}
+        self.assertEqual(compact(artist).to_dict(), artist)
+        self.assertEqual(compact({"nome_artista": "Só nome"}).to_dict(), {"nome_artista": "Só nome"})
+        self.assertIsNone(compact(None))
+
+    def test_slots_and_interned_strings(self):
+        first = Artist.from_dict(json.loads(json.dumps(_artist("A"))))
+        second = Artist.from_dict(json.loads(json.dumps(_artist("B"))))
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertFalse(hasattr(first.albuns[0].faixas_album[0], "__dict__"))
+        # Strings repetidas entre registros (vindas de json.loads distintos) viram o mesmo objeto
+        self.assertIs(first.genero, second.genero)
+        self.assertIs(first.albuns[0].gravadora_album, second.albuns[1].gravadora_album)
+        self.assertIs(first.albuns[0].estilos_album[0], second.albuns[0].estilos_album[0])
+        self.assertIs(first.albuns[0].faixas_album[0].duracao_faixa, second.albuns[1].faixas_album[0].duracao_faixa)
+        self.assertIsInstance(first.albuns[0], Album)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import json
+import tempfile
+import unittest
+
+import requests
+
+import discogs_scraper
+from fetchers import HttpFetcher
+from fixture_server import FixtureServer, make_site_pages
+from jsonl_sink import iter_jsonl
+from replay import FixtureCorpus, RecordingFetcher, corpus_key, patched_config, replay_config
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pages = make_site_pages(n_artists=3, n_albums=2, n_tracks=4)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_recorded_pages_are_served_back(self):
+        corpus_dir = os.path.join(self.tmp.name, "corpus")
+        with FixtureServer(self.pages) as server:
+            fetcher = RecordingFetcher(HttpFetcher(), FixtureCorpus(corpus_dir))
+            for path in self.pages:
+                page_type = "listing" if "/releases?" in path else "album"
+                fetcher.fetch(server.url(path), page_type)
+            fetcher.fetch(server.url("/nao-existe"), "album")
+            fetcher.close()
+
+        corpus = FixtureCorpus(corpus_dir)
+        self.assertEqual(corpus.pages(), self.pages)
+        self.assertEqual(fetcher.recorded, len(self.pages))
+        with corpus.server() as replay:
+            listing = next(path for path in self.pages if "/releases?" in path)
+            response = requests.get(replay.url(listing))
+            self.assertEqual(response.headers["Content-Type"], "application/json")
+            self.assertEqual(response.json(), json.loads(self.pages[listing]))
+
+    def test_corpus_key_ignores_host(self):
+        self.assertEqual(corpus_key("https://api.discogs.com/artists/1/releases?page=2"), "/artists/1/releases?page=2")
+
+    def test_error_injection_is_reproducible(self):
+        def statuses(seed):
+            path = next(iter(self.pages))
+            with FixtureServer(self.pages, error_rate=0.3, seed=seed) as server:
+                with requests.Session() as session:
+                    return [session.get(server.url(path)).status_code for _ in range(30)], server.rejected
+
+        first, rejected = statuses(7)
+        self.assertEqual(statuses(7), (first, rejected))
+        self.assertEqual(first.count(503), rejected)
+        self.assertTrue(0 < rejected < 30)
+
+    def test_end_to_end_run_against_replay_server(self):
+        with FixtureServer(self.pages, error_rate=0.1, seed=1) as server:
+            overrides = replay_config(server, self.tmp.name)
+            with patched_config(discogs_scraper, PARSE_WORKERS=0, MAX_ARTISTS=3, **overrides):
+                discogs_scraper.run_scraper()
+            self.assertEqual(discogs_scraper.URL_SEARCH, "https://www.discogs.com/pt_BR/search")
+
+        records = list(iter_jsonl(overrides["OUTPUT_FILE"]))
+        self.assertEqual(sorted(r["nome_artista"] for r in records), ["Artista 1", "Artista 2", "Artista 3"])
+        self.assertTrue(all(len(r["albuns"]) == 2 for r in records))
+        with open(overrides["RUN_REPORT_FILE"], encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(report["counters"]["albums_written"], 6)
+        self.assertIn("extract.album_tracklist", report["stages"])
+
+    def test_unnormalized_run_keeps_baseline_track_keys(self):
+        """Com NORMALIZE_TRACKS=False as faixas saem só com as chaves do formato original."""
+        for store in (False, True):
+            with self.subTest(store=store), FixtureServer(self.pages) as server:
+                overrides = replay_config(server, self.tmp.name)
+                if store:
+                    overrides["STORE_FILE"] = os.path.join(self.tmp.name, "dados.sqlite")
+                with patched_config(discogs_scraper, PARSE_WORKERS=0, MAX_ARTISTS=2, NORMALIZE_TRACKS=False,
+                                    **overrides):
+                    discogs_scraper.run_scraper()
+                records = list(iter_jsonl(overrides["OUTPUT_FILE"]))
+                self.assertEqual(len(records), 2)
+                for album in (album for record in records for album in record["albuns"]):
+                    self.assertNotIn("duracao_total_segundos", album)
+                    for track in album["faixas_album"]:
+                        self.assertEqual(set(track), {"numero_faixa", "nome_faixa", "duracao_faixa"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from track_columns import MISSING, enrich_records, normalize_tracks, parse_durations, parse_positions
+
+
+def _track(position, duration="3:00", title="Faixa"):
+    return {"numero_faixa": "x", "nome_faixa": title, "duracao_faixa": duration, "posicao_original": position}
+
+
+class TestTrackColumns(unittest.TestCase):
+
+    def test_parse_positions(self):
+        """Lados de vinil, discos numerados e prefixos de mídia viram disco, lado e número."""
+        discs, sides, numbers = parse_positions(
+            ["A1", "B-02", "c3", "D", "1-3", "CD2-5", "DVD1.4", "14.", "7", "LADO 1", "", None]
+        )
+        self.assertEqual(list(discs), [1, 1, 2, 2, 1, 2, 1, 1, 1, MISSING, MISSING, MISSING])
+        self.assertEqual(sides, ["A", "B", "C", "D", "", "", "", "", "", "", "", ""])
+        self.assertEqual(list(numbers), [1, 2, 3, 1, 3, 5, 4, 14, 7, 1, MISSING, MISSING])
+
+    def test_parse_durations(self):
+        self.assertEqual(list(parse_durations(["3:26", "0:45", "1:02:03", "", None, "3'26"])),
+                         [206, 45, 3723, MISSING, MISSING, MISSING])
+
+    def test_columns_and_album_runtimes(self):
+        albums = [
+            {"faixas_album": [_track("A1", "3:00"), _track("B1", "4:30")]},
+            {"faixas_album": []},
+            {"faixas_album": [_track("1-1", "2:00"), _track("2-1", "")]},
+        ]
+        columns = normalize_tracks(albums)
+        self.assertEqual(len(columns), 4)
+        self.assertEqual(list(columns.album_index), [0, 0, 2, 2])
+        self.assertEqual(list(columns.disc), [1, 1, 1, 2])
+        self.assertEqual(columns.album_runtimes(), [450, None, 120])
+
+    def test_enrich_records_keeps_original_fields(self):
+        """Os campos originais ficam intactos; registros antigos sem posicao_original usam numero_faixa."""
+        artists = [{"albuns": [{"faixas_album": [_track("CD2-5", "1:02:03")]}]},
+                   {"albuns": [{"faixas_album": [{"numero_faixa": "4", "nome_faixa": "Antiga", "duracao_faixa": "4:00"}]}]}]
+        enrich_records(artists)
+
+        track = artists[0]["albuns"][0]["faixas_album"][0]
+        self.assertEqual(track["numero_faixa"], "x")
+        self.assertEqual((track["disco"], track["lado"], track["posicao"], track["duracao_segundos"]), (2, None, 5, 3723))
+        self.assertEqual(artists[0]["albuns"][0]["duracao_total_segundos"], 3723)
+        self.assertEqual(artists[1]["albuns"][0]["faixas_album"][0]["posicao"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
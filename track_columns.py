@@ -0,0 +1,196 @@
+"""
+Normalização em lote (colunar) das faixas de um run.
+
+Uso: python track_columns.py dados_discogs.jsonl dados_normalizados.jsonl
+"""
+import re
+import sys
+import json
+import argparse
+from array import array
+
+try:
+    import pyarrow
+except ImportError: # pyarrow é opcional: só necessário para to_arrow()
+    pyarrow = None
+
+MISSING = -1 # Valor das colunas numéricas quando a posição/duração não pôde ser lida
+
+# Uma única expressão para os três formatos de posição:
+#   "CD2-5", "DVD1.3", "1-3": mídia opcional, disco e faixa
+#   "A1", "B-02", "C", "AA3": lado (vinil/fita) e faixa opcional
+#   "7", "14.": só a faixa
+_POSITION = re.compile(
+    r"[A-Z]*(\d+)[-.](\d+)"
+    r"|([A-Z]{1,2})-?(\d*)\.?"
+    r"|(\d+)\.?"
+)
+_FIRST_NUMBER = re.compile(r"\d+")
+_DURATION = re.compile(r"(?:(\d+):)?(\d+):(\d{2})")
+
+
+class TrackColumns:
+    """
+    Colunas das faixas de um lote de álbuns: uma entrada por faixa, na ordem dos álbuns.
+    As colunas numéricas são arrays compactos (array('i')), com MISSING onde não há valor.
+    """
+
+    __slots__ = ("album_index", "title", "raw_position", "disc", "side", "number", "duration_s", "n_albums")
+
+    def __init__(self, n_albums=0):
+        self.n_albums = n_albums
+        self.album_index = array("i")
+        self.title = []
+        self.raw_position = []
+        self.disc = array("i")
+        self.side = []
+        self.number = array("i")
+        self.duration_s = array("i")
+
+    def __len__(self):
+        return len(self.title)
+
+    def album_runtimes(self):
+        """Duração total (s) de cada álbum, somando as faixas com duração conhecida (None se nenhuma)."""
+        totals = [None] * self.n_albums
+        for album, seconds in zip(self.album_index, self.duration_s):
+            if seconds != MISSING:
+                totals[album] = (totals[album] or 0) + seconds
+        return totals
+
+    def to_arrow(self):
+        """Tabela do pyarrow com as colunas (MISSING vira nulo)."""
+        if pyarrow is None:
+            raise ImportError("to_arrow() requer o pacote pyarrow (pip install pyarrow).")
+
+        def nullable(column):
+            return pyarrow.array([None if v == MISSING else v for v in column], pyarrow.int32())
+
+        return pyarrow.table({
+            "album_index": pyarrow.array(self.album_index, pyarrow.int32()),
+            "nome_faixa": pyarrow.array(self.title, pyarrow.string()),
+            "posicao_original": pyarrow.array(self.raw_position, pyarrow.string()),
+            "disco": nullable(self.disc),
+            "lado": pyarrow.array([s or None for s in self.side], pyarrow.string()).dictionary_encode(),
+            "posicao": nullable(self.number),
+            "duracao_segundos": nullable(self.duration_s),
+        })
+
+
+def _side_to_disc(side):
+    """Vinil: lados A/B são o disco 1, C/D o disco 2... ("AA" e afins ficam sem disco)."""
+    return (ord(side) - ord("A")) // 2 + 1 if len(side) == 1 else MISSING
+
+
+def _parse_position(text):
+    match = _POSITION.fullmatch(text)
+    if match is None:
+        # Formatos livres ("LADO 1", "A1a"): primeiro número, sem disco/lado
+        first = _FIRST_NUMBER.search(text)
+        return MISSING, "", int(first.group()) if first else MISSING
+    disc, disc_number, side, side_number, number = match.groups()
+    if disc is not None:
+        return int(disc), "", int(disc_number)
+    if side is not None:
+        return _side_to_disc(side), side, int(side_number) if side_number else 1
+    return 1, "", int(number)
+
+
+def parse_positions(raw_positions):
+    """
+    Converte um lote de posições em três colunas: disco, lado e número da faixa.
+    Cada valor distinto é interpretado uma única vez (num run, "A1", "B2"... se
+    repetem em quase todos os álbuns); o resto do lote só consulta o resultado.
+    """
+    cleaned = [(p or "").strip().upper() for p in raw_positions]
+    parsed = {text: _parse_position(text) for text in set(cleaned)}
+    rows = [parsed[text] for text in cleaned]
+    discs = array("i", [row[0] for row in rows])
+    sides = [row[1] for row in rows]
+    numbers = array("i", [row[2] for row in rows])
+    return discs, sides, numbers
+
+
+def _parse_duration(text):
+    match = _DURATION.fullmatch(text)
+    if match is None:
+        return MISSING
+    hours, minutes, seconds = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def parse_durations(raw_durations):
+    """Converte um lote de durações ("3:26", "1:02:03") em segundos (MISSING se inválida)."""
+    cleaned = [(d or "").strip() for d in raw_durations]
+    parsed = {text: _parse_duration(text) for text in set(cleaned)}
+    return array("i", [parsed[text] for text in cleaned])
+
+
+def normalize_tracks(albums):
+    """Monta as TrackColumns de todas as faixas de uma lista de álbuns (dicts com faixas_album)."""
+    columns = TrackColumns(len(albums))
+    durations = []
+    for index, album in enumerate(albums):
+        for track in album.get("faixas_album") or ():
+            columns.album_index.append(index)
+            columns.title.append(track.get("nome_faixa"))
+            columns.raw_position.append(track.get("posicao_original") or track.get("numero_faixa"))
+            durations.append(track.get("duracao_faixa"))
+
+    columns.disc, columns.side, columns.number = parse_positions(columns.raw_position)
+    columns.duration_s = parse_durations(durations)
+    return columns
+
+
+def enrich_records(artists):
+    """
+    Normaliza de uma vez todas as faixas dos artistas e grava o resultado nos próprios
+    registros: disco, lado, posicao e duracao_segundos em cada faixa e
+    duracao_total_segundos em cada álbum. Os campos originais não mudam.
+    """
+    albums = [album for artist in artists for album in artist.get("albuns") or ()]
+    columns = normalize_tracks(albums)
+
+    row = 0
+    for album, runtime in zip(albums, columns.album_runtimes()):
+        for track in album.get("faixas_album") or ():
+            track["disco"] = None if columns.disc[row] == MISSING else columns.disc[row]
+            track["lado"] = columns.side[row] or None
+            track["posicao"] = None if columns.number[row] == MISSING else columns.number[row]
+            track["duracao_segundos"] = None if columns.duration_s[row] == MISSING else columns.duration_s[row]
+            row += 1
+        album["duracao_total_segundos"] = runtime
+    return artists
+
+
+def without_raw_positions(artist):
+    """
+    Cópia do registro sem a posicao_original das faixas, que o scraper guarda só
+    para a normalização. Sem NORMALIZE_TRACKS, a saída fica com as chaves de faixa
+    do formato original (numero_faixa, nome_faixa, duracao_faixa).
+    """
+    albums = []
+    for album in artist.get("albuns") or ():
+        tracks = [{key: value for key, value in track.items() if key != "posicao_original"}
+                  for track in album.get("faixas_album") or ()]
+        albums.append({**album, "faixas_album": tracks})
+    return {**artist, "albuns": albums}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normaliza posições e durações das faixas de um JSONL do scraper.")
+    parser.add_argument("entrada")
+    parser.add_argument("saida")
+    args = parser.parse_args()
+
+    with open(args.entrada, encoding="utf-8") as f:
+        artists = [json.loads(line) for line in f if line.strip()]
+    enrich_records(artists)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        for artist in artists:
+            f.write(json.dumps(artist, ensure_ascii=False) + "\n")
+    print(f"{sum(len(a.get('albuns') or ()) for a in artists)} álbuns normalizados em {args.saida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,630 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+
+try:
+    import redis
+except ImportError: # redis é opcional: só necessário para a fila em rede (várias máquinas)
+    redis = None
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_COLUMNS = "id, kind, key, url, payload, parent, attempts, status, result, error"
+# Sistemas de arquivos de rede: o WAL do SQLite não funciona neles
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "fuse.sshfs", "afs"}
+# Endereços de fila que vão para a RedisWorkQueue (o resto é um caminho de arquivo SQLite)
+REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+def filesystem_type(path):
+    """Tipo do sistema de arquivos onde `path` está (lido de /proc/mounts), ou None fora do Linux."""
+    try:
+        with open("/proc/mounts", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if len(line.split()) >= 3]
+    except OSError:
+        return None
+    directory = os.path.dirname(os.path.abspath(path))
+    best = None
+    for mount_point, fs_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        if directory == mount_point or directory.startswith(mount_point.rstrip("/") + "/"):
+            if best is None or len(mount_point) > len(best[0]):
+                best = (mount_point, fs_type)
+    return best[1] if best else None
+
+
+@dataclass
+class Task:
+    """Tarefa da fila: uma URL de artista ou álbum, com os dados para processá-la."""
+    id: int
+    kind: str
+    key: str
+    url: str
+    payload: dict = None
+    parent: int = None
+    attempts: int = 0
+    status: str = QUEUED
+    result: object = None
+    error: str = None
+
+
+class TaskQueue:
+    """
+    Interface da fila do crawl distribuído: o que o coordenador e os workers usam.
+
+    O coordenador começa um run (`begin_run`), enfileira tarefas (`put`, idempotente
+    por (kind, key) dentro do run) e acompanha os resultados (`statuses`). Um worker
+    reserva tarefas com um lease de lease_seconds (`claim`), renova o lease das
+    demoradas (`renew`) e devolve cada uma como concluída (`complete`) ou de volta à
+    fila (`fail`, que a encerra após max_attempts tentativas). Um lease vencido volta
+    para a fila no próximo claim de qualquer worker, e quem o perdeu não consegue mais
+    concluir a tarefa. `get_meta`/`set_meta` guardam marcas do run (ex: fechamento).
+
+    Implementações: WorkQueue (SQLite, numa máquina; o stand-in local e dos testes) e
+    RedisWorkQueue (servidor Redis, para workers em várias máquinas).
+    """
+
+    def __init__(self, lease_seconds=300, max_attempts=3, clock=time.time):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self.expired = 0
+
+    def begin_run(self):
+        """Começa um run novo: descarta as tarefas (e resultados) dos anteriores. Retorna o número do run."""
+        raise NotImplementedError
+
+    def current_run(self):
+        """Número do run atual (0 se nenhum coordenador começou um run nesta fila)."""
+        return self.get_meta("run", 0)
+
+    def idle_seconds(self):
+        """Segundos desde a última atividade de um worker (claim, renew, complete, fail) ou o início do run."""
+        raise NotImplementedError
+
+    def put(self, kind, key, url, payload=None, parent=None, priority=0):
+        """Enfileira uma tarefa. Retorna (Task, criada?); se a chave já existia, devolve a existente."""
+        raise NotImplementedError
+
+    def claim(self, owner, limit=1, kinds=None):
+        """Reserva até `limit` tarefas disponíveis (maior prioridade primeiro) para `owner`."""
+        raise NotImplementedError
+
+    def renew(self, task, owner):
+        """Estende o lease de uma tarefa ainda reservada por `owner`. False se ele já foi perdido."""
+        raise NotImplementedError
+
+    def _finish(self, task, owner, status, result=None, error=None, available_at=None):
+        raise NotImplementedError
+
+    def complete(self, task, owner, result=None):
+        """Conclui a tarefa com o resultado. False se o lease já tinha expirado (outro worker a refaz)."""
+        return self._finish(task, owner, DONE, result=result)
+
+    def fail(self, task, owner, error, retry_after=0):
+        """Devolve a tarefa à fila (disponível só após retry_after s) ou a encerra após max_attempts."""
+        if task.attempts >= self.max_attempts:
+            return self._finish(task, owner, FAILED, error=str(error))
+        return self._finish(task, owner, QUEUED, error=str(error), available_at=self._clock() + retry_after)
+
+    def _lost_lease(self, task, owner):
+        logging.warning(f"[FILA] Lease de {task.url} perdido por {owner}; resultado descartado.")
+
+    def get(self, task_id):
+        raise NotImplementedError
+
+    def statuses(self, task_ids):
+        """{id: (status, resultado)} de várias tarefas, numa consulta."""
+        raise NotImplementedError
+
+    def set_meta(self, name, value):
+        raise NotImplementedError
+
+    def get_meta(self, name, default=None):
+        raise NotImplementedError
+
+    def counts(self):
+        """{"kind:status": n} das tarefas do run."""
+        raise NotImplementedError
+
+    def report(self):
+        return {**self.counts(), "leases_expirados": self.expired}
+
+    def close(self):
+        pass
+
+
+class WorkQueue(TaskQueue):
+    """
+    TaskQueue em SQLite: a fila de uma máquina só (modo local e testes).
+
+    Cada processo (coordenador ou worker) abre a sua conexão ao mesmo arquivo local.
+    O modo WAL depende de memória compartilhada (o arquivo -shm mapeado), que não
+    funciona em NFS/SMB; por isso um arquivo num sistema de arquivos de rede é
+    recusado. Para workers em várias máquinas, use a RedisWorkQueue.
+
+    As tarefas pertencem a um run: `begin_run` apaga as do run anterior, então um
+    resultado antigo nunca volta como se fosse deste run.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3, clock=time.time):
+        fs_type = filesystem_type(path)
+        if fs_type in NETWORK_FILESYSTEMS:
+            raise ValueError(f"Fila em sistema de arquivos de rede ({fs_type}): {path}. A WorkQueue (SQLite em modo "
+                             "WAL) só funciona numa máquina; para várias, use uma URL redis:// (RedisWorkQueue).")
+        super().__init__(lease_seconds, max_attempts, clock)
+        self.path = path
+        self._lock = threading.Lock()
+        # isolation_level=None: as transações são abertas explicitamente (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                url TEXT NOT NULL,
+                payload TEXT,
+                parent INTEGER,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_expires REAL,
+                available_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                result TEXT,
+                error TEXT,
+                UNIQUE (kind, key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (status, priority DESC, id);
+            CREATE INDEX IF NOT EXISTS idx_tasks_parent ON tasks (parent);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def _transaction(self):
+        """BEGIN IMMEDIATE: reserva a escrita já no início, então dois claims nunca pegam a mesma tarefa."""
+        self._db.execute("BEGIN IMMEDIATE")
+
+    def begin_run(self):
+        with self._lock:
+            self._transaction()
+            try:
+                row = self._db.execute("SELECT value FROM meta WHERE name = 'run'").fetchone()
+                run_id = json.loads(row[0]) + 1 if row else 1
+                discarded = self._db.execute("DELETE FROM tasks").rowcount
+                self._db.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                                     [("run", json.dumps(run_id)), ("run_started", json.dumps(self._clock()))])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        if discarded:
+            logging.info(f"[FILA] Run #{run_id}: {discarded} tarefas do run anterior descartadas.")
+        return run_id
+
+    def idle_seconds(self):
+        with self._lock:
+            last = self._db.execute("SELECT MAX(updated_at) FROM tasks WHERE attempts > 0").fetchone()[0]
+        started = self.get_meta("run_started")
+        marks = [mark for mark in (last, started) if mark is not None]
+        return self._clock() - max(marks) if marks else 0.0
+
+    def put(self, kind, key, url, payload=None, parent=None, priority=0):
+        now = self._clock()
+        with self._lock:
+            self._transaction()
+            try:
+                cursor = self._db.execute(
+                    """INSERT OR IGNORE INTO tasks (kind, key, url, payload, parent, priority, status,
+                                                    available_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (kind, key, url, json.dumps(payload, ensure_ascii=False), parent, priority, QUEUED, now, now),
+                )
+                created = cursor.rowcount == 1
+                row = self._db.execute(f"SELECT {_COLUMNS} FROM tasks WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return _task(row), created
+
+    def _release_expired(self, now):
+        """Leases vencidos voltam para a fila (ou falham de vez, após max_attempts tentativas)."""
+        expired = self._db.execute(
+            """UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                                owner = NULL, lease_expires = NULL, updated_at = ?,
+                                error = 'lease expirado'
+               WHERE status = ? AND lease_expires < ?""",
+            (self.max_attempts, FAILED, QUEUED, now, LEASED, now),
+        ).rowcount
+        if expired:
+            self.expired += expired
+            logging.warning(f"[FILA] {expired} leases expirados; tarefas devolvidas à fila.")
+        return expired
+
+    def claim(self, owner, limit=1, kinds=None):
+        now = self._clock()
+        kind_filter = f"AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""
+        with self._lock:
+            self._transaction()
+            try:
+                self._release_expired(now)
+                rows = self._db.execute(
+                    f"""SELECT {_COLUMNS} FROM tasks
+                        WHERE status = ? AND available_at <= ? {kind_filter}
+                        ORDER BY priority DESC, id LIMIT ?""",
+                    (QUEUED, now, *(kinds or ()), limit),
+                ).fetchall()
+                self._db.executemany(
+                    """UPDATE tasks SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1,
+                                        updated_at = ? WHERE id = ?""",
+                    [(LEASED, owner, now + self.lease_seconds, now, row[0]) for row in rows],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        tasks = [_task(row) for row in rows]
+        for task in tasks:
+            task.status, task.attempts = LEASED, task.attempts + 1
+        return tasks
+
+    def _finish(self, task, owner, status, result=None, error=None, available_at=None):
+        now = self._clock()
+        with self._lock:
+            updated = self._db.execute(
+                """UPDATE tasks SET status = ?, result = ?, error = ?, owner = NULL, lease_expires = NULL,
+                                    available_at = ?, updated_at = ?
+                   WHERE id = ? AND status = ? AND owner = ?""",
+                (status, json.dumps(result, ensure_ascii=False) if status == DONE else None, error,
+                 available_at or now, now, task.id, LEASED, owner),
+            ).rowcount
+        if not updated:
+            self._lost_lease(task, owner)
+        return bool(updated)
+
+    def renew(self, task, owner):
+        now = self._clock()
+        with self._lock:
+            renewed = self._db.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (now + self.lease_seconds, now, task.id, LEASED, owner),
+            ).rowcount
+        return bool(renewed)
+
+    def get(self, task_id):
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _task(row) if row else None
+
+    def statuses(self, task_ids):
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, status, result FROM tasks WHERE id IN ({', '.join('?' * len(task_ids))})", task_ids,
+            ).fetchall()
+        return {task_id: (status, json.loads(result) if result is not None else None)
+                for task_id, status, result in rows}
+
+    def set_meta(self, name, value):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, json.dumps(value)))
+
+    def get_meta(self, name, default=None):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT kind, status, COUNT(*) FROM tasks GROUP BY kind, status").fetchall()
+        return {f"{kind}:{status}": n for kind, status, n in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _task(row):
+    task_id, kind, key, url, payload, parent, attempts, status, result, error = row
+    return Task(task_id, kind, key, url, json.loads(payload) if payload else None, parent, attempts, status,
+                json.loads(result) if result is not None else None, error)
+
+
+# ----------------------
+# FILA EM REDIS
+# ----------------------
+
+# Cada operação da RedisWorkQueue é um script Lua: o Redis o executa de forma atômica,
+# então dois workers (em máquinas diferentes) nunca reservam a mesma tarefa. Chaves,
+# todas sob o prefixo (ARGV[1]): task:<id> (hash da tarefa), keys (kind+key -> id no
+# run), ready (zset das disponíveis, por prioridade e id), delayed (zset das que
+# esperam available_at), leases (zset das reservadas, por lease_expires), counts
+# ("kind:status" -> n), seq, activity e meta.
+_LUA_HEADER = f"""
+local QUEUED, LEASED, DONE, FAILED = "{QUEUED}", "{LEASED}", "{DONE}", "{FAILED}"
+local p = ARGV[1]
+""" + """
+local function count(kind, status, n)
+    redis.call("HINCRBY", p .. "counts", kind .. ":" .. status, n)
+end
+local function make_ready(id, priority)
+    -- Maior prioridade primeiro e, na mesma prioridade, a ordem de chegada (id)
+    redis.call("ZADD", p .. "ready", tonumber(id) - tonumber(priority) * 1e13, id)
+end
+local function leased_by(id, owner)
+    -- A tarefa é deste run (o zset de chaves do run aponta para ela) e ainda está com owner?
+    local kind, key, status, holder = unpack(redis.call("HMGET", p .. "task:" .. id, "kind", "key", "status", "owner"))
+    if status ~= LEASED or holder ~= owner or redis.call("HGET", p .. "keys", kind .. "\\n" .. key) ~= id then
+        return nil
+    end
+    return kind
+end
+"""
+
+_REDIS_SCRIPTS = {
+    # ARGV: prefixo, agora
+    "begin_run": """
+local run = redis.call("HINCRBY", p .. "meta", "run", 1)
+redis.call("HSET", p .. "meta", "run_started", ARGV[2])
+local discarded = redis.call("HLEN", p .. "keys")
+-- Renomear é O(1): as tarefas antigas saem do run na hora e são apagadas depois, em lotes
+for _, name in ipairs({"keys", "ready", "delayed", "leases", "counts", "activity"}) do
+    if redis.call("EXISTS", p .. name) == 1 then
+        redis.call("RENAME", p .. name, p .. "descartado:" .. run .. ":" .. name)
+    end
+end
+return {run, discarded}
+""",
+    # ARGV: prefixo, kind, key, url, payload, parent, priority, agora
+    "put": """
+local field = ARGV[2] .. "\\n" .. ARGV[3]
+local id = redis.call("HGET", p .. "keys", field)
+if id then
+    return {tonumber(id), 0}
+end
+id = redis.call("INCR", p .. "seq")
+redis.call("HSET", p .. "keys", field, id)
+redis.call("HSET", p .. "task:" .. id, "kind", ARGV[2], "key", ARGV[3], "url", ARGV[4], "payload", ARGV[5],
+           "parent", ARGV[6], "priority", ARGV[7], "status", QUEUED, "attempts", 0, "owner", "",
+           "lease_expires", "", "available_at", ARGV[8], "updated_at", ARGV[8], "result", "", "error", "")
+make_ready(id, ARGV[7])
+count(ARGV[2], QUEUED, 1)
+return {id, 1}
+""",
+    # ARGV: prefixo, agora, owner, limite, lease_seconds, max_attempts, kinds (separados por vírgula)
+    "claim": """
+local now = tonumber(ARGV[2])
+local expired = 0
+for _, id in ipairs(redis.call("ZRANGEBYSCORE", p .. "leases", "-inf", "(" .. ARGV[2])) do
+    local task = p .. "task:" .. id
+    local kind, attempts, priority = unpack(redis.call("HMGET", task, "kind", "attempts", "priority"))
+    local status = QUEUED
+    if tonumber(attempts) >= tonumber(ARGV[6]) then
+        status = FAILED
+    else
+        make_ready(id, priority)
+    end
+    redis.call("HSET", task, "status", status, "owner", "", "lease_expires", "", "updated_at", ARGV[2],
+               "error", "lease expirado")
+    redis.call("ZREM", p .. "leases", id)
+    count(kind, LEASED, -1)
+    count(kind, status, 1)
+    expired = expired + 1
+end
+for _, id in ipairs(redis.call("ZRANGEBYSCORE", p .. "delayed", "-inf", ARGV[2])) do
+    make_ready(id, redis.call("HGET", p .. "task:" .. id, "priority"))
+    redis.call("ZREM", p .. "delayed", id)
+end
+
+local kinds = {}
+for kind in string.gmatch(ARGV[7], "[^,]+") do
+    kinds[kind] = true
+end
+local limit = tonumber(ARGV[4])
+local lease_expires = now + tonumber(ARGV[5])
+local claimed = {expired}
+local skipped = 0
+while #claimed <= limit do
+    local ids = redis.call("ZRANGE", p .. "ready", skipped, skipped + 99)
+    if #ids == 0 then
+        break
+    end
+    for _, id in ipairs(ids) do
+        if #claimed > limit then
+            break
+        end
+        local task = p .. "task:" .. id
+        local kind = redis.call("HGET", task, "kind")
+        if ARGV[7] ~= "" and not kinds[kind] then
+            skipped = skipped + 1
+        else
+            redis.call("ZREM", p .. "ready", id)
+            redis.call("HSET", task, "status", LEASED, "owner", ARGV[3], "lease_expires", lease_expires,
+                       "updated_at", ARGV[2])
+            redis.call("HINCRBY", task, "attempts", 1)
+            redis.call("ZADD", p .. "leases", lease_expires, id)
+            count(kind, QUEUED, -1)
+            count(kind, LEASED, 1)
+            claimed[#claimed + 1] = tonumber(id)
+        end
+    end
+end
+if #claimed > 1 then
+    redis.call("SET", p .. "activity", ARGV[2])
+end
+return claimed
+""",
+    # ARGV: prefixo, id, owner, agora, lease_seconds
+    "renew": """
+if not leased_by(ARGV[2], ARGV[3]) then
+    return 0
+end
+local lease_expires = tonumber(ARGV[4]) + tonumber(ARGV[5])
+redis.call("HSET", p .. "task:" .. ARGV[2], "lease_expires", lease_expires, "updated_at", ARGV[4])
+redis.call("ZADD", p .. "leases", lease_expires, ARGV[2])
+redis.call("SET", p .. "activity", ARGV[4])
+return 1
+""",
+    # ARGV: prefixo, id, owner, status, resultado, erro, available_at, agora
+    "finish": """
+local kind = leased_by(ARGV[2], ARGV[3])
+if not kind then
+    return 0
+end
+redis.call("HSET", p .. "task:" .. ARGV[2], "status", ARGV[4], "result", ARGV[5], "error", ARGV[6], "owner", "",
+           "lease_expires", "", "available_at", ARGV[7], "updated_at", ARGV[8])
+redis.call("ZREM", p .. "leases", ARGV[2])
+if ARGV[4] == QUEUED then
+    redis.call("ZADD", p .. "delayed", ARGV[7], ARGV[2])
+end
+count(kind, LEASED, -1)
+count(kind, ARGV[4], 1)
+redis.call("SET", p .. "activity", ARGV[8])
+return 1
+""",
+}
+
+
+class RedisWorkQueue(TaskQueue):
+    """
+    TaskQueue num servidor Redis, para workers em várias máquinas (cada uma com o seu
+    IP e o seu limite de taxa) consumindo a mesma fila.
+
+    Cada operação é um script Lua, atômico no servidor. Sem um `clock`, o tempo dos
+    leases é o do próprio Redis (TIME), então relógios diferentes entre as máquinas não
+    fazem um lease vencer antes da hora. `begin_run` tira as tarefas do run anterior de
+    uso num passo só e depois as apaga em lotes. Os scripts montam os nomes das chaves a
+    partir do prefixo: use um Redis sem cluster (ou um prefixo por fila num Redis
+    compartilhado). `client` é um cliente redis-py com decode_responses=True.
+    """
+
+    def __init__(self, url, lease_seconds=300, max_attempts=3, clock=None, prefix="discogs:fila", client=None):
+        if client is None:
+            if redis is None:
+                raise ImportError("A fila em rede requer o pacote 'redis' (pip install redis).")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        super().__init__(lease_seconds, max_attempts, clock or self._server_time)
+        self.url = url
+        self.prefix = prefix + ":"
+        self._redis = client
+        self._scripts = {name: client.register_script(_LUA_HEADER + source) for name, source in _REDIS_SCRIPTS.items()}
+
+    def _server_time(self):
+        seconds, microseconds = self._redis.time()
+        return seconds + microseconds / 1e6
+
+    def _run(self, script, *args):
+        return self._scripts[script](args=[self.prefix, *args])
+
+    def begin_run(self):
+        run_id, discarded = self._run("begin_run", json.dumps(self._clock()))
+        self._drop_discarded()
+        if discarded:
+            logging.info(f"[FILA] Run #{run_id}: {discarded} tarefas do run anterior descartadas.")
+        return run_id
+
+    def _drop_discarded(self):
+        """Apaga em lotes as tarefas dos runs descartados (inclusive as de um coordenador que caiu no meio disso)."""
+        for keys_name in self._redis.scan_iter(match=f"{self.prefix}descartado:*:keys"):
+            batch = []
+            for _, task_id in self._redis.hscan_iter(keys_name, count=1000):
+                batch.append(f"{self.prefix}task:{task_id}")
+                if len(batch) >= 1000:
+                    self._redis.unlink(*batch)
+                    batch = []
+            if batch:
+                self._redis.unlink(*batch)
+            self._redis.unlink(keys_name)
+        leftovers = list(self._redis.scan_iter(match=f"{self.prefix}descartado:*"))
+        if leftovers:
+            self._redis.unlink(*leftovers)
+
+    def idle_seconds(self):
+        marks = [float(mark) for mark in (self._redis.get(self.prefix + "activity"), self.get_meta("run_started"))
+                 if mark is not None]
+        return self._clock() - max(marks) if marks else 0.0
+
+    def put(self, kind, key, url, payload=None, parent=None, priority=0):
+        task_id, created = self._run(
+            "put", kind, key, url, json.dumps(payload, ensure_ascii=False), "" if parent is None else parent,
+            priority, self._clock(),
+        )
+        return self.get(task_id), bool(created)
+
+    def claim(self, owner, limit=1, kinds=None):
+        expired, *task_ids = self._run(
+            "claim", self._clock(), owner, limit, self.lease_seconds, self.max_attempts, ",".join(kinds or ()),
+        )
+        if expired:
+            self.expired += expired
+            logging.warning(f"[FILA] {expired} leases expirados; tarefas devolvidas à fila.")
+        return self._get_many(task_ids)
+
+    def renew(self, task, owner):
+        return bool(self._run("renew", task.id, owner, self._clock(), self.lease_seconds))
+
+    def _finish(self, task, owner, status, result=None, error=None, available_at=None):
+        now = self._clock()
+        updated = self._run(
+            "finish", task.id, owner, status, json.dumps(result, ensure_ascii=False) if status == DONE else "",
+            error or "", available_at or now, now,
+        )
+        if not updated:
+            self._lost_lease(task, owner)
+        return bool(updated)
+
+    def _get_many(self, task_ids):
+        pipeline = self._redis.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipeline.hgetall(f"{self.prefix}task:{task_id}")
+        return [_redis_task(task_id, fields) for task_id, fields in zip(task_ids, pipeline.execute()) if fields]
+
+    def get(self, task_id):
+        tasks = self._get_many([task_id])
+        return tasks[0] if tasks else None
+
+    def statuses(self, task_ids):
+        task_ids = list(task_ids)
+        pipeline = self._redis.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipeline.hmget(f"{self.prefix}task:{task_id}", "status", "result")
+        return {task_id: (status, json.loads(result) if result else None)
+                for task_id, (status, result) in zip(task_ids, pipeline.execute()) if status is not None}
+
+    def set_meta(self, name, value):
+        self._redis.hset(self.prefix + "meta", name, json.dumps(value))
+
+    def get_meta(self, name, default=None):
+        value = self._redis.hget(self.prefix + "meta", name)
+        return json.loads(value) if value is not None else default
+
+    def counts(self):
+        return {name: int(n) for name, n in sorted(self._redis.hgetall(self.prefix + "counts").items()) if int(n)}
+
+    def close(self):
+        self._redis.close()
+
+
+def _redis_task(task_id, fields):
+    return Task(int(task_id), fields["kind"], fields["key"], fields["url"], json.loads(fields["payload"]),
+                int(fields["parent"]) if fields["parent"] else None, int(fields["attempts"]), fields["status"],
+                json.loads(fields["result"]) if fields["result"] else None, fields["error"] or None)
+
+
+def open_work_queue(location, lease_seconds=300, max_attempts=3):
+    """RedisWorkQueue para uma URL redis:// (várias máquinas); WorkQueue (SQLite local) para um caminho de arquivo."""
+    if location.startswith(REDIS_SCHEMES):
+        return RedisWorkQueue(location, lease_seconds, max_attempts)
+    return WorkQueue(location, lease_seconds, max_attempts)